@@ -1,16 +1,25 @@
 #!/usr/bin/env python
 
 import argparse
+import glob
+import hashlib
 import json
+import multiprocessing
 import os
 import os.path as ospath
+import sys
+import time
+import traceback
+import types
 
 from collections import defaultdict
 
-import parsing.exprparser as exprparser
-from common import sympyutils
-from libgencode.codegenutil import FileCodeWriter
-from libgencode.exprclasscode import JavaExprClassCodeGenerator
+from common.util import LRUCache
+
+# Modules depending on sympy and the code generators of the supported languages
+# are imported in the functions using them, since importing sympy takes most
+# of the start-up time of the program. Showing the help message, or reporting
+# an invalid command-line argument, does not need them
 
 DESCRIPTION = """
 The program reads a file specifying a multivariate arithmetic expression, and
@@ -19,9 +28,29 @@ matrix. The program supports various programming languages for the generated
 code.
 """
 
-SUPPORTED_LANGS = ["java"]
+SUPPORTED_LANGS = ["java", "c", "numpy"]
 DEFAULT_LANG = "java"
 
+# The name standing for the expression specification file when only its
+# content is given (from which the default class name is derived)
+SPEC_TEXT_FILE_NAME = "MathExpression"
+
+# The extension of the expression specification files looked up in the
+# directories given on the command line
+SPEC_FILE_EXT = ".spec"
+
+# The suffix of the name of the profiling report file (after the class name)
+PROFILE_REPORT_FILE_SUFFIX = ".profile.json"
+
+# The language of the code compiled by compile_spec
+COMPILED_SPEC_LANG = "numpy"
+# The maximum number of compiled expression specifications kept in memory
+COMPILED_SPEC_CACHE_SIZE = 64
+
+# Modules compiled by compile_spec, keyed by the digest of the specification
+# and the configuration
+_compiled_spec_cache = LRUCache(COMPILED_SPEC_CACHE_SIZE)
+
 
 def init_argument_parser():
     """ Creates an argument parser and adds specifications for command-line
@@ -29,7 +58,7 @@ def init_argument_parser():
 
     Returns:
         arg_parser : An initialized ArgumentParser object with properties
-                     lang, dest, cname, exprfile
+                     lang, dest, cname, exprfiles, etc.
     """
     arg_parser = argparse.ArgumentParser(description=DESCRIPTION)
     # Optional arguments
@@ -64,7 +93,15 @@ def init_argument_parser():
         "--lang", "-l",
         type=str,
         default="",
-        help="Programming language that the generated code is in. "
+        help="Programming language that the generated code is in. 'java' "
+             "generates a class of static methods. 'c' generates C99 "
+             "functions prefixed by the class name in a .c file, and a .h "
+             "file declaring them; they take vectors and matrices (row-major) "
+             "as restrict-qualified pointers, and write the Jacobian vector "
+             "and the Hessian matrix into arrays passed by the caller. "
+             "'numpy' generates a Python module whose functions take NumPy "
+             "arrays with a leading axis over many points, and compute at "
+             "all points by whole-array operations. "
              "The default language is Java."
     )
     arg_parser.add_argument(
@@ -73,22 +110,166 @@ def init_argument_parser():
         default=False,
         help="Flag to turn off code generation for Hessian matrix"
     )
+    arg_parser.add_argument(
+        "--hessian-format",
+        type=str,
+        default="",
+        dest="hessianformat",
+        help="The storage format of the Hessian matrix. 'dense' computes the "
+             "whole matrix as a 2D array. 'coo' and 'csr' compute only the "
+             "entries in the upper triangle that are not structurally zero "
+             "as a 1D array, and generate a hessianSparsity method returning "
+             "their positions (row and column indices for 'coo', row offsets "
+             "and column indices for 'csr'). 'packed' computes the upper "
+             "triangle as a 1D array of n * (n + 1) / 2 entries, where entry "
+             "(i, j) with i <= j is at position i + j * (j + 1) / 2 (LAPACK "
+             "packed storage with UPLO = 'U'), and generates hessianIndex and "
+             "hessianEntry methods to look entries up. The default format is "
+             "dense."
+    )
+    arg_parser.add_argument(
+        "--evalall",
+        action="store_true",
+        default=False,
+        help="Flag to generate an additional evalAll method that computes the "
+             "expression value, writes the Jacobian vector and the Hessian "
+             "matrix into arrays passed by the caller, and evaluates every "
+             "common sub-expression only once"
+    )
+    arg_parser.add_argument(
+        "--batch",
+        action="store_true",
+        default=False,
+        help="Flag to generate additional evalBatch, jacobianBatch and "
+             "hessianBatch methods that evaluate at n points at once. Each "
+             "element of a differentiation variable is passed as an array of "
+             "its values over the points, and nodiff variables are shared by "
+             "all points. The values are written into arrays passed by the "
+             "caller, with one row per Jacobian or Hessian entry"
+    )
+    arg_parser.add_argument(
+        "--ctypes",
+        action="store_true",
+        default=False,
+        help="Flag to generate, together with C code, a Python module with a "
+             "class calling the compiled functions through ctypes (only for "
+             "the C language)"
+    )
+    arg_parser.add_argument(
+        "--gradient", "-g",
+        type=str,
+        default="",
+        help="The method used to compute the Jacobian vector. 'symbolic' "
+             "generates one partial derivative function per differentiation "
+             "variable. 'adjoint' generates a single function that computes "
+             "the whole Jacobian vector in reverse mode (one forward sweep "
+             "and one backward sweep over the evaluation trace). "
+             "The default method is symbolic."
+    )
+    arg_parser.add_argument(
+        "--param-layout",
+        type=str,
+        default="",
+        dest="paramlayout",
+        help="The layout of the parameters of the generated methods. "
+             "'separate' passes each declared variable as a separate "
+             "argument. 'flat' packs all differentiation variables into a "
+             "single double[] x argument, in the order of the entries of the "
+             "Jacobian vector (matrices in row-major order), followed by the "
+             "nodiff variables as separate arguments. The default layout is "
+             "separate."
+    )
+    arg_parser.add_argument(
+        "--simplify",
+        type=str,
+        default="",
+        help="How much each declared expression is simplified before code "
+             "generation. 'none' keeps expressions as they are written. "
+             "'cheap' applies a fixed pipeline of fast passes (expansion, "
+             "cancellation and collection of powers). 'full' applies the "
+             "complete sympy simplification, which may be slow for large "
+             "expressions. The default level is full."
+    )
+    arg_parser.add_argument(
+        "--simplify-timeout",
+        type=float,
+        default=0,
+        dest="simplifytimeout",
+        help="The time budget in seconds to simplify each declared "
+             "expression. When the budget runs out, the best form found so "
+             "far is used. By default, the time is not limited."
+    )
+    arg_parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default="",
+        dest="cachedir",
+        help="The directory keeping the computed derivatives and the "
+             "generated code files on disk. Each derivative is written as "
+             "soon as it is computed, and is reused by later runs on the same "
+             "expression (e.g. runs changing only the class name, or resuming "
+             "an interrupted run) instead of being computed again. A run on "
+             "an unchanged expression specification with the same "
+             "configuration restores the generated code files without "
+             "generating them again. By default, nothing is kept."
+    )
+    arg_parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=0,
+        help="The number of worker processes differentiating and generating "
+             "code for the entries of the Hessian matrix in parallel. The "
+             "generated code is the same as with a single process. "
+             "By default, a single process is used."
+    )
+    arg_parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=False,
+        help="Flag to measure the wall time, the number of calls and the peak "
+             "memory of each phase of code generation (parsing, conversion "
+             "to sympy, simplification, summation expansion, "
+             "differentiation, sparsity analysis and code emission), and the "
+             "time taken by each derivative function, and to write them as a "
+             "JSON report (<class name>%s) next to the generated code, with "
+             "the slowest derivative functions listed. Profiling runs in a "
+             "single process (--jobs is ignored), and does not restore code "
+             "from the cache directory." % PROFILE_REPORT_FILE_SUFFIX
+    )
+    arg_parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=0,
+        help="The number of worker processes generating code for different "
+             "expression specification files in parallel, when several files "
+             "are given. With more than one worker, each worker uses a single "
+             "process for the Hessian matrix (--jobs is ignored). "
+             "By default, one worker per CPU is used."
+    )
 
     # Positional arguments
     arg_parser.add_argument(
-        "exprfile", type=str,
-        help="The expression specification file name or path."
+        "exprfiles", type=str, nargs="+", metavar="exprfile",
+        help="The expression specification file name or path. Several files, "
+             "directories (standing for all the %s files in them) and glob "
+             "patterns may be given; a class is then generated for each file, "
+             "named after the file, and the time taken and the failures for "
+             "each file are summarized at the end." % SPEC_FILE_EXT
     )
 
     return arg_parser
 
 
-def get_code_gen_config(args):
+def get_code_gen_config(args, base_config=None):
     """ Gets a dictionary containing configuration information for code
     generation
     Args:
         args : Object returned by ArgumentParser containing command-line
                arguments passed to the script
+        base_config : A dictionary of configuration parameters (as in the
+                      configuration file) given by the caller. They override
+                      those in the configuration file, and are overridden by
+                      the command-line arguments. It may be None
 
     Returns:
         code_gen_config : A dictionary with key-value pairs indicating
@@ -98,8 +279,12 @@ def get_code_gen_config(args):
     Raises:
         IOError : An error if the configuration file path is specified, but
                   the file content is not a JSON object
-        NotImplementedError: An error if the specified language is not yet
-                             supported by the program
+        NotImplementedError: An error if the specified language, gradient
+                             mode, Hessian format, parameter layout or
+                             simplification level is not yet supported by the
+                             program
+        ValueError : An error if the specified number of jobs is not
+                     positive
     """
     config_file_path = args.config
     code_gen_config = defaultdict(str)
@@ -113,6 +298,8 @@ def get_code_gen_config(args):
                 )
             for key, value in config.iteritems():
                 code_gen_config[key.lower()] = value
+    for key, value in (base_config or {}).iteritems():
+        code_gen_config[key.lower()] = value
 
     # Language
     lang = args.lang if args.lang else code_gen_config["lang"]
@@ -138,13 +325,186 @@ def get_code_gen_config(args):
         dest = os.getcwd()
     code_gen_config["dest"] = dest
 
+    from common.sympyutils import SimplifyLevel
+    from libgencode.exprclasscode import ExprClassCodeGenerator
+    from libgencode.hessiancode import HessianCodeGenerator
+    from libgencode.jacobiancode import JacobianCodeGenerator
+
     # Hessian Flag
-    code_gen_config["nohessian"] = args.nohessian
+    code_gen_config["nohessian"] = args.nohessian or bool(
+        code_gen_config["nohessian"])
+
+    # Hessian format
+    hessianformat = (args.hessianformat if args.hessianformat
+                     else code_gen_config["hessianformat"])
+    if not hessianformat:
+        hessianformat = HessianCodeGenerator.DEFAULT_HESSIAN_FORMAT
+    hessianformat = hessianformat.lower()
+    if hessianformat not in HessianCodeGenerator.SUPPORTED_HESSIAN_FORMATS:
+        raise NotImplementedError(
+            "The specified Hessian format: %s is not supported" %
+            hessianformat)
+    code_gen_config["hessianformat"] = hessianformat
+
+    # Fused evaluation flag
+    code_gen_config["evalall"] = args.evalall or bool(
+        code_gen_config["evalall"])
+
+    # Batched evaluation flag
+    code_gen_config["batch"] = args.batch or bool(code_gen_config["batch"])
+
+    # ctypes loader flag
+    code_gen_config["ctypes"] = args.ctypes or bool(code_gen_config["ctypes"])
+    if code_gen_config["ctypes"] and lang != "c":
+        raise NotImplementedError(
+            "The ctypes loader is only supported for the C language")
+
+    # Gradient mode
+    gradient = args.gradient if args.gradient else code_gen_config["gradient"]
+    if not gradient:
+        gradient = JacobianCodeGenerator.DEFAULT_GRADIENT_MODE
+    gradient = gradient.lower()
+    if gradient not in JacobianCodeGenerator.SUPPORTED_GRADIENT_MODES:
+        raise NotImplementedError(
+            "The specified gradient mode: %s is not supported" % gradient)
+    code_gen_config["gradient"] = gradient
+
+    # Parameter layout
+    paramlayout = (args.paramlayout if args.paramlayout
+                   else code_gen_config["paramlayout"])
+    if not paramlayout:
+        paramlayout = ExprClassCodeGenerator.DEFAULT_PARAM_LAYOUT
+    paramlayout = paramlayout.lower()
+    if paramlayout not in ExprClassCodeGenerator.SUPPORTED_PARAM_LAYOUTS:
+        raise NotImplementedError(
+            "The specified parameter layout: %s is not supported" %
+            paramlayout)
+    code_gen_config["paramlayout"] = paramlayout
+
+    # Simplification level
+    simplify = args.simplify if args.simplify else code_gen_config["simplify"]
+    if not simplify:
+        simplify = SimplifyLevel.DEFAULT_LEVEL
+    simplify = simplify.lower()
+    if simplify not in SimplifyLevel.SUPPORTED_LEVELS:
+        raise NotImplementedError(
+            "The specified simplification level: %s is not supported" %
+            simplify)
+    code_gen_config["simplify"] = simplify
+
+    # Simplification time budget (in seconds)
+    simplifytimeout = (args.simplifytimeout if args.simplifytimeout
+                       else code_gen_config["simplifytimeout"])
+    code_gen_config["simplifytimeout"] = (
+        float(simplifytimeout) if simplifytimeout else None)
+
+    # Directory keeping the computed derivatives
+    code_gen_config["cachedir"] = (args.cachedir if args.cachedir
+                                   else code_gen_config["cachedir"])
+
+    # Number of worker processes
+    jobs = args.jobs if args.jobs else code_gen_config["jobs"]
+    jobs = int(jobs) if jobs else 1
+    if jobs < 1:
+        raise ValueError("The number of jobs must be positive")
+    code_gen_config["jobs"] = jobs
+
+    # Profiling flag
+    code_gen_config["profile"] = args.profile or bool(
+        code_gen_config["profile"])
+    if code_gen_config["profile"]:
+        # Worker processes are not measured
+        code_gen_config["jobs"] = 1
 
     return dict(code_gen_config)
 
 
-def get_code_generator(lang, var_list, diff_var_list, sympy_expr, config):
+def expand_spec_paths(path_list):
+    """ Gets the expression specification files given on the command line
+    Args:
+        path_list : A list of strings, each of which is the path of a file, of
+                    a directory (standing for all the specification files in
+                    it) or a glob pattern
+
+    Returns:
+        file_list : A list of strings which are the paths of the files, in
+                    the order they are given, without repetition
+    Raises:
+        IOError : An error if a directory or a glob pattern matches no file
+    """
+    file_list = []
+    for path in path_list:
+        if ospath.isdir(path):
+            matched_list = sorted(
+                glob.glob(ospath.join(path, "*" + SPEC_FILE_EXT)))
+        elif glob.has_magic(path):
+            matched_list = sorted(
+                matched_path for matched_path in glob.glob(path)
+                if not ospath.isdir(matched_path))
+        else:
+            matched_list = [path]
+        if not matched_list:
+            raise IOError(
+                "No expression specification file matches %s" % path)
+        for matched_path in matched_list:
+            if matched_path not in file_list:
+                file_list.append(matched_path)
+    return file_list
+
+
+def get_file_args(args, exprfile):
+    """ Gets the command-line arguments for generating code for a single
+    expression specification file
+    Args:
+        args : Object returned by ArgumentParser containing command-line
+               arguments passed to the script
+        exprfile : A string which is the path of the file
+
+    Returns:
+        file_args : A copy of args with the additional property exprfile
+    """
+    file_args = argparse.Namespace(**vars(args))
+    file_args.exprfile = exprfile
+    return file_args
+
+
+def get_batch_file_args(args):
+    """ Gets the command-line arguments for each expression specification file
+    given on the command line
+    Args:
+        args : Object returned by ArgumentParser containing command-line
+               arguments passed to the script
+
+    Returns:
+        file_args_list : A list of objects returned by get_file_args, one for
+                         each file
+    Raises:
+        IOError : An error if a directory or a glob pattern matches no file
+        ValueError : An error if two files generate the same class in the
+                     same destination directory (e.g. when a class name is
+                     given for several files)
+    """
+    file_args_list = [get_file_args(args, exprfile)
+                      for exprfile in expand_spec_paths(args.exprfiles)]
+    if len(file_args_list) > 1:
+        exprfile_by_class = {}
+        for file_args in file_args_list:
+            code_gen_config = get_code_gen_config(file_args)
+            class_key = (ospath.abspath(code_gen_config["dest"]),
+                         code_gen_config["lang"],
+                         code_gen_config["classname"])
+            if class_key in exprfile_by_class:
+                raise ValueError(
+                    "The files %s and %s both generate the class %s in %s" %
+                    (exprfile_by_class[class_key], file_args.exprfile,
+                     code_gen_config["classname"], code_gen_config["dest"]))
+            exprfile_by_class[class_key] = file_args.exprfile
+    return file_args_list
+
+
+def get_code_generator(
+        lang, var_list, diff_var_list, sympy_expr, config,
+        intermediate_table=None):
     """ Gets the corresponding code generator for the input programming language
     Args:
         lang : a string that represents a programming language
@@ -154,6 +514,9 @@ def get_code_generator(lang, var_list, diff_var_list, sympy_expr, config):
         sympy_expr : A sympy symbolic expression
         config : A dictionary with key-value pairs indicating configuration for
                  code generation such as class name, package name, etc.
+        intermediate_table : An IntermediateExprTable object containing the
+                             named sub-expressions used by the expression. It
+                             may be None
 
     Returns:
         code_generator : an instance of exprclasscode.ExprClassCodeGenerator
@@ -163,15 +526,26 @@ def get_code_generator(lang, var_list, diff_var_list, sympy_expr, config):
     """
     normalized_lang = lang.lower()
     if normalized_lang == "java":
+        from libgencode.exprclasscode import JavaExprClassCodeGenerator
         return JavaExprClassCodeGenerator(
-            var_list, sympy_expr, config, diff_var_list)
+            var_list, sympy_expr, config, diff_var_list, intermediate_table)
+    elif normalized_lang == "c":
+        from libgencode.exprclasscode import CExprClassCodeGenerator
+        return CExprClassCodeGenerator(
+            var_list, sympy_expr, config, diff_var_list, intermediate_table)
+    elif normalized_lang == "numpy":
+        from libgencode.exprclasscode import NumpyExprClassCodeGenerator
+        return NumpyExprClassCodeGenerator(
+            var_list, sympy_expr, config, diff_var_list, intermediate_table)
     else:
         raise NotImplementedError(
             "The specified language: %s is not supported" % lang)
 
 
-def gen_code(var_list, diff_var_list, sympy_expr, code_gen_config):
-    """ Generates expression class code
+def gen_code_files(
+        var_list, diff_var_list, sympy_expr, code_gen_config,
+        intermediate_table=None):
+    """ Generates expression class code in memory
     Args:
         var_list : A list of Variable objects
         diff_var_list : A list of Variable objects that are used as
@@ -180,36 +554,391 @@ def gen_code(var_list, diff_var_list, sympy_expr, code_gen_config):
         code_gen_config : A dictionary with key-value pairs indicating
                           configuration for code generation such as class name,
                           package name, destination directory, language, etc.
+        intermediate_table : An IntermediateExprTable object containing the
+                             named sub-expressions used by the expression. It
+                             may be None
+
+    Returns:
+        file_list : A list of pairs (file_name, code_str) in which file_name
+                    is the name of a generated file (with extension), and
+                    code_str is its code. The source code file of the class
+                    comes first
     """
+    from libgencode.codegenutil import StringCodeWriter
+
     code_generator = get_code_generator(
         code_gen_config["lang"],
         var_list,
         diff_var_list,
         sympy_expr,
-        code_gen_config)
-    output_file_path = ospath.join(
-        code_gen_config["dest"], code_generator.default_file_name())
-    with FileCodeWriter(output_file_path) as output_file:
-        code_generator.gen_code(output_file)
+        code_gen_config,
+        intermediate_table)
+    code_writer = StringCodeWriter()
+    code_generator.gen_code(code_writer)
+    file_list = [(code_generator.default_file_name(), code_writer.get_code())]
+    for (file_name, gen_file_code) in code_generator.get_extra_file_list():
+        code_writer = StringCodeWriter()
+        gen_file_code(code_writer)
+        file_list.append((file_name, code_writer.get_code()))
+    return file_list
+
+
+def write_code_files(file_list, dest):
+    """ Writes generated code files
+    Args:
+        file_list : A list of pairs (file_name, code_str) as returned by
+                    gen_code_files
+        dest : A string which is the path of the destination directory
+
+    Returns:
+        path_list : A list of strings which are the paths of the files written
+    """
+    from libgencode.codegenutil import FileCodeWriter
+
+    path_list = []
+    for (file_name, code_str) in file_list:
+        file_path = ospath.join(dest, file_name)
+        with FileCodeWriter(file_path) as output_file:
+            output_file.write_indented(code_str)
+        path_list.append(file_path)
+    return path_list
+
+
+def gen_code(
+        var_list, diff_var_list, sympy_expr, code_gen_config,
+        intermediate_table=None):
+    """ Generates expression class code files in the destination directory
+    Args:
+        var_list : A list of Variable objects
+        diff_var_list : A list of Variable objects that are used as
+                        differentation variables
+        sympy_expr : A sympy symbolic expression
+        code_gen_config : A dictionary with key-value pairs indicating
+                          configuration for code generation such as class name,
+                          package name, destination directory, language, etc.
+        intermediate_table : An IntermediateExprTable object containing the
+                             named sub-expressions used by the expression. It
+                             may be None
+
+    Returns:
+        path_list : A list of strings which are the paths of the files written
+    """
+    return write_code_files(
+        gen_code_files(
+            var_list, diff_var_list, sympy_expr, code_gen_config,
+            intermediate_table),
+        code_gen_config["dest"])
+
+
+def parse_spec(spec_text, code_gen_config, simplify_report=None):
+    """ Parses an expression specification, and prepares the expression for
+    code generation
+    Args:
+        spec_text : A string which is the content of an expression
+                    specification file
+        code_gen_config : A dictionary with key-value pairs indicating
+                          configuration for code generation, as returned by
+                          get_code_gen_config
+        simplify_report : A list to which pairs (expression name, reached
+                          simplification level) are appended. It may be None
+
+    Returns:
+        var_list : A list of Variable objects
+        diff_var_list : A list of Variable objects that are used as
+                        differentation variables
+        sympy_expr : A sympy symbolic expression
+        intermediate_table : An IntermediateExprTable object containing the
+                             named sub-expressions used by the expression. It
+                             may be None
+    """
+    import parsing.exprparser as exprparser
+    from common import sympyutils
+
+    var_list, diff_var_list, sympy_expr, intermediate_table = (
+        exprparser.parse_expr_specification(
+            spec_text,
+            code_gen_config["simplify"],
+            code_gen_config["simplifytimeout"],
+            simplify_report)
+    )
+    sympyutils.distinguish_dummy_vars(sympy_expr)
+    return (var_list, diff_var_list, sympy_expr, intermediate_table)
+
+
+def compile_spec(spec_text, config=None):
+    """ Compiles an expression specification into Python functions, without
+    writing any file. The generated code is the NumPy module (see
+    exprclasscode.NumpyExprClassCodeGenerator), whose functions eval,
+    jacobian and hessian take NumPy arrays whose leading axis is over the
+    points, and compute at all points at once.
 
+    Compiled modules are kept in a bounded cache (evicting the least recently
+    used one), keyed by the specification and the configuration, so that
+    compiling the same specification again returns the same module at once.
 
-def main():
+    Args:
+        spec_text : A string which is the content of an expression
+                    specification file
+        config : A dictionary of configuration parameters as in the
+                 configuration file (e.g. {"hessianformat": "coo"}). The
+                 language is always NumPy. It may be None
+
+    Returns:
+        module : A module object with the generated functions
+
+    Raises:
+        NotImplementedError : An error if a configuration parameter is not
+                              supported by the program, or not supported for
+                              NumPy code
+        ValueError : An error if the specification has a syntax error. The
+                     message gives the line and the token of the error
+    """
+    args = get_file_args(
+        init_argument_parser().parse_args(
+            ["--lang", COMPILED_SPEC_LANG, SPEC_TEXT_FILE_NAME]),
+        SPEC_TEXT_FILE_NAME)
+    code_gen_config = get_code_gen_config(args, config)
+    # The destination directory is not used
+    del code_gen_config["dest"]
+    digest = hashlib.sha1(spec_text.encode("utf-8")).hexdigest()
+    cache_key = (digest, json.dumps(code_gen_config, sort_keys=True))
+    module = _compiled_spec_cache.get(cache_key)
+    if module is not None:
+        return module
+
+    var_list, diff_var_list, sympy_expr, intermediate_table = parse_spec(
+        spec_text, code_gen_config)
+    [(file_name, code_str)] = gen_code_files(
+        var_list, diff_var_list, sympy_expr, code_gen_config,
+        intermediate_table)
+    module = types.ModuleType(code_gen_config["classname"])
+    exec(compile(code_str, "<compiled %s>" % file_name, "exec"),
+         module.__dict__)
+    _compiled_spec_cache.put(cache_key, module)
+    return module
+
+
+def run_code_gen(args, base_config=None, spec_text=None):
+    """ Generates the code for the expression class in memory, as the program
+    does for the given command-line arguments. If there is a cache directory,
+    the code generated before for the same specification and configuration is
+    restored from it. If profiling is on, the profiling report is added as the
+    last generated file
+    Args:
+        args : Object returned by get_file_args containing command-line
+               arguments for a single file
+        base_config : A dictionary of configuration parameters given by the
+                      caller (see get_code_gen_config). It may be None
+        spec_text : A string which is the content of the expression
+                    specification file. If it is None, the file at
+                    args.exprfile is read
+
+    Returns:
+        code_gen_config : A dictionary with key-value pairs indicating
+                          configuration for code generation, as returned by
+                          get_code_gen_config
+        file_list : A list of pairs (file_name, code_str) as returned by
+                    gen_code_files
+        simplify_report : A list of pairs (expression name, reached
+                          simplification level)
+    """
+    code_gen_config = get_code_gen_config(args, base_config)
+    if spec_text is None:
+        with open(args.exprfile, "r") as input_file:
+            spec_text = input_file.read()
+    artifact_cache = None
+    if code_gen_config["cachedir"]:
+        from libgencode.artifactcache import ArtifactCache
+        artifact_cache = ArtifactCache(code_gen_config["cachedir"])
+        digest = artifact_cache.get_digest(spec_text, code_gen_config)
+        artifacts = artifact_cache.get(digest)
+        if artifacts is not None and not code_gen_config["profile"]:
+            (file_list, simplify_report) = artifacts
+            return (code_gen_config, file_list, simplify_report)
+
+    from common import profiling
+
+    if code_gen_config["profile"]:
+        profiling.start_profiling()
+    try:
+        simplify_report = []
+        var_list, diff_var_list, sympy_expr, intermediate_table = parse_spec(
+            spec_text, code_gen_config, simplify_report)
+        with profiling.profile_phase("emit"):
+            file_list = gen_code_files(
+                var_list, diff_var_list, sympy_expr, code_gen_config,
+                intermediate_table)
+    finally:
+        profiler = profiling.stop_profiling()
+    # Code for expressions whose simplification ran out of time is not kept,
+    # since a later run may simplify them further
+    if artifact_cache is not None and all(
+            reached_level == code_gen_config["simplify"]
+            for (_, reached_level) in simplify_report):
+        artifact_cache.put(digest, file_list, simplify_report)
+    if profiler is not None:
+        report = profiler.get_report()
+        report.update({
+            "exprfile": args.exprfile,
+            "config": code_gen_config,
+            "simplify": simplify_report,
+        })
+        file_list = file_list + [(
+            code_gen_config["classname"] + PROFILE_REPORT_FILE_SUFFIX,
+            json.dumps(report, indent=2, separators=(",", ": "),
+                       sort_keys=True) + "\n")]
+    return (code_gen_config, file_list, simplify_report)
+
+
+def _gen_code_file_task(file_args):
+    """ Generates and writes the code for one expression specification file of
+    a batch, possibly in a worker process
+
+    Args:
+        file_args : Object returned by get_file_args for the file
+
+    Returns:
+        result : A tuple (exprfile, elapsed_time, messages, error) in which
+                 exprfile is the path of the file, elapsed_time is the time
+                 taken in seconds, messages is a list of strings printed for
+                 the file, and error is a string describing the error if code
+                 generation failed, or None
+    """
+    start_time = time.time()
+    messages = []
+    error_str = None
+    try:
+        code_gen_config, file_list, simplify_report = run_code_gen(file_args)
+        messages = ["Expression %s simplified at level: %s" % report
+                    for report in simplify_report]
+        write_code_files(file_list, code_gen_config["dest"])
+    except Exception as error:
+        error_str = "".join(
+            traceback.format_exception_only(type(error), error)).strip()
+    return (file_args.exprfile, time.time() - start_time, messages, error_str)
+
+
+def _print_batch_progress(result, num_done, num_files):
+    """ Prints the outcome of one file of a batch as soon as it is known
+    Args:
+        result : A tuple as returned by _gen_code_file_task
+        num_done : An integer which is the number of files done so far,
+                   including this one
+        num_files : An integer which is the number of files in the batch
+    """
+    (exprfile, elapsed_time, messages, error_str) = result
+    print "[%d/%d] %s %s (%.2f s)" % (
+        num_done, num_files, "FAILED" if error_str else "done", exprfile,
+        elapsed_time)
+    for message in messages:
+        print "    " + message
+    sys.stdout.flush()
+
+
+def run_batch(file_args_list, num_workers=None):
+    """ Generates and writes the code for several expression specification
+    files. A failure for one file does not stop the others
+    Args:
+        file_args_list : A list of objects returned by get_file_args, one for
+                         each file
+        num_workers : An integer which is the number of worker processes
+                      generating code for different files in parallel. If it
+                      is None or 0, one worker per CPU is used. If it is 1, no
+                      worker process is used
+
+    Returns:
+        result_list : A list of tuples (exprfile, elapsed_time, messages,
+                      error) as returned by _gen_code_file_task, in the order
+                      of file_args_list
+    """
+    if not num_workers:
+        num_workers = multiprocessing.cpu_count()
+    num_workers = min(num_workers, len(file_args_list))
+    result_by_file = {}
+    if num_workers <= 1:
+        for file_args in file_args_list:
+            result = _gen_code_file_task(file_args)
+            _print_batch_progress(result, len(result_by_file) + 1,
+                                  len(file_args_list))
+            result_by_file[result[0]] = result
+    else:
+        # Worker processes cannot start processes of their own
+        task_list = []
+        for file_args in file_args_list:
+            file_args = argparse.Namespace(**vars(file_args))
+            file_args.jobs = 1
+            task_list.append(file_args)
+        pool = multiprocessing.Pool(num_workers)
+        try:
+            for result in pool.imap_unordered(_gen_code_file_task, task_list):
+                _print_batch_progress(result, len(result_by_file) + 1,
+                                      len(file_args_list))
+                result_by_file[result[0]] = result
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    return [result_by_file[file_args.exprfile]
+            for file_args in file_args_list]
+
+
+def print_batch_summary(result_list, elapsed_time):
+    """ Prints the time taken for each file of a batch, and the failures
+    Args:
+        result_list : A list of tuples as returned by run_batch
+        elapsed_time : A float which is the time taken by the whole batch in
+                       seconds
+    """
+    failure_list = [(exprfile, error_str)
+                    for (exprfile, _, _, error_str) in result_list
+                    if error_str]
+    print
+    print "Generated code for %d of %d files in %.2f s (%d failed)" % (
+        len(result_list) - len(failure_list), len(result_list), elapsed_time,
+        len(failure_list))
+    print "%10s  %-6s  %s" % ("time (s)", "status", "file")
+    for (exprfile, file_elapsed_time, _, error_str) in result_list:
+        print "%10.2f  %-6s  %s" % (
+            file_elapsed_time, "FAILED" if error_str else "ok", exprfile)
+    if failure_list:
+        print
+        print "Failures:"
+        for (exprfile, error_str) in failure_list:
+            print "%s: %s" % (exprfile, error_str)
+
+
+def main(argv=None):
     """ Main function that reads the expression specification file, does
     lexing and grammar parsing, and generates the code for the expression class
-    in the specified language.
+    in the specified language. If several files are given, the code for each
+    of them is generated, and the program exits with status 1 if any of them
+    failed.
+
+    Args:
+        argv : A list of strings which are the command-line arguments. If it
+               is None, the arguments of the program are used
     """
     # Parsing command-line inputs
     arg_parser = init_argument_parser()
-    args = arg_parser.parse_args()
+    args = arg_parser.parse_args(argv)
+    file_args_list = get_batch_file_args(args)
 
-    code_gen_config = get_code_gen_config(args)
+    if len(file_args_list) > 1:
+        start_time = time.time()
+        result_list = run_batch(file_args_list, args.workers)
+        print_batch_summary(result_list, time.time() - start_time)
+        if any(error_str for (_, _, _, error_str) in result_list):
+            sys.exit(1)
+        return
 
-    with open(args.exprfile, "r") as input_file:
-        var_list, diff_var_list, sympy_expr = (
-            exprparser.parse_expr_specification(input_file.read())
-        )
-        sympyutils.distinguish_dummy_vars(sympy_expr)
-        gen_code(var_list, diff_var_list, sympy_expr, code_gen_config)
+    code_gen_config, file_list, simplify_report = run_code_gen(
+        file_args_list[0])
+    for (expr_name, reached_level) in simplify_report:
+        print "Expression %s simplified at level: %s" % (
+            expr_name, reached_level)
+    write_code_files(file_list, code_gen_config["dest"])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+"""
+The module contains a long-lived code generation daemon, and a client running
+code generation through it.
+
+Starting the program (codegen.py) for each expression specification pays for
+starting the Python interpreter, importing sympy and loading the parser before
+any real work. The daemon pays for them once, and then runs code generation
+jobs over a local UNIX socket (or over its standard input and output). Jobs
+and replies are JSON objects, one per line. A job is either
+
+    {"argv": [...], "cwd": "..."}
+
+which runs the program with the given command-line arguments in the given
+working directory (writing the generated files as the program does; the
+files of a batch are generated one after another, and the job stops at the
+first failure), or
+
+    {"spec": "...", "config": {...}}
+
+where "spec" is the content of an expression specification ("specfile" may
+give the path of the file instead) and "config" has the parameters of a
+configuration file. The generated files are only written if the
+configuration gives a destination directory ("dest"). The reply is
+
+    {"ok": true, "paths": [...], "files": {...}, "messages": [...]}
+
+with the paths of the written files, or the generated code by file name if no
+file is written, and the messages the program prints; or, if the job fails,
+
+    {"ok": false, "error": "...", "messages": [...]}
+
+which is also the reply to a line that is not a valid job.
+
+The client takes the command-line arguments of the program, and runs them
+through the daemon. If no daemon is running, it runs them in process.
+"""
+
+import argparse
+import errno
+import json
+import os
+import os.path as ospath
+import signal
+import socket
+import SocketServer
+import sys
+import tempfile
+import traceback
+
+import codegen
+
+DESCRIPTION = """
+The program runs a long-lived code generation daemon ('serve'), or runs the
+code generation program through it ('gen'), falling back to running it in
+process if no daemon is running.
+"""
+
+DEFAULT_SOCKET_PATH = ospath.join(
+    tempfile.gettempdir(), "codegend-%d.sock" % os.getuid())
+
+# The specification generated when the daemon starts, so that the modules
+# used by code generation are imported and the caches are filled before the
+# first job
+WARM_UP_SPEC = "number x\nexpr main = x * x\n"
+
+
+def init_argument_parser():
+    """ Creates an argument parser and adds specifications for command-line
+    arguments for the daemon program.
+
+    Returns:
+        arg_parser : An initialized ArgumentParser object with properties
+                     command, socket, stdin. The arguments of the code
+                     generation program are left unparsed
+    """
+    arg_parser = argparse.ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument(
+        "--socket", "-s",
+        type=str,
+        default=DEFAULT_SOCKET_PATH,
+        help="The path of the UNIX socket the daemon listens on. By default, "
+             "it is %s" % DEFAULT_SOCKET_PATH
+    )
+    subparsers = arg_parser.add_subparsers(dest="command")
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Runs the daemon until it is interrupted or terminated")
+    serve_parser.add_argument(
+        "--stdin",
+        action="store_true",
+        default=False,
+        help="Flag to read jobs from the standard input and write replies to "
+             "the standard output instead of listening on the socket"
+    )
+    subparsers.add_parser(
+        "gen",
+        usage="%(prog)s [arguments of codegen.py]",
+        help="Runs the code generation program with the arguments following "
+             "this command through the daemon")
+    return arg_parser
+
+
+def run_job(job):
+    """ Runs a code generation job
+
+    Args:
+        job : A dictionary describing the job (see the module docstring)
+
+    Returns:
+        reply : A dictionary which is the reply to the job
+    """
+    reply = {"ok": True, "messages": []}
+    prev_cwd = os.getcwd()
+    try:
+        if "argv" in job:
+            if job.get("cwd"):
+                os.chdir(job["cwd"])
+            args = codegen.init_argument_parser().parse_args(job["argv"])
+            gen_result_list = [
+                codegen.run_code_gen(file_args)
+                for file_args in codegen.get_batch_file_args(args)]
+            write_files = True
+        else:
+            spec_file_name = job.get("specfile") or codegen.SPEC_TEXT_FILE_NAME
+            spec_text = job.get("spec")
+            if spec_text is None:
+                with open(job["specfile"], "r") as spec_file:
+                    spec_text = spec_file.read()
+            args = codegen.get_file_args(
+                codegen.init_argument_parser().parse_args([spec_file_name]),
+                spec_file_name)
+            config = job.get("config") or {}
+            write_files = bool(config.get("dest"))
+            gen_result_list = [codegen.run_code_gen(args, config, spec_text)]
+        if write_files:
+            reply["paths"] = []
+        else:
+            reply["files"] = {}
+        for (code_gen_config, file_list, simplify_report) in gen_result_list:
+            reply["messages"].extend(
+                "Expression %s simplified at level: %s" % report
+                for report in simplify_report)
+            if write_files:
+                reply["paths"].extend(
+                    ospath.abspath(path) for path in codegen.write_code_files(
+                        file_list, code_gen_config["dest"]))
+            else:
+                reply["files"].update(file_list)
+    except (Exception, SystemExit) as error:
+        reply["ok"] = False
+        reply["error"] = "".join(
+            traceback.format_exception_only(type(error), error)).strip()
+    finally:
+        os.chdir(prev_cwd)
+    return reply
+
+
+def run_job_line(line):
+    """ Runs a code generation job read as a line of JSON
+
+    Args:
+        line : A string which is the JSON object of the job
+
+    Returns:
+        reply_line : A string which is the JSON object of the reply, without
+                     a line break. If the line is not a valid job, the reply
+                     reports the error
+    """
+    try:
+        job = json.loads(line)
+        if not isinstance(job, dict):
+            raise ValueError("A job must be a JSON object")
+    except ValueError as error:
+        reply = {
+            "ok": False,
+            "error": "Invalid job: %s" % error,
+            "messages": []}
+    else:
+        reply = run_job(job)
+    return json.dumps(reply)
+
+
+def warm_up():
+    """ Runs a code generation job for a small specification in each supported
+    language
+    """
+    for lang in codegen.SUPPORTED_LANGS:
+        run_job({"spec": WARM_UP_SPEC, "config": {"lang": lang}})
+
+
+class JobRequestHandler(SocketServer.StreamRequestHandler):
+    """
+    A class that handles a connection to the daemon, reading jobs and writing
+    replies until the client closes the connection
+    """
+
+    def handle(self):
+        """ Runs the jobs sent over the connection
+        """
+        for line in iter(self.rfile.readline, ""):
+            if not line.strip():
+                continue
+            self.wfile.write(run_job_line(line) + "\n")
+            self.wfile.flush()
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    """ Handles a signal terminating the daemon like an interruption, so that
+    the daemon cleans up before exiting
+    """
+    raise KeyboardInterrupt()
+
+
+def serve_socket(socket_path):
+    """ Runs jobs sent over a UNIX socket until the daemon is interrupted or
+    terminated. Jobs are run one at a time
+
+    Args:
+        socket_path : A string which is the path of the socket
+    """
+    if ospath.exists(socket_path):
+        client_socket = connect(socket_path)
+        if client_socket is not None:
+            client_socket.close()
+            raise IOError("A daemon is running at %s" % socket_path)
+        # Left behind by a daemon which was killed
+        os.remove(socket_path)
+    prev_umask = os.umask(0077)
+    try:
+        server = SocketServer.UnixStreamServer(socket_path, JobRequestHandler)
+    finally:
+        os.umask(prev_umask)
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+
+
+def serve_stdin():
+    """ Runs jobs read from the standard input, and writes the replies to the
+    standard output. Anything else printed while running a job goes to the
+    standard error
+    """
+    reply_file = sys.stdout
+    sys.stdout = sys.stderr
+    for line in iter(sys.stdin.readline, ""):
+        if not line.strip():
+            continue
+        reply_file.write(run_job_line(line) + "\n")
+        reply_file.flush()
+
+
+def connect(socket_path):
+    """ Connects to the daemon
+
+    Args:
+        socket_path : A string which is the path of the socket
+
+    Returns:
+        client_socket : A connected socket object, or None if no daemon is
+                        listening on the socket
+    """
+    client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client_socket.connect(socket_path)
+    except socket.error as error:
+        client_socket.close()
+        if error.errno in [errno.ENOENT, errno.ECONNREFUSED]:
+            return None
+        raise
+    return client_socket
+
+
+def run_client(socket_path, codegen_args):
+    """ Runs the code generation program through the daemon, or in process if
+    no daemon is running
+
+    Args:
+        socket_path : A string which is the path of the socket
+        codegen_args : A list of strings which are the command-line arguments
+                       of the code generation program
+
+    Returns:
+        exit_code : An integer which is the exit code of the program
+    """
+    # Reports invalid arguments without a round trip
+    codegen.init_argument_parser().parse_args(codegen_args)
+    client_socket = connect(socket_path)
+    if client_socket is None:
+        codegen.main(codegen_args)
+        return 0
+
+    try:
+        client_socket.sendall(json.dumps(
+            {"argv": codegen_args, "cwd": os.getcwd()}) + "\n")
+        reply_line = client_socket.makefile("r").readline()
+    finally:
+        client_socket.close()
+    try:
+        reply = json.loads(reply_line)
+    except ValueError:
+        reply = None
+    if not isinstance(reply, dict) or "ok" not in reply:
+        print >> sys.stderr, (
+            "The daemon at %s did not reply to the job" % socket_path)
+        return 1
+    for message in reply.get("messages", []):
+        print message
+    if not reply["ok"]:
+        print >> sys.stderr, reply.get("error", "The job failed")
+        return 1
+    return 0
+
+
+def main():
+    """ Main function that runs the daemon or the client
+    """
+    arg_parser = init_argument_parser()
+    args, codegen_args = arg_parser.parse_known_args()
+    if args.command == "gen":
+        sys.exit(run_client(args.socket, codegen_args))
+    if codegen_args:
+        arg_parser.error(
+            "unrecognized arguments: %s" % " ".join(codegen_args))
+    warm_up()
+    if args.stdin:
+        serve_stdin()
+    else:
+        serve_socket(args.socket)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+The module contains the definition of the store of derivatives, which keeps the
+derivatives computed while generating code for an expression class so that
+they are computed only once, even if several code generators need them.
+Derivatives may also be kept in a directory on disk, so that they are reused
+by later runs of the program
+"""
+
+import hashlib
+import json
+import os
+import os.path as ospath
+import tempfile
+
+import sympy
+from sympy import srepr
+
+from common import profiling, sympyutils
+
+
+class DerivativeStore(object):
+    """
+    A class that encapsulates the derivatives of expressions with respect to
+    differentiation variables. Derivatives are computed on demand, and are
+    kept for later requests. The same store can be shared by all the code
+    generators of an expression class (e.g. the Jacobian generator and the
+    Hessian generator), so that first-order derivatives computed for the
+    Jacobian vector are reused for the Hessian matrix.
+
+    If there is an intermediate expression table, derivatives are computed by
+    the chain rule through the intermediate expressions. Expressions without
+    placeholder symbols of the table are differentiated as usual.
+
+    If a cache directory is given, each derivative is also written to a file
+    in it as soon as it is computed, and is read back instead of being
+    computed again in later runs (including runs resuming an interrupted one).
+    The file of a derivative is named by a digest of how the derivative is
+    obtained: the expression it is derived from (with the definitions of the
+    intermediate expressions it depends on), the sequence of differentiation
+    variables, the version of the store and the version of sympy. The
+    derivatives of the intermediate expressions are kept on disk too. When
+    the derivative of an expression containing placeholder symbols is read
+    from disk, the derivatives of its intermediate expressions are added to
+    the table (reading them from disk as well), as computing it would do.
+    Derivatives are written as the JSON form of their nodes given by
+    sympyutils.expr_to_json_nodes, so that reading a file of the directory
+    only creates sympy objects (unlike unpickling it, which may run code).
+
+    Public object member attributes:
+        intermediate_table : An IntermediateExprTable object containing the
+                             intermediate expressions whose placeholder symbols
+                             may appear in the expressions. It is None if
+                             there is no intermediate expression
+        cache_dir : A string which is the path of the directory keeping the
+                    derivatives on disk. It is None if derivatives are only
+                    kept in memory
+
+    Private object member attributes:
+        __expanded_expr_dict : A dictionary that maps a sympy expression to the
+                               expression with its summations expanded
+        __depend_dict : A dictionary that maps a pair (sympy expression,
+                        variable) to a boolean value indicating whether the
+                        expression depends on the variable
+        __derivative_dict : A dictionary that maps a pair (sympy expression,
+                            variable) to the first-order partial derivative of
+                            the expression with respect to the variable
+        __digest_dict : A dictionary that maps a sympy expression to the
+                        digest naming it in the cache directory
+    """
+
+    STORE_VERSION = "2"
+    CACHE_FILE_EXTENSION = ".json"
+
+    def __init__(self, intermediate_table=None, cache_dir=None):
+        """ Class constructor
+        """
+        self.intermediate_table = intermediate_table
+        self.cache_dir = cache_dir
+        self.__expanded_expr_dict = {}
+        self.__depend_dict = {}
+        self.__derivative_dict = {}
+        self.__digest_dict = {}
+        if self.cache_dir and not ospath.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        if self.cache_dir and self.intermediate_table is not None:
+            self.intermediate_table.set_derivative_func(self.differentiate)
+
+    def get_expanded_expr(self, sympy_expr):
+        """ Gets an expression with all its summations (of known ranges)
+        expanded. The expansion is done once per expression
+
+        Args:
+            sympy_expr : A sympy expression
+
+        Returns:
+            expanded_expr : A sympy expression after doing summation expansion
+        """
+        if sympy_expr not in self.__expanded_expr_dict:
+            with profiling.profile_phase("expand"):
+                self.__expanded_expr_dict[sympy_expr] = (
+                    sympyutils.expand_expr(sympy_expr, deep=True))
+        return self.__expanded_expr_dict[sympy_expr]
+
+    def depends_on(self, sympy_expr, var):
+        """ Checks if an expression depends on a differentiation variable,
+        either directly or through intermediate expressions
+
+        Args:
+            sympy_expr : A sympy expression
+            var : A sympy symbol or sympy matrix element
+
+        Returns:
+            is_dependent : A boolean value
+        """
+        key = (sympy_expr, var)
+        if key not in self.__depend_dict:
+            if self.intermediate_table is None:
+                self.__depend_dict[key] = sympyutils.is_in_expr(
+                    sympy_expr, var)
+            else:
+                self.__depend_dict[key] = self.intermediate_table.depends_on(
+                    sympy_expr, var)
+        return self.__depend_dict[key]
+
+    def differentiate(self, sympy_expr, var):
+        """ Gets the first-order partial derivative of an expression. If there
+        are intermediate expressions, the chain rule is applied through them
+
+        Args:
+            sympy_expr : A sympy expression
+            var : A sympy symbol or sympy matrix element
+
+        Returns:
+            derivative_expr : A sympy expression
+        """
+        key = (sympy_expr, var)
+        if key in self.__derivative_dict:
+            return self.__derivative_dict[key]
+
+        digest = None
+        derivative_expr = None
+        if self.cache_dir:
+            digest = self.__get_derivative_digest(sympy_expr, var)
+            derivative_expr = self.__read_cache_file(digest)
+            if (derivative_expr is not None and
+                    self.intermediate_table is not None):
+                self.intermediate_table.add_derivatives(sympy_expr, var)
+        if derivative_expr is None:
+            with profiling.profile_phase("diff"):
+                if self.intermediate_table is None:
+                    derivative_expr = sympyutils.first_order_derivative(
+                        sympy_expr, var)
+                else:
+                    derivative_expr = (
+                        self.intermediate_table.total_derivative(
+                            sympy_expr, var))
+            if digest is not None:
+                self.__write_cache_file(digest, derivative_expr)
+        if digest is not None:
+            self.__digest_dict.setdefault(derivative_expr, digest)
+        self.__derivative_dict[key] = derivative_expr
+        return derivative_expr
+
+    def __get_derivative_digest(self, sympy_expr, var):
+        """ Gets the digest naming the derivative of an expression with
+        respect to a variable in the cache directory
+
+        Args:
+            sympy_expr : A sympy expression
+            var : A sympy symbol or sympy matrix element
+
+        Returns:
+            digest : A string of hexadecimal digits
+        """
+        if sympy_expr not in self.__digest_dict:
+            # The expression is not a derivative obtained from the store, so
+            # it is named by its own content, including the definitions of
+            # the placeholder symbols it depends on
+            content_list = [
+                DerivativeStore.STORE_VERSION,
+                sympy.__version__,
+                srepr(sympy_expr)]
+            if self.intermediate_table is not None:
+                for (symbol, definition) in (
+                        self.intermediate_table.get_dependencies(sympy_expr)):
+                    content_list += [srepr(symbol), srepr(definition)]
+            self.__digest_dict[sympy_expr] = hashlib.sha1(
+                "\n".join(content_list)).hexdigest()
+        var_content = srepr(var)
+        if self.intermediate_table is not None:
+            # The names of the derivative symbols created in the table
+            # contain the integer of the variable
+            var_content += "\n%d" % self.intermediate_table.get_var_id(var)
+        return hashlib.sha1("%s\n%s" % (
+            self.__digest_dict[sympy_expr], var_content)).hexdigest()
+
+    def __get_cache_file_path(self, digest):
+        """ Gets the path of the file keeping a derivative on disk
+
+        Args:
+            digest : A string which is the digest naming the derivative
+
+        Returns:
+            file_path : A string
+        """
+        return ospath.join(
+            self.cache_dir, digest + DerivativeStore.CACHE_FILE_EXTENSION)
+
+    def __read_cache_file(self, digest):
+        """ Reads a derivative from the cache directory
+
+        Args:
+            digest : A string which is the digest naming the derivative
+
+        Returns:
+            derivative_expr : A sympy expression. It is None if the derivative
+                              is not in the cache directory, or if its file
+                              cannot be read
+        """
+        try:
+            with open(self.__get_cache_file_path(digest), "r") as cache_file:
+                return sympyutils.expr_from_json_nodes(json.load(cache_file))
+        except Exception:
+            return None
+
+    def __write_cache_file(self, digest, derivative_expr):
+        """ Writes a derivative to the cache directory. The derivative is
+        written to a temporary file which is then renamed, so that a run
+        interrupted while writing never leaves an incomplete file. A
+        derivative containing objects that cannot be written as JSON nodes is
+        only kept in memory
+
+        Args:
+            digest : A string which is the digest naming the derivative
+            derivative_expr : A sympy expression
+        """
+        try:
+            node_list = sympyutils.expr_to_json_nodes(derivative_expr)
+        except ValueError:
+            return
+        (file_descriptor, temp_path) = tempfile.mkstemp(
+            dir=self.cache_dir, prefix="." + digest)
+        try:
+            with os.fdopen(file_descriptor, "w") as temp_file:
+                json.dump(node_list, temp_file, separators=(",", ":"))
+            os.rename(temp_path, self.__get_cache_file_path(digest))
+        except Exception:
+            if ospath.exists(temp_path):
+                os.remove(temp_path)
+            raise
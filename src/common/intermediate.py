@@ -0,0 +1,307 @@
+"""
+The module contains the definition of the table of intermediate expressions,
+which are named sub-expressions kept as placeholder symbols in other
+expressions (instead of being inlined), together with the chain rule to
+differentiate expressions through them
+"""
+
+from collections import OrderedDict
+
+from sympy import Symbol
+from sympy.matrices.expressions.matexpr import MatrixElement
+
+from common import sympyutils
+
+
+class IntermediateExprTable(object):
+    """
+    A class that encapsulates intermediate expressions. Each intermediate
+    expression is represented by a placeholder sympy symbol, and is defined by
+    a sympy expression which may contain variables and placeholder symbols of
+    intermediate expressions added before it. Hence the insertion order of the
+    table is an evaluation order of the intermediate expressions.
+
+    Derivatives of intermediate expressions are intermediate expressions
+    themselves. They are added to the table on demand when computing total
+    derivatives.
+
+    Private object member attributes:
+        __definition_dict : An ordered dictionary that maps a placeholder
+                            symbol to its defining sympy expression
+        __order_dict : A dictionary that maps a placeholder symbol to its
+                       position in the evaluation order
+        __derivative_dict : A dictionary that maps a pair (placeholder symbol,
+                            variable) to the total derivative of the
+                            intermediate expression with respect to the
+                            variable (which is a placeholder symbol, or a
+                            singleton expression)
+        __depend_dict : A dictionary that maps a pair (placeholder symbol,
+                        variable) to a boolean value indicating whether the
+                        intermediate expression depends on the variable
+        __var_id_dict : A dictionary that maps a differentiation variable to
+                        an integer used in the names of derivative symbols
+        __derivative_func : A function that takes a sympy expression and a
+                            variable, and returns the total derivative of the
+                            expression with respect to the variable. It is
+                            used for the definitions of intermediate
+                            expressions. If it is None, total_derivative is
+                            used
+    """
+
+    DERIVATIVE_SUFFIX = "_d"
+
+    def __init__(self):
+        """ Class constructor
+        """
+        self.__definition_dict = OrderedDict()
+        self.__order_dict = {}
+        self.__derivative_dict = {}
+        self.__depend_dict = {}
+        self.__var_id_dict = {}
+        self.__derivative_func = None
+
+    def __len__(self):
+        """ Returns the number of intermediate expressions in the table
+        """
+        return len(self.__definition_dict)
+
+    def __contains__(self, symbol):
+        """ Checks if a symbol is a placeholder of an intermediate expression
+        """
+        return symbol in self.__definition_dict
+
+    def add_intermediate(self, symbol, definition):
+        """ Adds an intermediate expression to the table
+
+        Args:
+            symbol : A sympy symbol which is the placeholder of the
+                     intermediate expression
+            definition : A sympy expression defining the intermediate
+                         expression. All placeholder symbols in it must be
+                         already in the table
+        """
+        self.__order_dict[symbol] = len(self.__definition_dict)
+        self.__definition_dict[symbol] = definition
+
+    def get_definition(self, symbol):
+        """ Gets the defining expression of an intermediate expression
+
+        Args:
+            symbol : A placeholder symbol in the table
+
+        Returns:
+            definition : A sympy expression defining the intermediate
+                         expression
+        """
+        return self.__definition_dict[symbol]
+
+    def get_dependencies(self, sympy_expr):
+        """ Gets the intermediate expressions that need to be evaluated
+        before evaluating an expression
+
+        Args:
+            sympy_expr : A sympy expression
+
+        Returns:
+            intermediate_list : A list of pairs (symbol, definition) of all
+                                intermediate expressions which the input
+                                expression depends on (directly or
+                                indirectly), in evaluation order
+        """
+        symbol_set = set()
+        pending_symbols = [symbol for symbol in sympy_expr.free_symbols
+                           if symbol in self.__definition_dict]
+        while pending_symbols:
+            symbol = pending_symbols.pop()
+            if symbol in symbol_set:
+                continue
+            symbol_set.add(symbol)
+            pending_symbols += [
+                sub_symbol for sub_symbol
+                in self.__definition_dict[symbol].free_symbols
+                if sub_symbol in self.__definition_dict]
+        return [(symbol, self.__definition_dict[symbol]) for symbol
+                in sorted(symbol_set, key=self.__order_dict.get)]
+
+    def inline(self, sympy_expr):
+        """ Replaces all placeholder symbols in an expression by their
+        defining expressions (recursively)
+
+        Args:
+            sympy_expr : A sympy expression (or a sympy matrix)
+
+        Returns:
+            inlined_expr : A sympy expression which does not contain any
+                           placeholder symbol of the table
+        """
+        replace_dict = {}
+        for (symbol, definition) in self.get_dependencies(sympy_expr):
+            replace_dict[symbol] = definition.xreplace(replace_dict)
+        if not replace_dict:
+            return sympy_expr
+        return sympy_expr.xreplace(replace_dict)
+
+    def register_variables(self, var_list):
+        """ Assigns the integers used in the names of derivative symbols to
+        the differentiation variables which do not have one yet, in the given
+        order. Names of derivative symbols then no longer depend on the order
+        in which derivatives are computed (e.g. by separate processes)
+
+        Args:
+            var_list : A list of sympy symbols or sympy matrix elements
+        """
+        for var in var_list:
+            if var not in self.__var_id_dict:
+                self.__var_id_dict[var] = len(self.__var_id_dict)
+
+    def get_var_id(self, var):
+        """ Gets the integer used in the names of the derivative symbols with
+        respect to a variable. If the variable has none yet, it is the integer
+        that the next derivative symbol created would assign to it
+
+        Args:
+            var : A sympy symbol or sympy matrix element
+
+        Returns:
+            var_id : An integer
+        """
+        return self.__var_id_dict.get(var, len(self.__var_id_dict))
+
+    def set_derivative_func(self, derivative_func):
+        """ Sets the function computing the total derivatives of the
+        definitions of intermediate expressions (e.g. to read them from a
+        cache instead of computing them)
+
+        Args:
+            derivative_func : A function that takes a sympy expression and a
+                              variable, and returns the same as
+                              total_derivative. If it is None,
+                              total_derivative is used
+        """
+        self.__derivative_func = derivative_func
+
+    def depends_on(self, sympy_expr, var):
+        """ Checks if an expression depends on a variable, either directly or
+        through intermediate expressions
+
+        Args:
+            sympy_expr : A sympy expression
+            var : A sympy symbol or sympy matrix element
+
+        Returns:
+            is_dependent : A boolean value indicating whether the expression
+                           depends on the variable
+        """
+        if sympyutils.is_in_expr(sympy_expr, var):
+            return True
+        for symbol in sympy_expr.free_symbols:
+            if symbol in self.__definition_dict and (
+                    self.__symbol_depends_on(symbol, var)):
+                return True
+        return False
+
+    def __symbol_depends_on(self, symbol, var):
+        """ Checks if an intermediate expression depends on a variable
+
+        Args:
+            symbol : A placeholder symbol in the table
+            var : A sympy symbol or sympy matrix element
+
+        Returns:
+            is_dependent : A boolean value indicating whether the
+                           intermediate expression depends on the variable
+        """
+        key = (symbol, var)
+        if key not in self.__depend_dict:
+            self.__depend_dict[key] = self.depends_on(
+                self.__definition_dict[symbol], var)
+        return self.__depend_dict[key]
+
+    def __get_derivative(self, symbol, var):
+        """ Gets the total derivative of an intermediate expression with
+        respect to a variable. If it is not a constant or a singleton, it is
+        added to the table as a new intermediate expression
+
+        Args:
+            symbol : A placeholder symbol in the table
+            var : A sympy symbol or sympy matrix element
+
+        Returns:
+            derivative : A sympy expression (a number, a symbol, or a matrix
+                         element) which is the total derivative
+        """
+        key = (symbol, var)
+        if key in self.__derivative_dict:
+            return self.__derivative_dict[key]
+
+        derivative = 0
+        if self.__symbol_depends_on(symbol, var):
+            derivative_func = self.__derivative_func or self.total_derivative
+            derivative = derivative_func(self.__definition_dict[symbol], var)
+            is_singleton = (derivative.is_number or
+                            isinstance(derivative, (Symbol, MatrixElement)))
+            if not is_singleton:
+                if var not in self.__var_id_dict:
+                    self.__var_id_dict[var] = len(self.__var_id_dict)
+                derivative_symbol = Symbol(
+                    "%s%s%d" % (symbol.name,
+                                IntermediateExprTable.DERIVATIVE_SUFFIX,
+                                self.__var_id_dict[var]),
+                    real=True)
+                self.add_intermediate(derivative_symbol, derivative)
+                derivative = derivative_symbol
+        self.__derivative_dict[key] = derivative
+        return derivative
+
+    def total_derivative(self, sympy_expr, var):
+        """ Gets the total derivative of an expression with respect to a
+        variable by the chain rule over the intermediate expressions it
+        contains
+
+        Args:
+            sympy_expr : A sympy expression
+            var : A sympy symbol or sympy matrix element
+
+        Returns:
+            derivative_expr : A sympy expression which is the total
+                              derivative. It may contain placeholder symbols
+                              of intermediate expressions and their
+                              derivatives
+        """
+        derivative_expr = sympyutils.first_order_derivative(sympy_expr, var)
+        for symbol in self.__get_intermediate_symbols(sympy_expr):
+            symbol_derivative = self.__get_derivative(symbol, var)
+            if symbol_derivative == 0:
+                continue
+            derivative_expr += (
+                sympyutils.first_order_derivative(sympy_expr, symbol) *
+                symbol_derivative)
+        return derivative_expr
+
+    def add_derivatives(self, sympy_expr, var):
+        """ Adds the derivatives of the intermediate expressions in an
+        expression to the table, as computing the total derivative of the
+        expression does. It is used when the total derivative is obtained
+        otherwise (e.g. read from a cache), so that the placeholder symbols
+        in it are in the table
+
+        Args:
+            sympy_expr : A sympy expression
+            var : A sympy symbol or sympy matrix element
+        """
+        for symbol in self.__get_intermediate_symbols(sympy_expr):
+            self.__get_derivative(symbol, var)
+
+    def __get_intermediate_symbols(self, sympy_expr):
+        """ Gets the placeholder symbols of the table in an expression
+
+        Args:
+            sympy_expr : A sympy expression
+
+        Returns:
+            symbol_list : A list of placeholder symbols, in evaluation order
+        """
+        return sorted(
+            [symbol for symbol in sympy_expr.free_symbols
+             if symbol in self.__definition_dict],
+            key=self.__order_dict.get)
@@ -0,0 +1,222 @@
+"""
+The module contains a profiler measuring the phases of code generation (e.g.
+parsing, simplification, differentiation and code emission) and the time
+taken to generate each derivative function.
+
+Phases are measured where they happen, through profile_phase and add_entry,
+which do nothing unless a profiler is started by start_profiling. Only the
+current process is measured.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# The number of slowest derivative entries listed in a report by default
+DEFAULT_NUM_SLOWEST_ENTRIES = 20
+
+# The profiler recording the phases, or None if nothing is recorded
+_active_profiler = None
+
+
+def _get_peak_memory_kb():
+    """ Gets the peak resident set size of the current process so far
+
+    Returns:
+        peak_memory_kb : An integer which is the peak memory in kilobytes, or
+                         None if it cannot be measured (e.g. on Windows)
+    """
+    if resource is None:
+        return None
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # Reported in bytes instead of kilobytes
+        peak_memory /= 1024
+    return peak_memory
+
+
+class Profiler(object):
+    """
+    A class that records the wall time, the number of calls and the memory of
+    named phases, and the time taken by named entries (e.g. derivative
+    functions).
+
+    Phases may be nested. The time of a phase includes the time of the phases
+    nested in it, and its self time does not. A phase nested in itself (e.g.
+    differentiation calling differentiation through the chain rule) is counted
+    as a call, but its time is only measured once. Memory is the peak resident
+    set size of the process, which never decreases: the peak of a phase is the
+    highest peak seen at its end, and its growth is how much the peak rose
+    while it was running.
+
+    Private object member attributes:
+        __phase_dict : A dictionary that maps the name of a phase to a
+                       dictionary of its statistics
+        __phase_stack : A list of lists [name, start time, peak memory at
+                        start, time of nested phases] of the running phases,
+                        from the outermost one
+        __entry_list : A list of tuples (name, indices, elapsed time) of the
+                       recorded entries
+        __start_time : A float which is the time the profiler started
+    """
+
+    def __init__(self):
+        """ Class constructor
+        """
+        self.__phase_dict = {}
+        self.__phase_stack = []
+        self.__entry_list = []
+        self.__start_time = time.time()
+
+    def start_phase(self, name):
+        """ Starts measuring a phase
+
+        Args:
+            name : A string which is the name of the phase
+        """
+        self.__phase_stack.append(
+            [name, time.time(), _get_peak_memory_kb(), 0.0])
+
+    def end_phase(self):
+        """ Ends measuring the innermost running phase
+        """
+        (name, start_time, start_memory, nested_time) = (
+            self.__phase_stack.pop())
+        elapsed_time = time.time() - start_time
+        end_memory = _get_peak_memory_kb()
+        stats = self.__phase_dict.setdefault(name, {
+            "calls": 0,
+            "time": 0.0,
+            "self_time": 0.0,
+            "peak_memory_kb": None,
+            "memory_growth_kb": None,
+        })
+        stats["calls"] += 1
+        stats["self_time"] += elapsed_time - nested_time
+        if self.__phase_stack:
+            self.__phase_stack[-1][3] += elapsed_time
+        if any(phase[0] == name for phase in self.__phase_stack):
+            return
+        stats["time"] += elapsed_time
+        if end_memory is not None:
+            stats["peak_memory_kb"] = max(
+                stats["peak_memory_kb"], end_memory)
+            stats["memory_growth_kb"] = (
+                (stats["memory_growth_kb"] or 0) + end_memory - start_memory)
+
+    def add_entry(self, name, indices, elapsed_time):
+        """ Records the time taken by an entry
+
+        Args:
+            name : A string which is the name of the entry
+            indices : A tuple of integers identifying the entry
+            elapsed_time : A float which is the time taken in seconds
+        """
+        self.__entry_list.append((name, indices, elapsed_time))
+
+    def get_report(self, num_slowest_entries=None):
+        """ Gets a report of what is recorded so far
+
+        Args:
+            num_slowest_entries : An integer which is the number of slowest
+                                  entries listed. If it is None,
+                                  DEFAULT_NUM_SLOWEST_ENTRIES is used
+
+        Returns:
+            report : A dictionary which can be written as JSON, with the
+                     total time, the peak memory, the statistics of the
+                     phases (slowest first), and the statistics of the
+                     entries with the slowest ones
+        """
+        if num_slowest_entries is None:
+            num_slowest_entries = DEFAULT_NUM_SLOWEST_ENTRIES
+        phase_list = []
+        for (name, stats) in self.__phase_dict.iteritems():
+            phase_stats = {"name": name}
+            phase_stats.update(stats)
+            phase_list.append(phase_stats)
+        phase_list.sort(key=lambda stats: stats["time"], reverse=True)
+        entry_list = sorted(
+            self.__entry_list, key=lambda entry: entry[2], reverse=True)
+        return {
+            "total_time": time.time() - self.__start_time,
+            "peak_memory_kb": _get_peak_memory_kb(),
+            "phases": phase_list,
+            "entries": {
+                "count": len(entry_list),
+                "time": sum(entry[2] for entry in entry_list),
+                "slowest": [
+                    {"name": name, "indices": list(indices), "time": seconds}
+                    for (name, indices, seconds)
+                    in entry_list[:num_slowest_entries]],
+            },
+        }
+
+
+def start_profiling():
+    """ Starts a profiler recording the phases of the current process,
+    replacing the running one if any
+
+    Returns:
+        profiler : The started Profiler object
+    """
+    global _active_profiler
+    _active_profiler = Profiler()
+    return _active_profiler
+
+
+def stop_profiling():
+    """ Stops the running profiler
+
+    Returns:
+        profiler : The stopped Profiler object, or None if no profiler is
+                   running
+    """
+    global _active_profiler
+    profiler = _active_profiler
+    _active_profiler = None
+    return profiler
+
+
+def is_profiling():
+    """ Checks if a profiler is running
+
+    Returns:
+        is_running : A boolean value
+    """
+    return _active_profiler is not None
+
+
+@contextmanager
+def profile_phase(name):
+    """ Creates a context measured as a phase by the running profiler, if any
+
+    Args:
+        name : A string which is the name of the phase
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        yield
+        return
+    profiler.start_phase(name)
+    try:
+        yield
+    finally:
+        profiler.end_phase()
+
+
+def add_entry(name, indices, elapsed_time):
+    """ Records the time taken by an entry in the running profiler, if any
+
+    Args:
+        name : A string which is the name of the entry
+        indices : A tuple of integers identifying the entry
+        elapsed_time : A float which is the time taken in seconds
+    """
+    if _active_profiler is not None:
+        _active_profiler.add_entry(name, indices, elapsed_time)
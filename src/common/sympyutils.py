@@ -2,9 +2,41 @@
 The module contains utility functions that related to sympy
 """
 
-from sympy import diff, MatrixSymbol, Symbol
-from sympy.concrete import summations
-from sympy.matrices.expressions.matexpr import MatrixElement
+import inspect
+import sys
+import time
+
+import mpmath.libmp as mlib
+from sympy import (
+    Add, Basic, cancel, cse, diff, DiracDelta, Dummy, expand, Float,
+    Function, Integer, Matrix, MatrixBase, MatrixSymbol, Mul,
+    numbered_symbols, powsimp, preorder_traversal, Rational, re, S, sign,
+    simplify, srepr, Symbol)
+from sympy.concrete import products, summations
+from sympy.core.function import UndefinedFunction
+from sympy.matrices.expressions.matexpr import MatrixElement, MatrixExpr
+
+from common import util
+
+
+class SimplifyLevel(object):
+    """
+    An enum class that enumerates the levels of simplification applied to
+    declared expressions. NONE keeps expressions as they are written. CHEAP
+    applies a fixed pipeline of fast rewriting passes (expansion,
+    cancellation of rational functions and collection of powers), each kept
+    only if it does not increase the size of the expression tree. FULL applies
+    sympy.simplify
+    """
+    NONE = "none"
+    CHEAP = "cheap"
+    FULL = "full"
+    SUPPORTED_LEVELS = [NONE, CHEAP, FULL]
+    DEFAULT_LEVEL = FULL
+
+
+CHEAP_SIMPLIFY_PASSES = [expand, cancel, powsimp]
+
 
 def is_in_expr(expr, sympy_var):
     """ Checks if a sympy symbol or sympy matrix element is prenset in the
@@ -56,6 +88,19 @@ def second_order_derivative(expr, first_var, second_var):
         second_var)
 
 
+def has_loop(sympy_expr):
+    """ Checks if a sympy expression contains a summation or product loop
+
+    Args:
+        sympy_expr : A sympy symbolic expression
+
+    Returns:
+        has_loop : A boolean value indicating whether the input expression
+                   contains a Sum or Product sub-expression
+    """
+    return sympy_expr.has(summations.Sum, products.Product)
+
+
 def is_const_expr(sympy_expr):
     """ Checks if a sympy expression has constant values (which can be a
     number, vector, or matrix).
@@ -100,6 +145,200 @@ def get_reserved_var_names():
     return ["___tmp_loop_counter_1", "___tmp_loop_counter_2"]
 
 
+def _get_expr_size(sympy_expr):
+    """ Gets the size of a sympy expression, which is the number of nodes in
+    its expression tree. Unlike sympy.count_ops, it supports matrix elements
+
+    Args:
+        sympy_expr : A sympy expression
+
+    Returns:
+        expr_size : An integer
+    """
+    return sum(1 for _ in preorder_traversal(sympy_expr))
+
+
+def _apply_cheap_pass(simplify_pass, sympy_expr):
+    """ Applies a fast simplification pass on a sympy expression. The result
+    is kept only if its expression tree is not larger than the one of the
+    input expression
+
+    Args:
+        simplify_pass : A function taking a sympy expression and returning an
+                        equivalent sympy expression
+        sympy_expr : A sympy expression
+
+    Returns:
+        result_expr : A sympy expression
+    """
+    try:
+        result_expr = simplify_pass(sympy_expr)
+    except Exception:
+        # The pass does not support some sub-expressions
+        return sympy_expr
+    if _get_expr_size(result_expr) > _get_expr_size(sympy_expr):
+        return sympy_expr
+    return result_expr
+
+
+def _has_const_range(loop_expr):
+    """ Checks if all the ranges of a summation or product loop have a known
+    number of iterations
+
+    Args:
+        loop_expr : A sympy Sum or Product expression
+
+    Returns:
+        is_const_range : A boolean value
+    """
+    return all((upper_limit - lower_limit).is_Integer
+               for (_, lower_limit, upper_limit) in loop_expr.limits)
+
+
+def evaluate_const_loops(sympy_expr):
+    """ Evaluates the summation and product loops whose ranges have a known
+    number of iterations, which code cannot be generated for once they are
+    differentiated. Loops with ranges that are not known at code generation
+    time are kept
+
+    Args:
+        sympy_expr : A sympy expression or a sympy matrix
+
+    Returns:
+        evaluated_expr : A sympy expression or a sympy matrix
+    """
+    if isinstance(sympy_expr, MatrixBase):
+        return sympy_expr.applyfunc(evaluate_const_loops)
+    while has_loop(sympy_expr):
+        loop_dict = {}
+        traversal = preorder_traversal(sympy_expr)
+        for sub_expr in traversal:
+            if isinstance(sub_expr, (summations.Sum, products.Product)) and (
+                    _has_const_range(sub_expr)):
+                evaluated_expr = sub_expr.doit()
+                if evaluated_expr != sub_expr:
+                    loop_dict[sub_expr] = evaluated_expr
+                traversal.skip()
+        if not loop_dict:
+            break
+        # Evaluating an outer loop may give inner loops constant ranges
+        sympy_expr = sympy_expr.xreplace(loop_dict)
+    return sympy_expr
+
+
+def _iter_cheap_simplify(sympy_expr):
+    """ Applies the fast simplification passes on a sympy expression one after
+    another. Matrix elements, summations and products are treated as atoms,
+    since the passes do not support matrix elements and must not rewrite loop
+    bodies which depend on loop counters
+
+    Args:
+        sympy_expr : A sympy expression
+
+    Returns:
+        A generator of sympy expressions, which are the forms of the input
+        expression after each pass
+    """
+    atom_dict = {}
+    traversal = preorder_traversal(sympy_expr)
+    for sub_expr in traversal:
+        if isinstance(sub_expr, (
+                MatrixElement, summations.Sum, products.Product)):
+            atom_dict[sub_expr] = Dummy()
+            traversal.skip()
+    masked_expr = sympy_expr.xreplace(atom_dict)
+    inverse_atom_dict = {
+        dummy: atom for (atom, dummy) in atom_dict.iteritems()}
+    for simplify_pass in CHEAP_SIMPLIFY_PASSES:
+        masked_expr = _apply_cheap_pass(simplify_pass, masked_expr)
+        yield masked_expr.xreplace(inverse_atom_dict)
+
+
+def _check_deadline(deadline):
+    """ Checks that a deadline has not passed
+
+    Args:
+        deadline : A float which is the time of the deadline, or None if
+                   there is no deadline
+
+    Raises:
+        TimeLimitExceeded : An error if the deadline has passed
+    """
+    if deadline is not None and time.time() >= deadline:
+        raise util.TimeLimitExceeded("Time limit exceeded")
+
+
+def simplify_expr(sympy_expr, level=None, time_budget=None):
+    """ Simplifies a sympy expression (or a sympy matrix) up to a given level,
+    within a given time budget. When the budget runs out, the best form found
+    so far is returned. At every level (and whether or not the budget runs
+    out), loops with a known number of iterations are evaluated first (see
+    evaluate_const_loops). The budget is checked between the simplification
+    passes, and a pass running out of time is interrupted (see
+    util.time_limit)
+
+    Args:
+        sympy_expr : A sympy expression or a sympy matrix
+        level : A string which is one of SimplifyLevel.SUPPORTED_LEVELS. If it
+                is None, SimplifyLevel.DEFAULT_LEVEL is used
+        time_budget : A number indicating the time budget in seconds. If it
+                      is None or not positive, the time is not limited
+
+    Returns:
+        simplify_result : A tuple whose first element is the simplified
+                          sympy object, and second element is the highest
+                          level in SimplifyLevel whose simplification
+                          completed
+
+    Raises:
+        NotImplementedError : An error if the level is not supported
+    """
+    if level is None:
+        level = SimplifyLevel.DEFAULT_LEVEL
+    if level not in SimplifyLevel.SUPPORTED_LEVELS:
+        raise NotImplementedError(
+            "The simplification level: %s is not supported" % level)
+
+    sympy_expr = evaluate_const_loops(sympy_expr)
+    best_expr = sympy_expr
+    reached_level = SimplifyLevel.NONE
+    if level == SimplifyLevel.NONE:
+        return (best_expr, reached_level)
+    deadline = None
+    if time_budget and time_budget > 0:
+        deadline = time.time() + time_budget
+    try:
+        with util.time_limit(time_budget):
+            if level == SimplifyLevel.CHEAP or time_budget:
+                # With a time budget, the cheap form is the fallback in case
+                # full simplification runs out of time
+                if isinstance(sympy_expr, MatrixBase):
+                    # Elements are simplified in place, so that the elements
+                    # done so far are kept if the time budget runs out
+                    best_expr = Matrix(sympy_expr)
+                    for ind in xrange(len(best_expr)):
+                        for simplified_expr in _iter_cheap_simplify(
+                                best_expr[ind]):
+                            best_expr[ind] = simplified_expr
+                            _check_deadline(deadline)
+                elif not isinstance(sympy_expr, MatrixExpr):
+                    for simplified_expr in _iter_cheap_simplify(sympy_expr):
+                        best_expr = simplified_expr
+                        _check_deadline(deadline)
+                reached_level = SimplifyLevel.CHEAP
+            if level == SimplifyLevel.FULL:
+                try:
+                    best_expr = simplify(sympy_expr)
+                    reached_level = SimplifyLevel.FULL
+                except Exception:
+                    # If expr cannot be simplified due to errors, just take
+                    # the best form so far
+                    pass
+    except util.TimeLimitExceeded:
+        pass
+    return (best_expr, reached_level)
+
+
 def expand_expr(sympy_expr, deep=False):
     """ Expands the input sympy expression using sympy eval_sum_direct routine
 
@@ -146,4 +385,446 @@ def expand_expr(sympy_expr, deep=False):
             difference = upper_limit - lower_limit
             if difference.is_Integer:
                 expanded_expr = summations.eval_sum_direct(expanded_expr, limit)
+            else:
+                # The range is not known at code generation time, so the
+                # summation over this limit is kept
+                expanded_expr = summations.Sum(expanded_expr, limit)
     return expanded_expr
+
+
+def eliminate_common_subexprs(expr_list, symbol_prefix):
+    """ Finds common sub-expressions over a list of sympy expressions using
+    sympy cse routine. Matrix elements are treated as atoms. Summation and
+    product loops that are not nested in other loops are taken out as
+    sub-expressions of their own (so that each distinct loop is evaluated
+    once), while their bodies are left untouched since they may depend on
+    loop counters
+
+    Args:
+        expr_list : A list of sympy expressions
+        symbol_prefix : A string which is the prefix of names of symbols that
+                        hold the values of common sub-expressions
+
+    Returns:
+        replacements : A list of pairs (symbol, sub_expr) in the order that
+                       the sub-expressions should be evaluated
+        reduced_exprs : A list of sympy expressions which are the input
+                        expressions rewritten with the symbols
+    """
+    symbol_iter = numbered_symbols(symbol_prefix, real=True)
+    loop_replacements = []
+    atom_dict = {}
+    for expr in expr_list:
+        traversal = preorder_traversal(expr)
+        for sub_expr in traversal:
+            if sub_expr in atom_dict:
+                traversal.skip()
+            elif isinstance(sub_expr, (summations.Sum, products.Product)):
+                loop_symbol = next(symbol_iter)
+                loop_replacements.append((loop_symbol, sub_expr))
+                atom_dict[sub_expr] = loop_symbol
+                traversal.skip()
+            elif isinstance(sub_expr, MatrixElement):
+                atom_dict[sub_expr] = Dummy()
+                traversal.skip()
+    masked_exprs = [expr.xreplace(atom_dict) for expr in expr_list]
+    replacements, reduced_exprs = cse(masked_exprs, symbols=symbol_iter)
+
+    inverse_atom_dict = {
+        dummy: atom for (atom, dummy) in atom_dict.iteritems()
+        if isinstance(atom, MatrixElement)}
+    replacements = [(symbol, sub_expr.xreplace(inverse_atom_dict))
+                    for (symbol, sub_expr) in replacements]
+    reduced_exprs = [expr.xreplace(inverse_atom_dict)
+                     for expr in reduced_exprs]
+    return (loop_replacements + replacements, reduced_exprs)
+
+
+def _get_pairs(first_inds, second_inds):
+    """ Gets all unordered pairs of indices (i, j) with i taken from the first
+    index set and j taken from the second index set
+
+    Args:
+        first_inds : A set of integers
+        second_inds : A set of integers
+
+    Returns:
+        pairs : A set of tuples (i, j) where i <= j
+    """
+    return set([(min(i, j), max(i, j))
+                for i in first_inds for j in second_inds])
+
+
+def _get_second_order_dependency(
+        sympy_expr, var_ind_dict, matrix_ind_dict, dependency_cache):
+    """ Gets the differentiation variables that a sympy expression depends on,
+    and the pairs of differentiation variables whose second-order partial
+    derivative of the expression is not structurally zero
+
+    Args:
+        sympy_expr : A sympy expression
+        var_ind_dict : A dictionary that maps a differentiation variable (a
+                       sympy symbol or matrix element) to its index
+        matrix_ind_dict : A dictionary that maps a sympy matrix symbol to the
+                          set of indices of its elements which are
+                          differentiation variables
+        dependency_cache : A dictionary that maps a sub-expression already
+                           analyzed to its result
+
+    Returns:
+        deps : A set of indices of differentiation variables that the
+               expression depends on
+        pairs : A set of pairs of indices (i, j) with i <= j such that the
+                second-order derivative with respect to the i-th and the j-th
+                variables may be non-zero
+    """
+    if sympy_expr in dependency_cache:
+        return dependency_cache[sympy_expr]
+
+    deps = set()
+    pairs = set()
+    expr_func = sympy_expr.func
+    if sympy_expr in var_ind_dict:
+        deps.add(var_ind_dict[sympy_expr])
+    elif sympy_expr.is_number or expr_func in [Symbol, Dummy, MatrixSymbol]:
+        pass
+    elif expr_func == MatrixElement:
+        # An element accessed with indices unknown at code generation time
+        # may be any element of the matrix. Indexing is linear
+        if not (sympy_expr.args[1].is_Integer and
+                sympy_expr.args[2].is_Integer):
+            deps |= matrix_ind_dict.get(sympy_expr.args[0], set())
+    elif expr_func in [sign, DiracDelta]:
+        # Piecewise constant functions have zero derivatives
+        pass
+    else:
+        sub_infos = [
+            _get_second_order_dependency(
+                operand, var_ind_dict, matrix_ind_dict, dependency_cache)
+            for operand in sympy_expr.args]
+        for (sub_deps, sub_pairs) in sub_infos:
+            pairs |= sub_pairs
+        if expr_func in [Add, re, summations.Sum]:
+            # Linear operators
+            for (sub_deps, _) in sub_infos:
+                deps |= sub_deps
+        elif expr_func == Mul:
+            for (sub_deps, _) in sub_infos:
+                pairs |= _get_pairs(deps, sub_deps)
+                deps |= sub_deps
+        else:
+            # Non-linear operators. Loop limits in summations or products
+            # do not depend on differentiation variables
+            for (sub_deps, _) in sub_infos:
+                deps |= sub_deps
+            pairs |= _get_pairs(deps, deps)
+
+    dependency_cache[sympy_expr] = (deps, pairs)
+    return (deps, pairs)
+
+
+def _init_dependency_cache(
+        intermediate_list, var_ind_dict, matrix_ind_dict):
+    """ Creates the cache for dependency analysis, seeded with the results for
+    the placeholder symbols of intermediate expressions, so that a placeholder
+    symbol is analyzed as its defining expression
+
+    Args:
+        intermediate_list : A list of pairs (symbol, definition) of
+                            intermediate expressions in evaluation order. It
+                            may be None
+        var_ind_dict : A dictionary that maps a differentiation variable (a
+                       sympy symbol or matrix element) to its index
+        matrix_ind_dict : A dictionary that maps a sympy matrix symbol to the
+                          set of indices of its elements which are
+                          differentiation variables
+
+    Returns:
+        dependency_cache : A dictionary that maps a sub-expression already
+                           analyzed to its result
+    """
+    dependency_cache = {}
+    if intermediate_list is None:
+        return dependency_cache
+    for (symbol, definition) in intermediate_list:
+        dependency_cache[symbol] = _get_second_order_dependency(
+            definition, var_ind_dict, matrix_ind_dict, dependency_cache)
+    return dependency_cache
+
+
+def get_hessian_sparsity(sympy_expr, diff_var_list, intermediate_list=None):
+    """ Gets the structural sparsity pattern of the Hessian matrix of a sympy
+    expression, which is computed by a dependency analysis over the expression
+    tree without doing any differentiation. An entry outside the pattern is
+    guaranteed to be identically zero; an entry in the pattern may be non-zero
+
+    Args:
+        sympy_expr : A sympy expression
+        diff_var_list : A list of sympy symbols or sympy matrix elements which
+                        are the differentiation variables
+        intermediate_list : A list of pairs (symbol, definition) of
+                            intermediate expressions (in evaluation order)
+                            whose placeholder symbols may appear in the
+                            expression. It may be None
+
+    Returns:
+        entry_list : A sorted list of pairs of indices (i, j) with i <= j such
+                     that the second-order partial derivative with respect to
+                     the i-th and the j-th variables may be non-zero
+    """
+    var_ind_dict = {}
+    matrix_ind_dict = {}
+    for (ind, var) in enumerate(diff_var_list):
+        var_ind_dict[var] = ind
+        if isinstance(var, MatrixElement):
+            matrix_ind_dict.setdefault(var.args[0], set()).add(ind)
+    dependency_cache = _init_dependency_cache(
+        intermediate_list, var_ind_dict, matrix_ind_dict)
+    (_, pairs) = _get_second_order_dependency(
+        sympy_expr, var_ind_dict, matrix_ind_dict, dependency_cache)
+    return sorted(pairs)
+
+
+def get_jacobian_sparsity(expr_list, diff_var_list, intermediate_list=None):
+    """ Gets the structural sparsity pattern of the Jacobian matrix of a list
+    of sympy expressions (the i-th row of the Jacobian matrix is the gradient
+    of the i-th expression), which is computed by a dependency analysis over
+    the expression trees without doing any differentiation
+
+    Args:
+        expr_list : A list of sympy expressions
+        diff_var_list : A list of sympy symbols or sympy matrix elements which
+                        are the differentiation variables
+        intermediate_list : A list of pairs (symbol, definition) of
+                            intermediate expressions (in evaluation order)
+                            whose placeholder symbols may appear in the
+                            expressions. It may be None
+
+    Returns:
+        entry_list : A sorted list of pairs of indices (k, i) such that the
+                     partial derivative of the k-th expression with respect to
+                     the i-th variable may be non-zero
+    """
+    var_ind_dict = {}
+    matrix_ind_dict = {}
+    for (ind, var) in enumerate(diff_var_list):
+        var_ind_dict[var] = ind
+        if isinstance(var, MatrixElement):
+            matrix_ind_dict.setdefault(var.args[0], set()).add(ind)
+    dependency_cache = _init_dependency_cache(
+        intermediate_list, var_ind_dict, matrix_ind_dict)
+    entry_list = []
+    for (expr_ind, sympy_expr) in enumerate(expr_list):
+        (deps, _) = _get_second_order_dependency(
+            sympy_expr, var_ind_dict, matrix_ind_dict, dependency_cache)
+        entry_list += [(expr_ind, var_ind) for var_ind in sorted(deps)]
+    return entry_list
+
+
+def expr_to_json_nodes(sympy_expr):
+    """ Converts a sympy expression into a list of nodes that can be written
+    as JSON, and from which expr_from_json_nodes rebuilds the expression.
+    Each distinct sub-expression is one node, given after the nodes of its
+    arguments, and arguments are referred to by their positions in the list.
+    The list is flat whatever the depth of the expression, and repeated
+    sub-expressions are given only once. The nodes are:
+        ["symbol", name, assumption_dict]
+        ["dummy", name, dummy_index, assumption_dict]
+        ["integer", value]
+        ["rational", numerator, denominator]
+        ["float", decimal_string, precision]
+        ["singleton", class_name]
+        ["function", name, arg_pos, ...] (undefined functions)
+        ["class", module_name, class_name, arg_pos, ...]
+
+    Args:
+        sympy_expr : A sympy expression
+
+    Returns:
+        node_list : A list of nodes, the last one being the expression
+
+    Raises:
+        ValueError : If the expression contains an atom that cannot be
+                     converted
+    """
+    node_list = []
+    pos_dict = {}
+    stack = [sympy_expr]
+    while stack:
+        expr = stack[-1]
+        if expr in pos_dict:
+            stack.pop()
+            continue
+        missing_args = [arg for arg in expr.args if arg not in pos_dict]
+        if missing_args:
+            stack += missing_args
+            continue
+        stack.pop()
+        expr_type = type(expr)
+        arg_pos_list = [pos_dict[arg] for arg in expr.args]
+        if expr_type in (Symbol, Dummy):
+            # The assumptions are the ones given when creating the symbol
+            # (as in srepr), not all the assumptions implied by them
+            assumption_dict = dict(getattr(
+                expr._assumptions, "generator", expr.assumptions0))
+        if expr_type is Symbol:
+            node = ["symbol", expr.name, assumption_dict]
+        elif expr_type is Dummy:
+            node = ["dummy", expr.name, expr.dummy_index, assumption_dict]
+        elif isinstance(expr, Integer):
+            node = ["integer", expr.p]
+        elif isinstance(expr, Rational):
+            node = ["rational", expr.p, expr.q]
+        elif isinstance(expr, Float):
+            node = ["float", mlib.to_str(expr._mpf_, mlib.repr_dps(
+                expr._prec)), expr._prec]
+        elif not expr.args and getattr(
+                S, expr_type.__name__, None) is expr:
+            node = ["singleton", expr_type.__name__]
+        elif isinstance(expr_type, UndefinedFunction):
+            node = ["function", expr_type.__name__] + arg_pos_list
+        elif expr.args:
+            node = ["class", expr_type.__module__,
+                    expr_type.__name__] + arg_pos_list
+        else:
+            raise ValueError("Cannot convert %s into JSON nodes" % srepr(expr))
+        pos_dict[expr] = len(node_list)
+        node_list.append(node)
+    return node_list
+
+
+def _get_sympy_class(module_name, class_name):
+    """ Gets a sympy class from its module, which must be a sympy module that
+    is already imported
+
+    Args:
+        module_name : A string which is the name of the module
+        class_name : A string which is the name of the class
+
+    Returns:
+        sympy_class : A subclass of sympy.Basic
+
+    Raises:
+        ValueError : If there is no such sympy class
+    """
+    module = None
+    if module_name == "sympy" or module_name.startswith("sympy."):
+        module = sys.modules.get(module_name)
+    sympy_class = getattr(module, class_name, None)
+    if not (inspect.isclass(sympy_class) and issubclass(sympy_class, Basic)):
+        raise ValueError("Unknown sympy class %s.%s" % (
+            module_name, class_name))
+    return sympy_class
+
+
+def expr_from_json_nodes(node_list):
+    """ Rebuilds a sympy expression from the list of nodes given by
+    expr_to_json_nodes (e.g. read back from JSON). Only sympy objects are
+    created, so that a list from an untrusted source cannot run code
+
+    Args:
+        node_list : A list of nodes
+
+    Returns:
+        sympy_expr : A sympy expression
+
+    Raises:
+        ValueError : If the list is not a valid list of nodes
+    """
+    expr_list = []
+    for node in node_list:
+        if not isinstance(node, list) or not node:
+            raise ValueError("Invalid node %r" % (node,))
+        (kind, values) = (node[0], node[1:])
+        if kind == "symbol":
+            (name, assumption_dict) = values
+            expr = Symbol(str(name), **_to_assumptions(assumption_dict))
+        elif kind == "dummy":
+            (name, dummy_index, assumption_dict) = values
+            expr = Dummy(str(name), dummy_index=int(dummy_index),
+                         **_to_assumptions(assumption_dict))
+        elif kind == "integer":
+            expr = Integer(_to_int(values[0]))
+        elif kind == "rational":
+            (numerator, denominator) = values
+            expr = Rational(_to_int(numerator), _to_int(denominator))
+        elif kind == "float":
+            (decimal_string, precision) = values
+            expr = Float(str(decimal_string), precision=int(precision))
+        elif kind == "singleton":
+            expr = getattr(S, str(values[0]), None)
+            if not isinstance(expr, Basic):
+                raise ValueError("Unknown sympy singleton %r" % (values[0],))
+        elif kind == "function":
+            expr = Function(str(values[0]))(
+                *_get_node_args(expr_list, values[1:]))
+        elif kind == "class":
+            sympy_class = _get_sympy_class(str(values[0]), str(values[1]))
+            expr = sympy_class(*_get_node_args(expr_list, values[2:]))
+        else:
+            raise ValueError("Invalid node %r" % (node,))
+        expr_list.append(expr)
+    if not expr_list:
+        raise ValueError("Empty list of nodes")
+    return expr_list[-1]
+
+
+def _to_int(value):
+    """ Checks that a value read from a list of nodes is an integer
+
+    Args:
+        value : A value
+
+    Returns:
+        value : An integer
+
+    Raises:
+        ValueError : If the value is not an integer
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, long)):
+        raise ValueError("Invalid integer %r" % (value,))
+    return value
+
+
+def _get_node_args(expr_list, pos_list):
+    """ Gets the arguments of a node read from a list of nodes, which must
+    be given before it
+
+    Args:
+        expr_list : A list of the sympy expressions of the previous nodes
+        pos_list : A list of the positions of the arguments
+
+    Returns:
+        arg_list : A list of sympy expressions
+
+    Raises:
+        ValueError : If a position is not the one of a previous node
+    """
+    arg_list = []
+    for pos in pos_list:
+        if not 0 <= _to_int(pos) < len(expr_list):
+            raise ValueError("Invalid argument position %r" % (pos,))
+        arg_list.append(expr_list[pos])
+    return arg_list
+
+
+def _to_assumptions(assumption_dict):
+    """ Checks that a value read from a list of nodes is a dictionary of
+    sympy assumptions
+
+    Args:
+        assumption_dict : A value
+
+    Returns:
+        assumption_dict : A dictionary mapping assumption names (strings) to
+                          boolean values or None
+
+    Raises:
+        ValueError : If the value is not a dictionary of assumptions
+    """
+    if not isinstance(assumption_dict, dict) or not all(
+            value is None or isinstance(value, bool)
+            for value in assumption_dict.values()):
+        raise ValueError("Invalid assumptions %r" % (assumption_dict,))
+    return dict((str(name), value)
+                for (name, value) in assumption_dict.items())
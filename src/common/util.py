@@ -2,8 +2,215 @@
 The module contains general-purpose utility functions
 """
 
+import ctypes
+import signal
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class TimeLimitExceeded(BaseException):
+    """
+    An exception raised when a computation runs longer than the time limit
+    given by time_limit. It does not derive from Exception, so that the
+    interrupted code does not swallow it while handling its own errors
+    """
+    pass
+
+
+@contextmanager
+def time_limit(seconds):
+    """ Creates a context in which the running code is interrupted by a
+    TimeLimitExceeded exception once the given number of seconds has passed.
+    The exception is raised at most once, and never once the context is being
+    left.
+
+    The limit relies on the SIGALRM signal, which can only be handled in the
+    main thread. In other threads (e.g. a request handler calling
+    codegen.compile_spec), and where the signal is not available (e.g. on
+    Windows), a watchdog thread raises the exception in the current thread
+    instead (through the CPython API). Such an exception is only delivered
+    when Python code runs, so a long call into a C extension is not
+    interrupted until it returns. The limit is not enforced if seconds is None
+    or not positive
+
+    Args:
+        seconds : A number indicating the time limit in seconds
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    # threading has no public way to get the main thread in Python 2
+    if not hasattr(signal, "SIGALRM") or not isinstance(
+            threading.current_thread(), threading._MainThread):
+        with _watchdog_time_limit(seconds):
+            yield
+        return
+
+    # A list instead of a boolean value, so that the handler sees it change
+    leaving = [False]
+
+    def raise_time_limit_exceeded(signum, frame):
+        if not leaving[0]:
+            raise TimeLimitExceeded(
+                "Time limit of %s seconds exceeded" % seconds)
+
+    prev_handler = signal.signal(signal.SIGALRM, raise_time_limit_exceeded)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+        try:
+            yield
+        finally:
+            leaving[0] = True
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    finally:
+        # Restored even if the exception is raised when the inner cleanup
+        # starts, since the timer fires only once
+        signal.signal(signal.SIGALRM, prev_handler)
+
+
+@contextmanager
+def _watchdog_time_limit(seconds):
+    """ Creates a context in which the running code is interrupted by a
+    TimeLimitExceeded exception once the given number of seconds has passed,
+    using a watchdog thread which raises the exception asynchronously in the
+    current thread (see time_limit)
+
+    Args:
+        seconds : A positive number indicating the time limit in seconds
+    """
+    thread_id = ctypes.c_long(threading.current_thread().ident)
+    exception_type = ctypes.py_object(TimeLimitExceeded)
+    leaving = threading.Event()
+    # Guards raising the exception, so that it is never raised once the
+    # context is being left
+    lock = threading.Lock()
+
+    def raise_time_limit_exceeded():
+        if leaving.wait(seconds):
+            return
+        with lock:
+            if not leaving.is_set():
+                ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                    thread_id, exception_type)
+
+    watchdog = threading.Thread(target=raise_time_limit_exceeded)
+    watchdog.daemon = True
+    watchdog.start()
+    try:
+        yield
+    finally:
+        # The watchdog raises the exception at most once. If it is delivered
+        # during this cleanup, it leaves the context, and nothing is pending
+        leaving.set()
+        with lock:
+            # Clears the exception if it is raised but not yet delivered
+            ctypes.pythonapi.PyThreadState_SetAsyncExc(thread_id, None)
+        watchdog.join()
+
+
+class LRUCache(object):
+    """
+    A dictionary-like cache keeping at most a given number of values. When it
+    is full, adding a value evicts the least recently used one (i.e. the one
+    which was added or looked up least recently). The cache can be shared by
+    several threads
+
+    Public object member attributes:
+        max_size : An integer which is the maximum number of values kept
+
+    Private object member attributes:
+        __value_dict : An OrderedDict that maps a key to its value, from the
+                       least recently used to the most recently used
+        __lock : A lock guarding __value_dict
+    """
+
+    def __init__(self, max_size):
+        """ Class constructor
+        """
+        if max_size < 1:
+            raise ValueError("The size of a cache must be positive")
+        self.max_size = max_size
+        self.__value_dict = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__value_dict)
+
+    def get(self, key, default=None):
+        """ Gets the value of a key, which becomes the most recently used one
+        Args:
+            key : A hashable object
+            default : The value returned if the key is not in the cache
+
+        Returns:
+            value : The value of the key, or default
+        """
+        with self.__lock:
+            if key not in self.__value_dict:
+                return default
+            value = self.__value_dict.pop(key)
+            self.__value_dict[key] = value
+            return value
+
+    def put(self, key, value):
+        """ Sets the value of a key, which becomes the most recently used one.
+        The least recently used value is evicted if the cache is full
+        Args:
+            key : A hashable object
+            value : The value of the key
+        """
+        with self.__lock:
+            self.__value_dict.pop(key, None)
+            self.__value_dict[key] = value
+            if len(self.__value_dict) > self.max_size:
+                self.__value_dict.popitem(last=False)
+
+    def clear(self):
+        """ Removes all values from the cache
+        """
+        with self.__lock:
+            self.__value_dict.clear()
+
 
 def lower_first_char(my_str):
     if my_str:
         return my_str[:1].lower() + my_str[1:]
     return my_str
+
+
+def get_column_coloring(entry_list, num_cols):
+    """ Colors the columns of a sparse matrix so that no two columns with the
+    same color have non-zero entries in a common row (i.e. the columns of the
+    same color are structurally orthogonal). The coloring is computed greedily
+    by visiting columns in order and giving each column the smallest color
+    that is not used by any column sharing a row with it
+
+    Args:
+        entry_list : A list of pairs (row, col) which are the positions of the
+                     non-zero entries of the matrix
+        num_cols : An integer which is the number of columns of the matrix
+
+    Returns:
+        col_colors : A list of integers in which the i-th element is the color
+                     of the i-th column. Colors are numbered from 0
+    """
+    row_cols_dict = {}
+    col_rows_dict = {}
+    for (row, col) in entry_list:
+        row_cols_dict.setdefault(row, []).append(col)
+        col_rows_dict.setdefault(col, []).append(row)
+
+    col_colors = [0] * num_cols
+    for col in xrange(num_cols):
+        forbidden_colors = set()
+        for row in col_rows_dict.get(col, []):
+            for other_col in row_cols_dict[row]:
+                if other_col < col:
+                    forbidden_colors.add(col_colors[other_col])
+        color = 0
+        while color in forbidden_colors:
+            color += 1
+        col_colors[col] = color
+    return col_colors
@@ -0,0 +1,278 @@
+from sympy import Product, Sum, Symbol
+
+from common import profiling, sympyutils
+from common.vardef import Variable, VariableType
+import libgencode.codegenutil as codegenutil
+from .codegenutil import OperatorType
+from .exprcode import JavaExprCodeGenerator
+
+
+class JavaAdjointCodeGenerator(JavaExprCodeGenerator):
+    """
+    This is a class inherited from JavaExprCodeGenerator that generates Java
+    code for a function to compute the whole gradient vector of an input
+    mathematical expression in reverse mode (adjoint mode). The gradient vector
+    is written into an array supplied by the caller as the last parameter of
+    the function.
+
+    The generated function evaluates every distinct sub-expression once in a
+    forward sweep, and then propagates adjoint values from the root of the
+    expression tree back to the differentiation variables in a single
+    backward sweep. Hence the cost of the whole gradient is a small constant
+    multiple of the cost of evaluating the expression itself.
+
+    Public object member attributes:
+        diff_var_list : A list of sympy symbols or sympy matrix elements which
+                        are the differentiation variables. The i-th entry of
+                        the gradient vector is the partial derivative with
+                        respect to the i-th variable in this list
+        adjoint_var_prefix : A string indicating the name that is used as a
+                             prefix for adjoint variables in code generation
+        gradient_var_name : A string indicating the name of the array
+                            parameter that receives the gradient vector in the
+                            generated code
+
+    Private object member attributes:
+        __diff_var_ind_dict : A dictionary that maps a differentiation variable
+                              to its index in diff_var_list
+        __expr_var_dict : A dictionary that maps a sub-expression already
+                          evaluated in the forward sweep to the name of the
+                          variable (or the code) holding its value
+        __trace : A list of non-singleton sub-expressions in the order they
+                  are evaluated in the forward sweep
+        __loop_depth : An integer indicating the number of loops enclosing the
+                       sub-expression currently generated
+    """
+
+    DEFAULT_ADJOINT_NAME = "__adj"
+    DEFAULT_GRADIENT_NAME = codegenutil.DEFAULT_OUTPUT_PARAM_NAME
+
+    def __init__(
+            self,
+            var_list,
+            sympy_expr,
+            diff_var_list,
+            func_name=None,
+            modifier_list=None,
+            temp_prefix=None,
+            adjoint_prefix=None,
+            gradient_name=None):
+        """ Class constructor
+        """
+        JavaExprCodeGenerator.__init__(
+            self, var_list, sympy_expr, func_name, modifier_list, temp_prefix)
+        self.diff_var_list = diff_var_list
+        if adjoint_prefix is None:
+            self.adjoint_var_prefix = (
+                JavaAdjointCodeGenerator.DEFAULT_ADJOINT_NAME)
+        else:
+            self.adjoint_var_prefix = adjoint_prefix
+        if gradient_name is None:
+            self.gradient_var_name = codegenutil.get_unused_var_name(
+                JavaAdjointCodeGenerator.DEFAULT_GRADIENT_NAME, self.var_list)
+        else:
+            self.gradient_var_name = gradient_name
+        self.__diff_var_ind_dict = {
+            var: ind for (ind, var) in enumerate(self.diff_var_list)}
+        self.__expr_var_dict = {}
+        self.__trace = []
+        self.__loop_depth = 0
+
+        if sympyutils.has_loop(self.expr):
+            # Sum loops with constant ranges are unrolled. The forward sweep
+            # has to be straight-line code so that every intermediate value
+            # is still available in the backward sweep. The remaining loops
+            # are only allowed if they do not involve any differentiation
+            # variable (their values are then constants in the backward sweep)
+            with profiling.profile_phase("expand"):
+                self.expr = sympyutils.expand_expr(self.expr, deep=True)
+            diff_symbols = set([
+                var if isinstance(var, Symbol) else var.args[0]
+                for var in self.diff_var_list])
+            for loop_expr in self.expr.atoms(Sum, Product):
+                if loop_expr.free_symbols & diff_symbols:
+                    raise NotImplementedError(
+                        "Reverse-mode gradient code cannot be generated for "
+                        "loops over differentiation variables whose ranges "
+                        "are not constant. Use symbolic gradient mode instead")
+
+    def _gen_func_declaration(self, file_handler):
+        """ Generates Java code for function declaration
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        gradient_var = Variable(
+            self.gradient_var_name, VariableType.VECTOR,
+            (len(self.diff_var_list),))
+        func_declaration = codegenutil.get_java_func_declaration(
+            self.func_name, "void", self.var_list + [gradient_var],
+            self.modifier_list)
+        file_handler.write(func_declaration + " {\n")
+
+    def _gen_code_expr(self, sympy_expr, file_handler):
+        """ Generates Java code for the forward sweep to evaluate input
+        expression. Each distinct sub-expression is evaluated only once, and
+        non-singleton sub-expressions are recorded in the evaluation trace
+
+        Args:
+            sympy_expr : a sympy expression that needs code generation
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        Returns:
+            A string representing the name of the variable holding the final
+            result when evaluating the expression
+        """
+        if self.__loop_depth > 0:
+            # Values computed inside a loop body are out of scope after the
+            # loop, so they are neither reused nor recorded
+            return JavaExprCodeGenerator._gen_code_expr(
+                self, sympy_expr, file_handler)
+        if sympy_expr in self.__expr_var_dict:
+            return self.__expr_var_dict[sympy_expr]
+        expr_op_type = OperatorType.get_operator_type(sympy_expr)
+        is_loop = expr_op_type in [
+            OperatorType.SUM_LOOP, OperatorType.PRODUCT_LOOP]
+        if is_loop:
+            self.__loop_depth += 1
+        final_var_str = JavaExprCodeGenerator._gen_code_expr(
+            self, sympy_expr, file_handler)
+        if is_loop:
+            self.__loop_depth -= 1
+        self.__expr_var_dict[sympy_expr] = final_var_str
+        if not OperatorType.is_singleton_op(expr_op_type):
+            self.__trace.append(sympy_expr)
+        return final_var_str
+
+    def __get_local_partials(self, sympy_expr):
+        """ Gets Java code for local partial derivatives of a sub-expression
+        with respect to each of its operands
+
+        Args:
+            sympy_expr : a non-singleton sympy expression in the trace
+
+        Returns:
+            partials : A list of pairs (operand, partial_code) where operand is
+                a sympy expression, and partial_code is a string of Java code
+                computing the partial derivative of sympy_expr with respect to
+                the operand. partial_code is None if the partial derivative is
+                identically 1. Operands whose partial derivatives are
+                identically 0 are not included
+        """
+        expr_op_type = OperatorType.get_operator_type(sympy_expr)
+        operands = sympy_expr.args
+        operand_names = [self.__expr_var_dict[operand] for operand in operands]
+        value_name = self.__expr_var_dict[sympy_expr]
+
+        if expr_op_type in [OperatorType.ADD_REAL, OperatorType.EXTRACT_REAL]:
+            return [(operand, None) for operand in operands]
+        if expr_op_type == OperatorType.MUL_REAL:
+            partials = []
+            for ind in xrange(len(operands)):
+                other_names = operand_names[:ind] + operand_names[ind + 1:]
+                partials.append((operands[ind], " * ".join(other_names)))
+            return partials
+        if expr_op_type == OperatorType.POW_REAL:
+            base_name, exponent_name = operand_names
+            return [
+                (operands[0], "%s * Math.pow(%s, %s - 1)" % (
+                    exponent_name, base_name, exponent_name)),
+                (operands[1], "%s * Math.log(%s)" % (value_name, base_name))
+            ]
+        if expr_op_type in [OperatorType.SIGN_REAL,
+                            OperatorType.DIRAC_DELTA_REAL]:
+            return []
+
+        operand_name = operand_names[0]
+        if expr_op_type == OperatorType.ABS_REAL:
+            partial_code = "Math.signum(%s)" % operand_name
+        elif expr_op_type == OperatorType.LOG_REAL:
+            partial_code = "(1.0 / %s)" % operand_name
+        elif expr_op_type == OperatorType.SIN_REAL:
+            partial_code = "Math.cos(%s)" % operand_name
+        elif expr_op_type == OperatorType.COS_REAL:
+            partial_code = "(-Math.sin(%s))" % operand_name
+        elif expr_op_type == OperatorType.TAN_REAL:
+            partial_code = "(1.0 + %s * %s)" % (value_name, value_name)
+        elif expr_op_type == OperatorType.COT_REAL:
+            partial_code = "(-1.0 / Math.pow(Math.sin(%s), 2))" % operand_name
+        else:
+            # Operators in which we do not know how to differentiate
+            raise Exception(
+                "Cannot generate adjoint code for operator %s" % expr_op_type)
+        return [(operands[0], partial_code)]
+
+    def __gen_backward_sweep(self, file_handler):
+        """ Generates Java code for the backward sweep, which accumulates the
+        adjoint value of each sub-expression in the trace (in reverse order)
+        into the adjoint values of its operands, and eventually into the
+        gradient vector
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        # Only sub-expressions depending on some differentiation variable
+        # need adjoint values
+        active_exprs = set()
+        for sub_expr in self.__trace:
+            for operand in sub_expr.args:
+                if (operand in active_exprs or
+                        operand in self.__diff_var_ind_dict):
+                    active_exprs.add(sub_expr)
+                    break
+
+        if self.expr not in active_exprs:
+            # The whole expression is a single variable or a constant
+            if self.expr in self.__diff_var_ind_dict:
+                file_handler.write("%s[%d] = 1.0;\n" % (
+                    self.gradient_var_name,
+                    self.__diff_var_ind_dict[self.expr]))
+            return
+
+        adjoint_var_dict = {}
+        for sub_expr in self.__trace:
+            if sub_expr not in active_exprs:
+                continue
+            adjoint_var_name = "%s_%d" % (
+                self.adjoint_var_prefix, len(adjoint_var_dict))
+            adjoint_var_dict[sub_expr] = adjoint_var_name
+            init_value = 1.0 if sub_expr == self.expr else 0.0
+            file_handler.write("double %s = %f;\n" % (
+                adjoint_var_name, init_value))
+
+        for sub_expr in reversed(self.__trace):
+            if sub_expr not in active_exprs:
+                continue
+            adjoint_var_name = adjoint_var_dict[sub_expr]
+            for (operand, partial_code) in self.__get_local_partials(sub_expr):
+                if operand in adjoint_var_dict:
+                    target_name = adjoint_var_dict[operand]
+                elif operand in self.__diff_var_ind_dict:
+                    target_name = "%s[%d]" % (
+                        self.gradient_var_name,
+                        self.__diff_var_ind_dict[operand])
+                else:
+                    # Constants and non-differentiation variables
+                    continue
+                contribution = adjoint_var_name
+                if partial_code is not None:
+                    contribution += " * " + partial_code
+                file_handler.write("%s += %s;\n" % (target_name, contribution))
+
+    def gen_code(self, file_handler):
+        """ Generates code for a function to evaluate the gradient vector of
+        the input expression
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        self._gen_func_declaration(file_handler)
+        file_handler.tab()
+        # Adjoint values are accumulated into the gradient vector
+        file_handler.write("java.util.Arrays.fill(%s, 0.0);\n" % (
+            self.gradient_var_name))
+        self._gen_code_expr(self.expr, file_handler)
+        self.__gen_backward_sweep(file_handler)
+        file_handler.untab()
+        file_handler.write("}\n\n")
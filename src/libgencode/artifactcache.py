@@ -0,0 +1,131 @@
+"""
+The module contains the definition of the artifact cache, which keeps the
+generated code files of an expression class on disk, so that running the
+program again on an unchanged expression specification with the same
+configuration restores them instead of generating them again
+"""
+
+import hashlib
+import json
+import os
+import os.path as ospath
+import tempfile
+
+import sympy
+
+from .exprclasscode import CODE_GENERATOR_VERSION
+
+
+class ArtifactCache(object):
+    """
+    A class that encapsulates the generated code files (artifacts) kept in a
+    directory on disk. The artifacts of a run are kept in a single file named
+    by a digest of the content of the expression specification, the
+    configuration for code generation (without the parameters that do not
+    change the generated code, such as the destination directory), the version
+    of the code generator, the version of the cache and the version of sympy.
+
+    Public object member attributes:
+        cache_dir : A string which is the path of the directory keeping the
+                    artifacts
+    """
+
+    CACHE_VERSION = "1"
+    CACHE_FILE_EXTENSION = ".json"
+    # The configuration parameters that do not change the generated code
+    IGNORED_CONFIG_KEYS = ["dest", "cachedir", "jobs", "profile"]
+
+    def __init__(self, cache_dir):
+        """ Class constructor
+        """
+        self.cache_dir = cache_dir
+        if not ospath.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def get_digest(self, spec_text, code_gen_config):
+        """ Gets the digest naming the artifacts generated for an expression
+        specification with a configuration
+
+        Args:
+            spec_text : A string which is the content of the expression
+                        specification file
+            code_gen_config : A dictionary with key-value pairs indicating
+                              configuration for code generation
+
+        Returns:
+            digest : A string of hexadecimal digits
+        """
+        if isinstance(spec_text, unicode):
+            spec_text = spec_text.encode("utf-8")
+        config = dict(
+            (key, value) for (key, value) in code_gen_config.iteritems()
+            if key not in ArtifactCache.IGNORED_CONFIG_KEYS)
+        return hashlib.sha1("%s\n%s\n%s\n%s\n%s" % (
+            ArtifactCache.CACHE_VERSION,
+            CODE_GENERATOR_VERSION,
+            sympy.__version__,
+            json.dumps(config, sort_keys=True),
+            spec_text)).hexdigest()
+
+    def get(self, digest):
+        """ Reads the artifacts named by a digest from the cache directory
+
+        Args:
+            digest : A string which is the digest naming the artifacts
+
+        Returns:
+            artifacts : A pair (file_list, simplify_report) in which file_list
+                        is a list of pairs (file_name, code_str), and
+                        simplify_report is a list of pairs (expression name,
+                        reached simplification level). It is None if the
+                        artifacts are not in the cache directory, or if their
+                        file cannot be read
+        """
+        try:
+            with open(self.__get_cache_file_path(digest), "r") as cache_file:
+                artifacts = json.load(cache_file)
+            file_list = [
+                (file_name.encode("utf-8"), code_str.encode("utf-8"))
+                for (file_name, code_str) in artifacts["files"]]
+            simplify_report = [
+                (expr_name.encode("utf-8"), reached_level.encode("utf-8"))
+                for (expr_name, reached_level) in artifacts["simplify"]]
+        except Exception:
+            return None
+        return (file_list, simplify_report)
+
+    def put(self, digest, file_list, simplify_report):
+        """ Writes artifacts to the cache directory. They are written to a
+        temporary file which is then renamed, so that a run interrupted while
+        writing never leaves an incomplete file
+
+        Args:
+            digest : A string which is the digest naming the artifacts
+            file_list : A list of pairs (file_name, code_str)
+            simplify_report : A list of pairs (expression name, reached
+                              simplification level)
+        """
+        (file_descriptor, temp_path) = tempfile.mkstemp(
+            dir=self.cache_dir, prefix="." + digest)
+        try:
+            with os.fdopen(file_descriptor, "w") as temp_file:
+                json.dump(
+                    {"files": file_list, "simplify": simplify_report},
+                    temp_file)
+            os.rename(temp_path, self.__get_cache_file_path(digest))
+        except Exception:
+            if ospath.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def __get_cache_file_path(self, digest):
+        """ Gets the path of the file keeping artifacts on disk
+
+        Args:
+            digest : A string which is the digest naming the artifacts
+
+        Returns:
+            file_path : A string
+        """
+        return ospath.join(
+            self.cache_dir, digest + ArtifactCache.CACHE_FILE_EXTENSION)
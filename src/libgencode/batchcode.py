@@ -0,0 +1,192 @@
+from common import sympyutils
+from common.vardef import Variable, VariableType
+import libgencode.codegenutil as codegenutil
+from .exprcode import JavaExprCodeGenerator
+
+
+class JavaBatchCodeGenerator(JavaExprCodeGenerator):
+    """
+    This is a class inherited from JavaExprCodeGenerator that generates Java
+    code for a function to evaluate a list of expressions at many points at
+    once.
+
+    The differentiation variables are given as arrays of their values over
+    the points (see codegenutil.get_batch_var_list), and the number of points
+    is the first parameter of the generated function. The value of the i-th
+    expression at the p-th point is written to out[i][p] in an array out
+    passed in by the caller (or to out[p] if there is a single output). The
+    function loops over the points, and the loop body is straight-line code
+    evaluating all expressions, with common sub-expressions computed once.
+
+    If the estimated bytecode size of the loop body is above
+    codegenutil.JAVA_METHOD_SIZE_LIMIT, the expressions are grouped, and each
+    group is evaluated by its own loop in a private helper method. An
+    expression which is too large on its own is not split.
+
+    Public object member attributes:
+        output_expr_list : A list of sympy expressions which are evaluated
+        scalar_output : A boolean value indicating whether the output array is
+                        a vector of the values of a single expression over
+                        the points
+        count_var_name : A string indicating the name of the parameter which
+                         is the number of points
+        output_var_name : A string indicating the name of the array parameter
+                          receiving the values
+    """
+
+    POINT_INDEX_NAME = "__p"
+    DEFAULT_COUNT_NAME = "n"
+    CSE_SYMBOL_PREFIX = "__cse_"
+
+    def __init__(
+            self,
+            var_list,
+            output_expr_list,
+            func_name,
+            modifier_list=None,
+            temp_prefix=None,
+            scalar_output=False):
+        """ Class constructor
+        """
+        JavaExprCodeGenerator.__init__(
+            self, var_list, None, func_name, modifier_list, temp_prefix)
+        self.output_expr_list = output_expr_list
+        self.scalar_output = scalar_output
+        self.count_var_name = codegenutil.get_unused_var_name(
+            JavaBatchCodeGenerator.DEFAULT_COUNT_NAME, self.var_list)
+        self.output_var_name = codegenutil.get_unused_var_name(
+            codegenutil.DEFAULT_OUTPUT_PARAM_NAME, self.var_list)
+
+    def _get_param_list(self):
+        """ Gets the parameters of the generated method (after the number of
+        points), which are the variables followed by the output array
+        Returns:
+            param_list : A list of Variable objects
+        """
+        if self.scalar_output:
+            output_var = Variable(
+                self.output_var_name, VariableType.VECTOR, (None,))
+        else:
+            output_var = Variable(
+                self.output_var_name, VariableType.MATRIX,
+                (len(self.output_expr_list), None))
+        return list(self.var_list) + [output_var]
+
+    def _gen_func_declaration(self, file_handler):
+        """ Generates Java code for function declaration
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        func_declaration = codegenutil.get_java_func_declaration(
+            self.func_name, "void", self._get_param_list(),
+            self.modifier_list, [self.count_var_name])
+        file_handler.write(func_declaration + " {\n")
+
+    def __get_target(self, output_ind):
+        """ Gets the element of the output array receiving the value of an
+        expression at the current point
+
+        Args:
+            output_ind : An integer which is the index of the expression
+
+        Returns:
+            A string which is the array element
+        """
+        if self.scalar_output:
+            return "%s[%s]" % (
+                self.output_var_name, JavaBatchCodeGenerator.POINT_INDEX_NAME)
+        return "%s[%d][%s]" % (
+            self.output_var_name, output_ind,
+            JavaBatchCodeGenerator.POINT_INDEX_NAME)
+
+    def __get_output_groups(self):
+        """ Groups the expressions so that the estimated bytecode size of the
+        loop evaluating each group is under codegenutil.JAVA_METHOD_SIZE_LIMIT.
+        The sizes of the expressions are estimated without common
+        sub-expression elimination, so they are over-estimated
+
+        Returns:
+            group_list : A list of lists of indices of expressions
+        """
+        size_limit = (codegenutil.JAVA_METHOD_SIZE_LIMIT -
+                      JavaExprCodeGenerator.LOOP_SIZE)
+        replacements, reduced_exprs = sympyutils.eliminate_common_subexprs(
+            self.output_expr_list, JavaBatchCodeGenerator.CSE_SYMBOL_PREFIX)
+        size = self._estimate_statements_size(
+            replacements,
+            [(reduced_expr, [self.__get_target(output_ind)])
+             for (output_ind, reduced_expr) in enumerate(reduced_exprs)])
+        if size <= size_limit:
+            return [range(len(self.output_expr_list))]
+
+        group_list = [[]]
+        group_size = 0
+        for (output_ind, output_expr) in enumerate(self.output_expr_list):
+            output_size = self._estimate_statements_size(
+                [], [(output_expr, [self.__get_target(output_ind)])])
+            if group_list[-1] and group_size + output_size > size_limit:
+                group_list.append([])
+                group_size = 0
+            group_list[-1].append(output_ind)
+            group_size += output_size
+        return group_list
+
+    def __gen_code_loop(self, output_ind_list, file_handler):
+        """ Generates Java code for a loop over the points evaluating some of
+        the expressions
+
+        Args:
+            output_ind_list : A list of indices of the expressions
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        replacements, reduced_exprs = sympyutils.eliminate_common_subexprs(
+            [self.output_expr_list[output_ind]
+             for output_ind in output_ind_list],
+            JavaBatchCodeGenerator.CSE_SYMBOL_PREFIX)
+        # Symbols of common sub-expressions are only valid in their loop
+        self._intermediate_var_dict = {}
+
+        point_index = JavaBatchCodeGenerator.POINT_INDEX_NAME
+        file_handler.write("for (int %s = 0; %s < %s; %s += 1) {\n" % (
+            point_index, point_index, self.count_var_name, point_index))
+        file_handler.tab()
+        self._gen_code_intermediates(replacements, file_handler)
+        for (output_ind, reduced_expr) in zip(output_ind_list, reduced_exprs):
+            var_name = self._gen_code_expr(reduced_expr, file_handler)
+            file_handler.write("%s = %s;\n" % (
+                self.__get_target(output_ind), var_name))
+        file_handler.untab()
+        file_handler.write("}\n")
+
+    def gen_code(self, file_handler):
+        """ Generates code for a function to evaluate the expressions at many
+        points
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        group_list = self.__get_output_groups()
+        self._gen_func_declaration(file_handler)
+        file_handler.tab()
+        if len(group_list) == 1:
+            self.__gen_code_loop(group_list[0], file_handler)
+            file_handler.untab()
+            file_handler.write("}\n\n")
+            return
+
+        splitter = codegenutil.JavaMethodSplitter(
+            self.func_name,
+            self._get_param_list(),
+            self.modifier_list,
+            file_handler,
+            [self.count_var_name])
+        for output_ind_list in group_list:
+            code_writer = splitter.create_code_writer()
+            self.__gen_code_loop(output_ind_list, code_writer)
+            file_handler.write("%s;\n" % splitter.add_helper(
+                "void", code_writer.get_code()))
+        file_handler.untab()
+        file_handler.write("}\n")
+        splitter.gen_code_helpers(file_handler)
@@ -1,8 +1,15 @@
+import filecmp
+import os
+import os.path as ospath
+import stat
+import tempfile
+
 import sympy
 
+from cStringIO import StringIO
 from sympy.matrices.expressions.matexpr import MatrixElement
 
-from common.vardef import VariableType
+from common.vardef import Variable, VariableType
 
 
 class OperatorType(object):
@@ -98,6 +105,12 @@ class FileCodeWriter(object):
         Instance of this class also takes care of code indentation when
         writing output code strings.
 
+        The code is written to a temporary file in the same directory, which
+        replaces the file when it is closed. The file is thus never left
+        incomplete (e.g. by an interrupted run), and it is left untouched
+        (keeping its modification time, so that build tools do not rebuild
+        it) if its content does not change.
+
     Public object member attributes:
         file_name : Name of the file that is written to
         tab_type : An IndentType enum indicating the generated code should be
@@ -107,6 +120,8 @@ class FileCodeWriter(object):
 
     Private object member attributes:
         __file_handler : An output file handler to write the code to
+        __temp_file_name : Name of the temporary file that the code is
+                           written to before replacing the file
         __num_tab_from_margin : Number of tabs from the left margin
         __indent_str : A string that contains indentation characters that is
                        a prefix to a code line
@@ -132,6 +147,7 @@ class FileCodeWriter(object):
         self.__num_tab_from_margin = 0
         self.__indent_str = self.__get_indent_string()
         self.__file_handler = None
+        self.__temp_file_name = None
 
     def __enter__(self):
         if not self.__file_handler:
@@ -142,16 +158,62 @@ class FileCodeWriter(object):
     def __exit__(self, exc_type, exc_value, traceback):
         if self.__file_handler:
             self.__file_handler.__exit__(exc_type, exc_value, traceback)
+            if exc_type is None:
+                self.__replace_file()
+            else:
+                self.__remove_temp_file()
 
     def open(self):
         """ Opens the file with specified file name for writing code
         """
-        self.__file_handler = open(self.file_name, "w")
+        self.__file_handler = self._create_file_handler()
+
+    def _create_file_handler(self):
+        """ Creates the file handler which the code is written to
+
+        Returns:
+            file_handler : A file object opened for writing
+        """
+        (file_descriptor, self.__temp_file_name) = tempfile.mkstemp(
+            dir=ospath.dirname(ospath.abspath(self.file_name)),
+            prefix="." + ospath.basename(self.file_name))
+        return os.fdopen(file_descriptor, "w")
 
     def close(self):
         """ Closes the file
         """
         self.__file_handler.close()
+        self.__replace_file()
+
+    def __replace_file(self):
+        """ Replaces the file with the temporary file the code is written to,
+        unless their contents are the same
+        """
+        if self.__temp_file_name is None:
+            return
+        try:
+            if ospath.isfile(self.file_name):
+                if filecmp.cmp(self.__temp_file_name, self.file_name,
+                               shallow=False):
+                    return
+                file_mode = stat.S_IMODE(os.stat(self.file_name).st_mode)
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                file_mode = 0666 & ~umask
+            os.chmod(self.__temp_file_name, file_mode)
+            os.rename(self.__temp_file_name, self.file_name)
+        finally:
+            self.__remove_temp_file()
+
+    def __remove_temp_file(self):
+        """ Removes the temporary file the code is written to, if it is left
+        """
+        if self.__temp_file_name is None:
+            return
+        if ospath.exists(self.__temp_file_name):
+            os.remove(self.__temp_file_name)
+        self.__temp_file_name = None
 
     def tab(self):
         """ Increases the number of tabs from left margin by 1
@@ -174,6 +236,32 @@ class FileCodeWriter(object):
         """
         self.__file_handler.write(self.__indent_str + content_str)
 
+    def write_indented(self, code_str):
+        """ Writes code which is already indented (e.g. code generated by a
+            StringCodeWriter with the same indentation) to a file handler
+        Args:
+            code_str : A string representing the code
+        """
+        self.__file_handler.write(code_str)
+
+    def write_lines(self, code_str):
+        """ Writes code which is indented from the left margin (e.g. code
+            generated by a StringCodeWriter without tabs) to a file handler,
+            adding the current indentation to each non-empty line
+        Args:
+            code_str : A string representing the code
+        """
+        for line in code_str.splitlines(True):
+            if line.strip():
+                self.write(line)
+            else:
+                self.__file_handler.write(line)
+
+    def get_num_tab_from_margin(self):
+        """ Returns the number of tabs from the left margin
+        """
+        return self.__num_tab_from_margin
+
     def __get_indent_string(self):
         """ Gets indentation string for a code line
         Returns:
@@ -184,36 +272,225 @@ class FileCodeWriter(object):
         return ' ' * (self.__num_tab_from_margin * self.tab_size)
 
 
+class StringCodeWriter(FileCodeWriter):
+    """ This class is a FileCodeWriter that writes code to a string buffer in
+        memory instead of a file, e.g. to generate pieces of code separately
+        and to write them to a file later in a given order. The buffer is
+        opened by the constructor
+
+    Private object member attributes:
+        __buffer : A string buffer that the code is written to
+    """
+
+    def __init__(
+            self,
+            tab_type=None,
+            tab_size=None,
+            num_tab_from_margin=0):
+        FileCodeWriter.__init__(self, None, tab_type, tab_size)
+        for _ in xrange(num_tab_from_margin):
+            self.tab()
+        self.__buffer = None
+        self.open()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def _create_file_handler(self):
+        """ Creates the string buffer which the code is written to
+
+        Returns:
+            file_handler : A string buffer object
+        """
+        self.__buffer = StringIO()
+        return self.__buffer
+
+    def close(self):
+        """ Does nothing. The buffer is kept so that the code can be read
+        """
+        pass
+
+    def get_code(self):
+        """ Gets the code written so far
+
+        Returns:
+            code_str : A string
+        """
+        return self.__buffer.getvalue()
+
+
+def get_java_type(var):
+    """ Gets the Java type of a variable. For example, "double[]"
+    Args:
+        var : A Variable object
+
+    Returns:
+        A string that is the type in Java
+    """
+    type_decl = "double"
+    if var.props.get(BATCH_INDEX_PROP):
+        # One array of values over the points per element of the variable
+        if var.var_type == VariableType.NUMBER:
+            return type_decl + "[]"
+        return type_decl + "[][]"
+    if var.var_type == VariableType.VECTOR:
+        type_decl += "[]"
+    elif var.var_type == VariableType.MATRIX:
+        type_decl += "[][]"
+    return type_decl
+
+
+def get_unused_var_name(base_name, var_list):
+    """ Gets a name for a generated parameter or variable that does not clash
+        with the names of the given variables
+    Args:
+        base_name : A string which is the preferred name
+        var_list : A list of Variable objects
+
+    Returns:
+        A string which is base_name prefixed by as many underscores as needed
+        to be distinct from the variable names
+    """
+    var_names = set(var.name for var in var_list)
+    var_name = base_name
+    while var_name in var_names:
+        var_name = "_" + var_name
+    return var_name
+
+
+def get_flat_var_list(var_list, diff_var_list, flat_name):
+    """ Gets the variables of methods which take all differentiation variables
+        in a single flat array parameter. Elements of the differentiation
+        variables are stored one after another in the order of diff_var_list,
+        each matrix in row-major order (which is the order of the expanded
+        differentiation variables)
+    Args:
+        var_list : A list of Variable objects
+        diff_var_list : A list of Variable objects used for differentiation
+        flat_name : A string which is the preferred name of the array
+
+    Returns:
+        flat_var_list : A list of Variable objects which are the array,
+            followed by a copy of each differentiation variable whose
+            properties FLAT_ARRAY_PROP and FLAT_OFFSET_PROP give the name of
+            the array and the position of its first element in the array,
+            followed by the other variables of var_list
+    """
+    flat_name = get_unused_var_name(flat_name, var_list)
+    diff_var_names = set(var.name for var in diff_var_list)
+    view_list = []
+    offset = 0
+    for var in diff_var_list:
+        props = dict(var.props)
+        props[FLAT_ARRAY_PROP] = flat_name
+        props[FLAT_OFFSET_PROP] = offset
+        view_list.append(
+            Variable(var.name, var.var_type, var.dimension, props))
+        size = 1
+        for dim_size in var.dimension:
+            size *= int(dim_size)
+        offset += size
+    flat_var = Variable(flat_name, VariableType.VECTOR, (offset,))
+    return [flat_var] + view_list + [
+        var for var in var_list if var.name not in diff_var_names]
+
+
+def get_batch_var_list(var_list, diff_var_list, point_index_name):
+    """ Gets the variables of methods which evaluate at many points at once.
+        Each element of a differentiation variable is given as an array of
+        its values over the points (structure of arrays): a number a as
+        a[p], an element v[i] of a vector as v[i][p], and an element m[i][j]
+        of a matrix with c columns as m[i * c + j][p]. With the flat
+        parameter layout, element k of the flat array x is given as x[k][p].
+        The other variables have the same values at all points
+    Args:
+        var_list : A list of Variable objects
+        diff_var_list : A list of Variable objects used for differentiation
+        point_index_name : A string which is the name of the index of the
+                           point in the generated code
+
+    Returns:
+        batch_var_list : A list of Variable objects which are the variables
+            of var_list, where the differentiation variables (and the flat
+            array holding them) are replaced by a copy whose property
+            BATCH_INDEX_PROP is point_index_name
+    """
+    diff_var_names = set(var.name for var in diff_var_list)
+    batch_var_names = set(diff_var_names)
+    for var in var_list:
+        if var.name in diff_var_names and var.props.get(FLAT_ARRAY_PROP):
+            batch_var_names.add(var.props[FLAT_ARRAY_PROP])
+    batch_var_list = []
+    for var in var_list:
+        if var.name in batch_var_names:
+            props = dict(var.props)
+            props[BATCH_INDEX_PROP] = point_index_name
+            var = Variable(var.name, var.var_type, var.dimension, props)
+        batch_var_list.append(var)
+    return batch_var_list
+
+
+def get_param_list(var_list):
+    """ Gets the variables which are method parameters, leaving out the
+        variables stored in a flat array parameter (see get_flat_var_list)
+    Args:
+        var_list : A list of Variable objects
+
+    Returns:
+        A list of Variable objects
+    """
+    return [var for var in var_list if not var.props.get(FLAT_ARRAY_PROP)]
+
+
+def get_packed_index(row_ind, col_ind):
+    """ Gets the position of an entry of a symmetric matrix whose upper
+        triangle is packed column by column into a flat array (the layout of
+        LAPACK packed storage with UPLO = 'U'). Entry (i, j) with i <= j is at
+        position i + j * (j + 1) / 2, and entry (j, i) shares its position
+    Args:
+        row_ind : An integer which is the row index of the entry
+        col_ind : An integer which is the column index of the entry
+
+    Returns:
+        An integer which is the position of the entry in the flat array
+    """
+    if row_ind > col_ind:
+        (row_ind, col_ind) = (col_ind, row_ind)
+    return row_ind + col_ind * (col_ind + 1) // 2
+
+
 def get_java_func_declaration(
         func_name,
         ret_type,
         var_list,
-        modifier_list):
+        modifier_list,
+        int_param_list=None):
     """ Gets a string which is a function / method declaration in Java.
         For example, "double foo(double x, double y)"
     Args:
         func_name : A string which is a name of the method / function
         ret_type : A string which is a return type of the method / function
-        var_list : A list of Variable objects which are method parameters
+        var_list : A list of Variable objects which are method parameters.
+                   Variables stored in a flat array parameter are left out
         modifier_list : A list of modifiers for the method / function (such as
                         static, private, public, etc.)
+        int_param_list : A list of names of int parameters declared before
+                         the variables
 
     Returns:
         A string that is the function / method declaration in Java
     """
-    param_str = ""
-    is_first = True
-    for var in var_list:
+    param_str = ", ".join(["int " + name for name in int_param_list or []])
+    is_first = not param_str
+    for var in get_param_list(var_list):
         if is_first:
             is_first = False
         else:
             param_str += ", "
-        type_decl = "double"
-        if var.var_type == VariableType.VECTOR:
-            type_decl += "[]"
-        elif var.var_type == VariableType.MATRIX:
-            type_decl += "[][]"
-        param_str += type_decl + " " + var.name
+        param_str += get_java_type(var) + " " + var.name
     modifier_str = " ".join(modifier_list)
     if modifier_str:
         modifier_str += " "
@@ -222,3 +499,431 @@ def get_java_func_declaration(
         rettype_str += " "
     func_delc = "%s%s%s(%s)" % (modifier_str, rettype_str, func_name, param_str)
     return func_delc
+
+
+def get_java_func_call(
+        func_name,
+        var_list,
+        class_name=None,
+        modifier_list=None,
+        int_param_list=None):
+    """ Gets a string which is a direct call to a method in Java, passing the
+        given variables as arguments. For example, "Foo.bar(x, y)"
+    Args:
+        func_name : A string which is a name of the method / function
+        var_list : A list of Variable objects which are passed as arguments.
+                   Variables stored in a flat array parameter are left out
+        class_name : A string which is the name of the class declaring the
+                     method. The call is qualified by the class name if the
+                     method is static
+        modifier_list : A list of modifiers for the method / function (such as
+                        static, private, public, etc.)
+        int_param_list : A list of names of int variables passed as arguments
+                         before the variables
+
+    Returns:
+        A string that is the method call in Java
+    """
+    arg_str = ", ".join((int_param_list or []) + [
+        var.name for var in get_param_list(var_list)])
+    func_call = "%s(%s)" % (func_name, arg_str)
+    if class_name and modifier_list and "static" in modifier_list:
+        func_call = "%s.%s" % (class_name, func_call)
+    return func_call
+
+
+def get_java_array_initializer(value_list):
+    """ Gets a string which is a Java array initializer for the given values.
+        For example, "{0, 1, 2}"
+    Args:
+        value_list : A list of numbers
+
+    Returns:
+        A string that is the array initializer in Java
+    """
+    return "{%s}" % ", ".join([str(value) for value in value_list])
+
+
+def gen_java_allocating_method(
+        file_handler,
+        func_name,
+        var_list,
+        out_var,
+        modifier_list,
+        class_name=None):
+    """ Generates Java code for a method which allocates an array, passes it
+        to the overload of the method taking the array as an extra last
+        parameter (which fills it), and returns it
+    Args:
+        file_handler : an instance of FileCodeWriter that handles writing
+                       generated code to a file.
+        func_name : A string which is a name of the method
+        var_list : A list of Variable objects which are method parameters
+        out_var : A Variable object describing the type and the dimension of
+                  the array
+        modifier_list : A list of modifiers for the method
+        class_name : A string which is the name of the class declaring the
+                     methods
+    """
+    temp_var = Variable("__temp", out_var.var_type, out_var.dimension)
+    temp_type = get_java_type(temp_var)
+    func_declaration = get_java_func_declaration(
+        func_name, temp_type, var_list, modifier_list)
+    file_handler.write(func_declaration + " {\n")
+    file_handler.tab()
+    file_handler.write("%s %s = new double%s;\n" % (
+        temp_type, temp_var.name,
+        "".join(["[%d]" % size for size in temp_var.dimension])))
+    file_handler.write("%s;\n" % get_java_func_call(
+        func_name, list(var_list) + [temp_var], class_name, modifier_list))
+    file_handler.write("return %s;\n" % temp_var.name)
+    file_handler.untab()
+    file_handler.write("}\n\n")
+
+
+def get_c_type(var):
+    """ Gets the C type of a function parameter for a variable. Vectors and
+        matrices (in row-major order) are passed as pointers to their first
+        element, which are read-only and restrict-qualified since they are
+        not aliased by other pointer parameters. For example,
+        "const double *restrict"
+    Args:
+        var : A Variable object
+
+    Returns:
+        A string that is the type in C
+    """
+    if var.var_type == VariableType.NUMBER:
+        return "double"
+    return "const double *restrict"
+
+
+def get_c_func_declaration(
+        func_name,
+        ret_type,
+        var_list,
+        modifier_list,
+        out_name_list=None):
+    """ Gets a string which is a function declaration in C.
+        For example, "double foo(double x, const double *restrict v)"
+    Args:
+        func_name : A string which is a name of the function
+        ret_type : A string which is a return type of the function
+        var_list : A list of Variable objects which are function parameters.
+                   Variables stored in a flat array parameter are left out
+        modifier_list : A list of modifiers for the function (such as static)
+        out_name_list : A list of names of (restrict-qualified) pointer
+                        parameters receiving results, declared after the
+                        variables
+
+    Returns:
+        A string that is the function declaration in C
+    """
+    param_list = ["%s %s" % (get_c_type(var), var.name)
+                  for var in get_param_list(var_list)]
+    param_list += ["double *restrict " + name for name in out_name_list or []]
+    param_str = ", ".join(param_list)
+    if not param_str:
+        param_str = "void"
+    return " ".join(list(modifier_list) + [
+        ret_type, "%s(%s)" % (func_name, param_str)])
+
+
+def get_c_func_call(func_name, var_list, out_name_list=None):
+    """ Gets a string which is a call to a function in C, passing the given
+        variables as arguments. For example, "foo(x, v)"
+    Args:
+        func_name : A string which is a name of the function
+        var_list : A list of Variable objects which are passed as arguments.
+                   Variables stored in a flat array parameter are left out
+        out_name_list : A list of names of pointers receiving results, passed
+                        as arguments after the variables
+
+    Returns:
+        A string that is the function call in C
+    """
+    arg_list = [var.name for var in get_param_list(var_list)]
+    arg_list += out_name_list or []
+    return "%s(%s)" % (func_name, ", ".join(arg_list))
+
+
+def get_python_func_declaration(func_name, var_list, out_name_list=None):
+    """ Gets a string which is a function declaration in Python.
+        For example, "def foo(x, v, out=None):"
+    Args:
+        func_name : A string which is a name of the function
+        var_list : A list of Variable objects which are function parameters.
+                   Variables stored in a flat array parameter are left out
+        out_name_list : A list of names of optional parameters (defaulting to
+                        None) receiving results, declared after the variables
+
+    Returns:
+        A string that is the function declaration in Python
+    """
+    param_list = [var.name for var in get_param_list(var_list)]
+    param_list += [name + "=None" for name in out_name_list or []]
+    return "def %s(%s):" % (func_name, ", ".join(param_list))
+
+
+def get_python_func_call(func_name, var_list):
+    """ Gets a string which is a call to a function in Python, passing the
+        given variables as arguments. For example, "foo(x, v)"
+    Args:
+        func_name : A string which is a name of the function
+        var_list : A list of Variable objects which are passed as arguments.
+                   Variables stored in a flat array parameter are left out
+
+    Returns:
+        A string that is the function call in Python
+    """
+    arg_list = [var.name for var in get_param_list(var_list)]
+    return "%s(%s)" % (func_name, ", ".join(arg_list))
+
+
+# The name of the function of a generated NumPy module returning the number of
+# points its arguments are given at (i.e. the size of their leading axis)
+NUMPY_NUM_POINTS_FUNC_NAME = "_num_points"
+
+
+def get_numpy_empty_array(var_list, shape_list):
+    """ Gets a string which is Python code creating an uninitialized NumPy
+        array for results at the points the variables are given at. For
+        example, "numpy.empty((_num_points(x, v), 3, 3))"
+    Args:
+        var_list : A list of Variable objects which are given at the points
+        shape_list : A list of integers which is the shape of the result at
+                     a point
+
+    Returns:
+        A string that is the Python expression
+    """
+    dim_list = [get_python_func_call(NUMPY_NUM_POINTS_FUNC_NAME, var_list)]
+    dim_list += [str(size) for size in shape_list]
+    return "numpy.empty((%s))" % ", ".join(dim_list)
+
+
+# The preferred name of the array parameter of methods that write their results
+# into an array supplied by the caller
+DEFAULT_OUTPUT_PARAM_NAME = "out"
+
+# The preferred name of the array parameter holding all differentiation
+# variables in the flat parameter layout
+DEFAULT_FLAT_PARAM_NAME = "x"
+
+# Properties of a variable stored in a flat array parameter, giving the name
+# of the array and the position of the first element of the variable in it
+FLAT_ARRAY_PROP = "flatarray"
+FLAT_OFFSET_PROP = "flatoffset"
+
+# Property of a variable given as arrays of values over many points (see
+# get_batch_var_list), which is the name of the index of the point
+BATCH_INDEX_PROP = "batchindex"
+
+# HotSpot does not JIT-compile methods of more than 8000 bytes of bytecode
+# (HugeMethodLimit), and javac rejects methods of more than 64KB of bytecode.
+# Sizes of generated methods are only estimated, so methods are split well
+# below the limit
+JAVA_METHOD_SIZE_LIMIT = 6000
+
+
+def estimate_java_call_size(var_list):
+    """ Estimates the bytecode size (in bytes) of a call to a static method,
+        passing the given variables as arguments
+
+    Args:
+        var_list : A list of Variable objects which are passed as arguments
+
+    Returns:
+        An integer which is the estimated size
+    """
+    # A load instruction per argument, and the call instruction
+    return 2 * len(get_param_list(var_list)) + 3
+
+
+def estimate_java_array_store_size(num_dims):
+    """ Estimates the bytecode size (in bytes) of storing a value (which is
+        already computed) into an element of an array parameter
+
+    Args:
+        num_dims : An integer which is the number of indices of the element
+
+    Returns:
+        An integer which is the estimated size
+    """
+    # Loads of the array, of the value and of the indices, the accesses to
+    # inner arrays and the store instruction
+    return 4 * num_dims + 5
+
+
+class JavaMethodSplitter(object):
+    """ This class moves code of a generated Java method into private helper
+        methods, so that the estimated bytecode size of each method stays under
+        JAVA_METHOD_SIZE_LIMIT. Helper methods are named by the name of the
+        method followed by PART_SUFFIX and a number, and take the given
+        parameters. They either execute a sequence of statements of the
+        method, or return the value of an expression. Their code is kept until
+        it is written after the method.
+
+        Code is given as strings which are indented from the left margin,
+        e.g. code generated by a StringCodeWriter created by the splitter.
+        Statements are given as pairs (code, size) in which size is the
+        estimated bytecode size of the code. They may only use the parameters
+        of helper methods (and local variables they declare themselves).
+
+    Public object member attributes:
+        func_name : A string which is the name of the method
+        param_list : A list of Variable objects which are the parameters of
+                     helper methods
+        int_param_list : A list of names of int parameters of helper methods,
+                         declared before param_list
+        modifier_list : A list of strings which are the modifiers of helper
+                        methods
+        tab_type : An IndentType enum indicating the indentation of the code
+        tab_size : An integer indicating the tab size
+
+    Private object member attributes:
+        __helper_code_list : A list of strings which are the code of the
+                             helper methods
+    """
+
+    PART_SUFFIX = "_part"
+
+    def __init__(
+            self,
+            func_name,
+            param_list,
+            modifier_list,
+            file_handler,
+            int_param_list=None):
+        """ Class constructor. The code is indented in the same way as the
+            code written by the given FileCodeWriter
+        """
+        self.func_name = func_name
+        self.param_list = param_list
+        if int_param_list is None:
+            self.int_param_list = []
+        else:
+            self.int_param_list = int_param_list
+        self.modifier_list = ["private"]
+        if "static" in modifier_list:
+            self.modifier_list.append("static")
+        self.tab_type = file_handler.tab_type
+        self.tab_size = file_handler.tab_size
+        self.__helper_code_list = []
+
+    def create_code_writer(self):
+        """ Creates a writer for code indented from the left margin
+
+        Returns:
+            code_writer : A StringCodeWriter object
+        """
+        return StringCodeWriter(self.tab_type, self.tab_size)
+
+    def get_call_size(self):
+        """ Returns the estimated bytecode size of a call to a helper method
+        """
+        return estimate_java_call_size(self.param_list) + (
+            2 * len(self.int_param_list))
+
+    def add_helper(self, ret_type, body_code):
+        """ Adds a helper method
+
+        Args:
+            ret_type : A string which is the return type of the helper method
+            body_code : A string which is the code of the method body
+
+        Returns:
+            func_call : A string which is a call to the helper method
+        """
+        func_name = "%s%s%d" % (
+            self.func_name, JavaMethodSplitter.PART_SUFFIX,
+            len(self.__helper_code_list))
+        code_writer = self.create_code_writer()
+        code_writer.write(get_java_func_declaration(
+            func_name, ret_type, self.param_list, self.modifier_list,
+            self.int_param_list) + " {\n")
+        code_writer.tab()
+        code_writer.write_lines(body_code)
+        code_writer.untab()
+        code_writer.write("}\n\n")
+        self.__helper_code_list.append(code_writer.get_code())
+        return get_java_func_call(
+            func_name, self.param_list, int_param_list=self.int_param_list)
+
+    def group_statements(self, statement_list, size_limit):
+        """ Moves consecutive statements into helper methods until the total
+            estimated size of the statements is under a limit. Each helper
+            method executes statements of total estimated size under
+            JAVA_METHOD_SIZE_LIMIT, and is replaced by a call statement. Calls
+            are grouped again if there are too many of them
+
+        Args:
+            statement_list : A list of pairs (code, size) of statements
+            size_limit : An integer which is the limit of the total estimated
+                         size of the statements kept in the method
+
+        Returns:
+            statement_list : A list of pairs (code, size) of the statements
+                             (and calls to helper methods) in the same
+                             execution order
+        """
+        total_size = sum(size for (_, size) in statement_list)
+        call_size = self.get_call_size()
+        while total_size > size_limit:
+            grouped_statement_list = []
+            part_code_list = []
+            part_size = 0
+            for (code, size) in statement_list + [(None, None)]:
+                if part_code_list and (
+                        code is None or
+                        part_size + size > JAVA_METHOD_SIZE_LIMIT):
+                    if len(part_code_list) == 1:
+                        grouped_statement_list.append(
+                            (part_code_list[0], part_size))
+                    else:
+                        func_call = self.add_helper(
+                            "void", "".join(part_code_list))
+                        grouped_statement_list.append(
+                            (func_call + ";\n", call_size))
+                    part_code_list = []
+                    part_size = 0
+                if code is not None:
+                    part_code_list.append(code)
+                    part_size += size
+            grouped_size = sum(size for (_, size) in grouped_statement_list)
+            statement_list = grouped_statement_list
+            if grouped_size >= total_size:
+                # Statements are too large to be grouped
+                break
+            total_size = grouped_size
+        return statement_list
+
+    def gen_code_statements(
+            self,
+            file_handler,
+            statement_list,
+            size_limit=None):
+        """ Writes statements of the method, after moving them into helper
+            methods if their total estimated size is above a limit
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+            statement_list : A list of pairs (code, size) of statements
+            size_limit : An integer which is the limit of the total estimated
+                         size of the statements kept in the method. It is
+                         JAVA_METHOD_SIZE_LIMIT if it is None
+        """
+        if size_limit is None:
+            size_limit = JAVA_METHOD_SIZE_LIMIT
+        for (code, _) in self.group_statements(statement_list, size_limit):
+            file_handler.write_lines(code)
+
+    def gen_code_helpers(self, file_handler):
+        """ Writes the code of the helper methods added so far
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        for helper_code in self.__helper_code_list:
+            file_handler.write_lines(helper_code)
+        self.__helper_code_list = []
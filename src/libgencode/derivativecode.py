@@ -1,9 +1,50 @@
+import multiprocessing
+import time
 from abc import ABCMeta, abstractmethod
+from itertools import groupby
 from sympy import Matrix, MatrixSymbol, Symbol
 
-from common import sympyutils
+from common import profiling, sympyutils
+from common.derivativestore import DerivativeStore
 from common.vardef import VariableType
-from .exprcode import JavaExprCodeGenerator
+from .codegenutil import StringCodeWriter
+from .exprcode import (
+    CExprCodeGenerator, JavaExprCodeGenerator, NumpyExprCodeGenerator)
+
+# The derivative code generator used by a worker process generating code for
+# second-order derivative functions. It is set when the worker process starts
+_worker_code_generator = None
+
+
+def _init_second_order_worker(code_generator):
+    """ Initializes a worker process generating code for second-order
+    derivative functions
+
+    Args:
+        code_generator : A DerivativeCodeGenerator object
+    """
+    global _worker_code_generator
+    _worker_code_generator = code_generator
+
+
+def _gen_code_second_order_task(task):
+    """ Generates code for some second-order derivative functions in a worker
+    process
+
+    Args:
+        task : A tuple whose first element is a list of pairs of indices
+               (i, j) with i <= j, sorted by i, and the other elements are the
+               indentation type, the tab size and the number of tabs from the
+               left margin of the generated code
+
+    Returns:
+        code_str : A string which is the generated code
+    """
+    (entry_list, tab_type, tab_size, num_tab_from_margin) = task
+    code_writer = StringCodeWriter(tab_type, tab_size, num_tab_from_margin)
+    _worker_code_generator._gen_code_second_order_entries(
+        code_writer, entry_list)
+    return code_writer.get_code()
 
 
 class DerivativeCodeGenerator(object):
@@ -20,6 +61,15 @@ class DerivativeCodeGenerator(object):
         modifier_list : A list of strings indicating modifiers for the
                         derivative method / function (such as static, private,
                         public, etc.)
+        intermediate_table : An IntermediateExprTable object containing the
+                             intermediate expressions whose placeholder symbols
+                             may appear in the expression. Derivatives are
+                             computed by the chain rule through them. It is
+                             None if the expression has no intermediate
+                             expressions
+        derivative_store : A DerivativeStore object keeping the derivatives
+                           computed so far. It may be shared with other code
+                           generators, so that derivatives are computed once
 
     Protected object member attributes:
         _expanded_diff_var_list : The expanded diff var list.
@@ -38,7 +88,9 @@ class DerivativeCodeGenerator(object):
             sympy_expr,
             base_func_name=None,
             diff_var_list=None,
-            modifier_list=None):
+            modifier_list=None,
+            intermediate_table=None,
+            derivative_store=None):
         """ Class constructor
         """
         self.var_list = var_list
@@ -55,6 +107,11 @@ class DerivativeCodeGenerator(object):
             self.modifier_list = []
         else:
             self.modifier_list = modifier_list
+        self.intermediate_table = intermediate_table
+        if derivative_store is None:
+            self.derivative_store = DerivativeStore(intermediate_table)
+        else:
+            self.derivative_store = derivative_store
         # Expand the diff_var_list (because it contains differentiation
         # variables) . For example, if v is a variable matrix of size
         # 1 x 3, we add v[0, 1], v[0, 2], v[0, 3] to the list. The hessian
@@ -74,13 +131,18 @@ class DerivativeCodeGenerator(object):
                 for i in xrange(shape[0]):
                     for j in xrange(shape[1]):
                         self._expanded_diff_var_list.append(var_mat[i, j])
-        self._expanded_expr = sympyutils.expand_expr(self.expr, deep=True)
 
     def get_num_expanded_diff_var(self):
         """ Returns the number of variables after expanding the variable list
         """
         return len(self._expanded_diff_var_list)
 
+    def get_expanded_diff_var_list(self):
+        """ Returns the list of sympy symbols or sympy matrix elements after
+        expanding the variable list
+        """
+        return self._expanded_diff_var_list
+
     def get_derivative_func_name(
             self,
             first_var_ind,
@@ -109,6 +171,22 @@ class DerivativeCodeGenerator(object):
             func_name += "_" + str(second_var_ind)
         return func_name
 
+    def get_intermediate_list(self, sympy_expr):
+        """ Gets the intermediate expressions that need to be evaluated before
+        evaluating an expression
+
+        Args:
+            sympy_expr : A sympy expression, such as a derivative expression
+                         returned by get_derivative_expr
+
+        Returns:
+            intermediate_list : A list of pairs (symbol, definition) of
+                                intermediate expressions in evaluation order
+        """
+        if self.intermediate_table is None:
+            return []
+        return self.intermediate_table.get_dependencies(sympy_expr)
+
     @abstractmethod
     def _get_expr_generator_class(self):
         """ Gets the code generator class for derivative expressions
@@ -122,6 +200,91 @@ class DerivativeCodeGenerator(object):
         """
         pass
 
+    def get_derivative_expr(self, first_var_ind, second_var_ind=None):
+        """ Gets the sympy expression of a partial derivative
+        Args:
+            first_var_ind : an integer indicating the index of the first
+                            variable for differentiation
+            second_var_ind : an integer indicating the index of the second
+                             variable for differentiation (maybe None if we
+                             compute first-order derivative)
+
+        Returns:
+            derivative_expr : A sympy symbolic expression which is the partial
+                              derivative of the expression
+        """
+        expr_for_diff = self.expr
+
+        first_var = self._expanded_diff_var_list[first_var_ind]
+        second_var = None
+        if second_var_ind is not None:
+            second_var = self._expanded_diff_var_list[second_var_ind]
+
+        # The expression is expanded (once, on the first miss) only if some
+        # differentiation variable does not appear in it, e.g. when the
+        # variable is only used in a summation
+        depends_on = self.derivative_store.depends_on
+        if not depends_on(self.expr, first_var) or (
+                second_var and not depends_on(self.expr, second_var)):
+            expr_for_diff = self.derivative_store.get_expanded_expr(self.expr)
+
+        derivative_expr = self.derivative_store.differentiate(
+            expr_for_diff, first_var)
+        if second_var:
+            derivative_expr = self.derivative_store.differentiate(
+                derivative_expr, second_var)
+        return derivative_expr
+
+    def get_hessian_sparsity(self):
+        """ Gets the structural sparsity pattern of the Hessian matrix, i.e.
+        the second-order partial derivatives which are not identically zero
+
+        Returns:
+            entry_list : A sorted list of pairs of indices (i, j) with i <= j
+                         such that the second-order partial derivative with
+                         respect to the variables of indices i and j may be
+                         non-zero
+        """
+        expanded_expr = self.derivative_store.get_expanded_expr(self.expr)
+        with profiling.profile_phase("sparsity"):
+            return sympyutils.get_hessian_sparsity(
+                expanded_expr,
+                self._expanded_diff_var_list,
+                self.get_intermediate_list(expanded_expr))
+
+    def get_all_second_order_derivative_exprs(self, entry_list=None):
+        """ Gets the sympy expressions of all second-order partial derivatives
+        with respect to two variables of indices i, j where i <= j. Here we
+        assume the symmetry of second-order derivatives
+
+        Args:
+            entry_list : A list of pairs of indices (i, j) with i <= j, sorted
+                         by i, for which the second-order derivatives are
+                         computed. If it is None, all pairs are used
+
+        Returns:
+            A generator of tuples (i, j, derivative_expr) in which
+            derivative_expr is a sympy symbolic expression which is the
+            second-order partial derivative with respect to the variables of
+            indices i and j. Tuples are ordered by i, and then by j
+        """
+        if entry_list is None:
+            num_diff_var = self.get_num_expanded_diff_var()
+            entry_list = [(i, j) for i in xrange(num_diff_var)
+                          for j in xrange(i, num_diff_var)]
+        first_order_diff = None
+        prev_first_var_ind = None
+        for (first_var_ind, second_var_ind) in entry_list:
+            if first_var_ind != prev_first_var_ind:
+                first_order_diff = self.derivative_store.differentiate(
+                    self.expr, self._expanded_diff_var_list[first_var_ind])
+                prev_first_var_ind = first_var_ind
+            second_order_diff = self.derivative_store.differentiate(
+                first_order_diff,
+                self._expanded_diff_var_list[second_var_ind]
+            )
+            yield (first_var_ind, second_var_ind, second_order_diff)
+
     def gen_code(
             self,
             file_handler,
@@ -143,34 +306,16 @@ class DerivativeCodeGenerator(object):
                 self.base_func_name followed by first_var_ind, and
                 second_var_ind (if it is not None)
         """
-        use_expanded_expr = False
-        expr_for_diff = self.expr
-
-        first_var = self._expanded_diff_var_list[first_var_ind]
-        second_var = None
-        if second_var_ind:
-            second_var = self._expanded_diff_var_list[second_var_ind]
-
-        if not sympyutils.is_in_expr(self.expr, first_var):
-            use_expanded_expr = True
-        if second_var and not sympyutils.is_in_expr(self.expr, second_var):
-            use_expanded_expr = True
-
-        if use_expanded_expr:
-            expr_for_diff = self._expanded_expr
-
-        if not second_var:
-            derivative_expr = sympyutils.first_order_derivative(
-                expr_for_diff, first_var)
-        else:
-            derivative_expr = sympyutils.second_order_derivative(
-                expr_for_diff,
-                first_var,
-                second_var)
+        derivative_expr = self.get_derivative_expr(
+            first_var_ind, second_var_ind)
         func_name = self.get_derivative_func_name(
             first_var_ind, second_var_ind, auto_add_suffix)
         expr_generator = self._get_expr_generator_class()(
-            self.var_list, derivative_expr, func_name, self.modifier_list)
+            self.var_list,
+            derivative_expr,
+            func_name,
+            self.modifier_list,
+            intermediate_list=self.get_intermediate_list(derivative_expr))
         expr_generator.gen_code(file_handler)
 
     def gen_code_all_first_order(self, file_handler):
@@ -182,9 +327,18 @@ class DerivativeCodeGenerator(object):
                            generated code to a file.
         """
         for var_ind in xrange(self.get_num_expanded_diff_var()):
+            start_time = time.time()
             self.gen_code(file_handler, var_ind, None, True)
+            profiling.add_entry(
+                self.get_derivative_func_name(var_ind, None, True),
+                (var_ind,),
+                time.time() - start_time)
 
-    def gen_code_all_second_order(self, file_handler):
+    def gen_code_all_second_order(
+            self,
+            file_handler,
+            entry_list=None,
+            num_jobs=None):
         """ Generates code for all second-order derivative functions. Note that
             for each derivative function, its name is self.base_func_name
             followed by the two indices i, j of two variables used in
@@ -193,25 +347,82 @@ class DerivativeCodeGenerator(object):
         Args:
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
+            entry_list : A list of pairs of indices (i, j) with i <= j, sorted
+                         by i, for which derivative functions are generated.
+                         If it is None, functions for all pairs are generated
+            num_jobs : An integer indicating the number of worker processes
+                       differentiating and generating code in parallel. Each
+                       worker handles a row (the pairs with the same i) at a
+                       time, and the code of the rows is written in order, so
+                       it is the same as the code generated serially. If it
+                       is None or 1, no worker process is used
+        """
+        if self.intermediate_table is not None:
+            # Fix the names of derivative symbols before they are created by
+            # separate processes
+            self.intermediate_table.register_variables(
+                self._expanded_diff_var_list)
+        if entry_list is None:
+            num_diff_var = self.get_num_expanded_diff_var()
+            entry_list = [(i, j) for i in xrange(num_diff_var)
+                          for j in xrange(i, num_diff_var)]
+        row_entry_lists = [
+            list(row_entries) for (_, row_entries)
+            in groupby(entry_list, key=lambda entry: entry[0])]
+        if num_jobs is None or num_jobs <= 1 or len(row_entry_lists) <= 1:
+            self._gen_code_second_order_entries(file_handler, entry_list)
+            return
+
+        tasks = [(row_entries,
+                  file_handler.tab_type,
+                  file_handler.tab_size,
+                  file_handler.get_num_tab_from_margin())
+                 for row_entries in row_entry_lists]
+        pool = multiprocessing.Pool(
+            min(num_jobs, len(tasks)),
+            _init_second_order_worker,
+            (self,))
+        try:
+            for code_str in pool.imap(_gen_code_second_order_task, tasks):
+                file_handler.write_indented(code_str)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+    def _gen_code_second_order_entries(self, file_handler, entry_list):
+        """ Generates code for second-order derivative functions
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+            entry_list : A list of pairs of indices (i, j) with i <= j, sorted
+                         by i, for which derivative functions are generated
         """
-        num_diff_var = self.get_num_expanded_diff_var()
-        for first_var_ind in xrange(num_diff_var):
-            first_order_diff = sympyutils.first_order_derivative(
-                self.expr, self._expanded_diff_var_list[first_var_ind])
-            for second_var_ind in xrange(first_var_ind, num_diff_var):
-                func_name = self.get_derivative_func_name(
-                    first_var_ind, second_var_ind, True)
-                second_order_diff = sympyutils.first_order_derivative(
-                    first_order_diff,
-                    self._expanded_diff_var_list[second_var_ind]
-                )
-                expr_generator = self._get_expr_generator_class()(
-                    self.var_list,
-                    second_order_diff,
-                    func_name,
-                    self.modifier_list
-                )
-                expr_generator.gen_code(file_handler)
+        # The time of an entry includes computing the derivatives it needs
+        # (the first-order derivative of a row is computed for its first
+        # entry)
+        start_time = time.time()
+        for diff_info in self.get_all_second_order_derivative_exprs(
+                entry_list):
+            (first_var_ind, second_var_ind, second_order_diff) = diff_info
+            func_name = self.get_derivative_func_name(
+                first_var_ind, second_var_ind, True)
+            expr_generator = self._get_expr_generator_class()(
+                self.var_list,
+                second_order_diff,
+                func_name,
+                self.modifier_list,
+                intermediate_list=self.get_intermediate_list(
+                    second_order_diff)
+            )
+            expr_generator.gen_code(file_handler)
+            profiling.add_entry(
+                func_name,
+                (first_var_ind, second_var_ind),
+                time.time() - start_time)
+            start_time = time.time()
 
 
 class JavaDerivativeCodeGenerator(DerivativeCodeGenerator):
@@ -227,12 +438,15 @@ class JavaDerivativeCodeGenerator(DerivativeCodeGenerator):
             sympy_expr,
             base_func_name=None,
             diff_var_list=None,
-            modifier_list=None):
+            modifier_list=None,
+            intermediate_table=None,
+            derivative_store=None):
         """ Class constructor
         """
         DerivativeCodeGenerator.__init__(
             self, var_list, sympy_expr, base_func_name,
-            diff_var_list, modifier_list)
+            diff_var_list, modifier_list, intermediate_table,
+            derivative_store)
 
     def _get_expr_generator_class(self):
         """ Gets the Java code generator class for derivative expressions
@@ -242,3 +456,69 @@ class JavaDerivativeCodeGenerator(DerivativeCodeGenerator):
                               ExprCodeGenerator
         """
         return JavaExprCodeGenerator
+
+
+class CDerivativeCodeGenerator(DerivativeCodeGenerator):
+    """
+    This is a class inherited from DerivativeCodeGenerator that generates
+    C code to compute partial derivatives for an input mathematical
+    multivariate expression
+    """
+
+    def __init__(
+            self,
+            var_list,
+            sympy_expr,
+            base_func_name=None,
+            diff_var_list=None,
+            modifier_list=None,
+            intermediate_table=None,
+            derivative_store=None):
+        """ Class constructor
+        """
+        DerivativeCodeGenerator.__init__(
+            self, var_list, sympy_expr, base_func_name,
+            diff_var_list, modifier_list, intermediate_table,
+            derivative_store)
+
+    def _get_expr_generator_class(self):
+        """ Gets the C code generator class for derivative expressions
+
+        Returns:
+            generator_class : The CExprCodeGenerator which is a subclass of
+                              ExprCodeGenerator
+        """
+        return CExprCodeGenerator
+
+
+class NumpyDerivativeCodeGenerator(DerivativeCodeGenerator):
+    """
+    This is a class inherited from DerivativeCodeGenerator that generates
+    Python code to compute partial derivatives for an input mathematical
+    multivariate expression at many points at once with NumPy
+    """
+
+    def __init__(
+            self,
+            var_list,
+            sympy_expr,
+            base_func_name=None,
+            diff_var_list=None,
+            modifier_list=None,
+            intermediate_table=None,
+            derivative_store=None):
+        """ Class constructor
+        """
+        DerivativeCodeGenerator.__init__(
+            self, var_list, sympy_expr, base_func_name,
+            diff_var_list, modifier_list, intermediate_table,
+            derivative_store)
+
+    def _get_expr_generator_class(self):
+        """ Gets the NumPy code generator class for derivative expressions
+
+        Returns:
+            generator_class : The NumpyExprCodeGenerator which is a subclass of
+                              ExprCodeGenerator
+        """
+        return NumpyExprCodeGenerator
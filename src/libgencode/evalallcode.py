@@ -0,0 +1,158 @@
+from common import sympyutils
+from common.vardef import Variable, VariableType
+import libgencode.codegenutil as codegenutil
+from .exprcode import JavaExprCodeGenerator
+
+
+class JavaEvalAllCodeGenerator(JavaExprCodeGenerator):
+    """
+    This is a class inherited from JavaExprCodeGenerator that generates Java
+    code for a single function to evaluate the value, the Jacobian vector and
+    (optionally) the Hessian matrix of an input mathematical expression.
+
+    Common sub-expressions are eliminated over the union of the value, all
+    first-order derivatives and all second-order derivatives, so each shared
+    sub-expression is computed once per function call. The generated function
+    returns the value of the expression, and writes the Jacobian vector and
+    the Hessian matrix into arrays passed in by the caller. The Hessian matrix
+    is written either as a dense matrix, as a flat array of the given entries
+    (in the order they are given) if it is stored in a sparse format, or as
+    its upper triangle packed into a flat array (see
+    codegenutil.get_packed_index).
+
+    Public object member attributes:
+        gradient_expr_list : A list of sympy expressions in which the i-th
+                             entry is the first-order partial derivative with
+                             respect to the i-th differentiation variable
+        hessian_expr_list : A list of tuples (i, j, expr) in which expr is a
+                            sympy expression for the second-order partial
+                            derivative with respect to the i-th and the j-th
+                            differentiation variables (i <= j). It is None if
+                            no code for Hessian matrix is generated
+        sparse_hessian : A boolean value indicating whether the Hessian matrix
+                         is written as a flat array of the entries in
+                         hessian_expr_list rather than as a dense matrix
+        packed_hessian : A boolean value indicating whether the upper triangle
+                         of the Hessian matrix is written packed into a flat
+                         array rather than as a dense matrix
+        gradient_var_name : A string indicating the name of the array
+                            parameter receiving the Jacobian vector
+        hessian_var_name : A string indicating the name of the array parameter
+                           receiving the Hessian matrix
+    """
+
+    DEFAULT_FUNC_NAME = "evalAll"
+    DEFAULT_GRADIENT_NAME = "grad"
+    DEFAULT_HESSIAN_NAME = "hess"
+    CSE_SYMBOL_PREFIX = "__cse_"
+
+    def __init__(
+            self,
+            var_list,
+            sympy_expr,
+            gradient_expr_list,
+            hessian_expr_list=None,
+            func_name=None,
+            modifier_list=None,
+            temp_prefix=None,
+            sparse_hessian=False,
+            packed_hessian=False):
+        """ Class constructor
+        """
+        if func_name is None:
+            func_name = JavaEvalAllCodeGenerator.DEFAULT_FUNC_NAME
+        JavaExprCodeGenerator.__init__(
+            self, var_list, sympy_expr, func_name, modifier_list, temp_prefix)
+        self.gradient_expr_list = gradient_expr_list
+        self.hessian_expr_list = hessian_expr_list
+        self.sparse_hessian = sparse_hessian
+        self.packed_hessian = packed_hessian
+        self.gradient_var_name = self.__get_param_name(
+            JavaEvalAllCodeGenerator.DEFAULT_GRADIENT_NAME)
+        self.hessian_var_name = self.__get_param_name(
+            JavaEvalAllCodeGenerator.DEFAULT_HESSIAN_NAME)
+
+    def __get_param_name(self, base_name):
+        """ Gets a name for an output array parameter that does not clash with
+        the names of the expression variables
+
+        Args:
+            base_name : A string which is the preferred parameter name
+
+        Returns:
+            param_name : A string which is base_name prefixed by as many
+                         underscores as needed to be distinct from variable
+                         names
+        """
+        param_name = base_name
+        while param_name in self._var_dict:
+            param_name = "_" + param_name
+        return param_name
+
+    def _get_param_list(self):
+        """ Gets the parameters of the generated method, which are the
+        variables followed by the output arrays
+        Returns:
+            param_list : A list of Variable objects
+        """
+        num_diff_var = len(self.gradient_expr_list)
+        param_list = list(self.var_list)
+        param_list.append(Variable(
+            self.gradient_var_name, VariableType.VECTOR, (num_diff_var,)))
+        if self.hessian_expr_list is not None and self.sparse_hessian:
+            param_list.append(Variable(
+                self.hessian_var_name,
+                VariableType.VECTOR,
+                (len(self.hessian_expr_list),)))
+        elif self.hessian_expr_list is not None and self.packed_hessian:
+            param_list.append(Variable(
+                self.hessian_var_name,
+                VariableType.VECTOR,
+                (num_diff_var * (num_diff_var + 1) // 2,)))
+        elif self.hessian_expr_list is not None:
+            param_list.append(Variable(
+                self.hessian_var_name,
+                VariableType.MATRIX,
+                (num_diff_var, num_diff_var)))
+        return param_list
+
+    def gen_code(self, file_handler):
+        """ Generates code for a function to evaluate the value, the Jacobian
+        vector and the Hessian matrix of the input expression
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        expr_list = [self.expr] + list(self.gradient_expr_list)
+        if self.hessian_expr_list is not None:
+            expr_list += [diff_expr for (_, _, diff_expr)
+                          in self.hessian_expr_list]
+        replacements, reduced_exprs = sympyutils.eliminate_common_subexprs(
+            expr_list, JavaEvalAllCodeGenerator.CSE_SYMBOL_PREFIX)
+
+        num_diff_var = len(self.gradient_expr_list)
+        output_list = [
+            (reduced_exprs[1 + var_ind],
+             ["%s[%d]" % (self.gradient_var_name, var_ind)])
+            for var_ind in xrange(num_diff_var)]
+        if self.hessian_expr_list is not None:
+            hessian_reduced_exprs = reduced_exprs[1 + num_diff_var:]
+            for (ind, diff_info) in enumerate(self.hessian_expr_list):
+                (first_var_ind, second_var_ind, _) = diff_info
+                if self.sparse_hessian:
+                    target_list = ["%s[%d]" % (self.hessian_var_name, ind)]
+                elif self.packed_hessian:
+                    target_list = ["%s[%d]" % (
+                        self.hessian_var_name, codegenutil.get_packed_index(
+                            first_var_ind, second_var_ind))]
+                else:
+                    target_list = ["%s[%d][%d]" % (
+                        self.hessian_var_name, first_var_ind, second_var_ind)]
+                    if first_var_ind != second_var_ind:
+                        target_list.append("%s[%d][%d]" % (
+                            self.hessian_var_name, second_var_ind,
+                            first_var_ind))
+                output_list.append((hessian_reduced_exprs[ind], target_list))
+        # Common sub-expressions are evaluated as intermediate expressions
+        self._gen_code_method(
+            replacements, reduced_exprs[0], output_list, file_handler)
@@ -1,12 +1,60 @@
 from abc import ABCMeta, abstractmethod
+from sympy import Function
+from sympy.matrices import MatrixBase
 
-from .exprcode import JavaExprCodeGenerator
-from .hessiancode import JavaHessianCodeGenerator
-from .jacobiancode import JavaJacobianCodeGenerator
+import libgencode.codegenutil as codegenutil
+from common.derivativestore import DerivativeStore
+from common.vardef import VariableType
+
+from .batchcode import JavaBatchCodeGenerator
+from .codegenutil import OperatorType
+from .derivativecode import JavaDerivativeCodeGenerator
+from .evalallcode import JavaEvalAllCodeGenerator
+from .exprcode import (
+    CExprCodeGenerator, JavaExprCodeGenerator, NumpyExprCodeGenerator)
+from .hessiancode import (
+    CHessianCodeGenerator, HessianCodeGenerator, JavaHessianCodeGenerator,
+    NumpyHessianCodeGenerator)
+from .jacobiancode import (
+    CJacobianCodeGenerator, JacobianCodeGenerator, JavaJacobianCodeGenerator,
+    NumpyJacobianCodeGenerator)
+from .jacobianmatrixcode import JavaJacobianMatrixCodeGenerator
 
 CODE_GENERATOR_VERSION = "0.0.1"
 REPOSITORY_LINK = "https://github.com/truongduy134/derivative-code-generator"
 
+HEADER_COMMENT_LINES = [
+    "Autogenerated by Derivative Code Generator (%s)" % CODE_GENERATOR_VERSION,
+    "",
+    "More information at %s" % REPOSITORY_LINK,
+    "",
+    "DO NOT EDIT UNLESS YOU ARE SURE THAT YOU KNOW WHAT YOU ARE DOING",
+]
+
+
+def gen_header_comment(file_handler):
+    """ Generates the comment at the beginning of a Java / C file, followed by
+    an empty line
+    Args:
+        file_handler : an instance of FileCodeWriter that handles writing
+                       generated code to a file.
+    """
+    star_line = '*' * 78
+    file_handler.write("/%s\n" % star_line)
+    for line in HEADER_COMMENT_LINES:
+        file_handler.write((" * %s" % line).rstrip() + "\n")
+    file_handler.write(" %s/\n\n" % star_line)
+
+
+def gen_python_header_comment(file_handler):
+    """ Generates the comment at the beginning of a Python file
+    Args:
+        file_handler : an instance of FileCodeWriter that handles writing
+                       generated code to a file.
+    """
+    for line in HEADER_COMMENT_LINES:
+        file_handler.write(("# %s" % line).rstrip() + "\n")
+
 
 class ExprClassCodeGenerator(object):
     """
@@ -16,27 +64,64 @@ class ExprClassCodeGenerator(object):
     of the input expression.
 
     Public object member attributes:
-        var_list : A list of Variable objects
-        expr : A sympy symbolic expression
+        var_list : A list of Variable objects. With the flat parameter layout,
+                   it starts with the array parameter holding all
+                   differentiation variables (see codegenutil.get_flat_var_list)
+        expr : A sympy symbolic expression, or a sympy matrix of expressions
+               for a vector-valued expression
+        output_expr_list : A list of sympy symbolic expressions which are the
+                           components of a vector-valued expression (in
+                           row-major order if it is a matrix). It is None if
+                           the expression is scalar-valued
         config : A dictionary with key-value pairs indicating configuration for
                  code generation such as class name, package name, etc.
         diff_var_list : A list of Variable objects used for differentiation
                         when generating hessian and jacobian methods
+        intermediate_table : An IntermediateExprTable object containing the
+                             named sub-expressions whose placeholder symbols
+                             may appear in the expression. It is None if the
+                             expression has no intermediate expressions
+
+    Protected object member attributes:
+        _derivative_store : A DerivativeStore object shared by the code
+                            generators of the class, so that derivatives
+                            needed by several methods (e.g. first-order
+                            derivatives for the Jacobian vector and the
+                            Hessian matrix) are computed once. If the
+                            configuration gives a cache directory, the
+                            derivatives are also kept on disk for later runs
     """
 
     __metaclass__ = ABCMeta
 
     DEFAULT_CLASS_NAME = "MathExpression"
     DEFAULT_EVAL_FUNC_NAME = "eval"
+    DEFAULT_EVAL_ALL_FUNC_NAME = "evalAll"
     DEFAULT_HESSIAN_FUNC_NAME = "hessian"
     DEFAULT_JACOBIAN_FUNC_NAME = "jacobian"
+    BATCH_FUNC_SUFFIX = "Batch"
+
+    # Layouts of the parameters of the generated methods. In SEPARATE_PARAMS,
+    # each variable is a parameter. In FLAT_PARAMS, the elements of all
+    # differentiation variables are packed into a single array parameter in
+    # the order of the Jacobian vector, and the other variables are separate
+    # parameters after it
+    SEPARATE_PARAMS = "separate"
+    FLAT_PARAMS = "flat"
+    SUPPORTED_PARAM_LAYOUTS = [SEPARATE_PARAMS, FLAT_PARAMS]
+    DEFAULT_PARAM_LAYOUT = SEPARATE_PARAMS
+
+    # Whether the functions are indented from the header (e.g. since they are
+    # declared inside a class)
+    INDENT_MEMBERS = True
 
     def __init__(
             self,
             var_list,
             sympy_expr,
             config=None,
-            diff_var_list=None):
+            diff_var_list=None,
+            intermediate_table=None):
         """ Class constructor
         """
         self.var_list = var_list
@@ -51,11 +136,94 @@ class ExprClassCodeGenerator(object):
             self.config["classname"] = ""
         if not self.config["classname"]:
             self.config["classname"] = ExprClassCodeGenerator.DEFAULT_CLASS_NAME
+        if "gradient" not in self.config:
+            self.config["gradient"] = ""
+        if not self.config["gradient"]:
+            self.config["gradient"] = JacobianCodeGenerator.DEFAULT_GRADIENT_MODE
+        if "hessianformat" not in self.config:
+            self.config["hessianformat"] = ""
+        if not self.config["hessianformat"]:
+            self.config["hessianformat"] = (
+                HessianCodeGenerator.DEFAULT_HESSIAN_FORMAT)
+        if "evalall" not in self.config:
+            self.config["evalall"] = False
+        if "batch" not in self.config:
+            self.config["batch"] = False
+        if "ctypes" not in self.config:
+            self.config["ctypes"] = False
+        if "cachedir" not in self.config:
+            self.config["cachedir"] = ""
+        if not self.config.get("jobs"):
+            self.config["jobs"] = 1
+        if not self.config.get("paramlayout"):
+            self.config["paramlayout"] = (
+                ExprClassCodeGenerator.DEFAULT_PARAM_LAYOUT)
 
         if diff_var_list is None:
             self.diff_var_list = self.var_list
         else:
             self.diff_var_list = diff_var_list
+        if self.config["paramlayout"] == ExprClassCodeGenerator.FLAT_PARAMS:
+            self.var_list = codegenutil.get_flat_var_list(
+                self.var_list, self.diff_var_list,
+                codegenutil.DEFAULT_FLAT_PARAM_NAME)
+        self.intermediate_table = intermediate_table
+        self._derivative_store = DerivativeStore(
+            intermediate_table, self.config["cachedir"] or None)
+
+        self.output_expr_list = None
+        if isinstance(self.expr, MatrixBase):
+            # Vector-valued expression. Only the value and the Jacobian matrix
+            # are generated
+            self.output_expr_list = list(self.expr)
+            if self.config["gradient"] != JacobianCodeGenerator.SYMBOLIC_MODE:
+                raise NotImplementedError(
+                    "The gradient mode: %s is not supported for vector-valued "
+                    "expressions" % self.config["gradient"])
+            if self.config["evalall"]:
+                raise NotImplementedError(
+                    "evalAll method is not supported for vector-valued "
+                    "expressions")
+            if self.config["batch"]:
+                raise NotImplementedError(
+                    "Batched methods are not supported for vector-valued "
+                    "expressions")
+
+    def is_vector_valued(self):
+        """ Checks if the expression is vector-valued
+
+        Returns:
+            is_vector_valued : A boolean value indicating whether the
+                               expression has more than one output component
+        """
+        return self.output_expr_list is not None
+
+    def _get_intermediate_list(self, sympy_expr):
+        """ Gets the intermediate expressions that need to be evaluated before
+        evaluating an expression
+
+        Args:
+            sympy_expr : A sympy expression
+
+        Returns:
+            intermediate_list : A list of pairs (symbol, definition) of
+                                intermediate expressions in evaluation order
+        """
+        if self.intermediate_table is None:
+            return []
+        return self.intermediate_table.get_dependencies(sympy_expr)
+
+    def _get_inlined_expr(self):
+        """ Gets the expression with all intermediate expressions inlined
+
+        Returns:
+            inlined_expr : A sympy expression (or a sympy matrix) which does
+                           not contain placeholder symbols of intermediate
+                           expressions
+        """
+        if self.intermediate_table is None:
+            return self.expr
+        return self.intermediate_table.inline(self.expr)
 
     @abstractmethod
     def _gen_code_header(self, file_handler):
@@ -132,6 +300,35 @@ class ExprClassCodeGenerator(object):
         """
         pass
 
+    @abstractmethod
+    def _gen_code_eval_all(self, file_handler):
+        """ Generates code for computing the input expression value, its
+        jacobian and its hessian matrix (unless hessian code generation is
+        turned off) in a single function, with common sub-expressions computed
+        only once
+        Subclass should implement this method to generate code in a specific
+        programming language
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        pass
+
+    @abstractmethod
+    def _gen_code_batch(self, file_handler):
+        """ Generates code for computing the input expression value, its
+        jacobian and its hessian matrix (unless hessian code generation is
+        turned off) at many points at once
+        Subclass should implement this method to generate code in a specific
+        programming language
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        pass
+
     @abstractmethod
     def default_file_name(self):
         """ Gets the default file name (with extension) for the source code file
@@ -144,6 +341,19 @@ class ExprClassCodeGenerator(object):
         """
         pass
 
+    def get_extra_file_list(self):
+        """ Gets the files generated together with the source code file of
+        this class (such as header files). Their code is generated after the
+        code of the source code file
+
+        Returns:
+            file_list : A list of pairs (file_name, gen_func) in which
+                        file_name is a file name with extension, and gen_func
+                        is a function taking an instance of FileCodeWriter
+                        that generates the code of the file
+        """
+        return []
+
     def gen_code(self, file_handler):
         """ Generates code for the expression class
         Args:
@@ -151,13 +361,25 @@ class ExprClassCodeGenerator(object):
                            generated code to a file.
         """
         self._gen_code_header(file_handler)
-        file_handler.tab()
+        if self.INDENT_MEMBERS:
+            file_handler.tab()
         self._gen_code_constructor(file_handler)
         self._gen_code_eval(file_handler)
         self._gen_code_jacobian(file_handler)
+        if self.is_vector_valued():
+            # Hessian tensors of vector-valued expressions are not supported
+            if self.INDENT_MEMBERS:
+                file_handler.untab()
+            self._gen_code_footer(file_handler)
+            return
         if not self.config["nohessian"]:
             self._gen_code_hessian(file_handler)
-        file_handler.untab()
+        if self.config["evalall"]:
+            self._gen_code_eval_all(file_handler)
+        if self.config["batch"]:
+            self._gen_code_batch(file_handler)
+        if self.INDENT_MEMBERS:
+            file_handler.untab()
         self._gen_code_footer(file_handler)
 
 
@@ -174,11 +396,13 @@ class JavaExprClassCodeGenerator(ExprClassCodeGenerator):
             var_list,
             sympy_expr,
             config=None,
-            diff_var_list=None):
+            diff_var_list=None,
+            intermediate_table=None):
         """ Class constructor
         """
         ExprClassCodeGenerator.__init__(
-            self, var_list, sympy_expr, config, diff_var_list)
+            self, var_list, sympy_expr, config, diff_var_list,
+            intermediate_table)
 
     def _gen_code_header(self, file_handler):
         """ Generates Java code for the beginning section of a class file,
@@ -190,25 +414,7 @@ class JavaExprClassCodeGenerator(ExprClassCodeGenerator):
                            generated code to a file.
         """
         # Header comment
-        star_line = '*' * 78
-        header_comment = (
-            "/%s"
-            "\n"
-            " * Autogenerated by Derivative Code Generator (%s)\n"
-            " *\n"
-            " * More information at %s\n"
-            " *\n"
-            " * DO NOT EDIT UNLESS YOU ARE SURE THAT YOU KNOW WHAT "
-            "YOU ARE DOING\n"
-            " %s/"
-            "\n\n"
-        )
-        file_handler.write(header_comment % (
-            star_line,
-            CODE_GENERATOR_VERSION,
-            REPOSITORY_LINK,
-            star_line
-        ))
+        gen_header_comment(file_handler)
 
         # Package and class
         if ("package" in self.config) and self.config["package"]:
@@ -225,6 +431,46 @@ class JavaExprClassCodeGenerator(ExprClassCodeGenerator):
         """
         file_handler.write("}\n")
 
+    def __gen_code_vector_eval(self, file_handler):
+        """ Generates Java code for computing the value of a vector-valued
+        expression. One function is generated per output component, and they
+        are called by a function returning the whole output vector
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        modifier_list = ["public", "static"]
+        func_name_list = []
+        for (expr_ind, output_expr) in enumerate(self.output_expr_list):
+            func_name = "%s_%d" % (
+                ExprClassCodeGenerator.DEFAULT_EVAL_FUNC_NAME, expr_ind)
+            func_name_list.append(func_name)
+            code_generator = JavaExprCodeGenerator(
+                self.var_list, output_expr, func_name, modifier_list,
+                intermediate_list=self._get_intermediate_list(output_expr))
+            code_generator.gen_code(file_handler)
+
+        temp_vector = "__temp"
+        func_declaration = codegenutil.get_java_func_declaration(
+            ExprClassCodeGenerator.DEFAULT_EVAL_FUNC_NAME,
+            "double[]",
+            self.var_list,
+            modifier_list)
+        file_handler.write(func_declaration + " {\n")
+        file_handler.tab()
+        file_handler.write("double[] %s = new double[%d];\n" % (
+            temp_vector, len(func_name_list)))
+        for (expr_ind, func_name) in enumerate(func_name_list):
+            func_call = codegenutil.get_java_func_call(
+                func_name, self.var_list, self.config["classname"],
+                modifier_list)
+            file_handler.write("%s[%d] = %s;\n" % (
+                temp_vector, expr_ind, func_call))
+        file_handler.write("return %s;\n" % temp_vector)
+        file_handler.untab()
+        file_handler.write("}\n\n")
+
     def _gen_code_eval(self, file_handler):
         """ Generates Java code for computing the input expression value
 
@@ -232,11 +478,15 @@ class JavaExprClassCodeGenerator(ExprClassCodeGenerator):
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
         """
+        if self.is_vector_valued():
+            self.__gen_code_vector_eval(file_handler)
+            return
         code_generator = JavaExprCodeGenerator(
             self.var_list,
             self.expr,
             ExprClassCodeGenerator.DEFAULT_EVAL_FUNC_NAME,
-            modifier_list=["public", "static"])
+            modifier_list=["public", "static"],
+            intermediate_list=self._get_intermediate_list(self.expr))
         code_generator.gen_code(file_handler)
 
     def _gen_code_jacobian(self, file_handler):
@@ -246,13 +496,28 @@ class JavaExprClassCodeGenerator(ExprClassCodeGenerator):
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
         """
+        if self.is_vector_valued():
+            code_generator = JavaJacobianMatrixCodeGenerator(
+                self.var_list,
+                self.output_expr_list,
+                ExprClassCodeGenerator.DEFAULT_JACOBIAN_FUNC_NAME,
+                self.diff_var_list,
+                ["public", "static"],
+                self.config["classname"],
+                self.intermediate_table,
+                self._derivative_store)
+            code_generator.gen_code(file_handler)
+            return
         code_generator = JavaJacobianCodeGenerator(
             self.var_list,
             self.expr,
             ExprClassCodeGenerator.DEFAULT_JACOBIAN_FUNC_NAME,
             self.diff_var_list,
             ["public", "static"],
-            self.config["classname"])
+            self.config["classname"],
+            self.config["gradient"],
+            self.intermediate_table,
+            self._derivative_store)
         code_generator.gen_code(file_handler)
 
     def _gen_code_hessian(self, file_handler):
@@ -269,9 +534,131 @@ class JavaExprClassCodeGenerator(ExprClassCodeGenerator):
             ExprClassCodeGenerator.DEFAULT_HESSIAN_FUNC_NAME,
             self.diff_var_list,
             ["public", "static"],
-            self.config["classname"])
+            self.config["classname"],
+            self.config["hessianformat"],
+            self.intermediate_table,
+            self._derivative_store,
+            self.config["jobs"])
+        code_generator.gen_code(file_handler)
+
+    def __get_inlined_derivative_exprs(self):
+        """ Gets the expression, its first-order derivatives and its
+        second-order derivatives with all intermediate expressions inlined
+        (since common sub-expression elimination works over the whole
+        expression trees)
+
+        Returns:
+            inlined_expr : A sympy expression
+            gradient_expr_list : A list of sympy expressions in which the i-th
+                                 entry is the first-order derivative with
+                                 respect to the i-th expanded differentiation
+                                 variable
+            hessian_expr_list : A list of tuples (i, j, expr) in which expr is
+                                the second-order derivative with respect to
+                                the i-th and the j-th expanded differentiation
+                                variables (i <= j). Only the structurally
+                                non-zero entries are given in a sparse Hessian
+                                format. It is None if hessian code generation
+                                is turned off
+        """
+        inlined_expr = self._get_inlined_expr()
+        diff_code_generator = JavaDerivativeCodeGenerator(
+            self.var_list, inlined_expr, diff_var_list=self.diff_var_list,
+            derivative_store=self._derivative_store)
+        gradient_expr_list = [
+            diff_code_generator.get_derivative_expr(var_ind)
+            for var_ind in xrange(
+                diff_code_generator.get_num_expanded_diff_var())]
+        hessian_expr_list = None
+        if not self.config["nohessian"]:
+            entry_list = None
+            if self.config["hessianformat"] in [
+                    HessianCodeGenerator.COO_FORMAT,
+                    HessianCodeGenerator.CSR_FORMAT]:
+                entry_list = diff_code_generator.get_hessian_sparsity()
+            hessian_expr_list = list(
+                diff_code_generator.get_all_second_order_derivative_exprs(
+                    entry_list))
+        return (inlined_expr, gradient_expr_list, hessian_expr_list)
+
+    def _gen_code_eval_all(self, file_handler):
+        """ Generates Java code for computing the input expression value, its
+        jacobian and its hessian matrix (unless hessian code generation is
+        turned off) in a single function, with common sub-expressions computed
+        only once
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        (inlined_expr, gradient_expr_list, hessian_expr_list) = (
+            self.__get_inlined_derivative_exprs())
+        sparse_hessian = self.config["hessianformat"] in [
+            HessianCodeGenerator.COO_FORMAT, HessianCodeGenerator.CSR_FORMAT]
+        packed_hessian = (self.config["hessianformat"] ==
+                          HessianCodeGenerator.PACKED_FORMAT)
+        code_generator = JavaEvalAllCodeGenerator(
+            self.var_list,
+            inlined_expr,
+            gradient_expr_list,
+            hessian_expr_list,
+            ExprClassCodeGenerator.DEFAULT_EVAL_ALL_FUNC_NAME,
+            ["public", "static"],
+            sparse_hessian=sparse_hessian,
+            packed_hessian=packed_hessian)
         code_generator.gen_code(file_handler)
 
+    def _gen_code_batch(self, file_handler):
+        """ Generates Java code for computing the input expression value, its
+        jacobian and its hessian matrix (unless hessian code generation is
+        turned off) at many points at once. One function is generated for
+        each of them, in which the entries of the Jacobian vector (or of the
+        Hessian matrix) are the rows of the output array. The rows of the
+        Hessian matrix are its structurally non-zero entries in a sparse
+        format, and the entries of its upper triangle in the order of the
+        packed format (see codegenutil.get_packed_index) otherwise
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        (inlined_expr, gradient_expr_list, hessian_expr_list) = (
+            self.__get_inlined_derivative_exprs())
+        batch_var_list = codegenutil.get_batch_var_list(
+            self.var_list, self.diff_var_list,
+            JavaBatchCodeGenerator.POINT_INDEX_NAME)
+        modifier_list = ["public", "static"]
+        suffix = ExprClassCodeGenerator.BATCH_FUNC_SUFFIX
+
+        JavaBatchCodeGenerator(
+            batch_var_list,
+            [inlined_expr],
+            ExprClassCodeGenerator.DEFAULT_EVAL_FUNC_NAME + suffix,
+            modifier_list,
+            scalar_output=True).gen_code(file_handler)
+        JavaBatchCodeGenerator(
+            batch_var_list,
+            gradient_expr_list,
+            ExprClassCodeGenerator.DEFAULT_JACOBIAN_FUNC_NAME + suffix,
+            modifier_list).gen_code(file_handler)
+        if hessian_expr_list is None:
+            return
+        if self.config["hessianformat"] in [
+                HessianCodeGenerator.COO_FORMAT,
+                HessianCodeGenerator.CSR_FORMAT]:
+            hessian_row_list = [
+                diff_expr for (_, _, diff_expr) in hessian_expr_list]
+        else:
+            hessian_row_list = [None] * len(hessian_expr_list)
+            for (i, j, diff_expr) in hessian_expr_list:
+                hessian_row_list[codegenutil.get_packed_index(i, j)] = (
+                    diff_expr)
+        JavaBatchCodeGenerator(
+            batch_var_list,
+            hessian_row_list,
+            ExprClassCodeGenerator.DEFAULT_HESSIAN_FUNC_NAME + suffix,
+            modifier_list).gen_code(file_handler)
+
     def _gen_code_constructor(self, file_handler):
         """ Generates Java code for class constructor.
 
@@ -290,3 +677,758 @@ class JavaExprClassCodeGenerator(ExprClassCodeGenerator):
             file_name : a string representing a file name with java extension.
         """
         return self.config["classname"] + "." + "java"
+
+
+class CExprClassCodeGenerator(ExprClassCodeGenerator):
+    """
+    This is a class inherited from ExprClassCodeGenerator that generates C
+    (C99) code for functions to evaluate values of the input expression, to
+    evaluate the Jacobian vector of the input expression, and to evaluate the
+    Hessian matrix of the input expression, together with a header file
+    declaring them. Names of the functions are prefixed by the class name
+    (e.g. MathExpression_eval).
+
+    The functions do not allocate memory. Vectors and matrices are passed as
+    restrict-qualified pointers to their elements (see codegenutil.get_c_type),
+    and the Jacobian vector and the Hessian matrix are written into arrays
+    supplied by the caller, whose sizes are macros of the header file. If the
+    configuration "ctypes" is set, a Python module calling the functions of
+    the compiled code through ctypes is generated as well.
+
+    Vector-valued expressions, the adjoint gradient mode, evalAll and batched
+    functions are not supported.
+
+    Private object member attributes:
+        __declaration_list : A list of strings which are the declarations of
+                             the functions generated so far for other files to
+                             call
+        __jacobian_generator : The CJacobianCodeGenerator used to generate the
+                               Jacobian function. It is None until the
+                               function is generated
+        __hessian_generator : The CHessianCodeGenerator used to generate the
+                              Hessian function. It is None until the function
+                              is generated
+    """
+
+    INDENT_MEMBERS = False
+
+    # Name of the shared library loaded by the generated Python module by
+    # default, relative to the directory of the module
+    DEFAULT_LIBRARY_NAME_FORMAT = "lib%s.so"
+
+    # Docstring of the generated Python module, formatted with the class name,
+    # the default library name and the class name
+    LOADER_DOCSTRING = '''"""
+Calls the functions of %s.c compiled into a shared library, e.g. by
+    gcc -O3 -shared -fPIC -o %s %s.c -lm
+Vectors and matrices (in row-major order) are passed as NumPy arrays
+(converted to float64 in C order if needed), as ctypes arrays of c_double, or
+as (nested) sequences of numbers. Results are written into the array passed
+as out, which must be a C-contiguous NumPy array of float64 or a ctypes array
+of c_double of the size of the result (it is never copied), or into a new
+ctypes array which is returned.
+"""
+'''
+
+    # Code of the generated Python module converting arguments to pointers
+    LOADER_HELPER_CODE = (
+        "_DOUBLE_PTR = ctypes.POINTER(ctypes.c_double)\n"
+        "_INT_PTR = ctypes.POINTER(ctypes.c_int)\n"
+        "\n"
+        "\n"
+        "def _check_size(actual_size, size):\n"
+        "  \"\"\" Checks the size of an array, unless the expected size is "
+        "None \"\"\"\n"
+        "  if size is not None and actual_size != size:\n"
+        "    raise ValueError(\n"
+        "      \"Expected %d elements, got %d\" % (size, actual_size))\n"
+        "\n"
+        "\n"
+        "def _get_pointer(value, size, ctype, is_output=False):\n"
+        "  \"\"\" Gets a pointer to the elements of an array of the given "
+        "size (which is\n"
+        "  not checked if it is None). An input NumPy array is converted to "
+        "a\n"
+        "  C-contiguous array of ctype if needed, but an output array is "
+        "never copied,\n"
+        "  since the results are written into it \"\"\"\n"
+        "  if hasattr(value, \"ctypes\"):\n"
+        "    import numpy\n"
+        "    dtype = numpy.dtype(ctype)\n"
+        "    if not is_output:\n"
+        "      value = numpy.ascontiguousarray(value, dtype=dtype)\n"
+        "    elif (value.dtype != dtype or not value.flags.c_contiguous or\n"
+        "          not value.flags.writeable):\n"
+        "      raise ValueError(\n"
+        "        \"Expected a writeable C-contiguous array of %s, got a \"\n"
+        "        \"%s array\" % (dtype, value.dtype))\n"
+        "    _check_size(value.size, size)\n"
+        "    pointer = value.ctypes.data_as(ctypes.POINTER(ctype))\n"
+        "    # Keeps a converted array alive while the pointer is used\n"
+        "    pointer._array = value\n"
+        "    return pointer\n"
+        "  if isinstance(value, ctypes.Array):\n"
+        "    if value._type_ is not ctype:\n"
+        "      raise ValueError(\n"
+        "        \"Expected a ctypes array of %s\" % ctype.__name__)\n"
+        "    _check_size(len(value), size)\n"
+        "    return value\n"
+        "  if is_output:\n"
+        "    raise ValueError(\"Expected a NumPy array or a ctypes array\")\n"
+        "  elem_list = []\n"
+        "  for elem in value:\n"
+        "    if hasattr(elem, \"__len__\"):\n"
+        "      elem_list.extend(elem)\n"
+        "    else:\n"
+        "      elem_list.append(elem)\n"
+        "  _check_size(len(elem_list), size)\n"
+        "  return (ctype * len(elem_list))(*elem_list)\n"
+    )
+
+    def __init__(
+            self,
+            var_list,
+            sympy_expr,
+            config=None,
+            diff_var_list=None,
+            intermediate_table=None):
+        """ Class constructor
+        """
+        ExprClassCodeGenerator.__init__(
+            self, var_list, sympy_expr, config, diff_var_list,
+            intermediate_table)
+        if self.is_vector_valued():
+            raise NotImplementedError(
+                "Vector-valued expressions are not supported for C code")
+        if self.config["gradient"] != JacobianCodeGenerator.SYMBOLIC_MODE:
+            raise NotImplementedError(
+                "The gradient mode: %s is not supported for C code" %
+                self.config["gradient"])
+        if self.config["evalall"]:
+            raise NotImplementedError(
+                "evalAll function is not supported for C code")
+        if self.config["batch"]:
+            raise NotImplementedError(
+                "Batched functions are not supported for C code")
+        self.__declaration_list = []
+        self.__jacobian_generator = None
+        self.__hessian_generator = None
+
+    def __get_func_name(self, base_name):
+        """ Gets the name of a generated function, which is prefixed by the
+        class name since C has a single namespace for functions
+        Args:
+            base_name : A string which is the name of the method in a class
+
+        Returns:
+            func_name : A string
+        """
+        return "%s_%s" % (self.config["classname"], base_name)
+
+    def __get_macro_prefix(self):
+        """ Gets the prefix of the macros of the header file
+        Returns:
+            macro_prefix : A string which is the class name in upper case
+        """
+        return self.config["classname"].upper()
+
+    def _gen_code_header(self, file_handler):
+        """ Generates C code for the beginning section of the source code
+        file, such as comments, file includes, and declarations of the custom
+        functions called by the expression (which are defined elsewhere)
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        gen_header_comment(file_handler)
+        file_handler.write("#include <math.h>\n\n")
+        file_handler.write("#include \"%s.h\"\n\n" % self.config["classname"])
+
+        custom_func_dict = {}
+        for func_expr in self._get_inlined_expr().atoms(Function):
+            if OperatorType.get_operator_type(func_expr) == (
+                    OperatorType.CUSTOM_FUNC):
+                custom_func_dict[func_expr.func.__name__] = len(func_expr.args)
+        for (func_name, num_args) in sorted(custom_func_dict.items()):
+            file_handler.write("double %s(%s);\n" % (
+                func_name, ", ".join(["double"] * num_args)))
+        if custom_func_dict:
+            file_handler.write("\n")
+
+    def _gen_code_footer(self, file_handler):
+        """ Generates C code for the ending section of the source code file.
+        There is none
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        return
+
+    def _gen_code_constructor(self, file_handler):
+        """ Generates C code for class constructor. There is none
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        return
+
+    def _gen_code_eval(self, file_handler):
+        """ Generates C code for computing the input expression value
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        func_name = self.__get_func_name(
+            ExprClassCodeGenerator.DEFAULT_EVAL_FUNC_NAME)
+        self.__declaration_list.append(codegenutil.get_c_func_declaration(
+            func_name, "double", self.var_list, []))
+        code_generator = CExprCodeGenerator(
+            self.var_list,
+            self.expr,
+            func_name,
+            intermediate_list=self._get_intermediate_list(self.expr))
+        code_generator.gen_code(file_handler)
+
+    def _gen_code_jacobian(self, file_handler):
+        """ Generates C code for computing jacobian of the input expression
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        self.__jacobian_generator = CJacobianCodeGenerator(
+            self.var_list,
+            self.expr,
+            self.__get_func_name(
+                ExprClassCodeGenerator.DEFAULT_JACOBIAN_FUNC_NAME),
+            self.diff_var_list,
+            [],
+            self.config["gradient"],
+            self.intermediate_table,
+            self._derivative_store)
+        self.__jacobian_generator.gen_code(file_handler)
+        self.__declaration_list += (
+            self.__jacobian_generator.get_declaration_list())
+
+    def _gen_code_hessian(self, file_handler):
+        """ Generates C code for computing hessian matrix of the input
+        expression
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        self.__hessian_generator = CHessianCodeGenerator(
+            self.var_list,
+            self.expr,
+            self.__get_func_name(
+                ExprClassCodeGenerator.DEFAULT_HESSIAN_FUNC_NAME),
+            self.diff_var_list,
+            [],
+            self.config["hessianformat"],
+            self.intermediate_table,
+            self._derivative_store,
+            self.config["jobs"])
+        self.__hessian_generator.gen_code(file_handler)
+        self.__declaration_list += (
+            self.__hessian_generator.get_declaration_list())
+
+    def _gen_code_eval_all(self, file_handler):
+        """ evalAll function is not supported in C
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        Raises:
+            NotImplementedError : Always
+        """
+        raise NotImplementedError(
+            "evalAll function is not supported for C code")
+
+    def _gen_code_batch(self, file_handler):
+        """ Batched functions are not supported in C
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        Raises:
+            NotImplementedError : Always
+        """
+        raise NotImplementedError(
+            "Batched functions are not supported for C code")
+
+    def default_file_name(self):
+        """ Gets the default file name (with extension) for the source code file
+        of this class.
+
+        Returns:
+            file_name : a string representing a file name with c extension.
+        """
+        return self.config["classname"] + "." + "c"
+
+    def get_extra_file_list(self):
+        """ Gets the files generated together with the source code file, which
+        are the header file, and the Python module loading the compiled code
+        if the configuration "ctypes" is set
+
+        Returns:
+            file_list : A list of pairs (file_name, gen_func) in which
+                        file_name is a file name with extension, and gen_func
+                        is a function taking an instance of FileCodeWriter
+                        that generates the code of the file
+        """
+        file_list = [
+            (self.config["classname"] + ".h", self.__gen_code_c_header)]
+        if self.config["ctypes"]:
+            file_list.append((
+                self.config["classname"] + "_ctypes.py",
+                self.__gen_code_ctypes_loader))
+        return file_list
+
+    def __get_size_list(self):
+        """ Gets the sizes of the arrays supplied by the caller of the
+        generated functions
+
+        Returns:
+            size_list : A list of pairs (name, size) in which name is a string
+                        (used in the names of the macros of the header file)
+                        and size is an integer
+        """
+        size_list = [
+            ("JACOBIAN_SIZE", self.__jacobian_generator.get_output_size())]
+        if self.__hessian_generator is None:
+            return size_list
+        size_list.append((
+            "HESSIAN_SIZE", self.__hessian_generator.get_output_size()))
+        if self.__hessian_generator.is_sparse():
+            (first_index_arr, second_index_arr) = (
+                self.__hessian_generator.get_sparsity_arrays())
+            size_list.append((
+                "HESSIAN_FIRST_INDEX_SIZE", len(first_index_arr)))
+            size_list.append((
+                "HESSIAN_SECOND_INDEX_SIZE", len(second_index_arr)))
+        return size_list
+
+    def __gen_code_c_header(self, file_handler):
+        """ Generates code for the header file declaring the functions of the
+        source code file, and macros for the sizes of the arrays supplied by
+        the caller. The source code file must be generated first
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        gen_header_comment(file_handler)
+        guard_name = self.__get_macro_prefix() + "_H"
+        file_handler.write("#ifndef %s\n" % guard_name)
+        file_handler.write("#define %s\n\n" % guard_name)
+        for (size_name, size) in self.__get_size_list():
+            file_handler.write("#define %s_%s %d\n" % (
+                self.__get_macro_prefix(), size_name, size))
+        file_handler.write("\n")
+        for declaration in self.__declaration_list:
+            file_handler.write(declaration + ";\n")
+        file_handler.write("\n#endif\n")
+
+    def __gen_code_ctypes_loader(self, file_handler):
+        """ Generates code for a Python module with a class loading the
+        compiled code of the source code file (as a shared library) through
+        ctypes, whose methods call the generated functions. The source code
+        file must be generated first
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        class_name = self.config["classname"]
+        lib_name = (CExprClassCodeGenerator.DEFAULT_LIBRARY_NAME_FORMAT %
+                    class_name)
+        gen_python_header_comment(file_handler)
+        file_handler.write(CExprClassCodeGenerator.LOADER_DOCSTRING % (
+            class_name, lib_name, class_name))
+        file_handler.write("\nimport ctypes\nimport os.path\n\n")
+        for (size_name, size) in self.__get_size_list():
+            file_handler.write("%s = %d\n" % (size_name, size))
+        file_handler.write("\n")
+        file_handler.write_lines(CExprClassCodeGenerator.LOADER_HELPER_CODE)
+        file_handler.write("\n\n")
+
+        file_handler.write("class %s(object):\n" % class_name)
+        file_handler.tab()
+        file_handler.write(
+            '""" Functions of the shared library compiled from %s.c """\n'
+            "\n" % class_name)
+        file_handler.write("def __init__(self, lib_path=None):\n")
+        file_handler.tab()
+        file_handler.write("if lib_path is None:\n")
+        file_handler.tab()
+        file_handler.write("lib_path = os.path.join(\n")
+        file_handler.tab()
+        file_handler.write(
+            "os.path.dirname(os.path.abspath(__file__)), \"%s\")\n" %
+            lib_name)
+        file_handler.untab()
+        file_handler.untab()
+        file_handler.write("lib = ctypes.CDLL(lib_path)\n")
+        func_list = self.__get_loader_func_list()
+        for (method_name, func_name, ret_type, arg_type_list, _, _) in (
+                func_list):
+            file_handler.write("self._%s = lib.%s\n" % (
+                method_name, func_name))
+            file_handler.write("self._%s.restype = %s\n" % (
+                method_name, ret_type))
+            file_handler.write("self._%s.argtypes = [%s]\n" % (
+                method_name, ", ".join(arg_type_list)))
+        file_handler.untab()
+
+        for (method_name, _, _, _, param_list, code) in func_list:
+            file_handler.write_lines("\ndef %s(%s):\n" % (
+                method_name, ", ".join(["self"] + param_list)))
+            file_handler.tab()
+            file_handler.write_lines(code)
+            file_handler.untab()
+        file_handler.untab()
+
+    def __get_loader_func_list(self):
+        """ Gets the functions called by the generated Python module, which
+        are the evaluation, Jacobian and Hessian functions, the sparsity
+        function in a sparse Hessian format, and the index and the entry
+        functions in the packed Hessian format
+
+        Returns:
+            func_list : A list of tuples (method_name, func_name, ret_type,
+                        arg_type_list, param_list, code) in which method_name
+                        is the name of the Python method calling the function
+                        named func_name, ret_type and arg_type_list are the
+                        ctypes return type and argument types of the function,
+                        and param_list and code are the parameter names and
+                        the body code of the method
+        """
+        var_param_list = codegenutil.get_param_list(self.var_list)
+        var_type_list = []
+        var_arg_list = []
+        for var in var_param_list:
+            if var.var_type == VariableType.NUMBER:
+                var_type_list.append("ctypes.c_double")
+                var_arg_list.append(var.name)
+                continue
+            size = 1
+            for dim_size in var.dimension:
+                size *= dim_size
+            size_str = "None"
+            if getattr(size, "is_number", True):
+                size_str = str(int(size))
+            var_type_list.append("_DOUBLE_PTR")
+            var_arg_list.append("_get_pointer(%s, %s, ctypes.c_double)" % (
+                var.name, size_str))
+        var_name_list = [var.name for var in var_param_list]
+        out_name = codegenutil.get_unused_var_name(
+            codegenutil.DEFAULT_OUTPUT_PARAM_NAME, self.var_list)
+
+        func_list = [(
+            "eval",
+            self.__get_func_name(
+                ExprClassCodeGenerator.DEFAULT_EVAL_FUNC_NAME),
+            "ctypes.c_double",
+            var_type_list,
+            var_name_list,
+            "return self._eval(%s)\n" % ", ".join(var_arg_list))]
+        method_list = [(
+            "jacobian", ExprClassCodeGenerator.DEFAULT_JACOBIAN_FUNC_NAME)]
+        if self.__hessian_generator is not None:
+            method_list.append((
+                "hessian", ExprClassCodeGenerator.DEFAULT_HESSIAN_FUNC_NAME))
+        for (method_name, base_name) in method_list:
+            size_name = method_name.upper() + "_SIZE"
+            code = (
+                "if %s is None:\n"
+                "  %s = (ctypes.c_double * %s)()\n"
+                "self._%s(%s)\n"
+                "return %s\n") % (
+                    out_name, out_name, size_name, method_name,
+                    ", ".join(var_arg_list + [
+                        "_get_pointer(%s, %s, ctypes.c_double, True)" % (
+                            out_name, size_name)]),
+                    out_name)
+            func_list.append((
+                method_name,
+                self.__get_func_name(base_name),
+                "None",
+                var_type_list + ["_DOUBLE_PTR"],
+                var_name_list + [out_name + "=None"],
+                code))
+        if (self.__hessian_generator is not None and
+                self.__hessian_generator.is_sparse()):
+            func_list.append((
+                "hessian_sparsity",
+                self.__get_func_name(
+                    ExprClassCodeGenerator.DEFAULT_HESSIAN_FUNC_NAME +
+                    "Sparsity"),
+                "None",
+                ["_INT_PTR", "_INT_PTR"],
+                [],
+                "first_index = (ctypes.c_int * HESSIAN_FIRST_INDEX_SIZE)()\n"
+                "second_index = (ctypes.c_int * HESSIAN_SECOND_INDEX_SIZE)()\n"
+                "self._hessian_sparsity(first_index, second_index)\n"
+                "return (list(first_index), list(second_index))\n"))
+        if (self.__hessian_generator is not None and
+                self.__hessian_generator.is_packed()):
+            hessian_func_name = self.__get_func_name(
+                ExprClassCodeGenerator.DEFAULT_HESSIAN_FUNC_NAME)
+            func_list.append((
+                "hessian_index",
+                hessian_func_name + "Index",
+                "ctypes.c_int",
+                ["ctypes.c_int", "ctypes.c_int"],
+                ["i", "j"],
+                "return self._hessian_index(i, j)\n"))
+            func_list.append((
+                "hessian_entry",
+                hessian_func_name + "Entry",
+                "ctypes.c_double",
+                ["_DOUBLE_PTR", "ctypes.c_int", "ctypes.c_int"],
+                ["packed", "i", "j"],
+                "return self._hessian_entry(\n"
+                "  _get_pointer(packed, HESSIAN_SIZE, ctypes.c_double), i, "
+                "j)\n"))
+        return func_list
+
+
+class NumpyExprClassCodeGenerator(ExprClassCodeGenerator):
+    """
+    This is a class inherited from ExprClassCodeGenerator that generates a
+    Python module with functions to evaluate values of the input expression,
+    to evaluate the Jacobian vector of the input expression, and to evaluate
+    the Hessian matrix of the input expression at many points at once with
+    NumPy. The module is named after the class name.
+
+    Variables are given as NumPy arrays whose leading axis is over the points,
+    and every function computes its results at all points by whole-array
+    operations (see NumpyExprCodeGenerator), rather than by a Python loop over
+    the points.
+
+    Vector-valued expressions, the adjoint gradient mode, evalAll and batched
+    functions are not supported.
+    """
+
+    INDENT_MEMBERS = False
+
+    # Code of the generated module getting the number of points of the
+    # arguments of a function
+    NUM_POINTS_HELPER_CODE = (
+        "def %s(*args):\n"
+        "  \"\"\" Gets the number of points the arguments are given at, which "
+        "is the\n"
+        "  largest size of their leading axis \"\"\"\n"
+        "  size_list = [numpy.shape(arg)[0] for arg in args "
+        "if numpy.ndim(arg) > 0]\n"
+        "  return max(size_list) if size_list else 1\n"
+    ) % codegenutil.NUMPY_NUM_POINTS_FUNC_NAME
+
+    def __init__(
+            self,
+            var_list,
+            sympy_expr,
+            config=None,
+            diff_var_list=None,
+            intermediate_table=None):
+        """ Class constructor
+        """
+        ExprClassCodeGenerator.__init__(
+            self, var_list, sympy_expr, config, diff_var_list,
+            intermediate_table)
+        if self.is_vector_valued():
+            raise NotImplementedError(
+                "Vector-valued expressions are not supported for NumPy code")
+        if self.config["gradient"] != JacobianCodeGenerator.SYMBOLIC_MODE:
+            raise NotImplementedError(
+                "The gradient mode: %s is not supported for NumPy code" %
+                self.config["gradient"])
+        if self.config["evalall"]:
+            raise NotImplementedError(
+                "evalAll function is not supported for NumPy code")
+        if self.config["batch"]:
+            raise NotImplementedError(
+                "Batched functions are not supported for NumPy code, whose "
+                "functions are evaluated at many points already")
+
+    def __get_num_diff_var(self):
+        """ Gets the number of entries of the Jacobian vector
+        Returns:
+            num_diff_var : An integer which is the number of elements of the
+                           differentiation variables
+        """
+        num_diff_var = 0
+        for var in self.diff_var_list:
+            size = 1
+            for dim_size in var.dimension:
+                size *= dim_size
+            num_diff_var += int(size)
+        return num_diff_var
+
+    def __get_hessian_shape_description(self):
+        """ Gets a description of the shape of the array computed by the
+        Hessian function for the module docstring
+        Returns:
+            description : A string
+        """
+        num_diff_var = self.__get_num_diff_var()
+        hessian_format = self.config["hessianformat"]
+        if hessian_format == HessianCodeGenerator.DENSE_FORMAT:
+            return "of shape (N, %d, %d)" % (num_diff_var, num_diff_var)
+        if hessian_format == HessianCodeGenerator.PACKED_FORMAT:
+            return ("of shape (N, %d) of the upper triangles packed column\n"
+                    "by column (see hessianIndex and hessianEntry)" % (
+                        num_diff_var * (num_diff_var + 1) // 2))
+        return ("of shape (N, k) of the k structurally non-zero entries in\n"
+                "the upper triangles (at the positions given by "
+                "hessianSparsity)")
+
+    def _gen_code_header(self, file_handler):
+        """ Generates Python code for the beginning section of the module,
+        such as comments, the module docstring, imports and helper functions
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        gen_python_header_comment(file_handler)
+        file_handler.write('"""\n')
+        file_handler.write_lines(
+            "Computes %s and its derivatives at many points at once with "
+            "NumPy.\n"
+            "\n"
+            "Variables are given as NumPy arrays whose leading axis is over "
+            "the N\n"
+            "points, e.g. of shape (N, r, c) for a matrix variable of size "
+            "r x c, and\n"
+            "of shape (N,) for a number variable. The leading axis may have "
+            "size 1 for\n"
+            "a variable whose value is the same at all points.\n"
+            "\n"
+            "eval returns an array of shape (N,), and jacobian returns an "
+            "array of\n"
+            "shape (N, %d)." % (
+                self.config["classname"], self.__get_num_diff_var()))
+        if not self.config["nohessian"]:
+            file_handler.write_lines(
+                " hessian returns an array %s." %
+                self.__get_hessian_shape_description())
+        file_handler.write_lines(
+            "\nIf an array is passed as out, the results are written into "
+            "it instead.\n")
+        custom_func_name_list = sorted(set([
+            func_expr.func.__name__
+            for func_expr in self._get_inlined_expr().atoms(Function)
+            if OperatorType.get_operator_type(func_expr) == (
+                OperatorType.CUSTOM_FUNC)]))
+        if custom_func_name_list:
+            file_handler.write_lines(
+                "\nThe custom functions %s must be set as attributes of the "
+                "module\nbefore use, and work on NumPy arrays.\n" %
+                ", ".join(custom_func_name_list))
+        file_handler.write('"""\n\nimport numpy\n\n\n')
+        file_handler.write_lines(
+            NumpyExprClassCodeGenerator.NUM_POINTS_HELPER_CODE)
+
+    def _gen_code_footer(self, file_handler):
+        """ Generates Python code for the ending section of the module. There
+        is none
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        return
+
+    def _gen_code_constructor(self, file_handler):
+        """ Generates Python code for class constructor. There is none
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        return
+
+    def _gen_code_eval(self, file_handler):
+        """ Generates Python code for computing the input expression value
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        code_generator = NumpyExprCodeGenerator(
+            self.var_list,
+            self.expr,
+            ExprClassCodeGenerator.DEFAULT_EVAL_FUNC_NAME,
+            intermediate_list=self._get_intermediate_list(self.expr))
+        code_generator.gen_code(file_handler)
+
+    def _gen_code_jacobian(self, file_handler):
+        """ Generates Python code for computing jacobian of the input
+        expression
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        code_generator = NumpyJacobianCodeGenerator(
+            self.var_list,
+            self.expr,
+            ExprClassCodeGenerator.DEFAULT_JACOBIAN_FUNC_NAME,
+            self.diff_var_list,
+            [],
+            self.config["gradient"],
+            self.intermediate_table,
+            self._derivative_store)
+        code_generator.gen_code(file_handler)
+
+    def _gen_code_hessian(self, file_handler):
+        """ Generates Python code for computing hessian matrix of the input
+        expression
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        code_generator = NumpyHessianCodeGenerator(
+            self.var_list,
+            self.expr,
+            ExprClassCodeGenerator.DEFAULT_HESSIAN_FUNC_NAME,
+            self.diff_var_list,
+            [],
+            self.config["hessianformat"],
+            self.intermediate_table,
+            self._derivative_store,
+            self.config["jobs"])
+        code_generator.gen_code(file_handler)
+
+    def _gen_code_eval_all(self, file_handler):
+        """ evalAll function is not supported with NumPy
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        Raises:
+            NotImplementedError : Always
+        """
+        raise NotImplementedError(
+            "evalAll function is not supported for NumPy code")
+
+    def _gen_code_batch(self, file_handler):
+        """ Batched functions are not supported with NumPy
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        Raises:
+            NotImplementedError : Always
+        """
+        raise NotImplementedError(
+            "Batched functions are not supported for NumPy code, whose "
+            "functions are evaluated at many points already")
+
+    def default_file_name(self):
+        """ Gets the default file name (with extension) for the source code file
+        of this class.
+
+        Returns:
+            file_name : a string representing a file name with py extension.
+        """
+        return self.config["classname"] + "." + "py"
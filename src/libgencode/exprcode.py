@@ -2,7 +2,7 @@ from abc import ABCMeta, abstractmethod
 
 import libgencode.codegenutil as codegenutil
 from .codegenutil import OperatorType
-from common.vardef import VariableType
+from common.vardef import Variable, VariableType
 
 
 class ExprCodeGenerator(object):
@@ -10,6 +10,12 @@ class ExprCodeGenerator(object):
     This is an abstract class for generating code for an input
     mathematical expression
 
+    The expression tree is walked here for all languages. Subclasses give the
+    code of variable accesses, and the names of the math functions of their
+    language (SUPPORT_MATH_FUNCS). The syntax of statements and loops is the
+    one of C-like languages, unless subclasses override the methods writing
+    it
+
     Public object member attributes:
         var_list : A list of Variable objects
         expr : A sympy symbolic expression
@@ -18,10 +24,20 @@ class ExprCodeGenerator(object):
                     method / function (such as static, private, public, etc.)
         temp_var_prefix : A string indicating the name that is used as a prefix
                    for temporary variables in code generation
+        intermediate_list : A list of pairs (symbol, definition) of
+                            intermediate expressions, in evaluation order.
+                            Each intermediate expression is evaluated once
+                            before the input expression, and its placeholder
+                            symbol is replaced by the variable holding its
+                            value
 
     Protected object member attributes:
         _var_dict : A dictionary that maps variable name to the Variable
                     structure itself
+        _intermediate_var_dict : A dictionary that maps a placeholder symbol
+                                 of an intermediate expression to the name of
+                                 the variable holding its value in the
+                                 generated code
 
     Private object member attributes:
         __num_temp_var_used : An integer indicating the number of temporary
@@ -33,13 +49,22 @@ class ExprCodeGenerator(object):
     DEFAULT_TEMP_NAME = "__temp"
     DEFAULT_FUNC_NAME = "evaluate"
 
+    # A dictionary that maps an operator type to the name of the function
+    # computing it, which takes the operands as arguments
+    SUPPORT_MATH_FUNCS = {}
+
+    # The code of the value of a Dirac delta, which is zero wherever code
+    # evaluates it
+    ZERO_CODE = "0"
+
     def __init__(
             self,
             var_list,
             sympy_expr,
             func_name=None,
             modifier_list=None,
-            temp_prefix=None):
+            temp_prefix=None,
+            intermediate_list=None):
         """ Class constructor
         """
         self.var_list = var_list
@@ -56,8 +81,13 @@ class ExprCodeGenerator(object):
             self.modifier_list = []
         else:
             self.modifier_list = modifier_list
+        if intermediate_list is None:
+            self.intermediate_list = []
+        else:
+            self.intermediate_list = intermediate_list
         self.__num_temp_var_used = 0
         self._var_dict = {var_obj.name: var_obj for var_obj in self.var_list}
+        self._intermediate_var_dict = {}
 
     def _get_nxt_temp_var_name(self):
         """ Gets the name that can be used for the next temporary variable.
@@ -94,11 +124,103 @@ class ExprCodeGenerator(object):
         pass
 
     @abstractmethod
+    def _gen_arr_access_code(self, var_obj, index_tuple):
+        """ Generates code for array / matrix element access (or for access
+        to a number variable, with an empty index tuple)
+        Subclass should implement this method to generate code in a specific
+        programming language
+
+        Args:
+            var_obj : an object containing information about the
+                      array / matrix variable, such as name, type, dimension
+            index_tuple : a tuple indicating the index of the element accessed
+        Returns:
+            A string representing the code to access array / matrix element
+        """
+        pass
+
+    def _get_assign_code(self, var_name, value_code):
+        """ Gets the statement declaring a variable and assigning a value to
+        it
+
+        Args:
+            var_name : A string which is the name of the variable
+            value_code : A string which is the code of the value
+        Returns:
+            A string representing the statement, ending with a line break
+        """
+        return "double %s = %s;\n" % (var_name, value_code)
+
+    def _get_loop_update_code(self, var_name, op_char, value_code):
+        """ Gets the statement adding a value to (or multiplying by a value)
+        the variable accumulating the result of a loop
+
+        Args:
+            var_name : A string which is the name of the variable
+            op_char : A string which is "+" or "*"
+            value_code : A string which is the code of the value
+        Returns:
+            A string representing the statement, ending with a line break
+        """
+        return "%s %s= %s;\n" % (var_name, op_char, value_code)
+
+    def _gen_code_loop_begin(self, loop_range, file_handler):
+        """ Generates code for the beginning of a loop over a range of
+        integers, before its body
+
+        Args:
+            loop_range : A tuple (loop counter, first value, last value)
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        var_loop = str(loop_range[0])
+        file_handler.write("for (int %s = %s; %s < %s; %s += 1) {\n" % (
+            var_loop, str(loop_range[1]), var_loop, str(loop_range[2] + 1),
+            var_loop))
+
+    def _gen_code_loop_end(self, file_handler):
+        """ Generates code for the end of a loop, after its body
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        file_handler.write("}\n")
+
+    def _get_func_call_code(self, expr_op_type, operand_names):
+        """ Gets the code computing an operator by a math function
+
+        Args:
+            expr_op_type : An integer which is the operator type
+            operand_names : A list of strings which are the code of the
+                            operands
+        Returns:
+            A string representing the code of the value
+        Raises:
+            Exception : An error if the language has no function for the
+                        operator
+        """
+        if expr_op_type not in self.SUPPORT_MATH_FUNCS:
+            # Operators in which we do not know how to generate code
+            raise Exception(
+                "Cannot generate code for operator %s" % expr_op_type)
+        return "%s(%s)" % (
+            self.SUPPORT_MATH_FUNCS[expr_op_type], ", ".join(operand_names))
+
+    def _get_operands(self, sympy_expr):
+        """ Gets the operands of an expression whose code is generated
+
+        Args:
+            sympy_expr : a sympy expression
+
+        Returns:
+            operands : A sequence of sympy expressions
+        """
+        return sympy_expr.args
+
     def _gen_code_expr(self, sympy_expr, file_handler):
         """ Generates code for a function to evaluate input expression
         if necessary. If the expression is a singleton, no code is generated
-        Subclass should implement this method to generate code in a specific
-        programming language
 
         Args:
             sympy_expr : a sympy expression that needs code generation
@@ -109,8 +231,8 @@ class ExprCodeGenerator(object):
             result when evaluting the expression
         Example:
             1) d = self._gen_code_expr(a + b * c, file_handler) generates code
-            to compute the expression a + b * c; and d is the variable name such
-            that d = a + b * c
+            to compute the expression a + b * c; and d is the variable name
+            such that d = a + b * c
             2) d = self._gen_code_expr(a, file_handler) does not generate
             any code. It simply returns a string 'a' representing the variable
             holding the final value
@@ -118,7 +240,122 @@ class ExprCodeGenerator(object):
             generate any code. It simply return a string 'm[0][5]'
             representing the variable holding final value
         """
-        pass
+        if sympy_expr in self._intermediate_var_dict:
+            # Intermediate expression whose value is already computed
+            return self._intermediate_var_dict[sympy_expr]
+        return self._gen_code_node(sympy_expr, file_handler)
+
+    def _gen_code_node(self, sympy_expr, file_handler):
+        """ Generates code to evaluate the root of an expression tree, after
+        generating code to evaluate its operands
+
+        Args:
+            sympy_expr : a sympy expression that needs code generation
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        Returns:
+            A string representing the name of the variable holding the final
+            result when evaluating the expression
+        """
+        expr_op_type = OperatorType.get_operator_type(sympy_expr)
+
+        if OperatorType.is_singleton_op(expr_op_type):
+            if expr_op_type == OperatorType.NUMBER:
+                final_var_str = str(sympy_expr.evalf())
+            elif expr_op_type == OperatorType.SYMBOL:
+                final_var_str = str(sympy_expr)
+                if final_var_str in self._var_dict:
+                    final_var_str = self._gen_arr_access_code(
+                        self._var_dict[final_var_str], ())
+            else:
+                # Matrix / Vector access
+                var_name = sympy_expr.args[0].name
+                index_tuple = sympy_expr.args[1:]
+                final_var_str = self._gen_arr_access_code(
+                    self._var_dict[var_name], index_tuple)
+            return final_var_str
+
+        if expr_op_type in [OperatorType.SUM_LOOP, OperatorType.PRODUCT_LOOP]:
+            # Handle loop operation seperately
+            return self._gen_code_loop(sympy_expr, file_handler)
+
+        # Sympy expression is not a singleton nor loop operation
+        final_var_str = self._get_nxt_temp_var_name()
+        operand_names = [self._gen_code_expr(operand, file_handler)
+                         for operand in self._get_operands(sympy_expr)]
+
+        if expr_op_type == OperatorType.DIRAC_DELTA_REAL:
+            value_code = self.ZERO_CODE
+        elif expr_op_type == OperatorType.EXTRACT_REAL:
+            value_code = operand_names[0]
+        elif expr_op_type == OperatorType.COT_REAL:
+            value_code = "%s / %s" % (
+                self._get_func_call_code(OperatorType.COS_REAL, operand_names),
+                self._get_func_call_code(OperatorType.SIN_REAL, operand_names))
+        elif expr_op_type in [OperatorType.ADD_REAL, OperatorType.MUL_REAL]:
+            op_char = " + " if expr_op_type == OperatorType.ADD_REAL else " * "
+            value_code = op_char.join(operand_names)
+        elif expr_op_type == OperatorType.CUSTOM_FUNC:
+            value_code = "%s(%s)" % (
+                sympy_expr.func.__name__,
+                ', '.join(operand_names))
+        else:
+            value_code = self._get_func_call_code(expr_op_type, operand_names)
+
+        file_handler.write(self._get_assign_code(final_var_str, value_code))
+        return final_var_str
+
+    def _gen_code_loop(self, sympy_expr, file_handler):
+        """ Generates code for a function to evaluate loop operation (e.g.
+        taking sum or product over a sequence of elements)
+
+        Args:
+            sympy_expr : a sympy expression that needs code generation
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        Returns:
+            A string representing the name of the variable holding the final
+            result when evaluating the expression
+        """
+        operands = sympy_expr.args
+        expr_op_type = OperatorType.get_operator_type(sympy_expr)
+        temp_var_name = self._get_nxt_temp_var_name()
+
+        init_value = 0.0
+        op_char = "+"
+        if expr_op_type == OperatorType.PRODUCT_LOOP:
+            init_value = 1.0
+            op_char = "*"
+        file_handler.write(self._get_assign_code(
+            temp_var_name, "%f" % init_value))
+        for loop_range in operands[1:]:
+            self._gen_code_loop_begin(loop_range, file_handler)
+            file_handler.tab()
+
+        inner_temp_var_name = self._gen_code_expr(operands[0], file_handler)
+        file_handler.write(self._get_loop_update_code(
+            temp_var_name, op_char, inner_temp_var_name))
+
+        for _ in xrange(len(operands[1:])):
+            file_handler.untab()
+            self._gen_code_loop_end(file_handler)
+
+        return temp_var_name
+
+    def _gen_code_intermediates(self, intermediate_list, file_handler):
+        """ Generates code to evaluate intermediate expressions, and records
+        the variables holding their values so that their placeholder symbols
+        are replaced by these variables in later generated code
+
+        Args:
+            intermediate_list : A list of pairs (symbol, definition) of
+                                intermediate expressions in evaluation order
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        for (symbol, definition) in intermediate_list:
+            self._intermediate_var_dict[symbol] = self._gen_code_expr(
+                definition, file_handler)
 
     def gen_code(self, file_handler):
         """ Generates code for a function to evaluate the input expression
@@ -128,6 +365,7 @@ class ExprCodeGenerator(object):
         """
         self._gen_func_declaration(file_handler)
         file_handler.tab()
+        self._gen_code_intermediates(self.intermediate_list, file_handler)
         final_var_name = self._gen_code_expr(self.expr, file_handler)
         file_handler.untab()
         self._gen_return_code(final_var_name, file_handler)
@@ -137,25 +375,81 @@ class JavaExprCodeGenerator(ExprCodeGenerator):
     """
     This is a class inherited from ExprCodeGenerator that generates Java code
     to compute the input math expressions
+
+    If the estimated bytecode size of the generated method is above
+    codegenutil.JAVA_METHOD_SIZE_LIMIT, its code is split into private helper
+    methods written after it (see codegenutil.JavaMethodSplitter), so that
+    the method is JIT-compiled:
+        - Values of intermediate expressions are kept in an array instead of
+          local variables, and the statements computing them are grouped into
+          helper methods
+        - Sub-expressions of large expressions are outlined into helper
+          methods returning their values. Operands of large sums and products
+          are grouped into parts computed by helper methods
+    Loops are never split, so a single large loop body is kept in a method.
+
+    Private object member attributes:
+        __splitter : A JavaMethodSplitter object keeping the helper methods of
+                     the generated method. It is None if the method is not
+                     split
+        __outlined_call_dict : A dictionary that maps an outlined sympy
+                               expression to the call to the helper method
+                               returning its value
+        __operand_dict : A dictionary that maps a sum / product whose operands
+                         are grouped into parts to the list of the parts
+        __size_dict : A dictionary that maps a sympy expression to the
+                      estimated bytecode size of the statements evaluating it
+                      (without outlining)
     """
 
-    SUPPORT_TRIGO_FUNCS = {
+    SUPPORT_MATH_FUNCS = {
+        OperatorType.ABS_REAL: "Math.abs",
+        OperatorType.SIGN_REAL: "Math.signum",
+        OperatorType.POW_REAL: "Math.pow",
+        OperatorType.LOG_REAL: "Math.log",
         OperatorType.SIN_REAL: "Math.sin",
         OperatorType.COS_REAL: "Math.cos",
         OperatorType.TAN_REAL: "Math.tan",
     }
 
+    INTERMEDIATE_ARRAY_NAME = "__intermediate"
+
+    # Estimated bytecode sizes (in bytes) of loading a number, a parameter, a
+    # local variable (whose index may need a wide instruction) and an array
+    # element index, of storing a local variable, of a call, and of the
+    # control flow of a for loop
+    NUMBER_LOAD_SIZE = 3
+    PARAM_LOAD_SIZE = 2
+    LOCAL_LOAD_SIZE = 4
+    INDEX_LOAD_SIZE = 4
+    LOCAL_STORE_SIZE = 4
+    CALL_SIZE = 3
+    LOOP_SIZE = 30
+
     def __init__(
             self,
             var_list,
             sympy_expr,
             func_name=None,
             modifier_list=None,
-            temp_prefix=None):
+            temp_prefix=None,
+            intermediate_list=None):
         """ Constructor
         """
         ExprCodeGenerator.__init__(
-            self, var_list, sympy_expr, func_name, modifier_list, temp_prefix)
+            self, var_list, sympy_expr, func_name, modifier_list, temp_prefix,
+            intermediate_list)
+        self.__splitter = None
+        self.__outlined_call_dict = {}
+        self.__operand_dict = {}
+        self.__size_dict = {}
+
+    def _get_param_list(self):
+        """ Gets the parameters of the generated method
+        Returns:
+            param_list : A list of Variable objects
+        """
+        return self.var_list
 
     def _gen_func_declaration(
             self,
@@ -166,7 +460,8 @@ class JavaExprCodeGenerator(ExprCodeGenerator):
                            generated code to a file.
         """
         func_declaration = codegenutil.get_java_func_declaration(
-            self.func_name, "double", self.var_list, self.modifier_list)
+            self.func_name, "double", self._get_param_list(),
+            self.modifier_list)
         file_handler.write(func_declaration + " {\n")
 
     def _gen_return_code(
@@ -187,11 +482,450 @@ class JavaExprCodeGenerator(ExprCodeGenerator):
         file_handler.untab()
         file_handler.write("}\n\n")
 
-    def __gen_arr_access_code(
+    def gen_code(self, file_handler):
+        """ Generates code for a function to evaluate the input expression
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        self._gen_code_method(
+            self.intermediate_list, self.expr, [], file_handler)
+
+    def _gen_code_method(
+            self,
+            intermediate_list,
+            result_expr,
+            output_list,
+            file_handler):
+        """ Generates Java code for a method which evaluates intermediate
+        expressions, assigns values of expressions to array elements, and
+        returns the value of an expression. The method is split into helper
+        methods if its estimated bytecode size is too large
+
+        Args:
+            intermediate_list : A list of pairs (symbol, definition) of
+                                intermediate expressions in evaluation order
+            result_expr : A sympy expression whose value is returned
+            output_list : A list of pairs (sympy expression, target list) in
+                          which target list is a list of strings which are
+                          elements of array parameters (e.g. "grad[0]")
+                          assigned the value of the expression
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        method_size = self.__estimate_method_size(
+            intermediate_list, result_expr, output_list)
+        if method_size > codegenutil.JAVA_METHOD_SIZE_LIMIT:
+            self.__gen_code_split_method(
+                intermediate_list, result_expr, output_list, file_handler)
+            return
+
+        self._gen_func_declaration(file_handler)
+        file_handler.tab()
+        self._gen_code_intermediates(intermediate_list, file_handler)
+        final_var_name = self._gen_code_expr(result_expr, file_handler)
+        for (sympy_expr, target_list) in output_list:
+            var_name = self._gen_code_expr(sympy_expr, file_handler)
+            for target in target_list:
+                file_handler.write("%s = %s;\n" % (target, var_name))
+        file_handler.untab()
+        self._gen_return_code(final_var_name, file_handler)
+
+    def __gen_code_split_method(
+            self,
+            intermediate_list,
+            result_expr,
+            output_list,
+            file_handler):
+        """ Generates Java code for a method (see _gen_code_method) which is
+        split into helper methods
+
+        Args:
+            intermediate_list : A list of pairs (symbol, definition) of
+                                intermediate expressions in evaluation order
+            result_expr : A sympy expression whose value is returned
+            output_list : A list of pairs (sympy expression, target list) of
+                          values assigned to elements of array parameters
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        array_name = JavaExprCodeGenerator.INTERMEDIATE_ARRAY_NAME
+        param_list = list(self._get_param_list())
+        if intermediate_list:
+            param_list.append(Variable(
+                array_name, VariableType.VECTOR, (len(intermediate_list),)))
+        self.__splitter = codegenutil.JavaMethodSplitter(
+            self.func_name, param_list, self.modifier_list, file_handler)
+        self.__size_dict = {}
+        for (ind, (symbol, _)) in enumerate(intermediate_list):
+            self._intermediate_var_dict[symbol] = "%s[%d]" % (array_name, ind)
+
+        # The statements left in the method and the statements evaluating the
+        # returned value take at most half of the method each
+        size_limit = codegenutil.JAVA_METHOD_SIZE_LIMIT // 2
+        statement_list = [
+            self.__gen_code_statement(
+                definition, [self._intermediate_var_dict[symbol]], size_limit)
+            for (symbol, definition) in intermediate_list]
+        statement_list += [
+            self.__gen_code_statement(sympy_expr, target_list, size_limit)
+            for (sympy_expr, target_list) in output_list]
+        self.__plan_expr(result_expr, size_limit)
+
+        self._gen_func_declaration(file_handler)
+        file_handler.tab()
+        if intermediate_list:
+            file_handler.write("double[] %s = new double[%d];\n" % (
+                array_name, len(intermediate_list)))
+        self.__splitter.gen_code_statements(
+            file_handler, statement_list, size_limit)
+        final_var_name = self._gen_code_expr(result_expr, file_handler)
+        file_handler.untab()
+        self._gen_return_code(final_var_name, file_handler)
+        self.__splitter.gen_code_helpers(file_handler)
+
+    def __gen_code_statement(self, sympy_expr, target_list, size_limit):
+        """ Generates Java code assigning the value of an expression to array
+        elements in a split method. Sub-expressions are outlined if the
+        expression is large
+
+        Args:
+            sympy_expr : a sympy expression that needs code generation
+            target_list : A list of strings which are the array elements
+            size_limit : An integer which is the limit of the estimated
+                         bytecode size of the statements evaluating the
+                         expression
+
+        Returns:
+            statement : A pair (code, size) in which code is a string of
+                        statements indented from the left margin, and size is
+                        their estimated bytecode size
+        """
+        size = self.__plan_expr(sympy_expr, size_limit)
+        code_writer = self.__splitter.create_code_writer()
+        var_name = self._gen_code_expr(sympy_expr, code_writer)
+        code_writer.write("%s = %s;\n" % (target_list[0], var_name))
+        for target in target_list[1:]:
+            code_writer.write("%s = %s;\n" % (target, target_list[0]))
+        size += self.__estimate_load_size(sympy_expr)
+        size += sum(codegenutil.estimate_java_array_store_size(
+            target.count("[")) for target in target_list)
+        return (code_writer.get_code(), size)
+
+    def __outline(self, sympy_expr):
+        """ Moves the statements evaluating an expression into a helper method
+        returning its value. The value of the expression is then obtained by
+        calling the helper method
+
+        Args:
+            sympy_expr : a sympy expression which is not a singleton
+        """
+        code_writer = self.__splitter.create_code_writer()
+        var_name = self._gen_code_node(sympy_expr, code_writer)
+        code_writer.write("return %s;\n" % var_name)
+        self.__outlined_call_dict[sympy_expr] = self.__splitter.add_helper(
+            "double", code_writer.get_code())
+
+    def __plan_expr(self, sympy_expr, size_limit):
+        """ Outlines sub-expressions of an expression in a split method, so
+        that the estimated bytecode size of the statements evaluating the
+        expression (and of each helper method) is under a limit. The largest
+        operands are outlined first. Operands of sums and products are grouped
+        into parts if there are too many of them. Loops are not split
+
+        Args:
+            sympy_expr : a sympy expression that needs code generation
+            size_limit : An integer which is the limit of the estimated size
+
+        Returns:
+            size : An integer which is the estimated size of the statements
+                   evaluating the expression after outlining
+        """
+        if (sympy_expr in self._intermediate_var_dict or
+                sympy_expr in self.__outlined_call_dict):
+            return 0
+        expr_op_type = OperatorType.get_operator_type(sympy_expr)
+        if OperatorType.is_singleton_op(expr_op_type):
+            return 0
+        if expr_op_type in [OperatorType.SUM_LOOP, OperatorType.PRODUCT_LOOP]:
+            return self.__estimate_size(sympy_expr)
+
+        operands = list(self._get_operands(sympy_expr))
+        operand_sizes = [self.__plan_expr(operand, size_limit)
+                         for operand in operands]
+        size = self.__estimate_statement_size(sympy_expr, operands) + sum(
+            operand_sizes)
+        if size > size_limit and expr_op_type in [
+                OperatorType.ADD_REAL, OperatorType.MUL_REAL]:
+            return self.__group_operands(
+                sympy_expr, operands, operand_sizes, size_limit)
+        while size > size_limit:
+            operand_ind = max(
+                xrange(len(operands)), key=operand_sizes.__getitem__)
+            if not self.__is_worth_outlining(
+                    operands[operand_ind], operand_sizes[operand_ind]):
+                break
+            self.__outline(operands[operand_ind])
+            operand_sizes[operand_ind] = 0
+            size = self.__estimate_statement_size(
+                sympy_expr, operands) + sum(operand_sizes)
+        return size
+
+    def __is_worth_outlining(self, sympy_expr, size):
+        """ Checks if outlining an expression makes the statements evaluating
+        it (and loading its value) smaller
+
+        Args:
+            sympy_expr : a sympy expression
+            size : An integer which is the estimated size of the statements
+                   evaluating the expression
+
+        Returns:
+            A boolean value
+        """
+        return size + self.__estimate_load_size(sympy_expr) > (
+            self.__splitter.get_call_size())
+
+    def __group_operands(
+            self,
+            sympy_expr,
+            operands,
+            operand_sizes,
+            size_limit):
+        """ Groups consecutive operands of a sum / product into parts which
+        are outlined, until the estimated bytecode size of the statements
+        evaluating the sum / product is under a limit. An operand which is
+        too large to be grouped with others is outlined alone. Parts are
+        grouped again if there are too many of them
+
+        Args:
+            sympy_expr : a sympy expression which is a sum or a product
+            operands : A list of sympy expressions which are the operands
+            operand_sizes : A list of integers which are the estimated sizes
+                            of the statements evaluating the operands
+            size_limit : An integer which is the limit of the estimated size
+
+        Returns:
+            size : An integer which is the estimated size of the statements
+                   evaluating the expression from the parts
+        """
+        size = self.__estimate_statement_size(sympy_expr, operands) + sum(
+            operand_sizes)
+        while size > size_limit:
+            part_list = [[]]
+            part_size = JavaExprCodeGenerator.LOCAL_STORE_SIZE
+            for (operand, operand_size) in zip(operands, operand_sizes):
+                operand_part_size = (
+                    operand_size + self.__estimate_load_size(operand) + 1)
+                if part_list[-1] and part_size + operand_part_size > (
+                        size_limit):
+                    part_list.append([])
+                    part_size = JavaExprCodeGenerator.LOCAL_STORE_SIZE
+                part_list[-1].append((operand, operand_size))
+                part_size += operand_part_size
+
+            is_changed = False
+            operands = []
+            operand_sizes = []
+            for part in part_list:
+                if len(part) == 1:
+                    (operand, operand_size) = part[0]
+                    if self.__is_worth_outlining(operand, operand_size):
+                        self.__outline(operand)
+                        operand_size = 0
+                        is_changed = True
+                    operands.append(operand)
+                    operand_sizes.append(operand_size)
+                    continue
+                part_expr = sympy_expr.func(
+                    *[operand for (operand, _) in part], evaluate=False)
+                if part_expr not in self.__outlined_call_dict:
+                    self.__outline(part_expr)
+                operands.append(part_expr)
+                operand_sizes.append(0)
+                is_changed = True
+            size = self.__estimate_statement_size(sympy_expr, operands) + sum(
+                operand_sizes)
+            if not is_changed:
+                # Operands can neither be grouped nor outlined
+                break
+        self.__operand_dict[sympy_expr] = operands
+        return size
+
+    def __estimate_method_size(
+            self,
+            intermediate_list,
+            result_expr,
+            output_list):
+        """ Estimates the bytecode size of a method (see _gen_code_method)
+        which is not split
+
+        Args:
+            intermediate_list : A list of pairs (symbol, definition) of
+                                intermediate expressions in evaluation order
+            result_expr : A sympy expression whose value is returned
+            output_list : A list of pairs (sympy expression, target list) of
+                          values assigned to elements of array parameters
+
+        Returns:
+            size : An integer which is the estimated size
+        """
+        size = self._estimate_statements_size(intermediate_list, output_list)
+        # The returned value is loaded by the return instruction
+        return size + self.__estimate_size(result_expr) + (
+            JavaExprCodeGenerator.LOCAL_LOAD_SIZE + 1)
+
+    def _estimate_statements_size(self, intermediate_list, output_list):
+        """ Estimates the bytecode size of the statements evaluating
+        intermediate expressions and assigning values of expressions to array
+        elements (without outlining)
+
+        Args:
+            intermediate_list : A list of pairs (symbol, definition) of
+                                intermediate expressions in evaluation order
+            output_list : A list of pairs (sympy expression, target list) of
+                          values assigned to array elements
+
+        Returns:
+            size : An integer which is the estimated size
+        """
+        size = sum(self.__estimate_size(definition)
+                   for (_, definition) in intermediate_list)
+        for (sympy_expr, target_list) in output_list:
+            size += self.__estimate_size(sympy_expr)
+            size += sum(codegenutil.estimate_java_array_store_size(
+                target.count("[")) for target in target_list)
+        return size
+
+    def __estimate_size(self, sympy_expr):
+        """ Estimates the bytecode size of the statements evaluating an
+        expression (without outlining its sub-expressions)
+
+        Args:
+            sympy_expr : a sympy expression
+
+        Returns:
+            size : An integer which is the estimated size. It is 0 if no
+                   statement is needed (e.g. for singletons)
+        """
+        if sympy_expr in self.__size_dict:
+            return self.__size_dict[sympy_expr]
+        size = 0
+        expr_op_type = OperatorType.get_operator_type(sympy_expr)
+        if (sympy_expr in self._intermediate_var_dict or
+                sympy_expr in self.__outlined_call_dict or
+                OperatorType.is_singleton_op(expr_op_type)):
+            size = 0
+        elif expr_op_type in [
+                OperatorType.SUM_LOOP, OperatorType.PRODUCT_LOOP]:
+            # Initialization, control flow of each loop, and update of the
+            # result by the value of the loop body
+            body_expr = sympy_expr.args[0]
+            size = (JavaExprCodeGenerator.NUMBER_LOAD_SIZE +
+                    JavaExprCodeGenerator.LOOP_SIZE * (
+                        len(sympy_expr.args) - 1) +
+                    self.__estimate_size(body_expr) +
+                    JavaExprCodeGenerator.LOCAL_LOAD_SIZE +
+                    self.__estimate_load_size(body_expr) + 1 +
+                    2 * JavaExprCodeGenerator.LOCAL_STORE_SIZE)
+        else:
+            operands = self._get_operands(sympy_expr)
+            size = self.__estimate_statement_size(sympy_expr, operands) + sum(
+                self.__estimate_size(operand) for operand in operands)
+        self.__size_dict[sympy_expr] = size
+        return size
+
+    def __estimate_statement_size(self, sympy_expr, operands):
+        """ Estimates the bytecode size of the statement evaluating an
+        expression (which is neither a singleton nor a loop) from the values
+        of its operands
+
+        Args:
+            sympy_expr : a sympy expression
+            operands : A list of sympy expressions which are the operands
+
+        Returns:
+            size : An integer which is the estimated size
+        """
+        expr_op_type = OperatorType.get_operator_type(sympy_expr)
+        size = JavaExprCodeGenerator.LOCAL_STORE_SIZE + sum(
+            self.__estimate_load_size(operand) for operand in operands)
+        if expr_op_type in [OperatorType.ADD_REAL, OperatorType.MUL_REAL]:
+            size += len(operands) - 1
+        elif expr_op_type == OperatorType.COT_REAL:
+            size += 2 * JavaExprCodeGenerator.CALL_SIZE + 1 + (
+                self.__estimate_load_size(operands[0]))
+        elif expr_op_type not in [
+                OperatorType.DIRAC_DELTA_REAL, OperatorType.EXTRACT_REAL]:
+            size += JavaExprCodeGenerator.CALL_SIZE
+        return size
+
+    def __estimate_load_size(self, sympy_expr):
+        """ Estimates the bytecode size of loading the value of an expression
+        (after the statements evaluating it)
+
+        Args:
+            sympy_expr : a sympy expression
+
+        Returns:
+            size : An integer which is the estimated size
+        """
+        if sympy_expr in self.__outlined_call_dict:
+            return self.__splitter.get_call_size()
+        if (self.__splitter is not None and
+                sympy_expr in self._intermediate_var_dict):
+            # Element of the array of intermediate values
+            return (JavaExprCodeGenerator.PARAM_LOAD_SIZE +
+                    JavaExprCodeGenerator.INDEX_LOAD_SIZE + 1)
+        expr_op_type = OperatorType.get_operator_type(sympy_expr)
+        if expr_op_type == OperatorType.NUMBER:
+            return JavaExprCodeGenerator.NUMBER_LOAD_SIZE
+        if expr_op_type in [OperatorType.SYMBOL, OperatorType.MATRIX]:
+            var_name = str(sympy_expr)
+            if expr_op_type == OperatorType.MATRIX:
+                var_name = sympy_expr.args[0].name
+            var_obj = self._var_dict.get(var_name)
+            if var_obj is not None and (
+                    var_obj.props.get(codegenutil.FLAT_ARRAY_PROP) or
+                    var_obj.props.get(codegenutil.BATCH_INDEX_PROP)):
+                # Element of the flat array parameter, or of a variable with
+                # one array per element
+                num_indices = 0
+                if (var_obj.props.get(codegenutil.FLAT_ARRAY_PROP) or
+                        var_obj.var_type != VariableType.NUMBER):
+                    num_indices += 1
+                if var_obj.props.get(codegenutil.BATCH_INDEX_PROP):
+                    num_indices += 1
+                return (JavaExprCodeGenerator.PARAM_LOAD_SIZE +
+                        (JavaExprCodeGenerator.INDEX_LOAD_SIZE + 1) *
+                        num_indices)
+        if expr_op_type == OperatorType.SYMBOL and (
+                str(sympy_expr) in self._var_dict):
+            return JavaExprCodeGenerator.PARAM_LOAD_SIZE
+        if expr_op_type == OperatorType.MATRIX:
+            num_indices = len(sympy_expr.args) - 1
+            return (JavaExprCodeGenerator.PARAM_LOAD_SIZE +
+                    (JavaExprCodeGenerator.INDEX_LOAD_SIZE + 1) * num_indices)
+        return JavaExprCodeGenerator.LOCAL_LOAD_SIZE
+
+    def _get_operands(self, sympy_expr):
+        """ Gets the operands of an expression, which are the parts of its
+        operands if they are grouped
+
+        Args:
+            sympy_expr : a sympy expression
+
+        Returns:
+            operands : A sequence of sympy expressions
+        """
+        return self.__operand_dict.get(sympy_expr, sympy_expr.args)
+
+    def _gen_arr_access_code(
             self,
             var_obj,
             index_tuple):
-        """ Generates Java code for array / matrix element access
+        """ Generates Java code for array / matrix element access (or for
+        access to a number variable, with an empty index tuple)
         Args:
             var_obj : an object containing information about the
                       array / matrix variable, such as name, type, dimension
@@ -199,6 +933,24 @@ class JavaExprCodeGenerator(ExprCodeGenerator):
         Returns:
             A string representing the code to access array / matrix element
         """
+        flat_array = var_obj.props.get(codegenutil.FLAT_ARRAY_PROP)
+        point_index = var_obj.props.get(codegenutil.BATCH_INDEX_PROP)
+        if flat_array or point_index:
+            # Element of the flat array parameter, or of a variable with one
+            # array per element, at an offset computed from the (possibly
+            # symbolic) indices
+            offset = var_obj.props.get(codegenutil.FLAT_OFFSET_PROP, 0)
+            if var_obj.var_type == VariableType.VECTOR:
+                offset += index_tuple[0]
+            elif var_obj.var_type == VariableType.MATRIX:
+                offset += index_tuple[0] * var_obj.dimension[1] + (
+                    index_tuple[1])
+            code = flat_array or var_obj.name
+            if flat_array or var_obj.var_type != VariableType.NUMBER:
+                code += "[%s]" % str(offset)
+            if point_index:
+                code += "[%s]" % point_index
+            return code
         code = var_obj.name
         if var_obj.var_type == VariableType.VECTOR:
             code += "[%s]" % str(index_tuple[0])
@@ -206,9 +958,10 @@ class JavaExprCodeGenerator(ExprCodeGenerator):
             code += "[%s][%s]" % (str(index_tuple[0]), str(index_tuple[1]))
         return code
 
-    def __gen_code_loop(self, sympy_expr, file_handler):
-        """ Generates Java code for a function to evaluate loop operation (e.g.
-        taking sum or product over a sequence of elements)
+    def _gen_code_expr(self, sympy_expr, file_handler):
+        """ Generates Java code for a function to evaluate input expression
+        if necessary. If the expression is a singleton, or is computed by a
+        helper method, no code is generated
 
         Args:
             sympy_expr : a sympy expression that needs code generation
@@ -218,107 +971,289 @@ class JavaExprCodeGenerator(ExprCodeGenerator):
             A string representing the name of the variable holding the final
             result when evaluating the expression
         """
-        operands = sympy_expr.args
-        expr_op_type = OperatorType.get_operator_type(sympy_expr)
-        temp_var_name = self._get_nxt_temp_var_name()
+        if (sympy_expr not in self._intermediate_var_dict and
+                sympy_expr in self.__outlined_call_dict):
+            # Expression whose value is computed by a helper method
+            return self.__outlined_call_dict[sympy_expr]
+        return ExprCodeGenerator._gen_code_expr(self, sympy_expr, file_handler)
 
-        init_value = 0.0
-        if expr_op_type == OperatorType.PRODUCT_LOOP:
-            init_value = 1.0
-        file_handler.write("double %s = %f;\n" % (temp_var_name, init_value))
-        for loop_range in operands[1:]:
-            var_loop = str(loop_range[0])
-            start_val = str(loop_range[1])
-            end_val = str(loop_range[2] + 1)
-            step = "1"
-            loop_statement = "for (int %s = %s; %s < %s; %s += %s) {\n" % (
-                var_loop, start_val, var_loop, end_val, var_loop, step)
-            file_handler.write(loop_statement)
-            file_handler.tab()
 
-        inner_temp_var_name = self._gen_code_expr(operands[0], file_handler)
-        op_str = "+="
-        if expr_op_type == OperatorType.PRODUCT_LOOP:
-            op_str = "*="
-        file_handler.write("%s %s %s;\n" % (
-            temp_var_name, op_str, inner_temp_var_name))
+class CExprCodeGenerator(ExprCodeGenerator):
+    """
+    This is a class inherited from ExprCodeGenerator that generates C (C99)
+    code to compute the input math expressions
 
-        for _ in xrange(len(operands[1:])):
-            file_handler.untab()
-            file_handler.write("}\n")
+    Vectors and matrices are passed as restrict-qualified pointers to their
+    elements, matrices in row-major order (see codegenutil.get_c_type). The
+    generated function does not allocate memory.
+    """
 
-        return temp_var_name
+    SUPPORT_MATH_FUNCS = {
+        OperatorType.ABS_REAL: "fabs",
+        OperatorType.POW_REAL: "pow",
+        OperatorType.LOG_REAL: "log",
+        OperatorType.SIN_REAL: "sin",
+        OperatorType.COS_REAL: "cos",
+        OperatorType.TAN_REAL: "tan",
+    }
 
-    def _gen_code_expr(self, sympy_expr, file_handler):
-        """ Generates Java code for a function to evaluate input expression
-        if necessary. If the expression is a singleton, no code is generated
+    def __init__(
+            self,
+            var_list,
+            sympy_expr,
+            func_name=None,
+            modifier_list=None,
+            temp_prefix=None,
+            intermediate_list=None):
+        """ Constructor
+        """
+        ExprCodeGenerator.__init__(
+            self, var_list, sympy_expr, func_name, modifier_list, temp_prefix,
+            intermediate_list)
 
+    def _gen_func_declaration(
+            self,
+            file_handler):
+        """ Generates C code for function declaration
         Args:
-            sympy_expr : a sympy expression that needs code generation
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
-        Returns:
-            A string representing the name of the variable holding the final
-            result when evaluating the expression
         """
-        expr_op_type = OperatorType.get_operator_type(sympy_expr)
+        func_declaration = codegenutil.get_c_func_declaration(
+            self.func_name, "double", self.var_list, self.modifier_list)
+        file_handler.write(func_declaration + " {\n")
 
-        if OperatorType.is_singleton_op(expr_op_type):
-            if expr_op_type == OperatorType.NUMBER:
-                final_var_str = str(sympy_expr.evalf())
-            elif expr_op_type == OperatorType.SYMBOL:
-                final_var_str = str(sympy_expr)
-            else:
-                # Matrix / Vector access
-                var_name = sympy_expr.args[0].name
-                index_tuple = sympy_expr.args[1:]
-                final_var_str = self.__gen_arr_access_code(
-                    self._var_dict[var_name], index_tuple)
-            return final_var_str
+    def _gen_return_code(
+            self,
+            result_holder_name,
+            file_handler):
+        """ Generates C code at the end of function (for returning results,
+        etc.)
+        Args:
+            result_holder_name : a string for a variable name that holds the
+                final result of the whole expression
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        return_stm = "return %s;\n" % result_holder_name
+        file_handler.tab()
+        file_handler.write(return_stm)
+        file_handler.untab()
+        file_handler.write("}\n\n")
 
-        if expr_op_type in [OperatorType.SUM_LOOP, OperatorType.PRODUCT_LOOP]:
-            # Handle loop operation seperately
-            return self.__gen_code_loop(sympy_expr, file_handler)
+    def _gen_arr_access_code(
+            self,
+            var_obj,
+            index_tuple):
+        """ Generates C code for array / matrix element access (or for access
+        to a number variable, with an empty index tuple)
+        Args:
+            var_obj : an object containing information about the
+                      array / matrix variable, such as name, type, dimension
+            index_tuple : a tuple indicating the index of the element accessed
+        Returns:
+            A string representing the code to access array / matrix element
+        """
+        flat_array = var_obj.props.get(codegenutil.FLAT_ARRAY_PROP)
+        if var_obj.var_type == VariableType.NUMBER and not flat_array:
+            return var_obj.name
+        offset = var_obj.props.get(codegenutil.FLAT_OFFSET_PROP, 0)
+        if var_obj.var_type == VariableType.VECTOR:
+            offset += index_tuple[0]
+        elif var_obj.var_type == VariableType.MATRIX:
+            num_cols = var_obj.dimension[1]
+            if not getattr(num_cols, "is_number", True):
+                # The number of columns is a number variable (of type double)
+                return "%s[(%s) * (int)%s + %s]" % (
+                    var_obj.name, str(index_tuple[0]), num_cols,
+                    str(index_tuple[1]))
+            offset += index_tuple[0] * num_cols + index_tuple[1]
+        return "%s[%s]" % (flat_array or var_obj.name, str(offset))
 
-        # Sympy expression is not a singleton nor loop operation
-        final_var_str = self._get_nxt_temp_var_name()
-        operands = sympy_expr.args
-        operand_names = [self._gen_code_expr(operand, file_handler)
-                         for operand in operands]
+    def _get_func_call_code(self, expr_op_type, operand_names):
+        """ Gets the C code computing an operator by a math function. The
+        sign has no function in C, and is computed by comparisons
 
-        statement_str = "double %s = " % final_var_str
-        if expr_op_type == OperatorType.DIRAC_DELTA_REAL:
-            statement_str += "0"
-        elif expr_op_type == OperatorType.EXTRACT_REAL:
-            statement_str += operand_names[0]
-        elif expr_op_type == OperatorType.ABS_REAL:
-            statement_str += "Math.abs(%s)" % (operand_names[0])
-        elif expr_op_type == OperatorType.SIGN_REAL:
-            statement_str += "Math.signum(%s)" % (operand_names[0])
-        elif expr_op_type == OperatorType.POW_REAL:
-            statement_str += "Math.pow(%s, %s)" % (
-                operand_names[0], operand_names[1])
-        elif expr_op_type == OperatorType.LOG_REAL:
-            statement_str += "Math.log(%s)" % operand_names[0]
-        elif expr_op_type in JavaExprCodeGenerator.SUPPORT_TRIGO_FUNCS:
-            statement_str += "%s(%s)" % (
-                JavaExprCodeGenerator.SUPPORT_TRIGO_FUNCS[expr_op_type],
-                operand_names[0])
-        elif expr_op_type == OperatorType.COT_REAL:
-            statement_str += "Math.sin(%s) / Math.cos(%s)" % (
+        Args:
+            expr_op_type : An integer which is the operator type
+            operand_names : A list of strings which are the code of the
+                            operands
+        Returns:
+            A string representing the code of the value
+        """
+        if expr_op_type == OperatorType.SIGN_REAL:
+            return "(double)((%s > 0) - (%s < 0))" % (
                 operand_names[0], operand_names[0])
-        elif expr_op_type in [OperatorType.ADD_REAL, OperatorType.MUL_REAL]:
-            op_char = " + " if expr_op_type == OperatorType.ADD_REAL else " * "
-            statement_str += op_char.join(operand_names)
-        elif expr_op_type == OperatorType.CUSTOM_FUNC:
-            statement_str += "%s(%s)" % (
-                sympy_expr.func.__name__,
-                ', '.join(operand_names))
-        else:
-            # Operators in which we do not know how to generate code
-            raise Exception(
-                "Cannot generate code for operator %s" % expr_op_type)
+        return ExprCodeGenerator._get_func_call_code(
+            self, expr_op_type, operand_names)
 
-        statement_str += ";\n"
-        file_handler.write(statement_str)
-        return final_var_str
+
+class NumpyExprCodeGenerator(ExprCodeGenerator):
+    """
+    This is a class inherited from ExprCodeGenerator that generates Python
+    code to compute the input math expressions at many points at once with
+    NumPy
+
+    Variables are given as NumPy arrays whose leading axis is over the points
+    (e.g. a matrix variable of size r x c at N points is an array of shape
+    (N, r, c), and a number variable is an array of shape (N,)). The
+    expression is computed by whole-array operations, and the generated
+    function returns an array of shape (N,). The leading axis of a variable
+    may have size 1 if its value is the same at all points. Sizes of vectors
+    and matrices given by number variables must be the same at all points.
+    """
+
+    SUPPORT_MATH_FUNCS = {
+        OperatorType.ABS_REAL: "numpy.abs",
+        OperatorType.SIGN_REAL: "numpy.sign",
+        OperatorType.POW_REAL: "numpy.power",
+        OperatorType.LOG_REAL: "numpy.log",
+        OperatorType.SIN_REAL: "numpy.sin",
+        OperatorType.COS_REAL: "numpy.cos",
+        OperatorType.TAN_REAL: "numpy.tan",
+    }
+
+    # A float, so that a variable assigned a Dirac delta is never an integer
+    ZERO_CODE = "0.0"
+
+    def __init__(
+            self,
+            var_list,
+            sympy_expr,
+            func_name=None,
+            modifier_list=None,
+            temp_prefix=None,
+            intermediate_list=None):
+        """ Constructor
+        """
+        ExprCodeGenerator.__init__(
+            self, var_list, sympy_expr, func_name, modifier_list, temp_prefix,
+            intermediate_list)
+
+    def _gen_func_declaration(
+            self,
+            file_handler):
+        """ Generates Python code for function declaration, preceded by empty
+        lines separating it from the code before
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        file_handler.write_lines("\n\n%s\n" % (
+            codegenutil.get_python_func_declaration(
+                self.func_name, self.var_list)))
+
+    def _gen_return_code(
+            self,
+            result_holder_name,
+            file_handler):
+        """ Generates Python code at the end of function (for returning
+        results, etc.). A constant expression is returned as an array of its
+        value at all points
+        Args:
+            result_holder_name : a string for a variable name that holds the
+                final result of the whole expression
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        if OperatorType.get_operator_type(self.expr) == OperatorType.NUMBER:
+            result_holder_name = "numpy.full(%s, %s, dtype=float)" % (
+                codegenutil.get_python_func_call(
+                    codegenutil.NUMPY_NUM_POINTS_FUNC_NAME, self.var_list),
+                result_holder_name)
+        file_handler.tab()
+        file_handler.write("return %s\n" % result_holder_name)
+        file_handler.untab()
+
+    def _gen_arr_access_code(
+            self,
+            var_obj,
+            index_tuple):
+        """ Generates Python code for array / matrix element access (or for
+        access to a number variable, with an empty index tuple) at all points
+        Args:
+            var_obj : an object containing information about the
+                      array / matrix variable, such as name, type, dimension
+            index_tuple : a tuple indicating the index of the element accessed
+        Returns:
+            A string representing the code to access array / matrix element
+        """
+        flat_array = var_obj.props.get(codegenutil.FLAT_ARRAY_PROP)
+        if flat_array:
+            offset = var_obj.props.get(codegenutil.FLAT_OFFSET_PROP, 0)
+            if var_obj.var_type == VariableType.VECTOR:
+                offset += index_tuple[0]
+            elif var_obj.var_type == VariableType.MATRIX:
+                offset += (index_tuple[0] * var_obj.dimension[1] +
+                           index_tuple[1])
+            return "%s[:, %s]" % (flat_array, str(offset))
+        if var_obj.var_type == VariableType.NUMBER:
+            return var_obj.name
+        if var_obj.var_type == VariableType.VECTOR:
+            return "%s[:, %s]" % (var_obj.name, str(index_tuple[0]))
+        return "%s[:, %s, %s]" % (
+            var_obj.name, str(index_tuple[0]), str(index_tuple[1]))
+
+    def __get_loop_bound_code(self, sympy_expr):
+        """ Generates Python code for a bound of a loop, which is an integer
+        Args:
+            sympy_expr : a sympy expression which is the bound. It may depend
+                         on number variables, whose values at the first point
+                         are used
+        Returns:
+            A string representing the code of the bound
+        """
+        if sympy_expr.is_number:
+            return str(int(sympy_expr))
+        return "int(numpy.ravel(%s)[0])" % str(sympy_expr)
+
+    def _get_assign_code(self, var_name, value_code):
+        """ Gets the Python statement assigning a value to a variable
+
+        Args:
+            var_name : A string which is the name of the variable
+            value_code : A string which is the code of the value
+        Returns:
+            A string representing the statement, ending with a line break
+        """
+        return "%s = %s\n" % (var_name, value_code)
+
+    def _get_loop_update_code(self, var_name, op_char, value_code):
+        """ Gets the Python statement adding a value to (or multiplying by a
+        value) the variable accumulating the result of a loop. It is not an
+        augmented assignment, which would modify an array of the loop body in
+        place
+
+        Args:
+            var_name : A string which is the name of the variable
+            op_char : A string which is "+" or "*"
+            value_code : A string which is the code of the value
+        Returns:
+            A string representing the statement, ending with a line break
+        """
+        return "%s = %s %s %s\n" % (var_name, var_name, op_char, value_code)
+
+    def _gen_code_loop_begin(self, loop_range, file_handler):
+        """ Generates Python code for the beginning of a loop over a range of
+        integers, before its body. The loop is over the elements, and each
+        step of its body is a whole-array operation over the points
+
+        Args:
+            loop_range : A tuple (loop counter, first value, last value)
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        file_handler.write("for %s in range(%s, %s):\n" % (
+            str(loop_range[0]),
+            self.__get_loop_bound_code(loop_range[1]),
+            self.__get_loop_bound_code(loop_range[2] + 1)))
+
+    def _gen_code_loop_end(self, file_handler):
+        """ Generates Python code for the end of a loop, which is only its
+        indentation
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        pass
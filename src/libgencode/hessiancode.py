@@ -1,9 +1,10 @@
 from abc import ABCMeta, abstractmethod
 
-import common.util as commonutil
 import libgencode.codegenutil as codegenutil
-from common.vardef import VariableType
-from .derivativecode import JavaDerivativeCodeGenerator
+from common.vardef import Variable, VariableType
+from .derivativecode import (
+    CDerivativeCodeGenerator, JavaDerivativeCodeGenerator,
+    NumpyDerivativeCodeGenerator)
 
 
 class HessianCodeGenerator(object):
@@ -19,9 +20,34 @@ class HessianCodeGenerator(object):
         modifier_list : A list of strings indicating modifiers for the
                         hessian method / function, and for derivative functions
                         (such as static, private, public, etc.)
+        hessian_format : A string indicating the storage format of the
+                         Hessian matrix. In DENSE_FORMAT, the whole matrix is
+                         computed. In COO_FORMAT and CSR_FORMAT, only the
+                         entries in the upper triangle that are not
+                         structurally zero are computed, and their positions
+                         are given by a separate sparsity function (in
+                         coordinate or compressed sparse row form). In
+                         PACKED_FORMAT, the upper triangle is computed and
+                         packed column by column into a flat array (see
+                         codegenutil.get_packed_index), and separate functions
+                         give the position and the value of an entry in it
+        intermediate_table : An IntermediateExprTable object containing the
+                             intermediate expressions whose placeholder symbols
+                             may appear in the expression. It is None if the
+                             expression has no intermediate expressions
+        derivative_store : A DerivativeStore object keeping the derivatives
+                           computed so far. It may be shared with other code
+                           generators. It is None if the derivative code
+                           generator uses a store of its own
+        num_jobs : An integer indicating the number of worker processes
+                   generating second-order derivative functions in parallel
 
     Protected object member attributes:
         _diff_code_generator : The code generator for partial derivatives
+        _entry_list : A sorted list of pairs of indices (i, j) with i <= j
+                      which are the positions of structurally non-zero entries
+                      of the Hessian matrix. It is None unless the Hessian
+                      matrix is stored in a sparse format
     """
 
     __metaclass__ = ABCMeta
@@ -29,17 +55,35 @@ class HessianCodeGenerator(object):
     DEFAULT_FUNC_NAME = "hessian"
     DEFAULT_DERIVATIVE_NAME = "partialDerivative"
 
+    DENSE_FORMAT = "dense"
+    COO_FORMAT = "coo"
+    CSR_FORMAT = "csr"
+    PACKED_FORMAT = "packed"
+    SUPPORTED_HESSIAN_FORMATS = [
+        DENSE_FORMAT, COO_FORMAT, CSR_FORMAT, PACKED_FORMAT]
+    DEFAULT_HESSIAN_FORMAT = DENSE_FORMAT
+
     def __init__(
             self,
             var_list,
             sympy_expr,
             func_name=None,
             diff_var_list=None,
-            modifier_list=None):
+            modifier_list=None,
+            hessian_format=None,
+            intermediate_table=None,
+            derivative_store=None,
+            num_jobs=None):
         """ Class constructor
         """
         self.var_list = var_list
         self.expr = sympy_expr
+        self.intermediate_table = intermediate_table
+        self.derivative_store = derivative_store
+        if num_jobs is None:
+            self.num_jobs = 1
+        else:
+            self.num_jobs = num_jobs
         if func_name is None:
             self.func_name = HessianCodeGenerator.DEFAULT_FUNC_NAME
         else:
@@ -52,7 +96,79 @@ class HessianCodeGenerator(object):
             self.modifier_list = []
         else:
             self.modifier_list = modifier_list
+        if hessian_format is None:
+            self.hessian_format = HessianCodeGenerator.DEFAULT_HESSIAN_FORMAT
+        else:
+            self.hessian_format = hessian_format
+        supported_formats = HessianCodeGenerator.SUPPORTED_HESSIAN_FORMATS
+        if self.hessian_format not in supported_formats:
+            raise NotImplementedError(
+                "The Hessian format: %s is not supported" %
+                self.hessian_format)
         self._diff_code_generator = self._get_derivative_code_generator()
+        self._entry_list = None
+        if self.is_sparse():
+            self._entry_list = self._diff_code_generator.get_hessian_sparsity()
+
+    def is_sparse(self):
+        """ Checks if the Hessian matrix is stored in a sparse format
+
+        Returns:
+            is_sparse : A boolean value indicating whether only structurally
+                        non-zero entries of the Hessian matrix are computed
+        """
+        return self.hessian_format in [
+            HessianCodeGenerator.COO_FORMAT, HessianCodeGenerator.CSR_FORMAT]
+
+    def is_packed(self):
+        """ Checks if the upper triangle of the Hessian matrix is packed into a
+        flat array
+
+        Returns:
+            is_packed : A boolean value indicating whether the Hessian matrix
+                        is stored in PACKED_FORMAT
+        """
+        return self.hessian_format == HessianCodeGenerator.PACKED_FORMAT
+
+    def get_sparsity_arrays(self):
+        """ Gets the arrays describing the positions of the entries computed
+        in a sparse format. Entries are ordered by row, then by column
+
+        Returns:
+            first_index_arr : In COO_FORMAT, a list of row indices of the
+                entries. In CSR_FORMAT, a list of (number of rows + 1) offsets
+                such that entries of row i are at positions from
+                first_index_arr[i] to first_index_arr[i + 1] - 1
+            second_index_arr : A list of column indices of the entries
+        """
+        row_inds = [i for (i, _) in self._entry_list]
+        col_inds = [j for (_, j) in self._entry_list]
+        if self.hessian_format == HessianCodeGenerator.COO_FORMAT:
+            return (row_inds, col_inds)
+        num_diff_var = self._diff_code_generator.get_num_expanded_diff_var()
+        row_offsets = [0] * (num_diff_var + 1)
+        for row_ind in row_inds:
+            row_offsets[row_ind + 1] += 1
+        for row_ind in xrange(num_diff_var):
+            row_offsets[row_ind + 1] += row_offsets[row_ind]
+        return (row_offsets, col_inds)
+
+    def get_output_size(self):
+        """ Gets the number of entries of Hessian matrix computed by the
+        Hessian function
+
+        Returns:
+            size : An integer which is n * n in DENSE_FORMAT, the number of
+                   structurally non-zero entries in the upper triangle in the
+                   sparse formats, and n * (n + 1) / 2 in PACKED_FORMAT, where
+                   n is the number of expanded differentiation variables
+        """
+        if self.is_sparse():
+            return len(self._entry_list)
+        num_diff_var = self._diff_code_generator.get_num_expanded_diff_var()
+        if self.is_packed():
+            return num_diff_var * (num_diff_var + 1) // 2
+        return num_diff_var * num_diff_var
 
     @abstractmethod
     def _get_derivative_code_generator(self):
@@ -73,20 +189,55 @@ class HessianCodeGenerator(object):
         """
         pass
 
+    @abstractmethod
+    def _gen_sparsity_code(self, file_handler):
+        """ Generates code for function to get the positions of the entries
+        computed in a sparse format
+        Subclass should implement this method to generate function code in a
+        specific programming language
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        pass
+
+    @abstractmethod
+    def _gen_packed_accessor_code(self, file_handler):
+        """ Generates code for functions to get the position and the value of
+        an entry of the Hessian matrix in PACKED_FORMAT
+        Subclass should implement this method to generate function code in a
+        specific programming language
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        pass
+
     def gen_code(self, file_handler):
         """ Generates code for a function to evaluate hessian matrix
         Args:
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
         """
-        self._diff_code_generator.gen_code_all_second_order(file_handler)
+        self._diff_code_generator.gen_code_all_second_order(
+            file_handler, self._entry_list, self.num_jobs)
         self._gen_hessian_code(file_handler)
+        if self.is_sparse():
+            self._gen_sparsity_code(file_handler)
+        elif self.is_packed():
+            self._gen_packed_accessor_code(file_handler)
 
 
 class JavaHessianCodeGenerator(HessianCodeGenerator):
     """
     This is a class inherited from HessianCodeGenerator that generates Java code
     to compute Hessian matrix for an input mathematical multivariate expression
+
+    Public object member attributes:
+        class_name : A string indicating the name of the class declaring the
+                     generated methods. If it is given and the methods are
+                     static, partial derivative methods are called through the
+                     class name
     """
 
     def __init__(
@@ -96,12 +247,17 @@ class JavaHessianCodeGenerator(HessianCodeGenerator):
             func_name=None,
             diff_var_list=None,
             modifier_list=None,
-            class_name=None):
+            class_name=None,
+            hessian_format=None,
+            intermediate_table=None,
+            derivative_store=None,
+            num_jobs=None):
         """ Class constructor
         """
         HessianCodeGenerator.__init__(
             self, var_list, sympy_expr, func_name,
-            diff_var_list, modifier_list)
+            diff_var_list, modifier_list, hessian_format, intermediate_table,
+            derivative_store, num_jobs)
         self.class_name = class_name
 
     def _get_derivative_code_generator(self):
@@ -112,130 +268,541 @@ class JavaHessianCodeGenerator(HessianCodeGenerator):
             self.expr,
             HessianCodeGenerator.DEFAULT_DERIVATIVE_NAME,
             self.diff_var_list,
-            self.modifier_list)
+            self.modifier_list,
+            self.intermediate_table,
+            self.derivative_store)
+
+    def __get_output_var(self):
+        """ Gets the array parameter which Hessian matrix is written to. It is
+        a matrix in DENSE_FORMAT, and a vector of the computed entries in the
+        sparse formats and in PACKED_FORMAT
+        Returns:
+            out_var : A Variable object
+        """
+        out_name = codegenutil.get_unused_var_name(
+            codegenutil.DEFAULT_OUTPUT_PARAM_NAME, self.var_list)
+        if self.is_sparse():
+            return Variable(
+                out_name, VariableType.VECTOR, (len(self._entry_list),))
+        num_diff_var = self._diff_code_generator.get_num_expanded_diff_var()
+        if self.is_packed():
+            return Variable(
+                out_name, VariableType.VECTOR,
+                (num_diff_var * (num_diff_var + 1) // 2,))
+        return Variable(
+            out_name, VariableType.MATRIX, (num_diff_var, num_diff_var))
 
-    def __gen_hessian_declaration(self, file_handler):
-        """ Generates Java code for Hessian function declaration
+    def __gen_hessian_declaration(self, file_handler, out_var):
+        """ Generates Java code for declaration of Hessian function writing
+        into an array supplied by the caller
         Args:
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
+            out_var : A Variable object which is the array parameter
         """
         func_declaration = codegenutil.get_java_func_declaration(
-            self.func_name, "double[][]", self.var_list, self.modifier_list)
-        if self.class_name:
-            func_declaration += (" throws NoSuchMethodException, "
-                                 "IllegalAccessException, "
-                                 "java.lang.reflect.InvocationTargetException")
+            self.func_name, "void", self.var_list + [out_var],
+            self.modifier_list)
         file_handler.write(func_declaration + " {\n")
 
-    def __gen_simple_hessian_body(self, file_handler):
+    def __gen_hessian_body(self, file_handler, out_var):
         """ Generates Java code for the body of the function to compute
         Hessian matrix
 
         Args:
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
+            out_var : A Variable object which is the array parameter
+        Returns:
+            splitter : A JavaMethodSplitter object keeping the helper methods
+                       which the assignments of entries are moved to
         """
         num_diff_var = self._diff_code_generator.get_num_expanded_diff_var()
-        param_list = ", ".join([var.name for var in self.var_list])
-        temp_mat = "__temp"
+        out_mat = out_var.name
+        splitter = codegenutil.JavaMethodSplitter(
+            self.func_name,
+            self.var_list + [out_var],
+            self.modifier_list,
+            file_handler)
+        entry_size = codegenutil.estimate_java_array_store_size(2) + (
+            codegenutil.estimate_java_call_size(self.var_list))
 
-        file_handler.write("double[][] %s = new double[%d][%d];\n" % (
-            temp_mat, num_diff_var, num_diff_var))
+        statement_list = []
         for i in xrange(num_diff_var):
             for j in xrange(i, num_diff_var):
-                file_handler.write("%s[%d][%d] = %s(%s);\n" % (
-                    temp_mat, i, j,
+                func_call = codegenutil.get_java_func_call(
                     self._diff_code_generator.get_derivative_func_name(
                         i, j, True),
-                    param_list))
+                    self.var_list,
+                    self.class_name,
+                    self.modifier_list)
+                code = "%s[%d][%d] = %s;\n" % (out_mat, i, j, func_call)
                 if i == j:
+                    statement_list.append((code, entry_size))
                     continue
-                file_handler.write("%s[%d][%d] = %s[%d][%d];\n" % (
-                    temp_mat, j, i, temp_mat, i, j))
-        file_handler.write("return %s;\n" % temp_mat)
+                code += "%s[%d][%d] = %s[%d][%d];\n" % (
+                    out_mat, j, i, out_mat, i, j)
+                statement_list.append((code, 2 * entry_size))
+        splitter.gen_code_statements(file_handler, statement_list)
+        return splitter
 
-    def __gen_reflect_hessian_body(self, file_handler):
-        """ Generates Java code for the body of the function to compute
-        Hessian matrix with Java Reflection API
+    def __gen_sparse_hessian_body(self, file_handler, out_var):
+        """ Generates Java code for the body of the function to compute the
+        structurally non-zero entries of Hessian matrix in the upper triangle
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+            out_var : A Variable object which is the array parameter
+        Returns:
+            splitter : A JavaMethodSplitter object keeping the helper methods
+                       which the assignments of entries are moved to
+        """
+        splitter = codegenutil.JavaMethodSplitter(
+            self.func_name,
+            self.var_list + [out_var],
+            self.modifier_list,
+            file_handler)
+        entry_size = codegenutil.estimate_java_array_store_size(1) + (
+            codegenutil.estimate_java_call_size(self.var_list))
+
+        statement_list = []
+        for (entry_ind, (i, j)) in enumerate(self._entry_list):
+            func_call = codegenutil.get_java_func_call(
+                self._diff_code_generator.get_derivative_func_name(
+                    i, j, True),
+                self.var_list,
+                self.class_name,
+                self.modifier_list)
+            statement_list.append(("%s[%d] = %s;\n" % (
+                out_var.name, entry_ind, func_call), entry_size))
+        splitter.gen_code_statements(file_handler, statement_list)
+        return splitter
+
+    def __gen_packed_hessian_body(self, file_handler, out_var):
+        """ Generates Java code for the body of the function to compute the
+        upper triangle of Hessian matrix packed into a flat array
 
         Args:
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
+            out_var : A Variable object which is the array parameter
+        Returns:
+            splitter : A JavaMethodSplitter object keeping the helper methods
+                       which the assignments of entries are moved to
         """
         num_diff_var = self._diff_code_generator.get_num_expanded_diff_var()
-        num_func_args = len(self.var_list)
-        temp_mat = "__temp"
-
-        arg_class_list_var_name = "argClasses"
-        main_class_var_name = (commonutil.lower_first_char(self.class_name) +
-                               "Class")
-        method_name_var_name = "methodName"
-        method_var_name = "method"
-
-        param_list = ", ".join([var.name for var in self.var_list])
-
-        file_handler.write("double[][] %s = new double[%d][%d];\n" % (
-            temp_mat, num_diff_var, num_diff_var))
-        file_handler.write("Class %s = new %s().getClass();\n" % (
-            main_class_var_name, self.class_name))
-        # Argument type list
-        file_handler.write("Class[] %s = new Class[%d];\n" % (
-            arg_class_list_var_name, num_func_args))
-        for arg_ind in xrange(num_func_args):
-            func_arg = self.var_list[arg_ind]
-            type_str = "double"
-            if func_arg.var_type == VariableType.VECTOR:
-                type_str += "[]"
-            elif func_arg.var_type == VariableType.MATRIX:
-                type_str += "[][]"
-            file_handler.write("%s[%d] = %s.class;\n" % (
-                arg_class_list_var_name, arg_ind, type_str))
-
-        # Jacobian code
-        file_handler.write("for (int i = 0; i < %d; ++i) {\n" % num_diff_var)
-        file_handler.tab()
-        file_handler.write("for (int j = i; j < %d; ++j) {\n" % num_diff_var)
+        splitter = codegenutil.JavaMethodSplitter(
+            self.func_name,
+            self.var_list + [out_var],
+            self.modifier_list,
+            file_handler)
+        entry_size = codegenutil.estimate_java_array_store_size(1) + (
+            codegenutil.estimate_java_call_size(self.var_list))
+
+        # Entries are assigned in the order of their positions in the array
+        statement_list = []
+        for j in xrange(num_diff_var):
+            for i in xrange(j + 1):
+                func_call = codegenutil.get_java_func_call(
+                    self._diff_code_generator.get_derivative_func_name(
+                        i, j, True),
+                    self.var_list,
+                    self.class_name,
+                    self.modifier_list)
+                statement_list.append(("%s[%d] = %s;\n" % (
+                    out_var.name, codegenutil.get_packed_index(i, j),
+                    func_call), entry_size))
+        splitter.gen_code_statements(file_handler, statement_list)
+        return splitter
+
+    def _gen_sparsity_code(self, file_handler):
+        """ Generates Java code for function to get the positions of the
+        entries computed in a sparse format. The function returns an array of
+        two int arrays, which are the row indices and the column indices in
+        COO_FORMAT, or the row offsets and the column indices in CSR_FORMAT
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        func_declaration = codegenutil.get_java_func_declaration(
+            self.func_name + "Sparsity", "int[][]", [], self.modifier_list)
+        file_handler.write(func_declaration + " {\n")
         file_handler.tab()
-        rhs_code = ("\"" + self._diff_code_generator.base_func_name + "_\" + " +
-                    "Integer.toString(i) + \"_\" + Integer.toString(j);")
-        file_handler.write("String %s = %s\n" % (
-            method_name_var_name, rhs_code))
-        rhs_code = "%s.getDeclaredMethod(%s, %s);\n" % (
-            main_class_var_name, method_name_var_name, arg_class_list_var_name)
-        file_handler.write("java.lang.reflect.Method %s = %s" % (
-            method_var_name, rhs_code))
-        invoked_obj = "this"
-        if "static" in self.modifier_list:
-            invoked_obj = "null"
-        file_handler.write("%s[i][j] = (Double) %s.invoke(%s, %s);\n" % (
-            temp_mat, method_var_name, invoked_obj, param_list))
-
-        # Symmetry code
-        file_handler.write("if (i != j) {\n")
+        file_handler.write("return new int[][] {\n")
         file_handler.tab()
-        file_handler.write("%s[j][i] = %s[i][j];\n" % (temp_mat, temp_mat))
+        (first_index_arr, second_index_arr) = self.get_sparsity_arrays()
+        file_handler.write("%s,\n" % codegenutil.get_java_array_initializer(
+            first_index_arr))
+        file_handler.write("%s\n" % codegenutil.get_java_array_initializer(
+            second_index_arr))
+        file_handler.untab()
+        file_handler.write("};\n")
         file_handler.untab()
         file_handler.write("}\n")
 
+    def _gen_packed_accessor_code(self, file_handler):
+        """ Generates Java code for a function returning the position of entry
+        (i, j) of Hessian matrix in the packed array, and a function returning
+        the value of the entry from the packed array. Either index can be the
+        larger one
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        modifier_str = " ".join(self.modifier_list)
+        if modifier_str:
+            modifier_str += " "
+        index_func_name = self.func_name + "Index"
+        file_handler.write("%sint %s(int i, int j) {\n" % (
+            modifier_str, index_func_name))
+        file_handler.tab()
+        file_handler.write(
+            "return i <= j ? i + j * (j + 1) / 2 : j + i * (i + 1) / 2;\n")
         file_handler.untab()
-        file_handler.write("}\n")
+        file_handler.write("}\n\n")
+
+        file_handler.write(
+            "%sdouble %sEntry(double[] packed, int i, int j) {\n" % (
+                modifier_str, self.func_name))
+        file_handler.tab()
+        index_func_call = "%s(i, j)" % index_func_name
+        if self.class_name and "static" in self.modifier_list:
+            index_func_call = "%s.%s" % (self.class_name, index_func_call)
+        file_handler.write("return packed[%s];\n" % index_func_call)
         file_handler.untab()
         file_handler.write("}\n")
-        file_handler.write("return %s;\n" % temp_mat)
 
     def _gen_hessian_code(self, file_handler):
-        """ Generates Java code for function to compute Hessian matrix
+        """ Generates Java code for function to compute Hessian matrix. The
+        function writing into an array supplied by the caller is generated
+        together with an overload allocating the array
         Args:
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
         """
-        self.__gen_hessian_declaration(file_handler)
+        out_var = self.__get_output_var()
+        codegenutil.gen_java_allocating_method(
+            file_handler, self.func_name, self.var_list, out_var,
+            self.modifier_list, self.class_name)
+        self.__gen_hessian_declaration(file_handler, out_var)
         # Function body
         file_handler.tab()
-        if self.class_name:
-            self.__gen_reflect_hessian_body(file_handler)
+        if self.is_sparse():
+            splitter = self.__gen_sparse_hessian_body(file_handler, out_var)
+        elif self.is_packed():
+            splitter = self.__gen_packed_hessian_body(file_handler, out_var)
         else:
-            self.__gen_simple_hessian_body(file_handler)
+            splitter = self.__gen_hessian_body(file_handler, out_var)
         file_handler.untab()
         file_handler.write("}\n")
+        splitter.gen_code_helpers(file_handler)
+
+
+class CHessianCodeGenerator(HessianCodeGenerator):
+    """
+    This is a class inherited from HessianCodeGenerator that generates C code
+    to compute Hessian matrix for an input mathematical multivariate
+    expression. The computed entries are written into an array supplied by
+    the caller (of get_output_size() entries, the whole matrix in row-major
+    order in DENSE_FORMAT), and partial derivative functions are static (i.e.
+    internal to the generated file)
+    """
+
+    SPARSITY_PARAM_NAMES = ["first_index", "second_index"]
+
+    def __init__(
+            self,
+            var_list,
+            sympy_expr,
+            func_name=None,
+            diff_var_list=None,
+            modifier_list=None,
+            hessian_format=None,
+            intermediate_table=None,
+            derivative_store=None,
+            num_jobs=None):
+        """ Class constructor
+        """
+        HessianCodeGenerator.__init__(
+            self, var_list, sympy_expr, func_name,
+            diff_var_list, modifier_list, hessian_format, intermediate_table,
+            derivative_store, num_jobs)
+
+    def _get_derivative_code_generator(self):
+        """ Returns the derivative code generator in C
+        """
+        return CDerivativeCodeGenerator(
+            self.var_list,
+            self.expr,
+            HessianCodeGenerator.DEFAULT_DERIVATIVE_NAME,
+            self.diff_var_list,
+            ["static"],
+            self.intermediate_table,
+            self.derivative_store)
+
+    def get_declaration_list(self):
+        """ Gets the declarations of the functions generated for other files to
+        call (i.e. the functions which are not static). They are the Hessian
+        function, followed by the sparsity function in a sparse format, or by
+        the index and the entry functions in PACKED_FORMAT
+
+        Returns:
+            declaration_list : A list of strings which are C function
+                               declarations
+        """
+        out_name = codegenutil.get_unused_var_name(
+            codegenutil.DEFAULT_OUTPUT_PARAM_NAME, self.var_list)
+        declaration_list = [codegenutil.get_c_func_declaration(
+            self.func_name, "void", self.var_list, self.modifier_list,
+            [out_name])]
+        modifier_str = "".join(
+            [modifier + " " for modifier in self.modifier_list])
+        if self.is_sparse():
+            declaration_list.append("%svoid %sSparsity(%s)" % (
+                modifier_str, self.func_name, ", ".join([
+                    "int *restrict " + name
+                    for name in CHessianCodeGenerator.SPARSITY_PARAM_NAMES])))
+        elif self.is_packed():
+            declaration_list.append("%sint %sIndex(int i, int j)" % (
+                modifier_str, self.func_name))
+            declaration_list.append(
+                "%sdouble %sEntry(const double *restrict packed, int i, "
+                "int j)" % (modifier_str, self.func_name))
+        return declaration_list
+
+    def __get_output_index_list(self):
+        """ Gets the entries of Hessian matrix computed by the Hessian
+        function, and their positions in the output array
+
+        Returns:
+            index_list : A list of tuples (i, j, pos_list) in which pos_list
+                         is a list of positions in the output array which
+                         entry (i, j) (i <= j) is written to. Tuples are in the
+                         order of the positions
+        """
+        if self.is_sparse():
+            return [(i, j, [entry_ind])
+                    for (entry_ind, (i, j)) in enumerate(self._entry_list)]
+        num_diff_var = self._diff_code_generator.get_num_expanded_diff_var()
+        if self.is_packed():
+            return [(i, j, [codegenutil.get_packed_index(i, j)])
+                    for j in xrange(num_diff_var) for i in xrange(j + 1)]
+        index_list = []
+        for i in xrange(num_diff_var):
+            for j in xrange(i, num_diff_var):
+                pos_list = [i * num_diff_var + j]
+                if i != j:
+                    pos_list.append(j * num_diff_var + i)
+                index_list.append((i, j, pos_list))
+        return index_list
+
+    def _gen_hessian_code(self, file_handler):
+        """ Generates C code for function to compute Hessian matrix
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        out_name = codegenutil.get_unused_var_name(
+            codegenutil.DEFAULT_OUTPUT_PARAM_NAME, self.var_list)
+        file_handler.write(self.get_declaration_list()[0] + " {\n")
+        file_handler.tab()
+        for (i, j, pos_list) in self.__get_output_index_list():
+            func_call = codegenutil.get_c_func_call(
+                self._diff_code_generator.get_derivative_func_name(
+                    i, j, True),
+                self.var_list)
+            file_handler.write("%s[%d] = %s;\n" % (
+                out_name, pos_list[0], func_call))
+            for pos in pos_list[1:]:
+                file_handler.write("%s[%d] = %s[%d];\n" % (
+                    out_name, pos, out_name, pos_list[0]))
+        file_handler.untab()
+        file_handler.write("}\n\n")
+
+    def _gen_sparsity_code(self, file_handler):
+        """ Generates C code for function to get the positions of the entries
+        computed in a sparse format. The function writes the row indices and
+        the column indices in COO_FORMAT, or the row offsets and the column
+        indices in CSR_FORMAT, into two arrays supplied by the caller
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        file_handler.write(self.get_declaration_list()[1] + " {\n")
+        file_handler.tab()
+        index_arr_list = self.get_sparsity_arrays()
+        for (param_name, index_arr) in zip(
+                CHessianCodeGenerator.SPARSITY_PARAM_NAMES, index_arr_list):
+            for (pos, index) in enumerate(index_arr):
+                file_handler.write("%s[%d] = %d;\n" % (param_name, pos, index))
+        file_handler.untab()
+        file_handler.write("}\n\n")
+
+    def _gen_packed_accessor_code(self, file_handler):
+        """ Generates C code for a function returning the position of entry
+        (i, j) of Hessian matrix in the packed array, and a function returning
+        the value of the entry from the packed array. Either index can be the
+        larger one
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        (_, index_declaration, entry_declaration) = (
+            self.get_declaration_list())
+        file_handler.write(index_declaration + " {\n")
+        file_handler.tab()
+        file_handler.write(
+            "return i <= j ? i + j * (j + 1) / 2 : j + i * (i + 1) / 2;\n")
+        file_handler.untab()
+        file_handler.write("}\n\n")
+
+        file_handler.write(entry_declaration + " {\n")
+        file_handler.tab()
+        file_handler.write("return packed[%sIndex(i, j)];\n" % self.func_name)
+        file_handler.untab()
+        file_handler.write("}\n\n")
+
+
+class NumpyHessianCodeGenerator(HessianCodeGenerator):
+    """
+    This is a class inherited from HessianCodeGenerator that generates Python
+    code to compute Hessian matrix for an input mathematical multivariate
+    expression at many points at once with NumPy (see NumpyExprCodeGenerator).
+    The computed entries at N points are written into an array supplied by
+    the caller, or into a new array which is returned. Its shape is (N, n, n)
+    in DENSE_FORMAT, and (N, get_output_size()) in the other formats. Partial
+    derivative functions are private (i.e. prefixed by an underscore)
+    """
+
+    def __init__(
+            self,
+            var_list,
+            sympy_expr,
+            func_name=None,
+            diff_var_list=None,
+            modifier_list=None,
+            hessian_format=None,
+            intermediate_table=None,
+            derivative_store=None,
+            num_jobs=None):
+        """ Class constructor
+        """
+        HessianCodeGenerator.__init__(
+            self, var_list, sympy_expr, func_name,
+            diff_var_list, modifier_list, hessian_format, intermediate_table,
+            derivative_store, num_jobs)
+
+    def _get_derivative_code_generator(self):
+        """ Returns the derivative code generator in Python with NumPy
+        """
+        return NumpyDerivativeCodeGenerator(
+            self.var_list,
+            self.expr,
+            "_" + HessianCodeGenerator.DEFAULT_DERIVATIVE_NAME,
+            self.diff_var_list,
+            [],
+            self.intermediate_table,
+            self.derivative_store)
+
+    def __get_output_index_list(self):
+        """ Gets the entries of Hessian matrix computed by the Hessian
+        function, and their indices in the output array after the leading axis
+
+        Returns:
+            index_list : A list of tuples (i, j, ind_list) in which ind_list
+                         is a list of strings which are the indices in the
+                         output array which entry (i, j) (i <= j) is written to
+        """
+        if self.is_sparse():
+            return [(i, j, [str(entry_ind)])
+                    for (entry_ind, (i, j)) in enumerate(self._entry_list)]
+        num_diff_var = self._diff_code_generator.get_num_expanded_diff_var()
+        if self.is_packed():
+            return [(i, j, [str(codegenutil.get_packed_index(i, j))])
+                    for j in xrange(num_diff_var) for i in xrange(j + 1)]
+        index_list = []
+        for i in xrange(num_diff_var):
+            for j in xrange(i, num_diff_var):
+                ind_list = ["%d, %d" % (i, j)]
+                if i != j:
+                    ind_list.append("%d, %d" % (j, i))
+                index_list.append((i, j, ind_list))
+        return index_list
+
+    def _gen_hessian_code(self, file_handler):
+        """ Generates Python code for function to compute Hessian matrix
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        out_name = codegenutil.get_unused_var_name(
+            codegenutil.DEFAULT_OUTPUT_PARAM_NAME, self.var_list)
+        num_diff_var = self._diff_code_generator.get_num_expanded_diff_var()
+        shape_list = [self.get_output_size()]
+        if not self.is_sparse() and not self.is_packed():
+            shape_list = [num_diff_var, num_diff_var]
+        file_handler.write_lines("\n\n%s\n" % (
+            codegenutil.get_python_func_declaration(
+                self.func_name, self.var_list, [out_name])))
+        file_handler.tab()
+        file_handler.write("if %s is None:\n" % out_name)
+        file_handler.tab()
+        file_handler.write("%s = %s\n" % (
+            out_name, codegenutil.get_numpy_empty_array(
+                self.var_list, shape_list)))
+        file_handler.untab()
+        for (i, j, ind_list) in self.__get_output_index_list():
+            func_call = codegenutil.get_python_func_call(
+                self._diff_code_generator.get_derivative_func_name(
+                    i, j, True),
+                self.var_list)
+            file_handler.write("%s[:, %s] = %s\n" % (
+                out_name, ind_list[0], func_call))
+            for ind in ind_list[1:]:
+                file_handler.write("%s[:, %s] = %s[:, %s]\n" % (
+                    out_name, ind, out_name, ind_list[0]))
+        file_handler.write("return %s\n" % out_name)
+        file_handler.untab()
+
+    def _gen_sparsity_code(self, file_handler):
+        """ Generates Python code for function to get the positions of the
+        entries computed in a sparse format. The function returns a pair of
+        NumPy int arrays, which are the row indices and the column indices in
+        COO_FORMAT, or the row offsets and the column indices in CSR_FORMAT
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        file_handler.write_lines("\n\ndef %sSparsity():\n" % self.func_name)
+        file_handler.tab()
+        file_handler.write("return (\n")
+        file_handler.tab()
+        (first_index_arr, second_index_arr) = self.get_sparsity_arrays()
+        file_handler.write("numpy.array(%s, dtype=int),\n" % first_index_arr)
+        file_handler.write("numpy.array(%s, dtype=int))\n" % second_index_arr)
+        file_handler.untab()
+        file_handler.untab()
+
+    def _gen_packed_accessor_code(self, file_handler):
+        """ Generates Python code for a function returning the position of
+        entry (i, j) of Hessian matrix in the packed array (after the leading
+        axis), and a function returning the values of the entry at all points
+        from the packed array. Either index can be the larger one
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        file_handler.write_lines("\n\ndef %sIndex(i, j):\n" % self.func_name)
+        file_handler.tab()
+        file_handler.write(
+            "return i + j * (j + 1) // 2 if i <= j else "
+            "j + i * (i + 1) // 2\n")
+        file_handler.untab()
+
+        file_handler.write_lines(
+            "\n\ndef %sEntry(packed, i, j):\n" % self.func_name)
+        file_handler.tab()
+        file_handler.write(
+            "return packed[:, %sIndex(i, j)]\n" % self.func_name)
+        file_handler.untab()
@@ -1,9 +1,11 @@
 from abc import ABCMeta, abstractmethod
 
-import common.util as commonutil
 import libgencode.codegenutil as codegenutil
-from common.vardef import VariableType
-from .derivativecode import JavaDerivativeCodeGenerator
+from common.vardef import Variable, VariableType
+from .adjointcode import JavaAdjointCodeGenerator
+from .derivativecode import (
+    CDerivativeCodeGenerator, JavaDerivativeCodeGenerator,
+    NumpyDerivativeCodeGenerator)
 
 
 class JacobianCodeGenerator(object):
@@ -19,6 +21,20 @@ class JacobianCodeGenerator(object):
         modifier_list : A list of strings indicating modifiers for the
                         jacobian method / function, and for derivative functions
                         (such as static, private, public, etc.)
+        gradient_mode : A string indicating how the Jacobian vector is
+                        computed. In SYMBOLIC_MODE, one partial derivative
+                        function is generated per differentiation variable.
+                        In ADJOINT_MODE, the whole Jacobian vector is computed
+                        by a single forward sweep and a single backward sweep
+                        (reverse-mode differentiation)
+        intermediate_table : An IntermediateExprTable object containing the
+                             intermediate expressions whose placeholder symbols
+                             may appear in the expression. It is None if the
+                             expression has no intermediate expressions
+        derivative_store : A DerivativeStore object keeping the derivatives
+                           computed so far. It may be shared with other code
+                           generators. It is None if the derivative code
+                           generator uses a store of its own
 
     Protected object member attributes:
         _diff_code_generator : The code generator for partial derivatives
@@ -29,17 +45,27 @@ class JacobianCodeGenerator(object):
     DEFAULT_FUNC_NAME = "jacobian"
     DEFAULT_DERIVATIVE_NAME = "partialDerivative"
 
+    SYMBOLIC_MODE = "symbolic"
+    ADJOINT_MODE = "adjoint"
+    SUPPORTED_GRADIENT_MODES = [SYMBOLIC_MODE, ADJOINT_MODE]
+    DEFAULT_GRADIENT_MODE = SYMBOLIC_MODE
+
     def __init__(
             self,
             var_list,
             sympy_expr,
             func_name=None,
             diff_var_list=None,
-            modifier_list=None):
+            modifier_list=None,
+            gradient_mode=None,
+            intermediate_table=None,
+            derivative_store=None):
         """ Class constructor
         """
         self.var_list = var_list
         self.expr = sympy_expr
+        self.intermediate_table = intermediate_table
+        self.derivative_store = derivative_store
         if func_name is None:
             self.func_name = JacobianCodeGenerator.DEFAULT_FUNC_NAME
         else:
@@ -52,6 +78,14 @@ class JacobianCodeGenerator(object):
             self.modifier_list = []
         else:
             self.modifier_list = modifier_list
+        if gradient_mode is None:
+            self.gradient_mode = JacobianCodeGenerator.DEFAULT_GRADIENT_MODE
+        else:
+            self.gradient_mode = gradient_mode
+        supported_modes = JacobianCodeGenerator.SUPPORTED_GRADIENT_MODES
+        if self.gradient_mode not in supported_modes:
+            raise NotImplementedError(
+                "The gradient mode: %s is not supported" % self.gradient_mode)
         self._diff_code_generator = self._get_derivative_code_generator()
 
     @abstractmethod
@@ -73,12 +107,37 @@ class JacobianCodeGenerator(object):
         """
         pass
 
+    @abstractmethod
+    def _gen_adjoint_jacobian_code(self, file_handler):
+        """ Generates code for function to compute Jacobian vector in reverse
+        mode (i.e. one forward sweep and one backward sweep over the evaluation
+        trace of the expression)
+        Subclass should implement this method to generate function code in a
+        specific programming language
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        pass
+
+    def get_output_size(self):
+        """ Gets the number of entries of the Jacobian vector
+
+        Returns:
+            size : An integer which is the number of expanded differentiation
+                   variables
+        """
+        return self._diff_code_generator.get_num_expanded_diff_var()
+
     def gen_code(self, file_handler):
-        """ Generates code for a function to evaluate hessian matrix
+        """ Generates code for a function to evaluate jacobian vector
         Args:
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
         """
+        if self.gradient_mode == JacobianCodeGenerator.ADJOINT_MODE:
+            self._gen_adjoint_jacobian_code(file_handler)
+            return
         self._diff_code_generator.gen_code_all_first_order(file_handler)
         self._gen_jacobian_code(file_handler)
 
@@ -86,8 +145,14 @@ class JacobianCodeGenerator(object):
 class JavaJacobianCodeGenerator(JacobianCodeGenerator):
     """
     This is a class inherited from JacobianCodeGenerator that generates Java
-    code to compute Hessian matrix for an input mathematical multivariate
+    code to compute Jacobian vector for an input mathematical multivariate
     expression
+
+    Public object member attributes:
+        class_name : A string indicating the name of the class declaring the
+                     generated methods. If it is given and the methods are
+                     static, partial derivative methods are called through the
+                     class name
     """
 
     def __init__(
@@ -97,12 +162,16 @@ class JavaJacobianCodeGenerator(JacobianCodeGenerator):
             func_name=None,
             diff_var_list=None,
             modifier_list=None,
-            class_name=None):
+            class_name=None,
+            gradient_mode=None,
+            intermediate_table=None,
+            derivative_store=None):
         """ Class constructor
         """
         JacobianCodeGenerator.__init__(
             self, var_list, sympy_expr, func_name,
-            diff_var_list, modifier_list)
+            diff_var_list, modifier_list, gradient_mode, intermediate_table,
+            derivative_store)
         self.class_name = class_name
 
     def _get_derivative_code_generator(self):
@@ -113,112 +182,273 @@ class JavaJacobianCodeGenerator(JacobianCodeGenerator):
             self.expr,
             JacobianCodeGenerator.DEFAULT_DERIVATIVE_NAME,
             self.diff_var_list,
-            self.modifier_list)
+            self.modifier_list,
+            self.intermediate_table,
+            self.derivative_store)
 
-    def __gen_jacobian_declaration(self, file_handler):
-        """ Generates Java code for Jacobian function declaration
+    def __get_output_var(self):
+        """ Gets the array parameter which the Jacobian vector is written to
+        Returns:
+            out_var : A Variable object
+        """
+        num_diff_var = self._diff_code_generator.get_num_expanded_diff_var()
+        return Variable(
+            codegenutil.get_unused_var_name(
+                codegenutil.DEFAULT_OUTPUT_PARAM_NAME, self.var_list),
+            VariableType.VECTOR, (num_diff_var,))
+
+    def __gen_jacobian_declaration(self, file_handler, out_var):
+        """ Generates Java code for declaration of Jacobian function writing
+        into an array supplied by the caller
         Args:
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
+            out_var : A Variable object which is the array parameter
         """
         func_declaration = codegenutil.get_java_func_declaration(
-            self.func_name, "double[]", self.var_list, self.modifier_list)
-        if self.class_name:
-            func_declaration += (" throws NoSuchMethodException, "
-                                 "IllegalAccessException, "
-                                 "java.lang.reflect.InvocationTargetException")
+            self.func_name, "void", self.var_list + [out_var],
+            self.modifier_list)
         file_handler.write(func_declaration + " {\n")
 
-    def __gen_simple_jacobian_body(self, file_handler):
+    def __gen_jacobian_body(self, file_handler, out_var):
         """ Generates Java code for the body of the function to compute
         Jacobian vector
 
         Args:
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
+            out_var : A Variable object which is the array parameter
+        Returns:
+            splitter : A JavaMethodSplitter object keeping the helper methods
+                       which the assignments of entries are moved to
         """
         num_diff_var = self._diff_code_generator.get_num_expanded_diff_var()
-        param_list = ", ".join([var.name for var in self.var_list])
-        temp_vector = "__temp"
+        splitter = codegenutil.JavaMethodSplitter(
+            self.func_name,
+            self.var_list + [out_var],
+            self.modifier_list,
+            file_handler)
+        entry_size = codegenutil.estimate_java_array_store_size(1) + (
+            codegenutil.estimate_java_call_size(self.var_list))
 
-        file_handler.write("double[] %s = new double[%d];\n" % (
-            temp_vector, num_diff_var))
+        statement_list = []
         for i in xrange(num_diff_var):
-            file_handler.write("%s[%d] = %s(%s);\n" % (
-                temp_vector, i,
+            func_call = codegenutil.get_java_func_call(
                 self._diff_code_generator.get_derivative_func_name(
                     i, None, True),
-                param_list))
-        file_handler.write("return %s;\n" % temp_vector)
-
-    def __gen_reflect_jacobian_body(self, file_handler):
-        """ Generates Java code for the body of the function to compute
-        Jacobian vector with Java Reflection API
+                self.var_list,
+                self.class_name,
+                self.modifier_list)
+            statement_list.append((
+                "%s[%d] = %s;\n" % (out_var.name, i, func_call), entry_size))
+        splitter.gen_code_statements(file_handler, statement_list)
+        return splitter
 
+    def _gen_jacobian_code(self, file_handler):
+        """ Generates Java code for function to compute Jacobian vector. The
+        function writing into an array supplied by the caller is generated
+        together with an overload allocating the array
         Args:
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
         """
-        num_diff_var = self._diff_code_generator.get_num_expanded_diff_var()
-        num_func_args = len(self.var_list)
-        temp_vector = "__temp"
-
-        arg_class_list_var_name = "argClasses"
-        main_class_var_name = (commonutil.lower_first_char(self.class_name) +
-                               "Class")
-        method_name_var_name = "methodName"
-        method_var_name = "method"
-
-        param_list = ", ".join([var.name for var in self.var_list])
-
-        file_handler.write("double[] %s = new double[%d];\n" % (
-            temp_vector, num_diff_var))
-        file_handler.write("Class %s = new %s().getClass();\n" % (
-            main_class_var_name, self.class_name))
-        # Argument type list
-        file_handler.write("Class[] %s = new Class[%d];\n" % (
-            arg_class_list_var_name, num_func_args))
-        for arg_ind in xrange(num_func_args):
-            func_arg = self.var_list[arg_ind]
-            type_str = "double"
-            if func_arg.var_type == VariableType.VECTOR:
-                type_str += "[]"
-            elif func_arg.var_type == VariableType.MATRIX:
-                type_str += "[][]"
-            file_handler.write("%s[%d] = %s.class;\n" % (
-                arg_class_list_var_name, arg_ind, type_str))
-
-        # Jacobian code
-        file_handler.write("for (int i = 0; i < %d; ++i) {\n" % num_diff_var)
+        out_var = self.__get_output_var()
+        codegenutil.gen_java_allocating_method(
+            file_handler, self.func_name, self.var_list, out_var,
+            self.modifier_list, self.class_name)
+        self.__gen_jacobian_declaration(file_handler, out_var)
+        # Function body
         file_handler.tab()
-        diff_base_name = self._diff_code_generator.base_func_name
-        file_handler.write("String %s = \"%s\" + Integer.toString(i);\n" % (
-            method_name_var_name, diff_base_name + "_"))
-        rhs_code = "%s.getDeclaredMethod(%s, %s);\n" % (
-            main_class_var_name, method_name_var_name, arg_class_list_var_name)
-        file_handler.write("java.lang.reflect.Method %s = %s" % (
-            method_var_name, rhs_code))
-        invoked_obj = "this"
-        if "static" in self.modifier_list:
-            invoked_obj = "null"
-        file_handler.write("%s[i] = (Double) %s.invoke(%s, %s);\n" % (
-            temp_vector, method_var_name, invoked_obj, param_list))
+        splitter = self.__gen_jacobian_body(file_handler, out_var)
         file_handler.untab()
         file_handler.write("}\n")
-        file_handler.write("return %s;\n" % temp_vector)
+        splitter.gen_code_helpers(file_handler)
+
+    def _gen_adjoint_jacobian_code(self, file_handler):
+        """ Generates Java code for function to compute Jacobian vector in
+        reverse mode, together with an overload allocating the array
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        # The backward sweep runs over the expression tree with intermediate
+        # expressions inlined
+        adjoint_expr = self.expr
+        if self.intermediate_table is not None:
+            adjoint_expr = self.intermediate_table.inline(self.expr)
+        out_var = self.__get_output_var()
+        codegenutil.gen_java_allocating_method(
+            file_handler, self.func_name, self.var_list, out_var,
+            self.modifier_list, self.class_name)
+        code_generator = JavaAdjointCodeGenerator(
+            self.var_list,
+            adjoint_expr,
+            self._diff_code_generator.get_expanded_diff_var_list(),
+            self.func_name,
+            self.modifier_list,
+            gradient_name=out_var.name)
+        code_generator.gen_code(file_handler)
+
+
+class CJacobianCodeGenerator(JacobianCodeGenerator):
+    """
+    This is a class inherited from JacobianCodeGenerator that generates C code
+    to compute Jacobian vector for an input mathematical multivariate
+    expression. The Jacobian vector is written into an array supplied by the
+    caller, and partial derivative functions are static (i.e. internal to the
+    generated file). Only SYMBOLIC_MODE is supported
+    """
+
+    def __init__(
+            self,
+            var_list,
+            sympy_expr,
+            func_name=None,
+            diff_var_list=None,
+            modifier_list=None,
+            gradient_mode=None,
+            intermediate_table=None,
+            derivative_store=None):
+        """ Class constructor
+        """
+        JacobianCodeGenerator.__init__(
+            self, var_list, sympy_expr, func_name,
+            diff_var_list, modifier_list, gradient_mode, intermediate_table,
+            derivative_store)
+
+    def _get_derivative_code_generator(self):
+        """ Returns the derivative code generator in C
+        """
+        return CDerivativeCodeGenerator(
+            self.var_list,
+            self.expr,
+            JacobianCodeGenerator.DEFAULT_DERIVATIVE_NAME,
+            self.diff_var_list,
+            ["static"],
+            self.intermediate_table,
+            self.derivative_store)
+
+    def get_declaration_list(self):
+        """ Gets the declarations of the functions generated for other files to
+        call (i.e. the functions which are not static)
+
+        Returns:
+            declaration_list : A list of strings which are C function
+                               declarations
+        """
+        out_name = codegenutil.get_unused_var_name(
+            codegenutil.DEFAULT_OUTPUT_PARAM_NAME, self.var_list)
+        return [codegenutil.get_c_func_declaration(
+            self.func_name, "void", self.var_list, self.modifier_list,
+            [out_name])]
 
     def _gen_jacobian_code(self, file_handler):
-        """ Generates Java code for function to compute Jacobian vector
+        """ Generates C code for function to compute Jacobian vector
         Args:
             file_handler : an instance of FileCodeWriter that handles writing
                            generated code to a file.
         """
-        self.__gen_jacobian_declaration(file_handler)
-        # Function body
+        out_name = codegenutil.get_unused_var_name(
+            codegenutil.DEFAULT_OUTPUT_PARAM_NAME, self.var_list)
+        file_handler.write(self.get_declaration_list()[0] + " {\n")
         file_handler.tab()
-        if self.class_name:
-            self.__gen_reflect_jacobian_body(file_handler)
-        else:
-            self.__gen_simple_jacobian_body(file_handler)
+        for i in xrange(self._diff_code_generator.get_num_expanded_diff_var()):
+            file_handler.write("%s[%d] = %s;\n" % (
+                out_name, i, codegenutil.get_c_func_call(
+                    self._diff_code_generator.get_derivative_func_name(
+                        i, None, True),
+                    self.var_list)))
         file_handler.untab()
-        file_handler.write("}\n")
+        file_handler.write("}\n\n")
+
+    def _gen_adjoint_jacobian_code(self, file_handler):
+        """ Reverse mode is not supported in C
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        Raises:
+            NotImplementedError : Always
+        """
+        raise NotImplementedError(
+            "The gradient mode: %s is not supported for C code" %
+            self.gradient_mode)
+
+
+class NumpyJacobianCodeGenerator(JacobianCodeGenerator):
+    """
+    This is a class inherited from JacobianCodeGenerator that generates Python
+    code to compute Jacobian vector for an input mathematical multivariate
+    expression at many points at once with NumPy (see NumpyExprCodeGenerator).
+    The Jacobian vectors at N points are written into an array of shape (N, n)
+    supplied by the caller, or into a new array which is returned. Partial
+    derivative functions are private (i.e. prefixed by an underscore). Only
+    SYMBOLIC_MODE is supported
+    """
+
+    def __init__(
+            self,
+            var_list,
+            sympy_expr,
+            func_name=None,
+            diff_var_list=None,
+            modifier_list=None,
+            gradient_mode=None,
+            intermediate_table=None,
+            derivative_store=None):
+        """ Class constructor
+        """
+        JacobianCodeGenerator.__init__(
+            self, var_list, sympy_expr, func_name,
+            diff_var_list, modifier_list, gradient_mode, intermediate_table,
+            derivative_store)
+
+    def _get_derivative_code_generator(self):
+        """ Returns the derivative code generator in Python with NumPy
+        """
+        return NumpyDerivativeCodeGenerator(
+            self.var_list,
+            self.expr,
+            "_" + JacobianCodeGenerator.DEFAULT_DERIVATIVE_NAME,
+            self.diff_var_list,
+            [],
+            self.intermediate_table,
+            self.derivative_store)
+
+    def _gen_jacobian_code(self, file_handler):
+        """ Generates Python code for function to compute Jacobian vector
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        out_name = codegenutil.get_unused_var_name(
+            codegenutil.DEFAULT_OUTPUT_PARAM_NAME, self.var_list)
+        file_handler.write_lines("\n\n%s\n" % (
+            codegenutil.get_python_func_declaration(
+                self.func_name, self.var_list, [out_name])))
+        file_handler.tab()
+        file_handler.write("if %s is None:\n" % out_name)
+        file_handler.tab()
+        file_handler.write("%s = %s\n" % (
+            out_name, codegenutil.get_numpy_empty_array(
+                self.var_list, [self.get_output_size()])))
+        file_handler.untab()
+        for i in xrange(self._diff_code_generator.get_num_expanded_diff_var()):
+            file_handler.write("%s[:, %d] = %s\n" % (
+                out_name, i, codegenutil.get_python_func_call(
+                    self._diff_code_generator.get_derivative_func_name(
+                        i, None, True),
+                    self.var_list)))
+        file_handler.write("return %s\n" % out_name)
+        file_handler.untab()
+
+    def _gen_adjoint_jacobian_code(self, file_handler):
+        """ Reverse mode is not supported with NumPy
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        Raises:
+            NotImplementedError : Always
+        """
+        raise NotImplementedError(
+            "The gradient mode: %s is not supported for NumPy code" %
+            self.gradient_mode)
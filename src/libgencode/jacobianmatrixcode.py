@@ -0,0 +1,379 @@
+from abc import ABCMeta, abstractmethod
+from sympy import Tuple
+
+import common.util as commonutil
+import libgencode.codegenutil as codegenutil
+from common import sympyutils
+from common.vardef import Variable, VariableType
+from .derivativecode import JavaDerivativeCodeGenerator
+
+
+class JacobianMatrixCodeGenerator(object):
+    """
+    This is an abstract class for generating code to compute Jacobian matrix
+    for a list of mathematical multivariate expressions (i.e. the components
+    of a vector-valued expression). The k-th row of the Jacobian matrix is
+    the gradient of the k-th expression.
+
+    Only the entries that are not structurally zero are computed. Besides the
+    full Jacobian matrix, code is generated for a compressed Jacobian matrix
+    based on a coloring of the columns: columns that do not share any row
+    are given the same color, and their entries are stored in the same column
+    of the compressed matrix.
+
+    Public object member attributes:
+        var_list : A list of Variable objects
+        expr_list : A list of sympy symbolic expressions
+        func_name : A string representing name of the generated Jacobian method
+        diff_var_list : A list of Variable objects used in differentiation
+        modifier_list : A list of strings indicating modifiers for the
+                        jacobian method / function, and for derivative functions
+                        (such as static, private, public, etc.)
+        intermediate_table : An IntermediateExprTable object containing the
+                             intermediate expressions whose placeholder symbols
+                             may appear in the expressions. It is None if the
+                             expressions have no intermediate expressions
+        derivative_store : A DerivativeStore object keeping the derivatives
+                           computed so far. It may be shared with other code
+                           generators. It is None if the derivative code
+                           generator uses a store of its own
+
+    Protected object member attributes:
+        _diff_code_generator_list : A list of code generators for partial
+                                    derivatives. The k-th generator is for the
+                                    k-th expression
+        _entry_list : A sorted list of pairs of indices (k, i) which are the
+                      positions of structurally non-zero entries of the
+                      Jacobian matrix
+        _col_colors : A list of integers in which the i-th element is the
+                      color of the i-th column of the Jacobian matrix
+    """
+
+    __metaclass__ = ABCMeta
+
+    DEFAULT_FUNC_NAME = "jacobian"
+    DEFAULT_DERIVATIVE_NAME = "jacobianEntry"
+
+    def __init__(
+            self,
+            var_list,
+            expr_list,
+            func_name=None,
+            diff_var_list=None,
+            modifier_list=None,
+            intermediate_table=None,
+            derivative_store=None):
+        """ Class constructor
+        """
+        self.var_list = var_list
+        self.expr_list = expr_list
+        if func_name is None:
+            self.func_name = JacobianMatrixCodeGenerator.DEFAULT_FUNC_NAME
+        else:
+            self.func_name = func_name
+        if diff_var_list is None:
+            self.diff_var_list = self.var_list
+        else:
+            self.diff_var_list = diff_var_list
+        if modifier_list is None:
+            self.modifier_list = []
+        else:
+            self.modifier_list = modifier_list
+        self.intermediate_table = intermediate_table
+        self.derivative_store = derivative_store
+        self._diff_code_generator_list = [
+            self._get_derivative_code_generator(expr_ind)
+            for expr_ind in xrange(len(self.expr_list))]
+        intermediate_list = None
+        if self.intermediate_table is not None:
+            intermediate_list = self.intermediate_table.get_dependencies(
+                Tuple(*self.expr_list))
+        self._entry_list = sympyutils.get_jacobian_sparsity(
+            self.expr_list, self.get_expanded_diff_var_list(),
+            intermediate_list)
+        self._col_colors = commonutil.get_column_coloring(
+            self._entry_list, self.get_num_expanded_diff_var())
+
+    def get_expanded_diff_var_list(self):
+        """ Returns the list of sympy symbols or sympy matrix elements after
+        expanding the variable list. The i-th column of the Jacobian matrix
+        corresponds to the i-th element of this list
+        """
+        return self._diff_code_generator_list[0].get_expanded_diff_var_list()
+
+    def get_num_expanded_diff_var(self):
+        """ Returns the number of variables after expanding the variable list
+        """
+        return len(self.get_expanded_diff_var_list())
+
+    def get_num_colors(self):
+        """ Returns the number of colors used to color the columns of the
+        Jacobian matrix, which is the number of columns of the compressed
+        Jacobian matrix
+        """
+        if not self._col_colors:
+            return 0
+        return max(self._col_colors) + 1
+
+    @abstractmethod
+    def _get_derivative_code_generator(self, expr_ind):
+        """ Returns the derivative code generator for an expression
+        Subclass should implement this method to get a derivative code generator
+        in a specific programming language
+
+        Args:
+            expr_ind : An integer which is the index of the expression
+        """
+        pass
+
+    @abstractmethod
+    def _gen_jacobian_code(self, file_handler):
+        """ Generates code for function to compute Jacobian matrix
+        Subclass should implement this method to generate function code in a
+        specific programming language
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        pass
+
+    @abstractmethod
+    def _gen_sparsity_code(self, file_handler):
+        """ Generates code for function to get the positions of structurally
+        non-zero entries of Jacobian matrix
+        Subclass should implement this method to generate function code in a
+        specific programming language
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        pass
+
+    @abstractmethod
+    def _gen_coloring_code(self, file_handler):
+        """ Generates code for function to get the colors of the columns of
+        Jacobian matrix
+        Subclass should implement this method to generate function code in a
+        specific programming language
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        pass
+
+    @abstractmethod
+    def _gen_compressed_jacobian_code(self, file_handler):
+        """ Generates code for function to compute the compressed Jacobian
+        matrix
+        Subclass should implement this method to generate function code in a
+        specific programming language
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        pass
+
+    def gen_code(self, file_handler):
+        """ Generates code for functions to evaluate Jacobian matrix
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        for (expr_ind, var_ind) in self._entry_list:
+            self._diff_code_generator_list[expr_ind].gen_code(
+                file_handler, var_ind)
+        self._gen_jacobian_code(file_handler)
+        self._gen_sparsity_code(file_handler)
+        self._gen_coloring_code(file_handler)
+        self._gen_compressed_jacobian_code(file_handler)
+
+
+class JavaJacobianMatrixCodeGenerator(JacobianMatrixCodeGenerator):
+    """
+    This is a class inherited from JacobianMatrixCodeGenerator that generates
+    Java code to compute Jacobian matrix for a list of mathematical
+    multivariate expressions
+
+    Public object member attributes:
+        class_name : A string indicating the name of the class declaring the
+                     generated methods. If it is given and the methods are
+                     static, partial derivative methods are called through the
+                     class name
+    """
+
+    def __init__(
+            self,
+            var_list,
+            expr_list,
+            func_name=None,
+            diff_var_list=None,
+            modifier_list=None,
+            class_name=None,
+            intermediate_table=None,
+            derivative_store=None):
+        """ Class constructor
+        """
+        JacobianMatrixCodeGenerator.__init__(
+            self, var_list, expr_list, func_name,
+            diff_var_list, modifier_list, intermediate_table, derivative_store)
+        self.class_name = class_name
+
+    def _get_derivative_code_generator(self, expr_ind):
+        """ Returns the derivative code generator in Java for an expression
+
+        Args:
+            expr_ind : An integer which is the index of the expression
+        """
+        return JavaDerivativeCodeGenerator(
+            self.var_list,
+            self.expr_list[expr_ind],
+            "%s_%d" % (JacobianMatrixCodeGenerator.DEFAULT_DERIVATIVE_NAME,
+                       expr_ind),
+            self.diff_var_list,
+            self.modifier_list,
+            self.intermediate_table,
+            self.derivative_store)
+
+    def __get_output_var(self, num_cols):
+        """ Gets the matrix parameter which entries of Jacobian matrix are
+        written to
+        Args:
+            num_cols : An integer which is the number of columns of the matrix
+
+        Returns:
+            out_var : A Variable object
+        """
+        return Variable(
+            codegenutil.get_unused_var_name(
+                codegenutil.DEFAULT_OUTPUT_PARAM_NAME, self.var_list),
+            VariableType.MATRIX, (len(self.expr_list), num_cols))
+
+    def __gen_entries_code(
+            self,
+            file_handler,
+            func_name,
+            out_var,
+            col_ind_list):
+        """ Generates Java code for a function assigning structurally non-zero
+        entries of Jacobian matrix to a matrix supplied by the caller. The
+        other entries of the matrix are set to zero. The function is generated
+        together with an overload allocating the matrix
+
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+            func_name : A string which is the name of the generated function
+            out_var : A Variable object which is the matrix parameter
+            col_ind_list : A list of integers in which the i-th element is
+                           the column of the matrix parameter where the
+                           entries of the i-th column of Jacobian matrix are
+                           assigned to
+        """
+        (num_rows, num_cols) = out_var.dimension
+        codegenutil.gen_java_allocating_method(
+            file_handler, func_name, self.var_list, out_var,
+            self.modifier_list, self.class_name)
+        func_declaration = codegenutil.get_java_func_declaration(
+            func_name, "void", self.var_list + [out_var], self.modifier_list)
+        file_handler.write(func_declaration + " {\n")
+        file_handler.tab()
+
+        assigned_entries = set([
+            (expr_ind, col_ind_list[var_ind])
+            for (expr_ind, var_ind) in self._entry_list])
+        if len(assigned_entries) < num_rows * num_cols:
+            file_handler.write(
+                "for (int __k = 0; __k < %d; __k += 1) {\n" % num_rows)
+            file_handler.tab()
+            file_handler.write("java.util.Arrays.fill(%s[__k], 0.0);\n" % (
+                out_var.name))
+            file_handler.untab()
+            file_handler.write("}\n")
+
+        splitter = codegenutil.JavaMethodSplitter(
+            func_name,
+            self.var_list + [out_var],
+            self.modifier_list,
+            file_handler)
+        entry_size = codegenutil.estimate_java_array_store_size(2) + (
+            codegenutil.estimate_java_call_size(self.var_list))
+        statement_list = []
+        for (expr_ind, var_ind) in self._entry_list:
+            diff_code_generator = self._diff_code_generator_list[expr_ind]
+            func_call = codegenutil.get_java_func_call(
+                diff_code_generator.get_derivative_func_name(
+                    var_ind, None, True),
+                self.var_list,
+                self.class_name,
+                self.modifier_list)
+            statement_list.append(("%s[%d][%d] = %s;\n" % (
+                out_var.name, expr_ind, col_ind_list[var_ind], func_call),
+                entry_size))
+        splitter.gen_code_statements(file_handler, statement_list)
+        file_handler.untab()
+        file_handler.write("}\n")
+        splitter.gen_code_helpers(file_handler)
+
+    def _gen_jacobian_code(self, file_handler):
+        """ Generates Java code for function to compute Jacobian matrix
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        num_diff_var = self.get_num_expanded_diff_var()
+        self.__gen_entries_code(
+            file_handler, self.func_name,
+            self.__get_output_var(num_diff_var), range(num_diff_var))
+
+    def _gen_sparsity_code(self, file_handler):
+        """ Generates Java code for function to get the positions of
+        structurally non-zero entries of Jacobian matrix. The function returns
+        an array of two int arrays, which are the row indices and the column
+        indices of the entries
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        func_declaration = codegenutil.get_java_func_declaration(
+            self.func_name + "Sparsity", "int[][]", [], self.modifier_list)
+        file_handler.write(func_declaration + " {\n")
+        file_handler.tab()
+        file_handler.write("return new int[][] {\n")
+        file_handler.tab()
+        file_handler.write("%s,\n" % codegenutil.get_java_array_initializer(
+            [expr_ind for (expr_ind, _) in self._entry_list]))
+        file_handler.write("%s\n" % codegenutil.get_java_array_initializer(
+            [var_ind for (_, var_ind) in self._entry_list]))
+        file_handler.untab()
+        file_handler.write("};\n")
+        file_handler.untab()
+        file_handler.write("}\n")
+
+    def _gen_coloring_code(self, file_handler):
+        """ Generates Java code for function to get the colors of the columns
+        of Jacobian matrix. The entry of Jacobian matrix at row k and column i
+        is stored in the compressed Jacobian matrix at row k and column
+        (color of column i)
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        func_declaration = codegenutil.get_java_func_declaration(
+            self.func_name + "Coloring", "int[]", [], self.modifier_list)
+        file_handler.write(func_declaration + " {\n")
+        file_handler.tab()
+        file_handler.write("return new int[] %s;\n" % (
+            codegenutil.get_java_array_initializer(self._col_colors)))
+        file_handler.untab()
+        file_handler.write("}\n")
+
+    def _gen_compressed_jacobian_code(self, file_handler):
+        """ Generates Java code for function to compute the compressed
+        Jacobian matrix
+        Args:
+            file_handler : an instance of FileCodeWriter that handles writing
+                           generated code to a file.
+        """
+        self.__gen_entries_code(
+            file_handler, self.func_name + "Compressed",
+            self.__get_output_var(self.get_num_colors()), self._col_colors)
@@ -3,6 +3,10 @@ The module contains definitions for structures used to construct the abstract
 syntax tree of the expression specification grammar
 """
 
+import operator
+
+import sympy
+
 from common import sympyutils
 
 
@@ -25,7 +29,7 @@ def get_norm_sympy_str(ast_expr):
     dimension = expr_type.dimension
 
     if expr_type.type == AstExprType.NUMBER:
-        norm_expr_str = "sqrt((%s)**2" % expr_str
+        norm_expr_str = "sqrt((%s)**2)" % expr_str
     elif expr_type.type == AstExprType.VECTOR:
         norm_expr_str = "sqrt(Sum(((%s)[%s,0])**2,(%s,0,%s)))" % (
             expr_str, counter_vars[0], counter_vars[0],
@@ -41,6 +45,40 @@ def get_norm_sympy_str(ast_expr):
     return norm_expr_str
 
 
+def get_norm_sympy(ast_expr, sympy_locals):
+    """ Gets a Sympy expression to evaluate Frobenius norm for matrix symbol,
+    and 2-norm for vector symbol. If the expression is evaluated to a single
+    number, the norm of the expression is the number itself
+
+    Args:
+        ast_expr : An AstExpression object
+        sympy_locals : A dictionary that maps names of symbols to sympy objects
+
+    Returns:
+        norm_expr : A sympy expression for computing norm
+    """
+    counter_vars = [sympy_locals[var_name] for var_name
+                    in sympyutils.get_reserved_var_names()]
+    expr_type = ast_expr.expr_type
+    sympy_expr = ast_expr.to_sympy(sympy_locals)
+    dimension = [sympy_locals[size] if isinstance(size, str) else size
+                 for size in expr_type.dimension]
+
+    if expr_type.type == AstExprType.NUMBER:
+        return sympy.sqrt(sympy_expr ** 2)
+    if expr_type.type == AstExprType.VECTOR:
+        return sympy.sqrt(sympy.Sum(
+            sympy_expr[counter_vars[0], 0] ** 2,
+            (counter_vars[0], 0, dimension[0] - 1)))
+    # Matrix case
+    square_expr = sympy.Sum(
+        sympy.Sum(
+            sympy_expr[counter_vars[0], counter_vars[1]] ** 2,
+            (counter_vars[0], 0, dimension[0] - 1)),
+        (counter_vars[1], 0, dimension[1] - 1))
+    return sympy.sqrt(square_expr)
+
+
 class AstProgram(object):
     """
     A class that encapsulates the expression specification program information
@@ -205,6 +243,22 @@ class AstOperator(object):
         LN: "log",
         TRANSPOSE: "Transpose"
     }
+    __dict_op_to_sympy_func = {
+        ADD: operator.add,
+        SUB: operator.sub,
+        MUL: operator.mul,
+        DIV: operator.truediv,
+        POW: operator.pow,
+        UMINUS: operator.neg,
+        ABS: sympy.Abs,
+        SQRT: sympy.sqrt,
+        SIN: sympy.sin,
+        COS: sympy.cos,
+        TAN: sympy.tan,
+        COT: sympy.cot,
+        LN: sympy.log,
+        TRANSPOSE: sympy.Transpose
+    }
     __dict_str_to_binary_ops = {
         "+": ADD,
         "-": SUB,
@@ -255,6 +309,23 @@ class AstOperator(object):
             return None
         return AstOperator.__dict_op_to_sympy_str[ast_op]
 
+    @staticmethod
+    def get_sympy_func(ast_op):
+        """ Returns the Python function that applies the input operator to
+        sympy objects. For example, POW is applied by operator.pow, and SIN is
+        applied by sympy.sin
+
+        Args:
+            ast_op : An enum value of AstOperator
+        Returns:
+            A function taking sympy objects as operands and returning the
+            sympy object of the result. Or None if such mapping is not
+            supported by the function
+        """
+        if ast_op not in AstOperator.__dict_op_to_sympy_func:
+            return None
+        return AstOperator.__dict_op_to_sympy_func[ast_op]
+
     @staticmethod
     def get_func_op(op_str):
         """ Returns a function operator for a given string
@@ -462,3 +533,74 @@ class AstExpression(object):
             result_str = "(%s)[0,0]" % result_str
 
         return result_str
+
+    def to_sympy(self, sympy_locals):
+        """ Builds the sympy object of the expression directly from the
+        expression tree. The result is the same as evaluating the string
+        returned by to_sympy_str with sympy.sympify, without building and
+        parsing the string
+
+        Args:
+            sympy_locals : A dictionary that maps names of symbols (constants,
+                           variables, loop counters and declared expressions)
+                           to sympy objects
+
+        Returns:
+            A sympy object (an expression, or a matrix) of the expression
+        """
+        result = None
+        if self.operator == AstOperator.SYMBOL:
+            name = self.operands[0].name
+            if name in sympy_locals:
+                result = sympy_locals[name]
+            elif name.isdigit():
+                result = sympy.Integer(name)
+            else:
+                try:
+                    result = sympy.Float(name)
+                except ValueError:
+                    result = sympy.Symbol(name)
+        elif self.operator == AstOperator.EXPR_COLLECTION:
+            if self.expr_type.type == AstExprType.VECTOR:
+                components = [expr.to_sympy(sympy_locals)
+                              for expr in self.operands]
+            else:
+                components = [[expr.to_sympy(sympy_locals)
+                               for expr in list_exprs]
+                              for list_exprs in self.operands]
+            result = sympy.Matrix(components)
+        elif self.operator == AstOperator.DOT:
+            result = (self.operands[0].to_sympy(sympy_locals).T *
+                      self.operands[1].to_sympy(sympy_locals))[0, 0]
+        elif self.operator == AstOperator.CROSS:
+            result = sympy.Matrix(
+                self.operands[0].to_sympy(sympy_locals)).cross(
+                    sympy.Matrix(self.operands[1].to_sympy(sympy_locals)))
+        elif self.operator == AstOperator.INDEXING:
+            indices = tuple(operand.to_sympy(sympy_locals)
+                            for operand in self.operands[1:])
+            result = self.operands[0].to_sympy(sympy_locals)[indices]
+        elif self.operator == AstOperator.TRANSPOSE_SHORT:
+            result = self.operands[0].to_sympy(sympy_locals).T
+        elif self.operator == AstOperator.NORM:
+            result = get_norm_sympy(self.operands[0], sympy_locals)
+        elif self.operator == AstOperator.RANGE:
+            result = tuple(operand.to_sympy(sympy_locals)
+                           for operand in self.operands)
+        elif (self.operator == AstOperator.LOOP_SUM or
+              self.operator == AstOperator.LOOP_PRODUCT):
+            sympy_func = sympy.Sum
+            if self.operator == AstOperator.LOOP_PRODUCT:
+                sympy_func = sympy.Product
+            result = sympy_func(
+                *[operand.to_sympy(sympy_locals) for operand in self.operands])
+        else:
+            # Functions, and the rest of unary and binary operators (+, -, /,
+            # *, etc.)
+            result = AstOperator.get_sympy_func(self.operator)(
+                *[operand.to_sympy(sympy_locals) for operand in self.operands])
+
+        if self._size_one_mat:
+            result = result[0, 0]
+
+        return result
@@ -1,5 +1,13 @@
+import os.path as ospath
+
 import ply.lex as pylex
 
+# Module name of the pre-generated lexer table, and the directory it is written
+# to. The table is loaded without validating the token rules again. It must be
+# deleted after changing the token rules, so that it is generated again
+LEX_TABLE_MODULE = "parsing.lextab"
+TABLE_DIR = ospath.dirname(ospath.abspath(__file__))
+
 # List of token names. Always required
 tokens = (
     # Reserved type keywords
@@ -93,67 +101,85 @@ reserved = {
     "main": "MAIN"
 }
 
-# Rules for operators
-t_PLUS = "\\+"
-t_MINUS = "-"
-t_MUL = "\\*"
-t_DIV = "/"
-t_EXP = "\\^"
-t_DOT = "\\."
-t_CROSS = "\\#"
-t_EQUAL = "="
-
-# Rules for bracket, parenthesis and punctuation
-t_LPAREN = "\\("
-t_RPAREN = "\\)"
-t_LSQRBRAC = "\\["
-t_RSQRBRAC = "\\]"
-t_COMMA = ","
-t_APOSTROPHE = "'"
-t_COLON = "\:"
-
-
-# Double token should have higher priority to be matched than that of
-# Integer token
-def t_DOUBLE(t):
-    "\\d+((\\.\\d*) | ((\\.\\d*)?(e[\\+-]\\d+)))"
-    t.value = float(t.value)
-    return t
-
-
-def t_INTEGER(t):
-    "\\d+"
-    t.value = int(t.value)
-    return t
-
-
-def t_ID(t):
-    "[A-Za-z_][A-Za-z_0-9]*"
-    if t.value in reserved:
-        t.type = reserved[t.value]
-    return t
-
-
-def t_error(t):
-    """ Error handling rule
-    """
-    print "Illegal character '%s'" % t.value[0]
-    t.lexer.skip(1)
-
-
-# Token rule for line comments, block comments and whitespaces
-# Simply discards the tokens
-t_ignore_LINE_COMMENT = "//.*"
-
-
-def t_ignore_WHITESPACES(t):
-    "\\s+"
-    t.lexer.lineno += t.value.count('\n')
 
+class ExprLexer(object):
+    """
+    A class that encapsulates a lexer of the expression description language.
+    Each object owns a separate PLY lexer, so that several objects can
+    tokenize different programs at the same time. The lexer is built from the
+    pre-generated table of LEX_TABLE_MODULE
 
-def t_ignore_BLOCK_COMMENT(t):
-    "/\\*(.|\\n)*?\\*/"
-    t.lexer.lineno += t.value.count("\n")
+    Public class attributes:
+        tokens : A tuple of token names
+        reserved : A dictionary that maps a reserved word to its token name
 
+    Public object member attributes:
+        lexer : A PLY lexer object built from the token rules of this class
+    """
 
-lexer = pylex.lex()
+    tokens = tokens
+    reserved = reserved
+
+    def __init__(self):
+        """ Class constructor
+        """
+        self.lexer = pylex.lex(
+            module=self,
+            optimize=1,
+            lextab=LEX_TABLE_MODULE,
+            outputdir=TABLE_DIR)
+
+    # Rules for operators
+    t_PLUS = "\\+"
+    t_MINUS = "-"
+    t_MUL = "\\*"
+    t_DIV = "/"
+    t_EXP = "\\^"
+    t_DOT = "\\."
+    t_CROSS = "\\#"
+    t_EQUAL = "="
+
+    # Rules for bracket, parenthesis and punctuation
+    t_LPAREN = "\\("
+    t_RPAREN = "\\)"
+    t_LSQRBRAC = "\\["
+    t_RSQRBRAC = "\\]"
+    t_COMMA = ","
+    t_APOSTROPHE = "'"
+    t_COLON = "\:"
+
+    # Double token should have higher priority to be matched than that of
+    # Integer token
+    def t_DOUBLE(self, t):
+        "\\d+((\\.\\d*) | ((\\.\\d*)?(e[\\+-]\\d+)))"
+        t.value = float(t.value)
+        return t
+
+    def t_INTEGER(self, t):
+        "\\d+"
+        t.value = int(t.value)
+        return t
+
+    def t_ID(self, t):
+        "[A-Za-z_][A-Za-z_0-9]*"
+        if t.value in self.reserved:
+            t.type = self.reserved[t.value]
+        return t
+
+    def t_error(self, t):
+        """ Error handling rule
+        """
+        print "Illegal character '%s'" % t.value[0]
+        t.lexer.skip(1)
+
+    # Token rule for line comments, block comments and whitespaces
+    # Simply discards the tokens
+    t_ignore_LINE_COMMENT = "//.*"
+
+    def t_ignore_WHITESPACES(self, t):
+        "\\s+"
+        t.lexer.lineno += t.value.count('\n')
+
+    def t_ignore_BLOCK_COMMENT(self, t):
+        "/\\*(.|\\n)*?\\*/"
+        t.lexer.lineno += t.value.count("\n")
@@ -1,33 +1,204 @@
 import sympy
-from sympy import Symbol, MatrixSymbol
+from sympy import ImmutableMatrix, Symbol, MatrixSymbol
+from sympy.matrices.expressions.matexpr import MatrixElement, MatrixExpr
 
 import parsing.expryacc as expryacc
 from .astdef import AstExprType, AstSymbolFlag
 
-from common import sympyutils
+from common import profiling, sympyutils
+from common.intermediate import IntermediateExprTable
 from common.vardef import VariableType, Variable
 
+INTERMEDIATE_SYMBOL_PREFIX = "__"
 
-def parse_expr_specification(program_txt):
+# The errors raised by sympy when an expression uses a placeholder of a
+# sub-expression in a way it does not support (e.g. indexing a matrix of
+# placeholders by a loop variable)
+UNSUPPORTED_PLACEHOLDER_ERRORS = (IndexError, TypeError)
+
+
+def _is_singleton_expr(sympy_expr):
+    """ Checks if a sympy expression is a number, a symbol or a matrix element,
+    which is never worth keeping as an intermediate expression
+
+    Args:
+        sympy_expr : A sympy expression
+
+    Returns:
+        is_singleton : A boolean value
+    """
+    return sympy_expr.is_number or sympy_expr.is_Symbol or (
+        isinstance(sympy_expr, MatrixElement))
+
+
+def _add_intermediate_expr(expr_name, sympy_expr, intermediate_table):
+    """ Replaces a named sub-expression by placeholder symbols, and adds the
+    corresponding intermediate expressions to the table. For a matrix-valued
+    sub-expression, each element is replaced separately
+
+    Args:
+        expr_name : A string which is the name of the sub-expression
+        sympy_expr : A sympy expression (or a sympy matrix) of the
+                     sub-expression
+        intermediate_table : An IntermediateExprTable object
+
+    Returns:
+        placeholder_expr : A sympy expression (or a sympy matrix) to be used
+                           in place of the sub-expression in later
+                           expressions. Elements containing loops, and
+                           singleton elements are kept as they are
+    """
+    if isinstance(sympy_expr, MatrixExpr):
+        try:
+            sympy_expr = sympy_expr.as_explicit()
+        except Exception:
+            # Matrix whose elements cannot be listed (e.g. its dimension is not
+            # known)
+            return sympy_expr
+    if isinstance(sympy_expr, sympy.MatrixBase):
+        (num_rows, num_cols) = sympy_expr.shape
+        placeholder_list = []
+        for row in xrange(num_rows):
+            for col in xrange(num_cols):
+                placeholder_list.append(_add_intermediate_expr(
+                    "%s_%d_%d" % (expr_name, row, col),
+                    sympy_expr[row, col],
+                    intermediate_table))
+        return sympy.Matrix(num_rows, num_cols, placeholder_list)
+    if _is_singleton_expr(sympy_expr) or sympyutils.has_loop(sympy_expr):
+        return sympy_expr
+    placeholder = Symbol(INTERMEDIATE_SYMBOL_PREFIX + expr_name, real=True)
+    intermediate_table.add_intermediate(placeholder, sympy_expr)
+    return placeholder
+
+
+def _sympify_exprs(
+        ast_exprs,
+        sympy_locals,
+        simplify_level=None,
+        simplify_time_budget=None):
+    """ Converts the expression declarations into sympy expressions until the
+    main expression is encountered. Expressions declared after main expression
+    are ignored.
+
+    Expressions other than main expression are kept as intermediate
+    expressions. They are inlined into the expressions using them from the
+    first expression that cannot be converted with placeholders (e.g. indexing
+    a matrix sub-expression by a loop variable), or into main expression if
+    it has loops (the chain rule terms would then be expanded in the loop body
+    and evaluated in every iteration). Each expression is simplified once: the
+    inlined value of a sub-expression is its simplified form, where the
+    placeholders are replaced by their definitions
+
+    Args:
+        ast_exprs : A list of pairs (name, AST expression) of expression
+                    declarations
+        sympy_locals : A dictionary that maps names of constants and variables
+                       to sympy objects. It will be modified
+        simplify_level : A string which is one of
+                         SimplifyLevel.SUPPORTED_LEVELS indicating how much
+                         each expression is simplified
+        simplify_time_budget : A number indicating the time budget in seconds
+                               to simplify each expression (None if the time
+                               is not limited)
+
+    Returns:
+        sympy_expr_info : A tuple whose first element is the sympy expression
+                          of main expression, second element is an
+                          IntermediateExprTable object (None if the
+                          sub-expressions are inlined into main expression),
+                          and third element is a list of pairs (expression
+                          name, simplification level reached by the
+                          expression)
+    """
+    intermediate_table = IntermediateExprTable()
+    inlined_locals = dict(sympy_locals)
+    use_intermediates = True
+    simplify_report = []
+    for (expr_name, ast_expr) in ast_exprs:
+        raw_sympy_expr = None
+        if use_intermediates:
+            try:
+                with profiling.profile_phase("sympify"):
+                    raw_sympy_expr = ast_expr.to_sympy(sympy_locals)
+            except UNSUPPORTED_PLACEHOLDER_ERRORS:
+                use_intermediates = False
+        if (expr_name == "main" and use_intermediates and
+                len(intermediate_table) > 0):
+            raw_sympy_expr = sympyutils.evaluate_const_loops(raw_sympy_expr)
+            use_intermediates = not sympyutils.has_loop(raw_sympy_expr)
+        if not use_intermediates:
+            with profiling.profile_phase("sympify"):
+                raw_sympy_expr = ast_expr.to_sympy(inlined_locals)
+        with profiling.profile_phase("simplify"):
+            sympy_expr, reached_level = sympyutils.simplify_expr(
+                raw_sympy_expr, simplify_level, simplify_time_budget)
+        simplify_report.append((expr_name, reached_level))
+        if expr_name == "main":
+            inlined_locals[expr_name] = sympy_expr
+            break
+        if use_intermediates:
+            inlined_locals[expr_name] = intermediate_table.inline(sympy_expr)
+            sympy_locals[expr_name] = _add_intermediate_expr(
+                expr_name, sympy_expr, intermediate_table)
+        else:
+            inlined_locals[expr_name] = sympy_expr
+
+    main_expr = inlined_locals["main"]
+    if isinstance(main_expr, MatrixExpr):
+        # Vector-valued expression given in terms of matrix operations
+        main_expr = main_expr.as_explicit()
+    if isinstance(main_expr, sympy.MatrixBase):
+        main_expr = ImmutableMatrix(main_expr)
+    if not use_intermediates:
+        intermediate_table = None
+    return (main_expr, intermediate_table, simplify_report)
+
+
+def parse_expr_specification(
+        program_txt,
+        simplify_level=None,
+        simplify_time_budget=None,
+        simplify_report=None):
     """ Parses a program text that contains the specification of expression
 
     Args:
         program_txt : A string which is the whole expression specification
                       program
+        simplify_level : A string which is one of
+                         SimplifyLevel.SUPPORTED_LEVELS indicating how much
+                         each declared expression is simplified. If it is
+                         None, SimplifyLevel.DEFAULT_LEVEL is used
+        simplify_time_budget : A number indicating the time budget in seconds
+                               to simplify each declared expression. When the
+                               budget runs out, the best form found so far is
+                               used. If it is None, the time is not limited
+        simplify_report : A list to which pairs (expression name,
+                          simplification level reached by the expression) are
+                          appended, in declaration order. It may be None
 
     Returns:
-        var_expr_pair : A pair whose first element is a list of symbol variables
-                        used by the expression, and second element is a sympy
-                        expression object
+        var_expr_pair : A tuple whose first element is a list of symbol
+                        variables used by the expression, second element is a
+                        list of symbol variables used for differentiation, and
+                        third element is a sympy expression object. If the main
+                        expression is vector-valued (or matrix-valued), the
+                        third element is a sympy matrix of expressions. The
+                        fourth element is an IntermediateExprTable object
+                        containing the named sub-expressions, whose
+                        placeholder symbols may appear in the main expression.
+                        It is None if the sub-expressions are inlined
     """
-    const_list, symbol_list, ast_exprs = expryacc.parse(program_txt)
+    with profiling.profile_phase("parse"):
+        const_list, symbol_list, ast_exprs = expryacc.parse(program_txt)
 
     var_list = []
     diff_var_list = []
     sympy_locals = {}
 
     for constant in const_list:
-        expr_value = sympy.sympify(constant.value.to_sympy_str())
+        with profiling.profile_phase("sympify"):
+            expr_value = constant.value.to_sympy(sympy_locals)
         if not sympyutils.is_const_expr(expr_value):
             raise Exception(
                 "Right hand-side is not a constant in constant declaration")
@@ -83,20 +254,13 @@ def parse_expr_specification(program_txt):
     for var_name in reserved_names:
         sympy_locals[var_name] = Symbol(var_name, integer=True)
 
-    # Sympify all expressions until we encounter main expression
-    # Expressions declared after main expression are ignored
-    for (expr_name, ast_expr) in ast_exprs:
-        expr_str = ast_expr.to_sympy_str()
-        raw_sympy_expr = sympy.sympify(expr_str, sympy_locals)
-        try:
-            sympy_expr = sympy.simplify(raw_sympy_expr)
-        except:
-            # If expr cannot be simplified due to errors, just take the original
-            sympy_expr = raw_sympy_expr
-        sympy_locals[expr_name] = sympy_expr
-        if expr_name == "main":
-            print expr_str
-            break
+    # Named sub-expressions are kept as intermediate expressions, so that
+    # they are differentiated once by the chain rule instead of being
+    # differentiated in every place they are used
+    main_expr, intermediate_table, expr_simplify_report = _sympify_exprs(
+        ast_exprs, dict(sympy_locals), simplify_level, simplify_time_budget)
+    if simplify_report is not None:
+        simplify_report.extend(expr_simplify_report)
 
     # Return Main expression
-    return (var_list, diff_var_list, sympy_locals["main"])
+    return (var_list, diff_var_list, main_expr, intermediate_table)
@@ -1,5 +1,5 @@
 import ply.yacc as pyyacc
-from .exprlex import tokens
+from .exprlex import ExprLexer, TABLE_DIR, tokens
 from .astdef import (
     AstConstant,
     AstExpression,
@@ -9,6 +9,11 @@ from .astdef import (
     AstSymbolFlag
 )
 
+# Module name of the pre-generated parsing table. The table is loaded without
+# validating the grammar rules again. It must be deleted after changing the
+# grammar rules, so that it is generated again (in TABLE_DIR)
+PARSE_TABLE_MODULE = "parsing.parsetab"
+
 precedence = (
     ("left", "PLUS", "MINUS"),
     ("left", "MUL", "DIV", "DOT"),
@@ -17,312 +22,368 @@ precedence = (
     ("right", "UMINUS")
 )
 
-environment = {}        # Map a string which is a name of an atom to its type
-for_loop_vars = []
-
-
-def p_file_description(p):
-    """
-    file_description : list_const_declarations list_var_declarations list_expr_declarations
-    """
-    p[2] += for_loop_vars
-    p[0] = (p[1], p[2], p[3])
-
-
-def p_list_const_declarations(p):
-    """
-    list_const_declarations : const_declaration list_const_declarations
-                            | empty
-    """
-    if len(p) == 2:
-        p[0] = []
-    else:
-        p[0] = [p[1]] + p[2]
-
-
-def p_const_declaration(p):
-    """
-    const_declaration : CONST ID EQUAL expression
-    """
-    p[0] = AstConstant(p[2], p[4])
-    environment[p[2]] = p[4].expr_type
-
 
-def p_list_var_declarations(p):
-    """
-    list_var_declarations : var_declaration list_var_declarations
-                          | empty
-    """
-    if len(p) == 3:
-        p[0] = [p[1]] + p[2]
-    else:
-        p[0] = []
-
-
-def p_var_declaration(p):
-    """
-    var_declaration : basic_var_declaration
-                    | basic_var_declaration COLON NODIFF
-                    | basic_var_declaration COLON EQUIVALENT
-    """
-    p[0] = p[1]
-    if len(p) == 4:
-        if p[3] == "nodiff":
-            # The variable is not used in differentiation
-            p[0].flag = AstSymbolFlag.NO_DIFF
+class ExprParser(object):
+    """
+    A class that encapsulates a parser of the expression description language.
+    Each object owns its PLY lexer and parser, and the state built up while
+    parsing a program (the types of the declared names, the loop variables
+    and the first syntax error). The state is reset at the start of every
+    parse, so an object can parse several programs in turn, and different
+    objects can parse programs at the same time (e.g. in different threads)
+
+    Public class attributes:
+        tokens : A tuple of token names
+        precedence : A tuple of precedence rules of the operators
+
+    Public object member attributes:
+        environment : A dictionary that maps a string which is a name of an
+                      atom to its type
+        for_loop_vars : A list of AstSymbol objects of loop variables
+        syntax_error : A string describing the first syntax error found in
+                       the program (with its location). It is None if there
+                       is no syntax error
+        lexer : An ExprLexer object
+        parser : A PLY parser object built from the grammar rules of this
+                 class
+    """
+
+    tokens = tokens
+    precedence = precedence
+
+    def __init__(self):
+        """ Class constructor
+        """
+        self.environment = {}
+        self.for_loop_vars = []
+        self.syntax_error = None
+        self.lexer = ExprLexer()
+        self.parser = pyyacc.yacc(
+            module=self,
+            debug=0,
+            optimize=1,
+            tabmodule=PARSE_TABLE_MODULE,
+            outputdir=TABLE_DIR)
+
+    def parse(self, program_text):
+        """ Parses the expression description program
+
+        Args:
+            program_text : A string which is the whole expression description
+                           program
+
+        Returns:
+            parse_result : A tuple whose first element is a list of
+                           AstConstant objects, second element is a list of
+                           AstSymbol objects of variables (including loop
+                           variables), and third element is a list of pairs
+                           (name, AST expression) of expression declarations
+
+        Raises:
+            ValueError : An error if the program has a syntax error
+        """
+        self.environment = {}
+        self.for_loop_vars = []
+        self.syntax_error = None
+        self.lexer.lexer.lineno = 1
+        parse_result = self.parser.parse(program_text, lexer=self.lexer.lexer)
+        if self.syntax_error is not None:
+            raise ValueError(self.syntax_error)
+        if parse_result is None:
+            raise ValueError("Syntax error in the expression specification")
+        return parse_result
+
+    def p_error(self, p):
+        """ Records the first syntax error found while parsing, with the
+        line and the token where it is found
+
+        Args:
+            p : A PLY token object. It is None if the error is at the end of
+                the program
+        """
+        if self.syntax_error is not None:
+            return
+        if p is None:
+            self.syntax_error = "Syntax error at the end of the specification"
         else:
-            p[0].flag = AstSymbolFlag.EQUIVALENT
-
-
-def p_basic_var_declaration(p):
-    """
-    basic_var_declaration : NUMBER ID
-                          | VECTOR ID LPAREN integer_and_id RPAREN
-                          | MATRIX ID LPAREN integer_and_id COMMA integer_and_id RPAREN
-    """
-    if len(p) == 3:
-        p[0] = AstSymbol(p[2], AstExprType(AstExprType.NUMBER, ()))
-    elif len(p) == 6:
-        p[0] = AstSymbol(p[2], AstExprType(AstExprType.VECTOR, (p[4], 1)))
-    else:
-        p[0] = AstSymbol(p[2], AstExprType(AstExprType.MATRIX, (p[4], p[6])))
-    environment[p[0].name] = p[0].type_info
-
-
-def p_list_expr_declarations(p):
-    """
-    list_expr_declarations : expr_declaration list_expr_declarations
-                           | empty
-    """
-    if len(p) == 3:
-        p[0] = [p[1]] + p[2]
-    else:
-        p[0] = []
-
-
-def p_expr_declaration(p):
-    """
-    expr_declaration : EXPR ID EQUAL expression
-                     | EXPR MAIN EQUAL expression
-    """
-    p[0] = (p[2], p[4])
-    environment[p[2]] = p[4].expr_type
-
-
-def p_expression(p):
-    """
-    expression : LPAREN expression RPAREN
-               | expression PLUS expression
-               | expression MINUS expression
-               | expression MUL expression
-               | expression DIV expression
-               | expression DOT expression
-               | expression EXP expression
-               | expression CROSS expression
-               | expression APOSTROPHE
-               | MINUS expression %prec UMINUS
-               | math_func_call
-               | loop_expression
-               | vector_index
-               | matrix_index
-               | atom
-               | matrix_of_exprs
-               | vector_of_exprs
-    """
-    num_components = len(p)
-    if num_components == 2:
+            self.syntax_error = "Syntax error at line %d, token %s (%r)" % (
+                p.lineno, p.type, p.value)
+
+    def p_file_description(self, p):
+        """
+        file_description : list_const_declarations list_var_declarations list_expr_declarations
+        """
+        p[2] += self.for_loop_vars
+        p[0] = (p[1], p[2], p[3])
+
+    def p_list_const_declarations(self, p):
+        """
+        list_const_declarations : const_declaration list_const_declarations
+                                | empty
+        """
+        if len(p) == 2:
+            p[0] = []
+        else:
+            p[0] = [p[1]] + p[2]
+
+    def p_const_declaration(self, p):
+        """
+        const_declaration : CONST ID EQUAL expression
+        """
+        p[0] = AstConstant(p[2], p[4])
+        self.environment[p[2]] = p[4].expr_type
+
+    def p_list_var_declarations(self, p):
+        """
+        list_var_declarations : var_declaration list_var_declarations
+                              | empty
+        """
+        if len(p) == 3:
+            p[0] = [p[1]] + p[2]
+        else:
+            p[0] = []
+
+    def p_var_declaration(self, p):
+        """
+        var_declaration : basic_var_declaration
+                        | basic_var_declaration COLON NODIFF
+                        | basic_var_declaration COLON EQUIVALENT
+        """
         p[0] = p[1]
-    elif num_components == 3:
-        if p[1] == "-":
-            # expression : -expression
-            p[0] = AstExpression(AstOperator.UMINUS, [p[2]])
+        if len(p) == 4:
+            if p[3] == "nodiff":
+                # The variable is not used in differentiation
+                p[0].flag = AstSymbolFlag.NO_DIFF
+            else:
+                p[0].flag = AstSymbolFlag.EQUIVALENT
+
+    def p_basic_var_declaration(self, p):
+        """
+        basic_var_declaration : NUMBER ID
+                              | VECTOR ID LPAREN integer_and_id RPAREN
+                              | MATRIX ID LPAREN integer_and_id COMMA integer_and_id RPAREN
+        """
+        if len(p) == 3:
+            p[0] = AstSymbol(p[2], AstExprType(AstExprType.NUMBER, ()))
+        elif len(p) == 6:
+            p[0] = AstSymbol(p[2], AstExprType(AstExprType.VECTOR, (p[4], 1)))
         else:
-            # expression : expression' (matrix transpose)
-            p[0] = AstExpression(AstOperator.TRANSPOSE_SHORT, [p[1]])
-    elif p[1] == "(":
-        # expression : (expression)
-        p[0] = p[2]
-    else:
-        # Binary operator
-        p[0] = AstExpression(AstOperator.get_binary_op(p[2]), [p[1], p[3]])
-
-
-def p_loop_expression(p):
-    """
-    loop_expression : for_statements loop_func LPAREN expression RPAREN
-    """
-    op_type = AstOperator.LOOP_SUM
-    if p[2] == "product":
-        op_type = AstOperator.LOOP_PRODUCT
-    p[0] = AstExpression(op_type, [p[4]] + p[1])
-
-
-def p_for_statements(p):
-    """
-    for_statements : for_statement for_statements
-                   | for_statement
-    """
-    if len(p) == 2:
-        p[0] = [p[1]]
-    else:
-        p[0] = [p[1]] + p[2]
-
-
-def p_for_statement(p):
-    """
-    for_statement : FOR ID IN integer_range
-    """
-    loop_symbol = AstSymbol(
-        p[2],
-        AstExprType(AstExprType.NUMBER, ()),
-        AstSymbolFlag.USED_IN_LOOP
-    )
-    p[0] = AstExpression(
-        AstOperator.RANGE,
-        [AstExpression(AstOperator.SYMBOL, [loop_symbol])] + p[4]
-    )
-    for_loop_vars.append(loop_symbol)
-    environment[loop_symbol.name] = loop_symbol.type_info
-
-
-def p_math_func_call(p):
-    """
-    math_func_call : math_func LPAREN expression RPAREN
-    """
-    p[0] = AstExpression(AstOperator.get_func_op(p[1]), [p[3]])
-
-
-def p_matrix_index(p):
-    """
-    matrix_index : vector_index LSQRBRAC expression RSQRBRAC
-    """
-    operands = [p[1].operands[0], p[1].operands[1], p[3]]
-    p[0] = AstExpression(AstOperator.INDEXING, operands)
-
-
-def p_vector_index(p):
-    """
-    vector_index : ID LSQRBRAC expression RSQRBRAC
-                 | LPAREN expression RPAREN LSQRBRAC expression RSQRBRAC
-    """
-    operands = []
-    symbol_zero = AstSymbol("0", AstExprType(AstExprType.NUMBER, ()))
-    expr_zero = AstExpression(AstOperator.SYMBOL, [symbol_zero])
-    if len(p) == 5:
-        indexed_src = AstExpression(
-            AstOperator.SYMBOL,
-            [AstSymbol(p[1], environment[p[1]])]
+            p[0] = AstSymbol(p[2], AstExprType(AstExprType.MATRIX, (p[4], p[6])))
+        self.environment[p[0].name] = p[0].type_info
+
+    def p_list_expr_declarations(self, p):
+        """
+        list_expr_declarations : expr_declaration list_expr_declarations
+                               | empty
+        """
+        if len(p) == 3:
+            p[0] = [p[1]] + p[2]
+        else:
+            p[0] = []
+
+    def p_expr_declaration(self, p):
+        """
+        expr_declaration : EXPR ID EQUAL expression
+                         | EXPR MAIN EQUAL expression
+        """
+        p[0] = (p[2], p[4])
+        self.environment[p[2]] = p[4].expr_type
+
+    def p_expression(self, p):
+        """
+        expression : LPAREN expression RPAREN
+                   | expression PLUS expression
+                   | expression MINUS expression
+                   | expression MUL expression
+                   | expression DIV expression
+                   | expression DOT expression
+                   | expression EXP expression
+                   | expression CROSS expression
+                   | expression APOSTROPHE
+                   | MINUS expression %prec UMINUS
+                   | math_func_call
+                   | loop_expression
+                   | vector_index
+                   | matrix_index
+                   | atom
+                   | matrix_of_exprs
+                   | vector_of_exprs
+        """
+        num_components = len(p)
+        if num_components == 2:
+            p[0] = p[1]
+        elif num_components == 3:
+            if p[1] == "-":
+                # expression : -expression
+                p[0] = AstExpression(AstOperator.UMINUS, [p[2]])
+            else:
+                # expression : expression' (matrix transpose)
+                p[0] = AstExpression(AstOperator.TRANSPOSE_SHORT, [p[1]])
+        elif p[1] == "(":
+            # expression : (expression)
+            p[0] = p[2]
+        else:
+            # Binary operator
+            p[0] = AstExpression(AstOperator.get_binary_op(p[2]), [p[1], p[3]])
+
+    def p_loop_expression(self, p):
+        """
+        loop_expression : for_statements loop_func LPAREN expression RPAREN
+        """
+        op_type = AstOperator.LOOP_SUM
+        if p[2] == "product":
+            op_type = AstOperator.LOOP_PRODUCT
+        p[0] = AstExpression(op_type, [p[4]] + p[1])
+
+    def p_for_statements(self, p):
+        """
+        for_statements : for_statement for_statements
+                       | for_statement
+        """
+        if len(p) == 2:
+            p[0] = [p[1]]
+        else:
+            p[0] = [p[1]] + p[2]
+
+    def p_for_statement(self, p):
+        """
+        for_statement : FOR ID IN integer_range
+        """
+        loop_symbol = AstSymbol(
+            p[2],
+            AstExprType(AstExprType.NUMBER, ()),
+            AstSymbolFlag.USED_IN_LOOP
         )
-        operands = [indexed_src, p[3], expr_zero]
-    else:
-        operands = [p[2], p[5], expr_zero]
-    p[0] = AstExpression(AstOperator.INDEXING, operands)
-
-
-def p_matrix_of_exprs(p):
-    """
-    matrix_of_exprs : LSQRBRAC list_vector_of_exprs RSQRBRAC
-    """
-    p[0] = AstExpression(AstOperator.EXPR_COLLECTION, p[2])
-
-
-def p_list_vector_of_exprs(p):
-    """
-    list_vector_of_exprs : vector_of_exprs COMMA list_vector_of_exprs
-                         | vector_of_exprs
-    """
-    if len(p) == 2:
-        p[0] = [p[1].operands]
-    else:
-        p[0] = [p[1].operands] + p[3]
-
-
-def p_vector_of_exprs(p):
-    """
-    vector_of_exprs : LSQRBRAC list_expressions RSQRBRAC
-    """
-    p[0] = AstExpression(AstOperator.EXPR_COLLECTION, p[2])
-
-
-def p_list_expressions(p):
-    """
-    list_expressions : expression COMMA list_expressions
-                     | expression
-    """
-    if len(p) == 2:
-        p[0] = [p[1]]
-    else:
-        p[0] = [p[1]] + p[3]
-
-
-def p_integer_range(p):
-    """
-    integer_range : LSQRBRAC expression COMMA expression RSQRBRAC
-    """
-    p[0] = [p[2], p[4]]
-
-
-def p_integer_class(p):
-    """
-    integer_class : ID
-                  | INTEGER
-    """
-    p[0] = AstSymbol(str(p[1]), AstExprType(AstExprType.NUMBER, ()))
-
-
-def p_atom(p):
-    """
-    atom : ID
-         | DOUBLE
-         | INTEGER
-    """
-    symbol_type = AstExprType(AstExprType.NUMBER, ())
-    if type(p[1]) == str:
-        symbol_type = environment[p[1]]
-    ast_symbol = AstSymbol(str(p[1]), symbol_type)
-    p[0] = AstExpression(AstOperator.SYMBOL, [ast_symbol])
-
-
-def p_integer_and_id(p):
-    """
-    integer_and_id : ID
-                   | INTEGER
-    """
-    p[0] = p[1]
-
-
-def p_math_func(p):
-    """
-    math_func : ABS
-              | SQRT
-              | SIN
-              | COS
-              | TAN
-              | COT
-              | LN
-              | NORM
-              | TRANSPOSE
-    """
-    p[0] = p[1]
-
-
-def p_loop_func(p):
-    """
-    loop_func : SUM
-              | PRODUCT
-    """
-    p[0] = p[1]
-
+        p[0] = AstExpression(
+            AstOperator.RANGE,
+            [AstExpression(AstOperator.SYMBOL, [loop_symbol])] + p[4]
+        )
+        self.for_loop_vars.append(loop_symbol)
+        self.environment[loop_symbol.name] = loop_symbol.type_info
+
+    def p_math_func_call(self, p):
+        """
+        math_func_call : math_func LPAREN expression RPAREN
+        """
+        p[0] = AstExpression(AstOperator.get_func_op(p[1]), [p[3]])
+
+    def p_matrix_index(self, p):
+        """
+        matrix_index : vector_index LSQRBRAC expression RSQRBRAC
+        """
+        operands = [p[1].operands[0], p[1].operands[1], p[3]]
+        p[0] = AstExpression(AstOperator.INDEXING, operands)
+
+    def p_vector_index(self, p):
+        """
+        vector_index : ID LSQRBRAC expression RSQRBRAC
+                     | LPAREN expression RPAREN LSQRBRAC expression RSQRBRAC
+        """
+        operands = []
+        symbol_zero = AstSymbol("0", AstExprType(AstExprType.NUMBER, ()))
+        expr_zero = AstExpression(AstOperator.SYMBOL, [symbol_zero])
+        if len(p) == 5:
+            indexed_src = AstExpression(
+                AstOperator.SYMBOL,
+                [AstSymbol(p[1], self.environment[p[1]])]
+            )
+            operands = [indexed_src, p[3], expr_zero]
+        else:
+            operands = [p[2], p[5], expr_zero]
+        p[0] = AstExpression(AstOperator.INDEXING, operands)
+
+    def p_matrix_of_exprs(self, p):
+        """
+        matrix_of_exprs : LSQRBRAC list_vector_of_exprs RSQRBRAC
+        """
+        p[0] = AstExpression(AstOperator.EXPR_COLLECTION, p[2])
+
+    def p_list_vector_of_exprs(self, p):
+        """
+        list_vector_of_exprs : vector_of_exprs COMMA list_vector_of_exprs
+                             | vector_of_exprs
+        """
+        if len(p) == 2:
+            p[0] = [p[1].operands]
+        else:
+            p[0] = [p[1].operands] + p[3]
+
+    def p_vector_of_exprs(self, p):
+        """
+        vector_of_exprs : LSQRBRAC list_expressions RSQRBRAC
+        """
+        p[0] = AstExpression(AstOperator.EXPR_COLLECTION, p[2])
+
+    def p_list_expressions(self, p):
+        """
+        list_expressions : expression COMMA list_expressions
+                         | expression
+        """
+        if len(p) == 2:
+            p[0] = [p[1]]
+        else:
+            p[0] = [p[1]] + p[3]
+
+    def p_integer_range(self, p):
+        """
+        integer_range : LSQRBRAC expression COMMA expression RSQRBRAC
+        """
+        p[0] = [p[2], p[4]]
+
+    def p_integer_class(self, p):
+        """
+        integer_class : ID
+                      | INTEGER
+        """
+        p[0] = AstSymbol(str(p[1]), AstExprType(AstExprType.NUMBER, ()))
+
+    def p_atom(self, p):
+        """
+        atom : ID
+             | DOUBLE
+             | INTEGER
+        """
+        symbol_type = AstExprType(AstExprType.NUMBER, ())
+        if type(p[1]) == str:
+            symbol_type = self.environment[p[1]]
+        ast_symbol = AstSymbol(str(p[1]), symbol_type)
+        p[0] = AstExpression(AstOperator.SYMBOL, [ast_symbol])
+
+    def p_integer_and_id(self, p):
+        """
+        integer_and_id : ID
+                       | INTEGER
+        """
+        p[0] = p[1]
 
-def p_empty(p):
-    "empty :"
-    p[0] = ""
+    def p_math_func(self, p):
+        """
+        math_func : ABS
+                  | SQRT
+                  | SIN
+                  | COS
+                  | TAN
+                  | COT
+                  | LN
+                  | NORM
+                  | TRANSPOSE
+        """
+        p[0] = p[1]
 
+    def p_loop_func(self, p):
+        """
+        loop_func : SUM
+                  | PRODUCT
+        """
+        p[0] = p[1]
 
-parser = pyyacc.yacc()
+    def p_empty(self, p):
+        "empty :"
+        p[0] = ""
 
 
 def parse(program_text):
-    """ Parses the expression description program
+    """ Parses the expression description program with a new parser, so that
+    no state is shared with other parses
     """
-    return parser.parse(program_text)
+    return ExprParser().parse(program_text)
@@ -0,0 +1,9 @@
+# parsing.lextab.py. This file automatically created by PLY (version 3.4). Don't edit!
+_tabversion   = '3.4'
+_lextokens    = {'COS': 1, 'CONST': 1, 'COT': 1, 'SUM': 1, 'NUMBER': 1, 'COLON': 1, 'RSQRBRAC': 1, 'EXP': 1, 'MUL': 1, 'NODIFF': 1, 'INTEGER': 1, 'SIN': 1, 'DOT': 1, 'RPAREN': 1, 'MATRIX': 1, 'LN': 1, 'EXPR': 1, 'TRANSPOSE': 1, 'MINUS': 1, 'PLUS': 1, 'LSQRBRAC': 1, 'COMMA': 1, 'TAN': 1, 'FOR': 1, 'EQUAL': 1, 'EQUIVALENT': 1, 'CROSS': 1, 'ABS': 1, 'LPAREN': 1, 'IN': 1, 'DIV': 1, 'ID': 1, 'PRODUCT': 1, 'DOUBLE': 1, 'SQRT': 1, 'VECTOR': 1, 'APOSTROPHE': 1, 'MAIN': 1, 'NORM': 1}
+_lexreflags   = 0
+_lexliterals  = ''
+_lexstateinfo = {'INITIAL': 'inclusive'}
+_lexstatere   = {'INITIAL': [("(?P<t_DOUBLE>\\d+((\\.\\d*) | ((\\.\\d*)?(e[\\+-]\\d+))))|(?P<t_INTEGER>\\d+)|(?P<t_ID>[A-Za-z_][A-Za-z_0-9]*)|(?P<t_ignore_WHITESPACES>\\s+)|(?P<t_ignore_BLOCK_COMMENT>/\\*(.|\\n)*?\\*/)|(?P<t_ignore_LINE_COMMENT>//.*)|(?P<t_MUL>\\*)|(?P<t_PLUS>\\+)|(?P<t_LSQRBRAC>\\[)|(?P<t_COLON>\\:)|(?P<t_EXP>\\^)|(?P<t_DOT>\\.)|(?P<t_RSQRBRAC>\\])|(?P<t_LPAREN>\\()|(?P<t_CROSS>\\#)|(?P<t_RPAREN>\\))|(?P<t_MINUS>-)|(?P<t_COMMA>,)|(?P<t_APOSTROPHE>')|(?P<t_EQUAL>=)|(?P<t_DIV>/)", [None, ('t_DOUBLE', 'DOUBLE'), None, None, None, None, None, ('t_INTEGER', 'INTEGER'), ('t_ID', 'ID'), ('t_ignore_WHITESPACES', 'ignore_WHITESPACES'), ('t_ignore_BLOCK_COMMENT', 'ignore_BLOCK_COMMENT'), None, (None, None), (None, 'MUL'), (None, 'PLUS'), (None, 'LSQRBRAC'), (None, 'COLON'), (None, 'EXP'), (None, 'DOT'), (None, 'RSQRBRAC'), (None, 'LPAREN'), (None, 'CROSS'), (None, 'RPAREN'), (None, 'MINUS'), (None, 'COMMA'), (None, 'APOSTROPHE'), (None, 'EQUAL'), (None, 'DIV')])]}
+_lexstateignore = {'INITIAL': ''}
+_lexstateerrorf = {'INITIAL': 't_error'}
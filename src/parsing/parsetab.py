@@ -0,0 +1,96 @@
+
+# parsing/parsetab.py
+# This file is automatically generated. Do not edit.
+_tabversion = '3.2'
+
+_lr_method = 'LALR'
+
+_lr_signature = '\x94\x1f\x93R\xa0%\r\xd1\x1d\x89E$\x7ff\xc5\xa3'
+    
+_lr_action_items = {'COS':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,]),'CONST':([0,2,27,34,38,42,43,44,45,46,47,48,51,60,78,90,91,95,98,99,100,101,102,103,104,109,118,119,122,126,],[1,1,-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,-4,-26,-25,-42,-45,-17,-24,-19,-18,-23,-20,-21,-22,-38,-40,-39,-34,-41,]),'COT':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[26,26,26,26,26,26,26,26,26,26,26,26,26,26,26,26,26,26,26,26,26,26,26,]),'SUM':([36,39,66,114,128,],[-36,69,-35,-37,-48,]),'NUMBER':([0,2,3,5,7,10,12,22,27,34,38,42,43,44,45,46,47,48,51,56,57,60,78,90,91,95,98,99,100,101,102,103,104,108,109,118,119,122,124,126,],[-67,-67,11,-3,-2,-7,11,-10,-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,-4,-8,-9,-26,-25,-42,-45,-17,-24,-19,-18,-23,-20,-21,-22,-11,-38,-40,-39,-34,-12,-41,]),'RSQRBRAC':([27,34,38,42,43,44,45,46,47,48,60,61,62,64,65,78,90,91,95,96,97,98,99,100,101,102,103,104,109,110,111,113,118,119,122,123,126,127,],[-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,-26,-33,90,91,-47,-25,-42,-45,-17,118,119,-24,-19,-18,-23,-20,-21,-22,-38,-43,-44,-46,-40,-39,-34,126,-41,128,]),'EXP':([27,34,38,42,43,44,45,46,47,48,51,60,61,65,71,78,88,90,91,95,96,97,98,99,100,101,102,103,104,105,106,109,116,118,119,121,122,123,126,127,],[-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,77,-26,-33,77,77,-25,77,-42,-45,-17,77,77,-24,77,77,-23,77,77,77,77,77,-38,77,-40,-39,77,-34,77,-41,77,]),'MUL':([27,34,38,42,43,44,45,46,47,48,51,60,61,65,71,78,88,90,91,95,96,97,98,99,100,101,102,103,104,105,106,109,116,118,119,121,122,123,126,127,],[-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,79,-26,-33,79,79,-25,79,-42,-45,-17,79,79,-24,79,79,-23,-20,-21,-22,79,79,-38,79,-40,-39,79,-34,79,-41,79,]),'NODIFF':([21,],[56,]),'SIN':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,]),'COMMA':([27,34,38,42,43,44,45,46,47,48,60,61,65,78,84,85,86,90,91,95,98,99,100,101,102,103,104,109,111,118,119,121,122,126,],[-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,-26,89,92,-25,-55,-54,107,-42,-45,-17,-24,-19,-18,-23,-20,-21,-22,-38,89,-40,-39,125,-34,-41,]),'RPAREN':([27,34,38,42,43,44,45,46,47,48,60,71,78,84,85,87,88,90,91,95,98,99,100,101,102,103,104,109,116,118,119,120,122,126,],[-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,-26,95,-25,-55,-54,108,109,-42,-45,-17,-24,-19,-18,-23,-20,-21,-22,-38,122,-40,-39,124,-34,-41,]),'MATRIX':([0,2,3,5,7,10,12,22,27,34,38,42,43,44,45,46,47,48,51,56,57,60,78,90,91,95,98,99,100,101,102,103,104,108,109,118,119,122,124,126,],[-67,-67,9,-3,-2,-7,9,-10,-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,-4,-8,-9,-26,-25,-42,-45,-17,-24,-19,-18,-23,-20,-21,-22,-11,-38,-40,-39,-34,-12,-41,]),'LN':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[30,30,30,30,30,30,30,30,30,30,30,30,30,30,30,30,30,30,30,30,30,30,30,]),'EXPR':([0,2,3,5,7,8,10,12,14,18,22,23,27,34,38,42,43,44,45,46,47,48,51,56,57,60,78,90,91,95,98,99,100,101,102,103,104,105,106,108,109,118,119,122,124,126,],[-67,-67,-67,-3,-2,17,-7,-67,-6,17,-10,-5,-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,-4,-8,-9,-26,-25,-42,-45,-17,-24,-19,-18,-23,-20,-21,-22,-16,-15,-11,-38,-40,-39,-34,-12,-41,]),'TRANSPOSE':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,]),'MINUS':([15,27,29,33,34,38,41,42,43,44,45,46,47,48,51,59,60,61,63,65,71,72,73,74,75,76,77,78,79,80,81,82,83,88,90,91,92,94,95,96,97,98,99,100,101,102,103,104,105,106,109,112,115,116,117,118,119,121,122,123,125,126,127,],[29,-33,29,29,-53,-30,29,-31,-28,-51,-32,-29,-52,-27,75,29,-26,-33,29,75,75,29,29,29,29,29,29,-25,29,29,29,29,29,75,-42,-45,29,29,-17,75,75,-24,-19,-18,-23,-20,-21,-22,75,75,-38,29,29,75,29,-40,-39,75,-34,75,29,-41,75,]),'COLON':([10,22,108,124,],[21,-10,-11,-12,]),'DOT':([27,34,38,42,43,44,45,46,47,48,51,60,61,65,71,78,88,90,91,95,96,97,98,99,100,101,102,103,104,105,106,109,116,118,119,121,122,123,126,127,],[-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,81,-26,-33,81,81,-25,81,-42,-45,-17,81,81,-24,81,81,-23,-20,-21,-22,81,81,-38,81,-40,-39,81,-34,81,-41,81,]),'LSQRBRAC':([15,29,33,41,44,46,59,63,72,73,74,75,76,77,79,80,81,82,83,89,92,93,94,95,112,115,117,118,125,126,],[33,33,63,33,72,73,33,63,33,33,33,33,33,33,33,33,33,33,33,112,33,115,33,117,33,33,33,-40,33,-41,]),'INTEGER':([15,29,33,41,55,58,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,107,112,115,117,125,],[34,34,34,34,84,84,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,84,34,34,34,34,]),'TAN':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,]),'$end':([0,2,3,4,5,7,8,10,12,14,16,18,19,22,23,27,34,38,42,43,44,45,46,47,48,51,54,56,57,60,78,90,91,95,98,99,100,101,102,103,104,105,106,108,109,118,119,122,124,126,],[-67,-67,-67,0,-3,-2,-67,-7,-67,-6,-1,-67,-14,-10,-5,-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,-4,-13,-8,-9,-26,-25,-42,-45,-17,-24,-19,-18,-23,-20,-21,-22,-16,-15,-11,-38,-40,-39,-34,-12,-41,]),'PLUS':([27,34,38,42,43,44,45,46,47,48,51,60,61,65,71,78,88,90,91,95,96,97,98,99,100,101,102,103,104,105,106,109,116,118,119,121,122,123,126,127,],[-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,76,-26,-33,76,76,-25,76,-42,-45,-17,76,76,-24,-19,-18,-23,-20,-21,-22,76,76,-38,76,-40,-39,76,-34,76,-41,76,]),'FOR':([15,29,33,36,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,114,115,117,125,128,],[37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,-37,37,37,37,-48,]),'EQUIVALENT':([21,],[57,]),'EQUAL':([6,52,53,],[15,82,83,]),'ABS':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,]),'LPAREN':([15,20,24,25,26,28,29,30,31,32,33,35,40,41,49,50,59,63,68,69,70,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[41,55,58,-59,-61,59,41,-62,-64,-58,41,-60,-56,41,-57,-63,41,41,-66,-65,94,41,41,41,41,41,41,41,41,41,41,41,41,41,41,41,41,41,]),'IN':([67,],[93,]),'DIV':([27,34,38,42,43,44,45,46,47,48,51,60,61,65,71,78,88,90,91,95,96,97,98,99,100,101,102,103,104,105,106,109,116,118,119,121,122,123,126,127,],[-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,80,-26,-33,80,80,-25,80,-42,-45,-17,80,80,-24,80,80,-23,-20,-21,-22,80,80,-38,80,-40,-39,80,-34,80,-41,80,]),'ID':([1,9,11,13,15,17,29,33,37,41,55,58,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,107,112,115,117,125,],[6,20,22,24,44,53,44,44,67,44,85,85,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,85,44,44,44,44,]),'PRODUCT':([36,39,66,114,128,],[-36,68,-35,-37,-48,]),'CROSS':([27,34,38,42,43,44,45,46,47,48,51,60,61,65,71,78,88,90,91,95,96,97,98,99,100,101,102,103,104,105,106,109,116,118,119,121,122,123,126,127,],[-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,74,-26,-33,74,74,-25,74,-42,-45,-17,74,74,-24,74,74,-23,74,74,74,74,74,-38,74,-40,-39,74,-34,74,-41,74,]),'DOUBLE':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,]),'SQRT':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,]),'VECTOR':([0,2,3,5,7,10,12,22,27,34,38,42,43,44,45,46,47,48,51,56,57,60,78,90,91,95,98,99,100,101,102,103,104,108,109,118,119,122,124,126,],[-67,-67,13,-3,-2,-7,13,-10,-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,-4,-8,-9,-26,-25,-42,-45,-17,-24,-19,-18,-23,-20,-21,-22,-11,-38,-40,-39,-34,-12,-41,]),'APOSTROPHE':([27,34,38,42,43,44,45,46,47,48,51,60,61,65,71,78,88,90,91,95,96,97,98,99,100,101,102,103,104,105,106,109,116,118,119,121,122,123,126,127,],[-33,-53,-30,-31,-28,-51,-32,-29,-52,-27,78,-26,-33,78,78,-25,78,-42,-45,-17,78,78,78,78,78,78,78,78,78,78,78,-38,78,-40,-39,78,-34,78,-41,78,]),'MAIN':([17,],[52,]),'NORM':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,]),}
+
+_lr_action = { }
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = { }
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'list_const_declarations':([0,2,],[3,7,]),'vector_of_exprs':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,89,92,94,112,115,117,125,],[27,27,61,27,27,61,27,27,27,27,27,27,27,27,27,27,27,111,27,27,27,27,27,27,]),'math_func':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,]),'integer_and_id':([55,58,107,],[86,87,120,]),'list_expr_declarations':([8,18,],[16,54,]),'list_var_declarations':([3,12,],[8,23,]),'list_vector_of_exprs':([33,63,89,],[62,62,110,]),'var_declaration':([3,12,],[12,12,]),'empty':([0,2,3,8,12,18,],[5,5,14,19,14,19,]),'integer_range':([93,],[114,]),'for_statement':([15,29,33,36,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,]),'basic_var_declaration':([3,12,],[10,10,]),'matrix_index':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,]),'for_statements':([15,29,33,36,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[39,39,39,66,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,39,]),'const_declaration':([0,2,],[2,2,]),'file_description':([0,],[4,]),'atom':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,]),'loop_expression':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,]),'loop_func':([39,],[70,]),'matrix_of_exprs':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,]),'vector_index':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,]),'math_func_call':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,]),'expr_declaration':([8,18,],[18,18,]),'list_expressions':([33,63,92,112,],[64,64,113,64,]),'expression':([15,29,33,41,59,63,72,73,74,75,76,77,79,80,81,82,83,92,94,112,115,117,125,],[51,60,65,71,88,65,96,97,98,99,100,101,102,103,104,105,106,65,116,65,121,123,127,]),}
+
+_lr_goto = { }
+for _k, _v in _lr_goto_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = { }
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> file_description","S'",1,None,None,None),
+  ('file_description -> list_const_declarations list_var_declarations list_expr_declarations','file_description',3,'p_file_description','parsing/expryacc.py',84),
+  ('list_const_declarations -> const_declaration list_const_declarations','list_const_declarations',2,'p_list_const_declarations','parsing/expryacc.py',91),
+  ('list_const_declarations -> empty','list_const_declarations',1,'p_list_const_declarations','parsing/expryacc.py',92),
+  ('const_declaration -> CONST ID EQUAL expression','const_declaration',4,'p_const_declaration','parsing/expryacc.py',101),
+  ('list_var_declarations -> var_declaration list_var_declarations','list_var_declarations',2,'p_list_var_declarations','parsing/expryacc.py',108),
+  ('list_var_declarations -> empty','list_var_declarations',1,'p_list_var_declarations','parsing/expryacc.py',109),
+  ('var_declaration -> basic_var_declaration','var_declaration',1,'p_var_declaration','parsing/expryacc.py',118),
+  ('var_declaration -> basic_var_declaration COLON NODIFF','var_declaration',3,'p_var_declaration','parsing/expryacc.py',119),
+  ('var_declaration -> basic_var_declaration COLON EQUIVALENT','var_declaration',3,'p_var_declaration','parsing/expryacc.py',120),
+  ('basic_var_declaration -> NUMBER ID','basic_var_declaration',2,'p_basic_var_declaration','parsing/expryacc.py',132),
+  ('basic_var_declaration -> VECTOR ID LPAREN integer_and_id RPAREN','basic_var_declaration',5,'p_basic_var_declaration','parsing/expryacc.py',133),
+  ('basic_var_declaration -> MATRIX ID LPAREN integer_and_id COMMA integer_and_id RPAREN','basic_var_declaration',7,'p_basic_var_declaration','parsing/expryacc.py',134),
+  ('list_expr_declarations -> expr_declaration list_expr_declarations','list_expr_declarations',2,'p_list_expr_declarations','parsing/expryacc.py',146),
+  ('list_expr_declarations -> empty','list_expr_declarations',1,'p_list_expr_declarations','parsing/expryacc.py',147),
+  ('expr_declaration -> EXPR ID EQUAL expression','expr_declaration',4,'p_expr_declaration','parsing/expryacc.py',156),
+  ('expr_declaration -> EXPR MAIN EQUAL expression','expr_declaration',4,'p_expr_declaration','parsing/expryacc.py',157),
+  ('expression -> LPAREN expression RPAREN','expression',3,'p_expression','parsing/expryacc.py',164),
+  ('expression -> expression PLUS expression','expression',3,'p_expression','parsing/expryacc.py',165),
+  ('expression -> expression MINUS expression','expression',3,'p_expression','parsing/expryacc.py',166),
+  ('expression -> expression MUL expression','expression',3,'p_expression','parsing/expryacc.py',167),
+  ('expression -> expression DIV expression','expression',3,'p_expression','parsing/expryacc.py',168),
+  ('expression -> expression DOT expression','expression',3,'p_expression','parsing/expryacc.py',169),
+  ('expression -> expression EXP expression','expression',3,'p_expression','parsing/expryacc.py',170),
+  ('expression -> expression CROSS expression','expression',3,'p_expression','parsing/expryacc.py',171),
+  ('expression -> expression APOSTROPHE','expression',2,'p_expression','parsing/expryacc.py',172),
+  ('expression -> MINUS expression','expression',2,'p_expression','parsing/expryacc.py',173),
+  ('expression -> math_func_call','expression',1,'p_expression','parsing/expryacc.py',174),
+  ('expression -> loop_expression','expression',1,'p_expression','parsing/expryacc.py',175),
+  ('expression -> vector_index','expression',1,'p_expression','parsing/expryacc.py',176),
+  ('expression -> matrix_index','expression',1,'p_expression','parsing/expryacc.py',177),
+  ('expression -> atom','expression',1,'p_expression','parsing/expryacc.py',178),
+  ('expression -> matrix_of_exprs','expression',1,'p_expression','parsing/expryacc.py',179),
+  ('expression -> vector_of_exprs','expression',1,'p_expression','parsing/expryacc.py',180),
+  ('loop_expression -> for_statements loop_func LPAREN expression RPAREN','loop_expression',5,'p_loop_expression','parsing/expryacc.py',201),
+  ('for_statements -> for_statement for_statements','for_statements',2,'p_for_statements','parsing/expryacc.py',210),
+  ('for_statements -> for_statement','for_statements',1,'p_for_statements','parsing/expryacc.py',211),
+  ('for_statement -> FOR ID IN integer_range','for_statement',4,'p_for_statement','parsing/expryacc.py',220),
+  ('math_func_call -> math_func LPAREN expression RPAREN','math_func_call',4,'p_math_func_call','parsing/expryacc.py',236),
+  ('matrix_index -> vector_index LSQRBRAC expression RSQRBRAC','matrix_index',4,'p_matrix_index','parsing/expryacc.py',242),
+  ('vector_index -> ID LSQRBRAC expression RSQRBRAC','vector_index',4,'p_vector_index','parsing/expryacc.py',249),
+  ('vector_index -> LPAREN expression RPAREN LSQRBRAC expression RSQRBRAC','vector_index',6,'p_vector_index','parsing/expryacc.py',250),
+  ('matrix_of_exprs -> LSQRBRAC list_vector_of_exprs RSQRBRAC','matrix_of_exprs',3,'p_matrix_of_exprs','parsing/expryacc.py',267),
+  ('list_vector_of_exprs -> vector_of_exprs COMMA list_vector_of_exprs','list_vector_of_exprs',3,'p_list_vector_of_exprs','parsing/expryacc.py',273),
+  ('list_vector_of_exprs -> vector_of_exprs','list_vector_of_exprs',1,'p_list_vector_of_exprs','parsing/expryacc.py',274),
+  ('vector_of_exprs -> LSQRBRAC list_expressions RSQRBRAC','vector_of_exprs',3,'p_vector_of_exprs','parsing/expryacc.py',283),
+  ('list_expressions -> expression COMMA list_expressions','list_expressions',3,'p_list_expressions','parsing/expryacc.py',289),
+  ('list_expressions -> expression','list_expressions',1,'p_list_expressions','parsing/expryacc.py',290),
+  ('integer_range -> LSQRBRAC expression COMMA expression RSQRBRAC','integer_range',5,'p_integer_range','parsing/expryacc.py',299),
+  ('integer_class -> ID','integer_class',1,'p_integer_class','parsing/expryacc.py',305),
+  ('integer_class -> INTEGER','integer_class',1,'p_integer_class','parsing/expryacc.py',306),
+  ('atom -> ID','atom',1,'p_atom','parsing/expryacc.py',312),
+  ('atom -> DOUBLE','atom',1,'p_atom','parsing/expryacc.py',313),
+  ('atom -> INTEGER','atom',1,'p_atom','parsing/expryacc.py',314),
+  ('integer_and_id -> ID','integer_and_id',1,'p_integer_and_id','parsing/expryacc.py',324),
+  ('integer_and_id -> INTEGER','integer_and_id',1,'p_integer_and_id','parsing/expryacc.py',325),
+  ('math_func -> ABS','math_func',1,'p_math_func','parsing/expryacc.py',331),
+  ('math_func -> SQRT','math_func',1,'p_math_func','parsing/expryacc.py',332),
+  ('math_func -> SIN','math_func',1,'p_math_func','parsing/expryacc.py',333),
+  ('math_func -> COS','math_func',1,'p_math_func','parsing/expryacc.py',334),
+  ('math_func -> TAN','math_func',1,'p_math_func','parsing/expryacc.py',335),
+  ('math_func -> COT','math_func',1,'p_math_func','parsing/expryacc.py',336),
+  ('math_func -> LN','math_func',1,'p_math_func','parsing/expryacc.py',337),
+  ('math_func -> NORM','math_func',1,'p_math_func','parsing/expryacc.py',338),
+  ('math_func -> TRANSPOSE','math_func',1,'p_math_func','parsing/expryacc.py',339),
+  ('loop_func -> SUM','loop_func',1,'p_loop_func','parsing/expryacc.py',345),
+  ('loop_func -> PRODUCT','loop_func',1,'p_loop_func','parsing/expryacc.py',346),
+  ('empty -> <empty>','empty',0,'p_empty','parsing/expryacc.py',351),
+]
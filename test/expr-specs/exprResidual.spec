@@ -0,0 +1,26 @@
+/**
+ * Vector-valued expression
+ *
+ * This example is the same as the sub-expression example, except that the
+ * main expression is the residual vector between the rotated image of point p
+ * and the point imgP, instead of the squared error. The generated jacobian
+ * method returns a 3 x 13 Jacobian matrix
+ */
+
+vector q(4)                  // Assume this is a unit quaternion (x, y, z, w)
+
+vector p(3) : nodiff         // Sample point (x, y, z)
+vector imgP(3) : nodiff      // Transformed image point (x, y, z)
+
+matrix T(3, 3)
+
+expr rotationMatrix =
+  [[1.0 - 2 * (q[1] ^ 2 + q[2] ^ 2), 2 * (q[0] * q[1] - q[2] * q[3]), 2 * (q[0] * q[2] + q[1] * q[3])],
+   [2 * (q[0] * q[1] + q[2] * q[3]), 1.0 - 2 * (q[0] ^ 2 + q[2] ^ 2), 2 * (q[1] * q[2] - q[0] * q[3])],
+   [2 * (q[0] * q[2] - q[1] * q[3]), 2 * (q[1] * q[2] + q[0] * q[3]), 1.0 - 2 * (q[0] ^ 2 + q[1] ^ 2)]]
+
+expr rotatedPoint = rotationMatrix * T * p
+
+// Residual vector between the rotated image of p by quaternion q and the
+// point imgP
+expr main = rotatedPoint - imgP
@@ -0,0 +1,16 @@
+/*******************
+ * Expression mixing math functions, loops and sub-expressions, which is
+ * smooth for positive variables (see test/numpy_derivative_check.py)
+ *******************/
+
+number s
+vector v(3)
+matrix A(2, 3)
+vector w(2): nodiff     // Weights of the rows of A * v
+
+expr u = A * v
+expr main =
+  ln(s + norm(u)) * sin(v[0] * v[1]) +
+  cos(s) * (w . u) / (1 + v . v) +
+  (for i in [0, 2] sum(sqrt(v[i] + s) * A[1][i])) +
+  tan(v[2] / 4) - cot(s + 1)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+"""
+The script checks the derivatives computed by the NumPy code generated for
+expression specifications. Each specification is compiled with
+codegen.compile_spec in the dense, packed, coo and csr Hessian formats and in
+the flat parameter layout, and the Jacobian vectors and Hessian matrices are
+compared with central finite differences (of eval for the Jacobian vectors,
+and of the dense jacobian for the Hessian matrices) at random points. The
+variables take values in [0.5, 1.5], so that the default specifications are
+smooth at the points. The script exits with status 1 if a check fails.
+
+Example:
+    python test/numpy_derivative_check.py --points 8 \
+        test/expr-specs/exprSmoothFuncs.spec
+"""
+
+import argparse
+import inspect
+import os.path as ospath
+import sys
+
+import numpy
+
+SRC_DIR = ospath.abspath(ospath.join(ospath.dirname(__file__), "../src"))
+SPEC_DIR = ospath.abspath(ospath.join(ospath.dirname(__file__), "expr-specs"))
+DEFAULT_SPEC_NAMES = [
+    "exprConstDecl", "exprCrossProduct", "exprIndexing", "exprLoop",
+    "exprMatrix", "exprMatrix1x1", "exprMatrixExprs", "exprQuaternion",
+    "exprSmoothFuncs", "exprSubExprs", "exprVectorExprs"]
+DEFAULT_NUM_POINTS = 4
+DEFAULT_TOLERANCE = 1e-5
+FINITE_DIFF_STEP = 1e-6
+
+# Configurations of the checked modules, as pairs (name, config)
+LAYOUT_CONFIG_LIST = [
+    ("dense", {"hessianformat": "dense"}),
+    ("packed", {"hessianformat": "packed"}),
+    ("coo", {"hessianformat": "coo"}),
+    ("csr", {"hessianformat": "csr"}),
+    ("flat", {"paramlayout": "flat"})]
+
+
+def get_random_values(var_list, num_points, random_state):
+    """ Gets random values of the variables at a number of points
+
+    Args:
+        var_list : A list of Variable objects
+        num_points : A positive integer indicating the number of points
+        random_state : A numpy.random.RandomState object
+
+    Returns:
+        value_dict : A dictionary that maps a variable name to a NumPy array
+                     whose leading axis is over the points. It is None if a
+                     variable has a dimension which is not an integer
+    """
+    value_dict = {}
+    for var in var_list:
+        if not all(getattr(dim_size, "is_Integer", True)
+                   for dim_size in var.dimension):
+            return None
+        shape = (num_points,) + tuple(int(size) for size in var.dimension)
+        value_dict[var.name] = random_state.uniform(0.5, 1.5, shape)
+    return value_dict
+
+
+def get_flat_values(value_dict, diff_var_list):
+    """ Gets the values of the differentiation variables packed into a flat
+    array, in the order of the Jacobian vector
+
+    Args:
+        value_dict : A dictionary as returned by get_random_values
+        diff_var_list : A list of Variable objects which are the
+                        differentiation variables
+
+    Returns:
+        flat_values : A NumPy array of shape (N, n)
+    """
+    return numpy.hstack([
+        value_dict[var.name].reshape(len(value_dict[var.name]), -1)
+        for var in diff_var_list])
+
+
+def get_args(func, value_dict, diff_var_list, flat_values):
+    """ Gets the arguments of a generated function, given the values of the
+    variables and of the differentiation variables packed in a flat array
+
+    Args:
+        func : A generated function
+        value_dict : A dictionary as returned by get_random_values
+        diff_var_list : A list of Variable objects which are the
+                        differentiation variables
+        flat_values : A NumPy array of shape (N, n)
+
+    Returns:
+        arg_list : A list of NumPy arrays
+    """
+    arg_dict = dict(value_dict)
+    offset = 0
+    for var in diff_var_list:
+        shape = value_dict[var.name].shape
+        size = value_dict[var.name][0].size
+        arg_dict[var.name] = flat_values[:, offset:offset + size].reshape(
+            shape)
+        offset += size
+    # The only parameter which is not a variable is the flat array
+    return [arg_dict.get(name, flat_values)
+            for name in inspect.getargspec(func).args if name != "out"]
+
+
+def get_dense_hessian(module, layout_name, hessian_values, num_diff_var):
+    """ Gets the dense Hessian matrices from the values computed by the
+    hessian function of a module
+
+    Args:
+        module : A module returned by codegen.compile_spec
+        layout_name : A string which is one of the names of
+                      LAYOUT_CONFIG_LIST
+        hessian_values : A NumPy array returned by the hessian function
+        num_diff_var : An integer which is the size of the Jacobian vector
+
+    Returns:
+        dense_hessian : A NumPy array of shape (N, n, n)
+    """
+    if layout_name in ["dense", "flat"]:
+        return hessian_values
+    dense_hessian = numpy.zeros(
+        (len(hessian_values), num_diff_var, num_diff_var))
+    if layout_name == "packed":
+        for i in xrange(num_diff_var):
+            for j in xrange(num_diff_var):
+                dense_hessian[:, i, j] = hessian_values[
+                    :, module.hessianIndex(i, j)]
+        return dense_hessian
+    (first_index, second_index) = module.hessianSparsity()
+    if layout_name == "csr":
+        row_index = numpy.repeat(
+            numpy.arange(num_diff_var), numpy.diff(first_index))
+    else:
+        row_index = first_index
+    dense_hessian[:, row_index, second_index] = hessian_values
+    dense_hessian[:, second_index, row_index] = hessian_values
+    return dense_hessian
+
+
+def get_max_error(actual, expected):
+    """ Gets the largest error of an array, relative to the magnitude of the
+    expected values (or absolute for values smaller than 1)
+
+    Args:
+        actual : A NumPy array
+        expected : A NumPy array of the same shape
+
+    Returns:
+        max_error : A float
+    """
+    if actual.size == 0:
+        return 0.0
+    return float(numpy.max(
+        numpy.abs(actual - expected) / (1.0 + numpy.abs(expected))))
+
+
+def check_spec(spec_path, num_points, config):
+    """ Checks the derivatives computed by the modules compiled from an
+    expression specification in all the layouts
+
+    Args:
+        spec_path : A string which is the path of the specification file
+        num_points : A positive integer indicating the number of points
+        config : A dictionary of configuration parameters given to
+                 codegen.compile_spec in every layout
+
+    Returns:
+        result_list : A list of pairs (layout name, max error). It is None if
+                      the specification is skipped since its variables do
+                      not have integer dimensions
+    """
+    import codegen
+    import parsing.exprparser as exprparser
+    from common.sympyutils import SimplifyLevel
+
+    with open(spec_path, "r") as spec_file:
+        spec_text = spec_file.read()
+    var_list, diff_var_list, _, _ = exprparser.parse_expr_specification(
+        spec_text, SimplifyLevel.NONE)
+    value_dict = get_random_values(
+        var_list, num_points, numpy.random.RandomState(0))
+    if value_dict is None:
+        return None
+    flat_values = get_flat_values(value_dict, diff_var_list)
+    num_diff_var = flat_values.shape[1]
+
+    def get_layout_module(layout_config):
+        """ Compiles the specification in a layout """
+        layout_config = dict(layout_config)
+        layout_config.update(config)
+        return codegen.compile_spec(spec_text, layout_config)
+
+    def call(func, values):
+        """ Calls a generated function at the points """
+        return func(*get_args(func, value_dict, diff_var_list, values))
+
+    # The finite differences are computed with the dense module
+    dense_module = get_layout_module(LAYOUT_CONFIG_LIST[0][1])
+    fd_jacobian = numpy.zeros((num_points, num_diff_var))
+    fd_hessian = numpy.zeros((num_points, num_diff_var, num_diff_var))
+    for k in xrange(num_diff_var):
+        step = numpy.zeros(num_diff_var)
+        step[k] = FINITE_DIFF_STEP
+        fd_jacobian[:, k] = (
+            call(dense_module.eval, flat_values + step) -
+            call(dense_module.eval, flat_values - step)) / (
+                2 * FINITE_DIFF_STEP)
+        fd_hessian[:, :, k] = (
+            call(dense_module.jacobian, flat_values + step) -
+            call(dense_module.jacobian, flat_values - step)) / (
+                2 * FINITE_DIFF_STEP)
+
+    result_list = []
+    for (layout_name, layout_config) in LAYOUT_CONFIG_LIST:
+        module = get_layout_module(layout_config)
+        jacobian = call(module.jacobian, flat_values)
+        hessian = get_dense_hessian(
+            module, layout_name, call(module.hessian, flat_values),
+            num_diff_var)
+        result_list.append((layout_name, max(
+            get_max_error(jacobian, fd_jacobian),
+            get_max_error(hessian, fd_hessian))))
+    return result_list
+
+
+def main():
+    """ Main function that runs the checks and prints the largest error of
+    each specification in each layout
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Checks the derivatives computed by the generated NumPy "
+                    "code against finite differences")
+    arg_parser.add_argument(
+        "--points", "-p",
+        type=int,
+        default=DEFAULT_NUM_POINTS,
+        help="The number of random points of each check"
+    )
+    arg_parser.add_argument(
+        "--tolerance", "-t",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="The largest allowed error, relative to the magnitude of the "
+             "finite differences"
+    )
+    arg_parser.add_argument(
+        "--simplify",
+        type=str,
+        default="cheap",
+        help="The simplification level of the declared expressions"
+    )
+    arg_parser.add_argument(
+        "specfiles", type=str, nargs="*",
+        default=[ospath.join(SPEC_DIR, name + ".spec")
+                 for name in DEFAULT_SPEC_NAMES],
+        help="The expression specification files to check"
+    )
+    args = arg_parser.parse_args()
+
+    sys.path.insert(0, SRC_DIR)
+    num_failures = 0
+    print "%-20s %s" % ("spec", " ".join(
+        "%10s" % layout_name for (layout_name, _) in LAYOUT_CONFIG_LIST))
+    for spec_path in args.specfiles:
+        spec_name = ospath.splitext(ospath.basename(spec_path))[0]
+        result_list = check_spec(
+            spec_path, args.points, {"simplify": args.simplify})
+        if result_list is None:
+            print "%-20s skipped (variables of variable size)" % spec_name
+            continue
+        error_list = []
+        for (_, max_error) in result_list:
+            failed = not max_error <= args.tolerance
+            num_failures += failed
+            error_list.append("%9.1e%s" % (max_error, "!" if failed else " "))
+        print "%-20s %s" % (spec_name, " ".join(error_list))
+    if num_failures:
+        print "%d checks failed (marked by !)" % num_failures
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
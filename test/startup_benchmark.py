@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+The script measures the wall time of running the code generation program from
+the command line, to keep track of its start-up cost. Each command is run a
+number of times in a new process from a temporary working directory, and the
+minimum, median and maximum wall times are reported.
+
+Example:
+    python test/startup_benchmark.py --runs 10 test/expr-specs/exprSimple.spec
+"""
+
+import argparse
+import os.path as ospath
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+CODEGEN_PATH = ospath.abspath(ospath.join(
+    ospath.dirname(__file__), "../src/codegen.py"))
+DEFAULT_SPEC_PATH = ospath.abspath(ospath.join(
+    ospath.dirname(__file__), "expr-specs/exprSimple.spec"))
+DEFAULT_NUM_RUNS = 5
+
+
+def time_command(command, num_runs, work_dir):
+    """ Runs a command several times and measures the wall time of each run
+
+    Args:
+        command : A list of strings which are the command and its arguments
+        num_runs : A positive integer indicating the number of runs
+        work_dir : A string which is the working directory of the command
+
+    Returns:
+        run_times : A sorted list of wall times (in seconds) of the runs
+    Raises:
+        subprocess.CalledProcessError : An error if a run of the command
+                                        fails
+    """
+    run_times = []
+    with open(ospath.join(work_dir, "output.log"), "w") as log_file:
+        for _ in xrange(num_runs):
+            start_time = time.time()
+            subprocess.check_call(
+                command, cwd=work_dir, stdout=log_file, stderr=log_file)
+            run_times.append(time.time() - start_time)
+    return sorted(run_times)
+
+
+def main():
+    """ Main function that runs the benchmark and prints the wall times
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Measures the start-up cost of the code generation "
+                    "program")
+    arg_parser.add_argument(
+        "--runs", "-r",
+        type=int,
+        default=DEFAULT_NUM_RUNS,
+        help="The number of runs of each command"
+    )
+    arg_parser.add_argument(
+        "specfile", type=str, nargs="?", default=DEFAULT_SPEC_PATH,
+        help="The expression specification file given to the program"
+    )
+    args = arg_parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        commands = [
+            ("help", [sys.executable, CODEGEN_PATH, "--help"]),
+            ("codegen", [sys.executable, CODEGEN_PATH, "-d", work_dir,
+                         ospath.abspath(args.specfile)])
+        ]
+        print "%-10s %10s %10s %10s" % ("command", "min", "median", "max")
+        for (name, command) in commands:
+            run_times = time_command(command, args.runs, work_dir)
+            print "%-10s %9.3fs %9.3fs %9.3fs" % (
+                name, run_times[0], run_times[len(run_times) // 2],
+                run_times[-1])
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()